@@ -0,0 +1,241 @@
+"""
+Evaluación adaptativa del grid (quadtree)
+
+En lugar de evaluar el modelo en todos los píxeles del grid uniforme, se parte
+de una malla gruesa (paso base_step) y se subdividen recursivamente solo las
+celdas donde:
+
+    - el rango del mejor RSRP entre sus esquinas supera tolerance_db
+      (gradiente fuerte: cerca de antenas, bordes de sombra)
+    - cambia el best server entre esquinas (bordes de celda)
+    - algún umbral de cobertura queda entre el mínimo y el máximo
+      (contornos de -110/-100/-90 dBm)
+    - contienen un punto forzado (ubicación de una antena)
+
+Las celdas hoja se rellenan por interpolación bilineal desde sus esquinas,
+capa por capa. El resultado se rasteriza a la resolución de salida, de modo
+que el resto del pipeline (render, agregación, exportación) no cambia.
+
+La función de evaluación debe ser puntual: el valor de un píxel no puede
+depender de qué otros píxeles se evalúan en la misma llamada.
+"""
+
+import logging
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class AdaptiveGridEvaluator:
+    """Refinamiento quadtree sobre un grid raster (índices fila/columna)"""
+
+    def __init__(self, shape: Tuple[int, int], base_step: int = 8,
+                 tolerance_db: float = 3.0,
+                 thresholds: Iterable[float] = (-110.0, -100.0, -90.0),
+                 force_points: Optional[Sequence[Tuple[int, int]]] = None):
+        """
+        Args:
+            shape: Forma (filas, columnas) del grid de salida
+            base_step: Separación en píxeles de la malla inicial
+            tolerance_db: Rango máximo de RSRP (dB) admitido dentro de una celda hoja
+            thresholds: Umbrales de cobertura [dBm] cuyos cruces fuerzan subdivisión
+            force_points: Índices (fila, columna) cuyas celdas se refinan siempre
+        """
+        self.shape = (int(shape[0]), int(shape[1]))
+        self.base_step = max(int(base_step), 1)
+        self.tolerance_db = float(tolerance_db)
+        self.thresholds = np.asarray(sorted(thresholds), dtype=np.float64)
+        self.force_points = np.asarray(force_points or [], dtype=np.int64).reshape(-1, 2)
+        self.logger = logging.getLogger("AdaptiveGridEvaluator")
+
+    def run(self, evaluate: Callable[[np.ndarray, np.ndarray], Dict[str, np.ndarray]]) -> Dict:
+        """
+        Ejecuta el refinamiento.
+
+        Args:
+            evaluate: Función (rows, cols) -> dict nombre -> array (A, n), con
+                      A capas (antenas) evaluadas en los n puntos. Debe incluir
+                      'rsrp'; las demás capas se interpolan igual.
+
+        Returns:
+            Dict con:
+            - 'layers': dict nombre -> array float64 (A, filas, columnas)
+            - 'evaluated': máscara bool de píxeles evaluados con el modelo
+            - 'n_evaluated': número de puntos evaluados
+            - 'n_leaves': número de celdas hoja
+        """
+        n_rows, n_cols = self.shape
+        self._evaluate = evaluate
+        self._layers = None
+        self._evaluated = np.zeros(self.shape, dtype=bool)
+        self._best = np.full(self.shape, -np.inf)
+        self._best_index = np.full(self.shape, -1, dtype=np.int32)
+
+        rows0 = self._lattice(n_rows)
+        cols0 = self._lattice(n_cols)
+        rr, cc = np.meshgrid(rows0, cols0, indexing='ij')
+        self._evaluate_nodes(rr.ravel(), cc.ravel())
+
+        # Celdas iniciales: (r0, r1, c0, c1) con esquinas en la malla gruesa
+        r0, c0 = np.meshgrid(rows0[:-1], cols0[:-1], indexing='ij')
+        r1, c1 = np.meshgrid(rows0[1:], cols0[1:], indexing='ij')
+        cells = np.stack([r0.ravel(), r1.ravel(), c0.ravel(), c1.ravel()], axis=1)
+        if n_rows == 1 or n_cols == 1:
+            cells = np.empty((0, 4), dtype=np.int64)
+
+        leaves = []
+        level = 0
+        while len(cells):
+            refine = self._needs_refinement(cells)
+            leaves.append(cells[~refine])
+            cells = self._split(cells[refine])
+            if len(cells):
+                self._evaluate_nodes(
+                    np.concatenate([cells[:, 0], cells[:, 0], cells[:, 1], cells[:, 1]]),
+                    np.concatenate([cells[:, 2], cells[:, 3], cells[:, 2], cells[:, 3]])
+                )
+            level += 1
+
+        leaves = np.concatenate(leaves) if leaves else np.empty((0, 4), dtype=np.int64)
+        self._fill_leaves(leaves)
+
+        n_evaluated = int(self._evaluated.sum())
+        self.logger.info(
+            f"Adaptive grid: {n_evaluated}/{n_rows * n_cols} points evaluated "
+            f"({100.0 * n_evaluated / max(n_rows * n_cols, 1):.1f}%), "
+            f"{len(leaves)} leaves, {level} levels"
+        )
+
+        return {
+            'layers': self._layers,
+            'evaluated': self._evaluated,
+            'n_evaluated': n_evaluated,
+            'n_leaves': int(len(leaves)),
+        }
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _lattice(self, n: int) -> np.ndarray:
+        """Índices de la malla inicial incluyendo siempre el último píxel"""
+        return np.unique(np.append(np.arange(0, n, self.base_step), n - 1))
+
+    def _evaluate_nodes(self, rows: np.ndarray, cols: np.ndarray):
+        """Evalúa los nodos aún no conocidos y actualiza best/best_index"""
+        flat = np.unique(rows * self.shape[1] + cols)
+        flat = flat[~self._evaluated.ravel()[flat]]
+        if flat.size == 0:
+            return
+        rows, cols = np.divmod(flat, self.shape[1])
+
+        values = self._evaluate(rows, cols)
+        if self._layers is None:
+            n_layers = np.asarray(values['rsrp']).shape[0]
+            self._layers = {
+                name: np.full((n_layers,) + self.shape, np.nan)
+                for name in values
+            }
+        for name, arr in values.items():
+            arr = np.asarray(arr, dtype=np.float64)
+            self._layers[name][:, rows, cols] = np.broadcast_to(
+                arr, (self._layers[name].shape[0], rows.size)
+            )
+
+        rsrp = np.where(np.isnan(values['rsrp']), -np.inf, values['rsrp'])
+        self._best[rows, cols] = rsrp.max(axis=0)
+        self._best_index[rows, cols] = rsrp.argmax(axis=0)
+        self._evaluated[rows, cols] = True
+
+    def _needs_refinement(self, cells: np.ndarray) -> np.ndarray:
+        """Criterios de subdivisión evaluados en las 4 esquinas de cada celda"""
+        r0, r1, c0, c1 = cells.T
+        corner_best = np.stack([
+            self._best[r0, c0], self._best[r0, c1],
+            self._best[r1, c0], self._best[r1, c1]
+        ])
+        corner_index = np.stack([
+            self._best_index[r0, c0], self._best_index[r0, c1],
+            self._best_index[r1, c0], self._best_index[r1, c1]
+        ])
+
+        with np.errstate(invalid='ignore'):
+            lo = corner_best.min(axis=0)
+            hi = corner_best.max(axis=0)
+            refine = (hi - lo) > self.tolerance_db
+            # Transición señal / sin señal
+            refine |= np.isfinite(hi) & ~np.isfinite(lo)
+        refine |= (corner_index != corner_index[0]).any(axis=0)
+
+        if self.thresholds.size:
+            # Cruce de umbral: algún T con lo < T <= hi
+            first_above_lo = np.searchsorted(self.thresholds, lo, side='right')
+            first_above_hi = np.searchsorted(self.thresholds, hi, side='right')
+            refine |= first_above_hi > first_above_lo
+
+        for row, col in self.force_points:
+            refine |= (r0 <= row) & (row <= r1) & (c0 <= col) & (col <= c1)
+
+        # Celdas sin píxeles interiores no se pueden subdividir
+        refine &= ((r1 - r0) > 1) | ((c1 - c0) > 1)
+        return refine
+
+    @staticmethod
+    def _split(cells: np.ndarray) -> np.ndarray:
+        """Divide celdas en 2 o 4 hijas (solo en los ejes con píxeles interiores)"""
+        if len(cells) == 0:
+            return cells
+        r0, r1, c0, c1 = cells.T
+        rm = (r0 + r1) // 2
+        cm = (c0 + c1) // 2
+        split_r = (r1 - r0) > 1
+        split_c = (c1 - c0) > 1
+
+        children = []
+        for row_half in (0, 1):
+            for col_half in (0, 1):
+                keep = np.ones(len(cells), dtype=bool)
+                if row_half:
+                    keep &= split_r
+                if col_half:
+                    keep &= split_c
+                cr0 = np.where(split_r & (row_half == 1), rm, r0)
+                cr1 = np.where(split_r & (row_half == 0), rm, r1)
+                cc0 = np.where(split_c & (col_half == 1), cm, c0)
+                cc1 = np.where(split_c & (col_half == 0), cm, c1)
+                children.append(np.stack([cr0, cr1, cc0, cc1], axis=1)[keep])
+        return np.concatenate(children)
+
+    def _fill_leaves(self, leaves: np.ndarray):
+        """Interpolación bilineal de los píxeles no evaluados de cada hoja"""
+        if self._layers is None or len(leaves) == 0:
+            return
+
+        heights = leaves[:, 1] - leaves[:, 0]
+        widths = leaves[:, 3] - leaves[:, 2]
+        # Agrupar por tamaño de celda para vectorizar
+        sizes = np.unique(np.stack([heights, widths], axis=1), axis=0)
+        for h, w in sizes:
+            group = leaves[(heights == h) & (widths == w)]
+            r0, r1, c0, c1 = group.T
+
+            # Las hojas siempre tienen h, w >= 1 (esquinas distintas)
+            ty = (np.arange(h + 1) / h)[:, None]
+            tx = (np.arange(w + 1) / w)[None, :]
+            rows = r0[:, None, None] + np.arange(h + 1)[None, :, None]
+            cols = c0[:, None, None] + np.arange(w + 1)[None, None, :]
+            rows, cols = np.broadcast_arrays(rows, cols)
+            fill = ~self._evaluated[rows, cols]
+            if not fill.any():
+                continue
+
+            target_rows = rows[fill]
+            target_cols = cols[fill]
+            for name, layer in self._layers.items():
+                v00 = layer[:, r0, c0][:, :, None, None]
+                v01 = layer[:, r0, c1][:, :, None, None]
+                v10 = layer[:, r1, c0][:, :, None, None]
+                v11 = layer[:, r1, c1][:, :, None, None]
+                interp = ((1 - ty) * ((1 - tx) * v00 + tx * v01)
+                          + ty * ((1 - tx) * v10 + tx * v11))
+                layer[:, target_rows, target_cols] = interp[:, fill]
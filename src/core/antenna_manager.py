@@ -1,5 +1,6 @@
 from typing import List, Optional, Dict
 from models.antenna import Antenna
+from models.antenna_table import AntennaCollection, AntennaTable
 from PyQt6.QtCore import QObject, pyqtSignal
 import logging
 import uuid
@@ -12,13 +13,24 @@ class AntennaManager(QObject):
     antenna_removed = pyqtSignal(str)
     antenna_modified = pyqtSignal(str)
     antenna_selected = pyqtSignal(str)
+    antennas_imported = pyqtSignal(list)  # antenna_ids (importación en bloque)
     
     def __init__(self):
         super().__init__()
-        self.antennas: Dict[str, Antenna] = {}
+        self._antennas = AntennaCollection()
         self.selected_antenna_id: Optional[str] = None
         self.logger = logging.getLogger("AntennaManager")
     
+    @property
+    def antennas(self) -> AntennaCollection:
+        """Dict antenna_id -> Antenna respaldado por un AntennaTable (columnar)"""
+        return self._antennas
+    
+    @antennas.setter
+    def antennas(self, antennas: Dict[str, Antenna]):
+        # Un AntennaCollection se comparte (ej. con Project); un dict se copia a una tabla
+        self._antennas = antennas if isinstance(antennas, AntennaCollection) else AntennaCollection(antennas)
+    
     def add_antenna(self, antenna: Antenna) -> str:
         """Agrega nueva antena"""
         self.antennas[antenna.id] = antenna
@@ -66,7 +78,39 @@ class AntennaManager(QObject):
     
     def get_enabled_antennas(self) -> List[Antenna]:
         """Obtiene solo antenas habilitadas"""
-        return [ant for ant in self.antennas.values() if ant.enabled]
+        table = self.antennas.table
+        return [self.antennas[aid] for aid in table.ids[table['enabled']].tolist()]
+    
+    def get_table(self, enabled_only: bool = False) -> AntennaTable:
+        """
+        Tabla columnar de las antenas (para operaciones vectorizadas).
+        
+        Sin filtro es el almacén en vivo; con enabled_only, una copia de las filas habilitadas.
+        """
+        table = self.antennas.table
+        return table.select(table['enabled']) if enabled_only else table
+    
+    def import_csv(self, path: str) -> List[str]:
+        """
+        Importa antenas en bloque desde CSV (ver AntennaTable.from_csv).
+        
+        Emite una sola señal antennas_imported en lugar de antenna_added por antena.
+        """
+        table = AntennaTable.from_csv(path)
+        duplicated = [aid for aid in table.ids if aid in self.antennas]
+        if duplicated:
+            raise ValueError(f"{len(duplicated)} IDs ya existen en el proyecto (ej. {duplicated[0]})")
+        
+        antenna_ids = self.antennas.extend_table(table)
+        self.logger.info(f"Imported {len(antenna_ids)} antennas from {path}")
+        self.antennas_imported.emit(antenna_ids)
+        return antenna_ids
+    
+    def export_csv(self, path: str) -> int:
+        """Exporta todas las antenas a CSV; retorna el número exportado"""
+        table = self.get_table()
+        table.to_csv(path)
+        return len(table)
     
     def select_antenna(self, antenna_id: Optional[str]):
         """Selecciona antena"""
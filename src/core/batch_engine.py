@@ -0,0 +1,235 @@
+"""
+Motor por lotes para modelos independientes del terreno
+
+Free Space, Okumura-Hata sin DEM y 3GPP TR 38.901 con use_dem=False son
+fórmulas cerradas de la distancia, la frecuencia y las alturas: el path loss
+de un píxel no depende de ningún otro. En lugar de una llamada Python a
+calculate_single_antenna_coverage por antena (cada una con su pasada de
+distancias, azimuts y patrón sobre el grid completo), este motor evalúa
+bloques antenas × chunk de píxeles en una sola llamada vectorizada:
+
+    distancias / azimuts   (A, n)  por broadcasting de las columnas de AntennaTable
+    path loss              (A, n)  una llamada al modelo por grupo de antenas
+    RSRP                   (A, n)  potencia + patrón - path loss
+    → TopKServerReducer.update_block sobre el tramo de píxeles
+
+Los modelos reciben frecuencia y alturas como escalares, por lo que las
+antenas se agrupan por (frecuencia, altura, elevación TX); en redes macro
+típicas hay pocos grupos. Nunca se materializa una capa completa por antena:
+la memoria es O(K · píxeles + A · chunk).
+
+Los resultados son idénticos (bit a bit) a los de calculate_multi_antenna_coverage.
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Dict, List
+
+import numpy as np
+
+from models.antenna import Antenna, AntennaType
+from models.antenna_table import AntennaTable
+from core.server_ranking import TopKServerReducer
+
+
+class BatchCoverageEngine:
+    """Evalúa bloques antenas × píxeles y reduce directamente al ranking Top-K"""
+
+    # Píxeles por chunk y antenas por bloque (acotan el bloque (A, n) en memoria)
+    DEFAULT_PIXEL_CHUNK = 65536
+    DEFAULT_ANTENNA_CHUNK = 32
+
+    def __init__(self, calculator, pixel_chunk: int = DEFAULT_PIXEL_CHUNK,
+                 antenna_chunk: int = DEFAULT_ANTENNA_CHUNK):
+        """
+        Args:
+            calculator: CoverageCalculator (módulo xp, distancias y azimuts)
+            pixel_chunk: Píxeles evaluados por bloque
+            antenna_chunk: Antenas máximas por bloque
+        """
+        self.calculator = calculator
+        self.pixel_chunk = max(int(pixel_chunk), 1)
+        self.antenna_chunk = max(int(antenna_chunk), 1)
+        self.logger = logging.getLogger("BatchCoverageEngine")
+
+    @property
+    def xp(self):
+        return self.calculator.xp
+
+    @staticmethod
+    def supports(model, terrain_loader=None) -> bool:
+        """
+        True si el path loss del modelo es puntual e independiente del DEM.
+
+        Okumura-Hata solo califica sin DEM cargado (con DEM usa perfiles
+        radiales por antena) y con la referencia de terreno 'global_mean'.
+        """
+        name = model.__class__.__name__
+        if name == 'FreeSpacePathLossModel':
+            return True
+        if name == 'ThreGPP38901Model':
+            return not getattr(model, 'use_dem', False)
+        if name == 'OkumuraHataModel':
+            has_dem = terrain_loader is not None and terrain_loader.is_loaded()
+            method = str(getattr(model, 'terrain_reference_method', 'global_mean')).lower()
+            return not has_dem and method == 'global_mean'
+        return False
+
+    def compute(self, antennas: List[Antenna], grid_lats, grid_lons, terrain_heights,
+                model, model_params: dict = None, terrain_loader=None,
+                k: int = 4, pollution_window_db: float = 6.0,
+                track=()) -> Dict[str, object]:
+        """
+        Ranking Top-K de servidores sin capas individuales.
+
+        Args:
+            antennas: Antenas a evaluar (el índice en la lista es el índice de servidor)
+            grid_lats, grid_lons: Arrays 2D del grid
+            terrain_heights: Array 2D de elevaciones del terreno
+            model: Modelo soportado (ver supports())
+            model_params: Parámetros adicionales del modelo (comunes a todas las antenas)
+            terrain_loader: TerrainLoader para la elevación TX (opcional)
+            k, pollution_window_db: Parámetros de TopKServerReducer
+            track: Métricas del mejor servidor a conservar ('path_loss', 'antenna_gain')
+
+        Returns:
+            Dict de TopKServerReducer.finalize() más 'best_server_ids'
+        """
+        xp = self.xp
+        model_params = dict(model_params or {})
+        table = AntennaTable.from_antennas(antennas)
+        shape = grid_lats.shape
+
+        lats = xp.asarray(grid_lats).reshape(-1)
+        lons = xp.asarray(grid_lons).reshape(-1)
+        # Los modelos soportados usan el terreno solo a través de su media global
+        # (Okumura-Hata 'global_mean'): se evalúa una vez sobre el grid completo
+        terrain_mean = xp.mean(xp.asarray(terrain_heights))
+
+        # Columnas por antena como (A, 1) para broadcasting contra (1, n)
+        columns = {
+            name: xp.asarray(table[name])[:, None]
+            for name in ('latitude', 'longitude', 'azimuth', 'horizontal_beamwidth',
+                         'gain_dbi', 'tx_power_dbm')
+        }
+        omni_code = list(AntennaType).index(AntennaType.OMNIDIRECTIONAL)
+        columns['omni'] = xp.asarray(table['antenna_type'] == omni_code)[:, None]
+
+        blocks = self._antenna_blocks(table, terrain_loader)
+        self.logger.info(
+            f"Batched coverage: {len(table)} antennas in {len(blocks)} blocks, "
+            f"{lats.size} pixels in chunks of {self.pixel_chunk}"
+        )
+
+        reducer = TopKServerReducer(
+            shape, k=k, pollution_window_db=pollution_window_db, track=track, xp=xp
+        )
+        for start in range(0, lats.size, self.pixel_chunk):
+            stop = min(start + self.pixel_chunk, lats.size)
+            pixels = self._pixel_terms(lats[None, start:stop], lons[None, start:stop])
+
+            for rows, (frequency, tx_height, tx_elevation) in blocks:
+                block = {name: col[rows] for name, col in columns.items()}
+                distances, azimuths = self._geometry(block, pixels)
+
+                path_loss_args = {
+                    'distances': distances,
+                    'frequency': frequency,
+                    'tx_height': tx_height,
+                    'tx_elevation': tx_elevation,
+                    'terrain_heights': terrain_mean,
+                }
+                path_loss_args.update(model_params)
+                result = model.calculate_path_loss(**path_loss_args)
+                path_loss = result['path_loss'] if isinstance(result, dict) else result
+
+                antenna_gain = self._pattern_gain(block, azimuths)
+                rsrp = block['tx_power_dbm'] + antenna_gain - path_loss
+
+                reducer.update_block(
+                    rows, rsrp, start=start,
+                    tracked={'path_loss': path_loss, 'antenna_gain': antenna_gain}
+                )
+
+        ranking = reducer.finalize()
+        ranking['best_server_ids'] = list(table.ids)
+        return ranking
+
+    def _antenna_blocks(self, table: AntennaTable, terrain_loader):
+        """
+        Agrupa filas por los escalares que recibe el modelo y las parte en
+        bloques de antenna_chunk.
+
+        Returns:
+            Lista de (índices de fila, (frecuencia, altura, elevación TX))
+        """
+        if terrain_loader is not None and terrain_loader.is_loaded():
+            tx_elevations = [
+                terrain_loader.get_elevation(lat, lon)
+                for lat, lon in zip(table['latitude'].tolist(), table['longitude'].tolist())
+            ]
+        else:
+            tx_elevations = [0.0] * len(table)
+
+        groups = OrderedDict()
+        keys = zip(table['frequency_mhz'].tolist(), table['height_agl'].tolist(), tx_elevations)
+        for row, key in enumerate(keys):
+            groups.setdefault(key, []).append(row)
+
+        blocks = []
+        for key, rows in groups.items():
+            for i in range(0, len(rows), self.antenna_chunk):
+                blocks.append((np.asarray(rows[i:i + self.antenna_chunk]), key))
+        return blocks
+
+    def _pixel_terms(self, chunk_lats, chunk_lons) -> Dict[str, object]:
+        """Términos trigonométricos del chunk (1, n), compartidos por todas las antenas"""
+        xp = self.xp
+        lat2 = xp.radians(chunk_lats)
+        return {
+            'lat2': lat2,
+            'lon2': xp.radians(chunk_lons),
+            'sin_lat2': xp.sin(lat2),
+            'cos_lat2': xp.cos(lat2),
+        }
+
+    def _geometry(self, block: Dict[str, object], pixels: Dict[str, object]):
+        """
+        Distancias [m] y azimuts [°] (A, n) con las mismas operaciones que
+        CoverageCalculator._calculate_distances/_calculate_azimuths (resultados
+        idénticos), reutilizando los términos por píxel y dlon.
+        """
+        xp = self.xp
+        R = 6371000  # Radio tierra en metros
+
+        lat1 = xp.radians(block['latitude'])
+        lon1 = xp.radians(block['longitude'])
+        cos_lat1 = xp.cos(lat1)
+        dlat = pixels['lat2'] - lat1
+        dlon = pixels['lon2'] - lon1
+
+        # Haversine
+        a = xp.sin(dlat/2)**2 + cos_lat1 * pixels['cos_lat2'] * xp.sin(dlon/2)**2
+        distances = R * (2 * xp.arctan2(xp.sqrt(a), xp.sqrt(1-a)))
+
+        # Bearing inicial geodésico (forward azimuth)
+        y = xp.sin(dlon) * pixels['cos_lat2']
+        x = (
+            cos_lat1 * pixels['sin_lat2']
+            - xp.sin(lat1) * pixels['cos_lat2'] * xp.cos(dlon)
+        )
+        azimuths = (xp.degrees(xp.arctan2(y, x)) + 360) % 360
+
+        return distances, azimuths
+
+    def _pattern_gain(self, block: Dict[str, object], azimuth_to_points):
+        """Patrón horizontal (A, n), igual a CoverageCalculator._apply_antenna_pattern"""
+        xp = self.xp
+        angle_diff = xp.abs(azimuth_to_points - block['azimuth'])
+        angle_diff = xp.minimum(angle_diff, 360 - angle_diff)
+
+        half_beamwidth = xp.where(block['omni'], 1.0, block['horizontal_beamwidth'] / 2)
+        horizontal_gain = -xp.minimum(12 * (angle_diff / half_beamwidth)**2, 30)
+        horizontal_gain = xp.where(block['omni'], 0.0, horizontal_gain)
+
+        return block['gain_dbi'] + horizontal_gain
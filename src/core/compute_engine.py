@@ -3,15 +3,18 @@ import logging
 import numpy as np
 from PyQt6.QtCore import QObject, pyqtSignal
 from utils.gpu_detector import GPUDetector
+from core import jit_kernels
 
 class ComputeEngine(QObject):
     # Signal when GPU/CPU mode changes
     gpu_mode_changed = pyqtSignal(bool)  # True = GPU, False = CPU
+    jit_mode_changed = pyqtSignal(bool)  # True = kernels JIT (Numba) activos
 
-    def __init__(self, use_gpu: bool = True):
+    def __init__(self, use_gpu: bool = True, use_jit: bool = False, gpu_detector: GPUDetector = None):
         super().__init__()
 
-        self.gpu_detector = GPUDetector()
+        # Sin GPU solicitada la detección no bloquea el arranque (hilo de fondo)
+        self.gpu_detector = gpu_detector if gpu_detector is not None else GPUDetector(background=not use_gpu)
         self.use_gpu = use_gpu and self.gpu_detector.cupy_available
 
         if self.use_gpu:
@@ -19,7 +22,25 @@ class ComputeEngine(QObject):
         else:
             self.xp = np
 
-        logging.info(f"Compute engine initialized: {'GPU' if self.use_gpu else 'CPU'}")
+        # Kernels JIT: opcionales, con fallback a NumPy si Numba no está instalado.
+        # El flag es de este motor (ver jit_scope), no del proceso
+        if use_jit and not jit_kernels.numba_available():
+            logging.warning("JIT kernels requested but Numba is not available")
+        self.use_jit = bool(use_jit) and jit_kernels.numba_available()
+
+        logging.info(f"Compute engine initialized: {self.backend}")
+
+    @property
+    def jit_available(self) -> bool:
+        """True si el backend JIT (Numba) se puede activar"""
+        return jit_kernels.numba_available()
+
+    @property
+    def backend(self) -> str:
+        """Backend efectivo: 'cupy' (GPU), 'numba' (CPU con kernels JIT) o 'numpy'"""
+        if self.use_gpu:
+            return 'cupy'
+        return 'numba' if self.use_jit else 'numpy'
     
     def switch_compute_mode(self, use_gpu: bool):
         """Permite cambiar CPU/GPU en runtime"""
@@ -39,4 +60,21 @@ class ComputeEngine(QObject):
         # Emit signal to notify UI of mode change
         self.gpu_mode_changed.emit(self.use_gpu)
 
-        return True
\ No newline at end of file
+        return True
+
+    def jit_scope(self):
+        """Contexto en el que las llamadas a modelos usan el backend JIT de este motor"""
+        return jit_kernels.scoped(self.use_jit)
+
+    def switch_jit_mode(self, use_jit: bool):
+        """Activa/desactiva los kernels JIT (solo se aplican en modo CPU)"""
+        if use_jit and not jit_kernels.numba_available():
+            logging.warning("JIT kernels requested but Numba is not available")
+            return False
+
+        self.use_jit = bool(use_jit)
+        logging.info(f"JIT kernels {'enabled' if self.use_jit else 'disabled'} (backend: {self.backend})")
+
+        self.jit_mode_changed.emit(self.use_jit)
+
+        return True
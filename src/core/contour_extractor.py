@@ -0,0 +1,582 @@
+"""
+Extracción de contornos de cobertura como polígonos vectoriales
+
+Los formatos raster (PNG drapeado en KML, CSV por píxel, GeoTIFF) crecen con
+el número de píxeles; un SIG solo necesita los bordes de cada banda de RSRP
+o región de best server. Aquí se obtienen polígonos con huecos:
+
+1. Marching squares sobre una grilla de etiquetas enteras (banda o índice de
+   servidor; < 0 = sin cobertura). Con etiquetas discretas la tabla de casos
+   se reduce a: cada lado de píxel con etiquetas distintas a ambos lados es
+   un lado de borde. Se generan vectorizados como aristas dirigidas con la
+   región a la izquierda (una por cada etiqueta válida del lado).
+2. Enlace: la arista siguiente sale del vértice donde termina la actual. En
+   los puntos de silla (tablero 2x2) se gira a la izquierda, es decir
+   conectividad 4 (la misma de scipy.ndimage.label). Los anillos (ciclos de
+   la permutación) y el orden dentro de cada uno salen de pointer jumping,
+   sin recorrer arista por arista en Python.
+3. Con la región a la izquierda los exteriores son antihorarios (área > 0) y
+   los huecos horarios. Cada anillo pertenece a la componente conexa del
+   píxel a su izquierda, así se agrupan exterior y huecos.
+4. Simplificación que preserva la topología: los vértices donde se juntan 3
+   o más regiones (o sillas) quedan fijos y cada tramo entre ellos se
+   simplifica una sola vez con Douglas-Peucker, de modo que el borde
+   compartido por dos regiones es idéntico en ambos polígonos (sin huecos ni
+   solapes). Luego se verifica que ningún segmento cruce o toque a otro y
+   que ningún atajo deje del otro lado un vértice de otro tramo; los tramos en
+   conflicto se re-simplifican con la mitad de tolerancia (con tolerancia 0
+   queda el borde original, que siempre es válido).
+
+Los vértices son esquinas de píxel: sin simplificar, el área de cada
+polígono es exactamente la suma de sus píxeles, y el paso a lon/lat es la
+afín del grid (sirve para grids 'ij' y 'xy'; los anillos se invierten si la
+afín refleja para que los exteriores queden antihorarios, como pide
+RFC 7946).
+"""
+
+import logging
+import math
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from core.coverage_statistics import CoverageStatistics, EARTH_RADIUS_M, pixel_area_deg2
+from core.server_ranking import NO_SERVER
+
+# Celda (en píxeles) para buscar pares de segmentos cercanos
+_CELL_PX = 8
+
+
+def band_labels(values, thresholds: Sequence[float]) -> np.ndarray:
+    """
+    Etiqueta cada píxel con su banda de umbrales.
+
+    La banda i es [t_i, t_i+1) con los umbrales ordenados; la última queda
+    abierta por arriba. Bajo el primer umbral o sin dato: -1.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    edges = np.sort(np.asarray(thresholds, dtype=np.float64))
+    labels = np.searchsorted(edges, values, side='right').astype(np.int32) - 1
+    labels[~np.isfinite(values)] = -1
+    return labels
+
+
+def _corner_transform(grid_lats, grid_lons):
+    """
+    Afín de esquinas de píxel a lon/lat: (lon, lat) = origen + [x, y] @ paso,
+    con x = columna e y = fila (la esquina (0, 0) está medio paso antes del
+    centro del primer píxel).
+    """
+    lats = np.asarray(grid_lats, dtype=np.float64)
+    lons = np.asarray(grid_lons, dtype=np.float64)
+    if lats.ndim != 2 or min(lats.shape) < 2:
+        raise ValueError("Se requiere un grid 2D de al menos 2x2")
+    lat0, lon0 = lats[0, 0], lons[0, 0]
+    step = np.array([
+        [lons[0, 1] - lon0, lats[0, 1] - lat0],  # +1 columna
+        [lons[1, 0] - lon0, lats[1, 0] - lat0],  # +1 fila
+    ])
+    origin = np.array([lon0, lat0]) - 0.5 * step.sum(axis=0)
+    return origin, step
+
+
+def _boundary_edges(padded: np.ndarray):
+    """
+    Aristas dirigidas del borde de cada región (la región a la izquierda).
+
+    Direcciones: 0 +x, 1 +y, 2 -x, 3 -y (orden antihorario, girar a la
+    izquierda es d+1). Vértice (fila i, columna j) = i * (ancho + 1) + j.
+
+    Returns:
+        (start, end, direction, label, pixel) o None si no hay bordes
+    """
+    width = padded.shape[1] - 2
+    stride = width + 1
+    parts = []
+
+    def add(mask, start, end, direction, label, pixel):
+        parts.append((start[mask], end[mask], np.full(int(mask.sum()), direction, dtype=np.int8),
+                      label[mask], pixel[mask]))
+
+    # Lados verticales: esquinas (r, j)-(r+1, j) entre los píxeles (r, j-1) y (r, j)
+    left, right = padded[1:-1, :-1], padded[1:-1, 1:]
+    r, j = np.nonzero(left != right)
+    v0 = r.astype(np.int64) * stride + j
+    left_label, right_label = left[r, j], right[r, j]
+    add(right_label >= 0, v0 + stride, v0, 3, right_label, r.astype(np.int64) * width + j)
+    add(left_label >= 0, v0, v0 + stride, 1, left_label, r.astype(np.int64) * width + j - 1)
+
+    # Lados horizontales: esquinas (i, c)-(i, c+1) entre los píxeles (i-1, c) y (i, c)
+    below, above = padded[:-1, 1:-1], padded[1:, 1:-1]
+    i, c = np.nonzero(below != above)
+    v0 = i.astype(np.int64) * stride + c
+    below_label, above_label = below[i, c], above[i, c]
+    add(above_label >= 0, v0, v0 + 1, 0, above_label, i.astype(np.int64) * width + c)
+    add(below_label >= 0, v0 + 1, v0, 2, below_label, (i.astype(np.int64) - 1) * width + c)
+
+    start = np.concatenate([p[0] for p in parts])
+    if start.size == 0:
+        return None
+    return (start, np.concatenate([p[1] for p in parts]), np.concatenate([p[2] for p in parts]),
+            np.concatenate([p[3] for p in parts]).astype(np.int64), np.concatenate([p[4] for p in parts]))
+
+
+def _link_edges(start, end, direction, label, n_vertices) -> np.ndarray:
+    """Arista siguiente de cada arista (misma etiqueta; giro a la izquierda en sillas)"""
+    key_start = label * n_vertices + start
+    order = np.argsort(key_start, kind='stable')
+    sorted_keys = key_start[order]
+    key_end = label * n_vertices + end
+    first = np.searchsorted(sorted_keys, key_end, side='left')
+    count = np.searchsorted(sorted_keys, key_end, side='right') - first
+    if np.any(count == 0):
+        raise RuntimeError("Borde abierto: la grilla de etiquetas no produjo anillos cerrados")
+    nxt = order[first]
+
+    saddle = np.flatnonzero(count == 2)
+    if saddle.size:
+        alternative = order[first[saddle] + 1]
+        use_alternative = direction[alternative] == (direction[saddle] + 1) % 4
+        nxt[saddle[use_alternative]] = alternative[use_alternative]
+    return nxt
+
+
+def _ring_order(nxt: np.ndarray):
+    """
+    Descompone la permutación 'nxt' en ciclos con pointer jumping.
+
+    Returns:
+        (order, ring_starts): aristas agrupadas por anillo y en orden de
+        recorrido, y la posición donde empieza cada anillo en 'order'
+    """
+    index = np.arange(nxt.size)
+
+    # Representante de cada ciclo: la arista de menor índice (ventanas de 2^k)
+    rep, jump = index.copy(), nxt.copy()
+    while True:
+        merged = np.minimum(rep, rep[jump])
+        jump = jump[jump]
+        if np.array_equal(merged, rep):
+            break
+        rep = merged
+
+    # Distancia hasta la última arista (la que vuelve al representante)
+    tail = nxt == rep
+    succ = np.where(tail, index, nxt)
+    dist = (~tail).astype(np.int64)
+    while not np.all(tail[succ]):
+        dist = dist + dist[succ]
+        succ = succ[succ]
+
+    order = np.lexsort((-dist, rep))
+    ring_starts = np.flatnonzero(np.r_[True, rep[order][1:] != rep[order][:-1]])
+    return order, ring_starts
+
+
+def _junctions(padded: np.ndarray) -> np.ndarray:
+    """Esquinas donde se juntan 3 o más etiquetas o hay una silla (2x2 en tablero)"""
+    a, b = padded[:-1, :-1], padded[:-1, 1:]
+    c, d = padded[1:, :-1], padded[1:, 1:]
+    distinct = 1 + (b != a) + ((c != a) & (c != b)) + ((d != a) & (d != b) & (d != c))
+    return (distinct >= 3) | ((a == d) & (b == c) & (a != b))
+
+
+def _components(labels: np.ndarray) -> np.ndarray:
+    """Id global de componente conexa (conectividad 4) por píxel; -1 fuera de regiones"""
+    from scipy import ndimage
+
+    components = np.full(labels.shape, -1, dtype=np.int64)
+    offset = 0
+    for value, window in enumerate(ndimage.find_objects(labels + 1)):
+        if window is None:
+            continue
+        mask = labels[window] == value
+        local, count = ndimage.label(mask)
+        components[window][mask] = local[mask] - 1 + offset
+        offset += count
+    return components
+
+
+def _douglas_peucker(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """Índices conservados por Douglas-Peucker (si el tramo es cerrado se fija el más lejano)"""
+    n = len(points)
+    if n <= 2 or tolerance <= 0:
+        return np.arange(n)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        chord = points[b] - points[a]
+        offsets = points[a + 1:b] - points[a]
+        norm = math.hypot(chord[0], chord[1])
+        if norm > 0:
+            distance = np.abs(chord[0] * offsets[:, 1] - chord[1] * offsets[:, 0]) / norm
+        else:
+            distance = np.hypot(offsets[:, 0], offsets[:, 1])
+        k = int(np.argmax(distance))
+        if distance[k] > tolerance:
+            split = a + 1 + k
+            keep[split] = True
+            stack.append((a, split))
+            stack.append((split, b))
+    return np.flatnonzero(keep)
+
+
+def _inside(px, py, vx, vy) -> np.ndarray:
+    """Paridad de cruces de cada punto contra un polígono cerrado implícitamente"""
+    x0, y0 = vx[None, :], vy[None, :]
+    x1, y1 = np.roll(vx, -1)[None, :], np.roll(vy, -1)[None, :]
+    py_, px_ = py[:, None], px[:, None]
+    straddle = (y0 > py_) != (y1 > py_)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        crossing = x0 + (py_ - y0) * (x1 - x0) / (y1 - y0)
+    return (np.count_nonzero(straddle & (px_ < crossing), axis=1) % 2) == 1
+
+
+def _sweeps_vertex(points, kept, wx, wy, owner, chain) -> bool:
+    """
+    True si algún atajo deja del otro lado un vértice de otro tramo (wx
+    ordenado). Basta con los vértices originales: si ninguno cambia de lado,
+    un tramo no puede saltar por encima de otro sin cruzarlo.
+    """
+    for a, b in zip(kept[:-1], kept[1:]):
+        if b - a < 2:
+            continue
+        sub = points[a:b + 1]
+        lo = np.searchsorted(wx, sub[:, 0].min(), side='left')
+        hi = np.searchsorted(wx, sub[:, 0].max(), side='right')
+        if lo == hi:
+            continue
+        px, py = wx[lo:hi], wy[lo:hi]
+        # Las uniones en los extremos del atajo están sobre el borde de la región
+        shared = (((px == sub[0, 0]) & (py == sub[0, 1]))
+                  | ((px == sub[-1, 0]) & (py == sub[-1, 1])))
+        select = (py >= sub[:, 1].min()) & (py <= sub[:, 1].max()) & ~shared & (owner[lo:hi] != chain)
+        if select.any() and _inside(px[select], py[select], sub[:, 0], sub[:, 1]).any():
+            return True
+    return False
+
+
+def _crossing_segments(x0, y0, x1, y1) -> np.ndarray:
+    """
+    Índices de segmentos que cruzan, tocan o duplican a otro (compartir solo
+    un extremo está permitido). Coordenadas enteras: tests exactos.
+    """
+    n = x0.size
+    cx0, cx1 = np.minimum(x0, x1) // _CELL_PX, np.maximum(x0, x1) // _CELL_PX
+    cy0, cy1 = np.minimum(y0, y1) // _CELL_PX, np.maximum(y0, y1) // _CELL_PX
+    nx, ny = cx1 - cx0 + 1, cy1 - cy0 + 1
+    count = nx * ny
+    segment = np.repeat(np.arange(n), count)
+    local = np.arange(segment.size) - np.repeat(np.cumsum(count) - count, count)
+    cell = (cx0[segment] + local % nx[segment]) * (int(cy1.max()) + 1) + cy0[segment] + local // nx[segment]
+
+    order = np.argsort(cell, kind='stable')
+    cell, segment = cell[order], segment[order]
+    starts = np.flatnonzero(np.r_[True, cell[1:] != cell[:-1]])
+    sizes = np.diff(np.r_[starts, cell.size])
+    group = np.repeat(np.arange(starts.size), sizes)
+    partners = sizes[group] - (np.arange(cell.size) - starts[group]) - 1
+    first = np.repeat(np.arange(cell.size), partners)
+    second = first + 1 + np.arange(first.size) - np.repeat(np.cumsum(partners) - partners, partners)
+    a, b = segment[first], segment[second]
+    if a.size == 0:
+        return np.empty(0, dtype=np.int64)
+
+    px, py, qx, qy = x0[a], y0[a], x1[a], y1[a]
+    rx, ry, sx, sy = x0[b], y0[b], x1[b], y1[b]
+
+    def orient(ax, ay, bx, by, cx, cy):
+        return np.sign((bx - ax) * (cy - ay) - (by - ay) * (cx - ax))
+
+    def on_segment(o, ax, ay, bx, by, cx, cy):
+        """c sobre el segmento ab sin ser uno de sus extremos"""
+        within = ((np.minimum(ax, bx) <= cx) & (cx <= np.maximum(ax, bx))
+                  & (np.minimum(ay, by) <= cy) & (cy <= np.maximum(ay, by)))
+        endpoint = ((cx == ax) & (cy == ay)) | ((cx == bx) & (cy == by))
+        return (o == 0) & within & ~endpoint
+
+    o1, o2 = orient(px, py, qx, qy, rx, ry), orient(px, py, qx, qy, sx, sy)
+    o3, o4 = orient(rx, ry, sx, sy, px, py), orient(rx, ry, sx, sy, qx, qy)
+    proper = (o1 * o2 < 0) & (o3 * o4 < 0)
+    touch = (on_segment(o1, px, py, qx, qy, rx, ry) | on_segment(o2, px, py, qx, qy, sx, sy)
+             | on_segment(o3, rx, ry, sx, sy, px, py) | on_segment(o4, rx, ry, sx, sy, qx, qy))
+    same = (((px == rx) & (py == ry) & (qx == sx) & (qy == sy))
+            | ((px == sx) & (py == sy) & (qx == rx) & (qy == ry)))
+    conflict = proper | touch | same
+    return np.unique(np.concatenate((a[conflict], b[conflict])))
+
+
+class ContourExtractor:
+    """Polígonos (con huecos) de bandas de RSRP y regiones de best server"""
+
+    def __init__(self, tolerance_px: float = 1.0, precision: int = 6):
+        """
+        Args:
+            tolerance_px: Tolerancia de Douglas-Peucker en píxeles (0 = bordes
+                          de píxel exactos)
+            precision: Decimales de lon/lat al serializar
+        """
+        self.tolerance_px = float(tolerance_px)
+        self.precision = int(precision)
+        self.logger = logging.getLogger("ContourExtractor")
+
+    def threshold_bands(self, values, grid_lats, grid_lons,
+                        thresholds: Optional[Sequence[float]] = None) -> List[Dict]:
+        """
+        Regiones por banda de umbrales de RSRP.
+
+        Returns:
+            Lista de dicts con 'band', 'min_dbm', 'max_dbm' (None en la banda
+            superior), 'area_km2' y 'polygons' (lon/lat)
+        """
+        if thresholds is None:
+            thresholds = CoverageStatistics.DEFAULT_THRESHOLDS_DBM
+        edges = sorted(float(t) for t in thresholds)
+        labels = band_labels(values, edges)
+        areas = self._label_areas(labels, grid_lats, grid_lons, len(edges))
+
+        regions = []
+        for band, polygons in sorted(self.lonlat_polygons(labels, grid_lats, grid_lons).items()):
+            regions.append({
+                'band': band,
+                'min_dbm': edges[band],
+                'max_dbm': edges[band + 1] if band + 1 < len(edges) else None,
+                'area_km2': None if areas is None else float(areas[band]),
+                'polygons': polygons,
+            })
+        return regions
+
+    def best_server_regions(self, best_server, grid_lats, grid_lons,
+                            server_ids: Optional[Sequence[str]] = None) -> List[Dict]:
+        """
+        Regiones por antena servidora (NO_SERVER queda fuera).
+
+        Returns:
+            Lista de dicts con 'server_index', 'server_id', 'area_km2' y
+            'polygons' (lon/lat)
+        """
+        indices = np.asarray(best_server)
+        labels = indices.astype(np.int32)
+        labels[indices == NO_SERVER] = -1
+        n_servers = int(labels.max()) + 1 if labels.size else 0
+        areas = self._label_areas(labels, grid_lats, grid_lons, n_servers)
+
+        regions = []
+        for index, polygons in sorted(self.lonlat_polygons(labels, grid_lats, grid_lons).items()):
+            regions.append({
+                'server_index': index,
+                'server_id': server_ids[index] if server_ids is not None and index < len(server_ids) else str(index),
+                'area_km2': None if areas is None else float(areas[index]),
+                'polygons': polygons,
+            })
+        return regions
+
+    def to_geojson(self, regions: List[Dict], properties: Optional[Dict] = None) -> Dict:
+        """
+        FeatureCollection con un MultiPolygon por región.
+
+        Args:
+            regions: Salida de threshold_bands / best_server_regions
+            properties: Propiedades comunes añadidas a cada feature
+        """
+        features = []
+        for region in regions:
+            feature_properties = dict(properties or {})
+            feature_properties.update({k: v for k, v in region.items() if k != 'polygons'})
+            features.append({
+                'type': 'Feature',
+                'properties': feature_properties,
+                'geometry': {
+                    'type': 'MultiPolygon',
+                    'coordinates': [
+                        [np.round(ring, self.precision).tolist() for ring in polygon]
+                        for polygon in region['polygons']
+                    ],
+                },
+            })
+        return {'type': 'FeatureCollection', 'features': features}
+
+    def lonlat_polygons(self, labels, grid_lats, grid_lons) -> Dict[int, List[List[np.ndarray]]]:
+        """polygons() convertidos a lon/lat con la afín del grid"""
+        origin, step = _corner_transform(grid_lats, grid_lons)
+        reflect = np.linalg.det(step) < 0
+        converted = {}
+        for label, polygons in self.polygons(labels).items():
+            converted[label] = [
+                [(origin + ring @ step)[::-1] if reflect else origin + ring @ step for ring in polygon]
+                for polygon in polygons
+            ]
+        return converted
+
+    def polygons(self, labels) -> Dict[int, List[List[np.ndarray]]]:
+        """
+        Polígonos por etiqueta en coordenadas de esquina de píxel.
+
+        Args:
+            labels: Array 2D de enteros; < 0 = fuera de toda región
+
+        Returns:
+            {etiqueta: [[exterior, hueco, ...], ...]} con anillos (n, 2)
+            cerrados en (x = columna, y = fila); exteriores antihorarios y
+            huecos horarios
+        """
+        labels = np.asarray(labels)
+        if labels.ndim != 2:
+            raise ValueError("labels debe ser un array 2D")
+        height, width = labels.shape
+        padded = np.full((height + 2, width + 2), -1, dtype=np.int32)
+        padded[1:-1, 1:-1] = np.where(labels < 0, -1, labels)
+        stride = width + 1
+
+        edges = _boundary_edges(padded)
+        if edges is None:
+            return {}
+        start, end, direction, label, pixel = edges
+        nxt = _link_edges(start, end, direction, label, (height + 1) * stride)
+        order, ring_starts = _ring_order(nxt)
+
+        # Vértices de cada anillo: solo esquinas y uniones (los lados rectos se funden)
+        n_edges = order.size
+        bounds = np.append(ring_starts, n_edges)
+        previous = np.arange(n_edges) - 1
+        previous[ring_starts] = bounds[1:] - 1
+        ordered_direction = direction[order]
+        junction = _junctions(padded).ravel()
+        vertex = start[order]
+        keep = (ordered_direction != ordered_direction[previous]) | junction[vertex]
+        ring_index = np.repeat(np.arange(ring_starts.size), np.diff(bounds))[keep]
+        vertex = vertex[keep]
+        ring_bounds = np.append(np.searchsorted(ring_index, np.arange(ring_starts.size)), vertex.size)
+
+        x, y = vertex % stride, vertex // stride
+        following = np.arange(vertex.size) + 1
+        following[ring_bounds[1:] - 1] = ring_bounds[:-1]
+        ring_area = 0.5 * np.add.reduceat(x * y[following] - x[following] * y, ring_bounds[:-1])
+        ring_label = label[order[ring_starts]]
+        ring_component = _components(padded[1:-1, 1:-1]).ravel()[pixel[order[ring_starts]]]
+
+        chains, pieces = self._split_chains(vertex, ring_bounds, junction)
+        kept = self._simplify_chains(chains, stride)
+
+        polygons_by_component: Dict[int, List] = {}
+        for ring in range(ring_starts.size):
+            parts = []
+            for chain, reverse in pieces[ring]:
+                ids = chains[chain][0][kept[chain]]
+                parts.append((ids[::-1] if reverse else ids)[:-1])
+            ids = np.concatenate(parts + [parts[0][:1]])
+            coordinates = np.column_stack((ids % stride, ids // stride))
+            entry = polygons_by_component.setdefault(int(ring_component[ring]), [None, []])
+            if ring_area[ring] > 0:
+                entry[0] = coordinates
+            else:
+                entry[1].append(coordinates)
+
+        result: Dict[int, List[List[np.ndarray]]] = {}
+        label_of_component = {int(ring_component[r]): int(ring_label[r]) for r in range(ring_starts.size)}
+        for component, (shell, holes) in polygons_by_component.items():
+            result.setdefault(label_of_component[component], []).append([shell] + holes)
+
+        self.logger.debug(f"{ring_starts.size} anillos, {len(chains)} tramos, "
+                          f"{sum(k.size for k in kept)} vértices tras simplificar")
+        return result
+
+    @staticmethod
+    def _split_chains(vertex, ring_bounds, junction):
+        """
+        Parte cada anillo en tramos entre uniones, en forma canónica.
+
+        Returns:
+            (chains, pieces): chains[i] = (vértices canónicos, cerrado o lazo);
+            pieces[anillo] = [(i, invertido), ...] en el orden del anillo
+        """
+        chains, index, pieces = [], {}, []
+        for ring in range(ring_bounds.size - 1):
+            ids = vertex[ring_bounds[ring]:ring_bounds[ring + 1]]
+            pinned = np.flatnonzero(junction[ids])
+            ring_pieces = []
+            if pinned.size == 0:
+                # Anillo aislado: empieza en el menor vértice, sentido hacia el menor vecino
+                first = int(np.argmin(ids))
+                ids = np.concatenate((ids[first:], ids[:first]))
+                reverse = bool(ids[-1] < ids[1])
+                if reverse:
+                    ids = np.concatenate((ids[:1], ids[:0:-1]))
+                sequences = [(np.append(ids, ids[0]), reverse, True)]
+            else:
+                ids = np.concatenate((ids[pinned[0]:], ids[:pinned[0]]))
+                cuts = np.append(pinned - pinned[0], ids.size)
+                sequences = []
+                for a, b in zip(cuts[:-1], cuts[1:]):
+                    sequence = ids[a:b + 1] if b < ids.size else np.append(ids[a:], ids[0])
+                    reverse = bool((sequence[0], sequence[1]) > (sequence[-1], sequence[-2]))
+                    # Un lazo que vuelve a la misma unión se trata como anillo cerrado
+                    sequences.append((sequence[::-1] if reverse else sequence, reverse,
+                                      bool(sequence[0] == sequence[-1])))
+
+            for sequence, reverse, closed in sequences:
+                key = (int(sequence[0]), int(sequence[1]))
+                if key not in index:
+                    index[key] = len(chains)
+                    chains.append((sequence, closed))
+                ring_pieces.append((index[key], reverse))
+            pieces.append(ring_pieces)
+        return chains, pieces
+
+    def _simplify_chains(self, chains, stride) -> List[np.ndarray]:
+        """Douglas-Peucker por tramo, reduciendo la tolerancia de los tramos en conflicto"""
+        points = [np.column_stack((ids % stride, ids // stride)) for ids, _ in chains]
+        if self.tolerance_px <= 0:
+            return [np.arange(len(p)) for p in points]
+
+        # Testigos: todos los vértices originales, con el tramo al que pertenecen
+        witnesses = np.concatenate(points)
+        owner = np.repeat(np.arange(len(chains)), [len(p) for p in points])
+        by_x = np.argsort(witnesses[:, 0], kind='stable')
+        wx, wy, owner = witnesses[by_x, 0], witnesses[by_x, 1], owner[by_x]
+
+        tolerance = np.full(len(chains), self.tolerance_px)
+        kept: List[Optional[np.ndarray]] = [None] * len(chains)
+        sweeps = np.zeros(len(chains), dtype=bool)
+        pending = np.arange(len(chains))
+        while True:
+            for chain in pending:
+                closed = chains[chain][1]
+                if closed and len(points[chain]) <= 5:
+                    indices = np.arange(len(points[chain]))  # Rectángulo aislado: nada que simplificar
+                else:
+                    indices = _douglas_peucker(points[chain].astype(np.float64), tolerance[chain])
+                    if closed and indices.size < 4:
+                        indices = np.arange(len(points[chain]))  # Un anillo aislado no colapsa
+                kept[chain] = indices
+                sweeps[chain] = (indices.size < len(points[chain])
+                                 and _sweeps_vertex(points[chain], indices, wx, wy, owner, chain))
+
+            segments = [points[c][kept[c]] for c in range(len(chains))]
+            segment_chain = np.repeat(np.arange(len(chains)), [s.shape[0] - 1 for s in segments])
+            start = np.concatenate([s[:-1] for s in segments])
+            stop = np.concatenate([s[1:] for s in segments])
+            crossing = segment_chain[_crossing_segments(start[:, 0], start[:, 1], stop[:, 0], stop[:, 1])]
+
+            conflict = np.unique(np.concatenate((crossing, np.flatnonzero(sweeps))))
+            conflict = conflict[tolerance[conflict] > 0]
+            if conflict.size == 0:
+                return kept
+            halved = tolerance[conflict] / 2
+            tolerance[conflict] = np.where(halved >= 0.25, halved, 0.0)
+            pending = conflict
+
+    @staticmethod
+    def _label_areas(labels, grid_lats, grid_lons, n_labels) -> Optional[np.ndarray]:
+        """Área real (km²) por etiqueta con el área de píxel de coverage_statistics"""
+        step_deg2 = pixel_area_deg2(grid_lats, grid_lons)
+        if step_deg2 is None or n_labels <= 0:
+            return None
+        valid = labels >= 0
+        scale = step_deg2 * (math.pi * EARTH_RADIUS_M / 180.0) ** 2 * 1e-6
+        weights = np.cos(np.radians(np.asarray(grid_lats, dtype=np.float64)[valid]))
+        return np.bincount(labels[valid], weights=weights, minlength=n_labels) * scale
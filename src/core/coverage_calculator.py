@@ -1,7 +1,11 @@
 import numpy as np
+from collections import OrderedDict
 from typing import Dict, List, Tuple
 from models.antenna import Antenna
 from core.compute_engine import ComputeEngine
+from core.server_ranking import TopKServerReducer
+from core.batch_engine import BatchCoverageEngine
+from core.effective_height import EffectiveHeightService
 import logging
 
 class CoverageCalculator:
@@ -10,6 +14,28 @@ class CoverageCalculator:
     def __init__(self, compute_engine: ComputeEngine):
         self.engine = compute_engine
         self.logger = logging.getLogger("CoverageCalculator")
+        # Ranking de servidores: K retenidos por píxel y ventana de pilot pollution
+        self.server_ranking_k = 4
+        self.pollution_window_db = 6.0
+        # Distancias memoizadas por (sitio, grid): antenas sectoriales co-ubicadas
+        # comparten el mismo array y con él los intermedios memoizados de los modelos
+        self.distance_memo_size = 4
+        self._distance_memo = OrderedDict()
+        # Recorte por huella (FootprintCuller); None = evaluar siempre el grid completo
+        self.footprint_culler = None
+        # Perfiles adaptativos CSR: kwargs de TerrainLoader.get_adaptive_profiles
+        # (None = perfiles densos de 50 muestras); solo modelos con supports_ragged_profiles
+        self.adaptive_profiles = None
+        # Altura efectiva por sector de acimut (EffectiveHeightService); None = perfiles
+        # por receptor. Solo modelos con supports_hb_effective (familia Hata)
+        self.effective_height = None
+        # Servicio que sobrevive entre corridas: su caché (TX, DEM) se reutiliza
+        self._effective_height_service = None
+        # Puntos por bloque en calculate_points_coverage (perfiles de 50 muestras:
+        # ~6 MB por array de perfiles en float64)
+        self.point_chunk_size = 16384
+        # Capas de morfología muestreadas en el último grid: (morfología, lats, lons, capas)
+        self._morphology_memo = None
     
     @property
     def xp(self):
@@ -41,6 +67,7 @@ class CoverageCalculator:
 
         Returns:
             Array 2D con RSRP en dBm para cada punto del grid o un dict detallado
+            (con footprint_culler activo, NaN fuera de la huella de la antena)
         """
         self.logger.info(f"Calculating coverage for {antenna.name}")
 
@@ -48,6 +75,44 @@ class CoverageCalculator:
         if model_params is None:
             model_params = {}
 
+        window = None
+        if self.footprint_culler is not None:
+            window = self.footprint_culler.window(
+                antenna, grid_lats, grid_lons, model, model_params
+            )
+        if window is None:
+            return self._evaluate_single_antenna(
+                antenna, grid_lats, grid_lons, terrain_heights, model,
+                model_params, return_details, terrain_loader,
+                adaptive_profiles=self.adaptive_profiles, effective_height=self.effective_height
+            )
+
+        # Evaluar solo la ventana de la huella y embeberla en capas NaN del grid
+        xp = self.xp
+        layers = {
+            name: xp.full(grid_lats.shape, xp.nan, dtype=xp.float64)
+            for name in ('rsrp', 'path_loss', 'antenna_gain')
+        }
+        if window[0].stop > window[0].start and window[1].stop > window[1].start:
+            inner = self._evaluate_single_antenna(
+                antenna, grid_lats[window], grid_lons[window],
+                terrain_heights[window], model, model_params, True, terrain_loader,
+                adaptive_profiles=self.adaptive_profiles, effective_height=self.effective_height
+            )
+            for name, layer in layers.items():
+                layer[window] = inner[name]
+
+        return layers if return_details else layers['rsrp']
+
+    def _evaluate_single_antenna(self, antenna, grid_lats, grid_lons, terrain_heights,
+                                 model, model_params, return_details, terrain_loader,
+                                 adaptive_profiles=None, effective_height=None):
+        """
+        Evalúa el modelo de una antena sobre todo el grid recibido
+
+        adaptive_profiles / effective_height llegan explícitos (el grid pasa los
+        del calculador; los puntos sueltos, los que recibe su llamada).
+        """
         # Convertir a GPU si está disponible
         if self.engine.use_gpu:
             grid_lats = self.xp.asarray(grid_lats)
@@ -55,7 +120,7 @@ class CoverageCalculator:
             terrain_heights = self.xp.asarray(terrain_heights)
 
         # Calcular distancias
-        distances = self._calculate_distances(
+        distances = self._site_distances(
             antenna.latitude, antenna.longitude,
             grid_lats, grid_lons
         )
@@ -77,8 +142,48 @@ class CoverageCalculator:
             'terrain_heights': terrain_heights
         }
 
+        # Posición del TX en el grid (modelos con corrección DEM 2D por perfiles)
+        if getattr(model, 'supports_tx_pixel', False):
+            path_loss_args['tx_pixel'] = self._grid_pixel(
+                antenna.latitude, antenna.longitude, grid_lats, grid_lons
+            )
+
+        use_ragged = (adaptive_profiles is not None
+                      and getattr(model, 'supports_ragged_profiles', False))
+        use_azimuth_heff = (effective_height is not None
+                            and getattr(model, 'supports_hb_effective', False))
+
         # Calcular perfiles radiales y distancias reales si hay TerrainLoader disponible
-        if terrain_loader is not None and terrain_loader.is_loaded():
+        if terrain_loader is not None and terrain_loader.is_loaded() and use_azimuth_heff:
+            # h_b,eff por sector de acimut: radiales compartidos, sin perfiles por receptor
+            gl = self.xp.asnumpy(grid_lats) if self.engine.use_gpu else grid_lats
+            gl_lons = self.xp.asnumpy(grid_lons) if self.engine.use_gpu else grid_lons
+            hb_effective = effective_height.effective_height(
+                terrain_loader, antenna.latitude, antenna.longitude,
+                antenna.height_agl, tx_elevation, gl, gl_lons
+            )
+            path_loss_args['hb_effective'] = self.xp.asarray(hb_effective)
+        elif terrain_loader is not None and terrain_loader.is_loaded() and use_ragged:
+            gl = self.xp.asnumpy(grid_lats) if self.engine.use_gpu else grid_lats
+            gl_lons = self.xp.asnumpy(grid_lons) if self.engine.use_gpu else grid_lons
+
+            # Perfiles CSR TX → receptor con muestras según la longitud del trayecto
+            # (las distancias viajan dentro del perfil: sin profile_distances)
+            terrain_profiles = terrain_loader.get_adaptive_profiles(
+                antenna.latitude, antenna.longitude,
+                gl.ravel(), gl_lons.ravel(),
+                **adaptive_profiles
+            )
+            smoothed_terrain_profiles = terrain_loader.get_smoothed_profiles(
+                terrain_profiles, window_size_m=1000.0
+            )
+            self.logger.info(
+                f"Adaptive profiles: {len(terrain_profiles)} receptors, "
+                f"{terrain_profiles.total_samples} samples"
+            )
+            path_loss_args['terrain_profiles'] = terrain_profiles.to(self.xp)
+            path_loss_args['smoothed_terrain_profiles'] = smoothed_terrain_profiles.to(self.xp)
+        elif terrain_loader is not None and terrain_loader.is_loaded():
             gl = self.xp.asnumpy(grid_lats) if self.engine.use_gpu else grid_lats
             gl_lons = self.xp.asnumpy(grid_lons) if self.engine.use_gpu else grid_lons
             self.logger.info(f"Before get_radial_profiles: gl.shape={gl.shape}, gl.ravel().shape={gl.ravel().shape}")
@@ -128,11 +233,20 @@ class CoverageCalculator:
         else:
             self.logger.info(f"terrain_loader check: is_None={terrain_loader is None}, is_loaded={terrain_loader.is_loaded() if terrain_loader else 'N/A'}")
 
+        # Morfología del DEM (clutter, altura de edificios): propiedad del terreno,
+        # se muestrea una vez por grid y la comparten todas las antenas
+        morphology_layers = getattr(model, 'MORPHOLOGY_LAYERS', None)
+        if morphology_layers and terrain_loader is not None and terrain_loader.is_loaded():
+            sampled = self._grid_morphology(terrain_loader, grid_lats, grid_lons, morphology_layers)
+            for layer, argument in morphology_layers.items():
+                path_loss_args[argument] = sampled[layer]
+
         # Agregar parámetros adicionales del modelo
         path_loss_args.update(model_params)
 
-        # Calcular path loss usando modelo
-        result = model.calculate_path_loss(**path_loss_args)
+        # Calcular path loss usando modelo (kernels JIT según este motor)
+        with self.engine.jit_scope():
+            result = model.calculate_path_loss(**path_loss_args)
         # Algunos modelos retornan dict, otros ndarray directamente
         path_loss = result['path_loss'] if isinstance(result, dict) else result
 
@@ -163,7 +277,9 @@ class CoverageCalculator:
         grid_lons: np.ndarray,
         terrain_heights: np.ndarray,
         model,
-        model_params: dict = None
+        model_params: dict = None,
+        keep_individual: bool = True,
+        terrain_loader=None
     ) -> Dict[str, np.ndarray]:
         """
         Calcula cobertura para múltiples antenas
@@ -175,15 +291,30 @@ class CoverageCalculator:
             terrain_heights: Array 2D con elevaciones del terreno
             model: Modelo de propagación
             model_params: Parámetros adicionales para el modelo
+            keep_individual: Si es False y el modelo es independiente del
+                             terreno (ver BatchCoverageEngine.supports), se
+                             usa el motor por lotes y 'individual' queda vacío
+            terrain_loader: TerrainLoader para la elevación TX (opcional)
 
         Returns:
             Dict con:
-            - 'best_server': ID de antena con mejor señal en cada punto
+            - 'best_server': Raster uint16 con el índice de la mejor antena
+              (NO_SERVER donde no hay señal)
+            - 'best_server_ids': Lista de antenna_ids indexada por 'best_server'
             - 'rsrp': RSRP de la mejor antena en cada punto
+            - 'second_rsrp': RSRP del segundo mejor servidor
+            - 'handover_margin': Diferencia best - second [dB]
+            - 'server_count': Servidores dentro de pollution_window_db del mejor
             - 'individual': Dict con cobertura de cada antena
         """
         self.logger.info(f"Calculating coverage for {len(antennas)} antennas")
 
+        if not keep_individual and BatchCoverageEngine.supports(model, terrain_loader):
+            return self._calculate_batched_coverage(
+                antennas, grid_lats, grid_lons, terrain_heights, model,
+                model_params, terrain_loader
+            )
+
         results = {'individual': {}}
 
         # Calcular cobertura individual
@@ -194,35 +325,293 @@ class CoverageCalculator:
                 )
                 results['individual'][antenna.id] = coverage
 
-        # Calcular best server (máximo RSRP en cada píxel)
+        # Calcular best server en streaming (Top-K, sin apilar todas las capas)
         if results['individual']:
-            coverage_stack = self.xp.stack(list(results['individual'].values()))  # CAMBIO: np.stack -> self.xp.stack
             antenna_ids = list(results['individual'].keys())
+            reducer = TopKServerReducer(
+                grid_lats.shape,
+                k=self.server_ranking_k,
+                pollution_window_db=self.pollution_window_db,
+                xp=self.xp
+            )
+            for i, ant_id in enumerate(antenna_ids):
+                reducer.update(i, results['individual'][ant_id])
+            ranking = reducer.finalize()
 
-            best_indices = self.xp.argmax(coverage_stack, axis=0)  # CAMBIO: np.argmax -> self.xp.argmax
-            results['rsrp'] = self.xp.max(coverage_stack, axis=0)  # CAMBIO: np.max -> self.xp.max
+            results['rsrp'] = ranking['best_rsrp']
+            results['second_rsrp'] = ranking['second_rsrp']
+            results['handover_margin'] = ranking['handover_margin']
+            results['server_count'] = ranking['server_count']
 
-            # Crear mapa de best server (siempre NumPy, dtype=object no soportado en GPU)
-            if self.engine.use_gpu:
-                best_indices_numpy = self.xp.asnumpy(best_indices)
-            else:
-                best_indices_numpy = best_indices
-                
-            results['best_server'] = np.empty(best_indices_numpy.shape, dtype=object)
-            for i, ant_id in enumerate(antenna_ids):
-                mask = best_indices_numpy == i
-                results['best_server'][mask] = ant_id
+            # Best server compacto: raster uint16 de índices + tabla de IDs
+            results['best_server'] = ranking['best_server']
+            results['best_server_ids'] = antenna_ids
         
         # OPTIMIZACION: Convertir a CPU solo aquí, antes del return (una sola vez)
         if self.engine.use_gpu:
             if results['individual']:
-                results['rsrp'] = self.xp.asnumpy(results['rsrp'])
-                # best_server ya es NumPy (creado así porque dtype=object no se soporta en GPU)
+                for key in ('rsrp', 'best_server', 'second_rsrp', 'handover_margin', 'server_count'):
+                    results[key] = self.xp.asnumpy(results[key])
             for antenna_id in results['individual'].keys():
                 results['individual'][antenna_id] = self.xp.asnumpy(results['individual'][antenna_id])
 
         return results
     
+    def effective_height_service(self, n_azimuths: int = 360) -> EffectiveHeightService:
+        """
+        EffectiveHeightService compartido entre corridas.
+
+        Solo se recrea si cambia el número de sectores; así los radiales ya
+        muestreados por (TX, DEM) no se recalculan en cada simulación.
+        """
+        service = self._effective_height_service
+        if service is None or service.n_azimuths != int(n_azimuths):
+            service = EffectiveHeightService(n_azimuths=n_azimuths)
+            self._effective_height_service = service
+        return service
+
+    def batch_engine(self) -> BatchCoverageEngine:
+        """Motor por lotes (antenas × chunk de píxeles) sobre este calculador"""
+        return BatchCoverageEngine(self)
+
+    def _calculate_batched_coverage(self, antennas, grid_lats, grid_lons, terrain_heights,
+                                    model, model_params, terrain_loader):
+        """Ranking de servidores con BatchCoverageEngine (sin capas individuales)"""
+        active = [ant for ant in antennas if ant.enabled and ant.show_coverage]
+        results = {'individual': {}}
+        if not active:
+            return results
+
+        ranking = self.batch_engine().compute(
+            active, grid_lats, grid_lons, terrain_heights, model, model_params,
+            terrain_loader=terrain_loader,
+            k=self.server_ranking_k,
+            pollution_window_db=self.pollution_window_db
+        )
+        for key, name in (('rsrp', 'best_rsrp'), ('second_rsrp', 'second_rsrp'),
+                          ('handover_margin', 'handover_margin'),
+                          ('server_count', 'server_count'), ('best_server', 'best_server')):
+            value = ranking[name]
+            results[key] = self.xp.asnumpy(value) if self.engine.use_gpu else value
+        results['best_server_ids'] = ranking['best_server_ids']
+        return results
+
+    def calculate_points_coverage(
+        self,
+        antennas: List[Antenna],
+        lats,
+        lons,
+        model,
+        model_params: dict = None,
+        terrain_loader=None,
+        heights=None,
+        chunk_size: int = None,
+        footprint_culler=None,
+        adaptive_profiles: dict = None,
+        effective_height=None
+    ) -> Dict[str, object]:
+        """
+        Cobertura en un conjunto arbitrario de puntos (drive test, direcciones
+        de clientes) sin construir un raster.
+
+        Los puntos se recorren en bloques de chunk_size; cada bloque pasa por
+        los perfiles DEM, el modelo y el patrón de cada antena como un grid
+        1D, y el ranking de servidores se reduce en streaming (Top-K), de modo
+        que la memoria es O(puntos) más O(bloque x muestras de perfil).
+        Se evalúan las mismas antenas que en el raster (enabled y
+        show_coverage). Las optimizaciones por corrida (recorte por huella,
+        perfiles adaptativos, h_eff por acimut) no se leen del calculador, que
+        SimulationWorker reconfigura en cada simulación: se pasan como
+        argumentos y por defecto quedan desactivadas. Con footprint_culler y
+        un modelo puntual, cada antena evalúa solo los puntos dentro de su
+        radio de huella (fuera queda NaN).
+
+        La corrección DEM 2D de 3GPP (use_dem) opera sobre rasters y no se
+        aplica a puntos sueltos.
+
+        Args:
+            antennas: Lista de antenas (se evalúan las habilitadas y visibles)
+            lats, lons: Arrays (N,) de coordenadas de los puntos
+            model: Modelo de propagación
+            model_params: Parámetros adicionales para el modelo
+            terrain_loader: TerrainLoader para elevaciones y perfiles (opcional)
+            heights: Altura del receptor AGL [m], escalar o (N,) (default: la
+                     del modelo). Se agrupa por valor redondeado a 0.1 m
+            chunk_size: Puntos por bloque (default: self.point_chunk_size)
+            footprint_culler: FootprintCuller (None = todos los puntos)
+            adaptive_profiles: kwargs de get_adaptive_profiles (None = perfiles densos)
+            effective_height: EffectiveHeightService (None = perfiles por receptor)
+
+        Returns:
+            Dict con arrays (N,) en NumPy:
+            - 'rsrp': RSRP del mejor servidor [dBm] (NaN sin señal)
+            - 'best_server': uint16, índice en 'best_server_ids' (NO_SERVER sin señal)
+            - 'best_server_ids': Lista de antenna_ids
+            - 'path_loss', 'antenna_gain': del mejor servidor
+        """
+        xp = self.xp
+        model_params = dict(model_params or {})
+        chunk_size = int(chunk_size or self.point_chunk_size)
+        active = [ant for ant in antennas if ant.enabled and ant.show_coverage]
+
+        lats = np.asarray(lats, dtype=float).reshape(-1)
+        lons = np.asarray(lons, dtype=float).reshape(-1)
+        n_points = lats.size
+
+        # Orden por altura: cada bloque se parte en tramos contiguos de una sola
+        # altura (los modelos reciben la altura del móvil como escalar)
+        height_arg = getattr(model, 'RX_HEIGHT_ARG', 'mobile_height')
+        if heights is None:
+            order, point_heights = None, None
+        else:
+            point_heights = np.round(np.broadcast_to(np.asarray(heights, dtype=float), lats.shape), 1)
+            order = np.argsort(point_heights, kind='stable')
+            lats, lons, point_heights = lats[order], lons[order], point_heights[order]
+
+        culler = footprint_culler
+        if culler is not None and not culler.is_windowable(model):
+            culler = None
+
+        reducer = TopKServerReducer(
+            (n_points,), k=self.server_ranking_k, pollution_window_db=self.pollution_window_db,
+            track=('path_loss', 'antenna_gain'), xp=xp
+        )
+        self.logger.info(
+            f"Point coverage: {n_points} points x {len(active)} antennas, "
+            f"chunks of {chunk_size}"
+        )
+
+        for start in range(0, n_points, chunk_size):
+            stop = min(start + chunk_size, n_points)
+            if point_heights is None:
+                runs = [(start, stop, None)]
+            else:
+                cuts = start + 1 + np.flatnonzero(np.diff(point_heights[start:stop]))
+                bounds = [start, *cuts.tolist(), stop]
+                runs = [(a, b, float(point_heights[a])) for a, b in zip(bounds[:-1], bounds[1:])]
+
+            for run_start, run_stop, height in runs:
+                run_lats = lats[run_start:run_stop]
+                run_lons = lons[run_start:run_stop]
+                if terrain_loader is not None and terrain_loader.is_loaded():
+                    run_terrain = terrain_loader.get_elevations_fast(run_lats, run_lons)
+                else:
+                    run_terrain = np.zeros(run_lats.shape)
+                params = model_params if height is None else {**model_params, height_arg: height}
+
+                for index, antenna in enumerate(active):
+                    selected = slice(None)
+                    if culler is not None:
+                        distances = self._calculate_distances(
+                            antenna.latitude, antenna.longitude,
+                            xp.asarray(run_lats), xp.asarray(run_lons)
+                        )
+                        distances = xp.asnumpy(distances) if self.engine.use_gpu else distances
+                        radius = culler.radius_m(antenna, model, params, float(distances.max()))
+                        selected = np.flatnonzero(distances <= radius)
+                        if selected.size == 0:
+                            continue
+
+                    layer = self._evaluate_single_antenna(
+                        antenna, run_lats[selected], run_lons[selected], run_terrain[selected],
+                        model, params, True, terrain_loader,
+                        adaptive_profiles=adaptive_profiles, effective_height=effective_height
+                    )
+                    if isinstance(selected, slice):
+                        values = layer
+                    else:
+                        values = {}
+                        for name in ('rsrp', 'path_loss', 'antenna_gain'):
+                            full = xp.full(run_lats.shape, xp.nan)
+                            full[xp.asarray(selected)] = xp.broadcast_to(
+                                xp.asarray(layer[name], dtype=float), (selected.size,))
+                            values[name] = full
+
+                    reducer.update_block(
+                        [index], values['rsrp'][None], start=run_start,
+                        tracked={name: xp.broadcast_to(
+                            xp.asarray(values[name], dtype=float), (run_stop - run_start,))[None]
+                            for name in ('path_loss', 'antenna_gain')}
+                    )
+            self.logger.debug(f"Point coverage: {stop}/{n_points} points")
+
+        ranking = reducer.finalize()
+        results = {'best_server_ids': [ant.id for ant in active]}
+        for key, name in (('rsrp', 'best_rsrp'), ('best_server', 'best_server'),
+                          ('path_loss', 'path_loss'), ('antenna_gain', 'antenna_gain')):
+            value = ranking[name]
+            value = xp.asnumpy(value) if self.engine.use_gpu else value
+            if order is not None:
+                restored = np.empty_like(value)
+                restored[order] = value
+                value = restored
+            results[key] = value
+        return results
+
+    @staticmethod
+    def _grid_pixel(lat, lon, grid_lats, grid_lons):
+        """
+        Posición (fila, columna) fraccionaria de (lat, lon) en un grid regular.
+
+        Resuelve el paso por fila/columna del grid, de modo que sirve para
+        grids indexados 'ij' o 'xy' y para puntos fuera del grid (ventanas
+        recortadas por footprint). None si el grid no tiene 2x2 píxeles.
+        """
+        if grid_lats.ndim != 2 or min(grid_lats.shape) < 2:
+            return None
+        lat0, lon0 = float(grid_lats[0, 0]), float(grid_lons[0, 0])
+        step = np.array([
+            [float(grid_lats[1, 0]) - lat0, float(grid_lats[0, 1]) - lat0],
+            [float(grid_lons[1, 0]) - lon0, float(grid_lons[0, 1]) - lon0],
+        ])
+        if abs(np.linalg.det(step)) < 1e-30:
+            return None
+        row, col = np.linalg.solve(step, [float(lat) - lat0, float(lon) - lon0])
+        return float(row), float(col)
+
+    def _grid_morphology(self, terrain_loader, grid_lats, grid_lons, layers) -> Dict:
+        """
+        Capas de TerrainMorphology en los píxeles del grid (memo del último grid).
+
+        Returns:
+            Dict capa -> array en self.xp con la forma del grid
+        """
+        morphology = terrain_loader.get_morphology()
+        memo = self._morphology_memo
+        if (memo is not None and memo[0] is morphology
+                and memo[1] is grid_lats and memo[2] is grid_lons
+                and all(layer in memo[3] for layer in layers)):
+            return memo[3]
+
+        lats = self.xp.asnumpy(grid_lats) if self.engine.use_gpu else grid_lats
+        lons = self.xp.asnumpy(grid_lons) if self.engine.use_gpu else grid_lons
+        sampled = terrain_loader.sample_morphology(lats, lons, tuple(layers))
+        sampled = {name: self.xp.asarray(values) for name, values in sampled.items()}
+        self._morphology_memo = (morphology, grid_lats, grid_lons, sampled)
+        return sampled
+
+    def _site_distances(self, ant_lat, ant_lon, grid_lats, grid_lons):
+        """
+        Distancias sitio -> grid memoizadas por ubicación y por identidad del grid.
+
+        El array retornado es de solo lectura y se comparte entre llamadas.
+        """
+        key = (float(ant_lat), float(ant_lon), id(grid_lats), id(grid_lons))
+        entry = self._distance_memo.get(key)
+        if entry is not None and entry[0] is grid_lats and entry[1] is grid_lons:
+            self._distance_memo.move_to_end(key)
+            return entry[2]
+
+        distances = self._calculate_distances(ant_lat, ant_lon, grid_lats, grid_lons)
+        if self.distance_memo_size <= 0:
+            return distances
+        if isinstance(distances, np.ndarray):
+            distances.setflags(write=False)
+        self._distance_memo[key] = (grid_lats, grid_lons, distances)
+        while len(self._distance_memo) > self.distance_memo_size:
+            self._distance_memo.popitem(last=False)
+        return distances
+
     def _calculate_distances(self, ant_lat, ant_lon, grid_lats, grid_lons):
         """Calcula distancias usando fórmula Haversine"""
         R = 6371000  # Radio tierra en metros
@@ -351,7 +740,7 @@ class CoverageCalculator:
             terrain_heights_gpu = terrain_heights
 
         # Calcular distancias
-        distances = self._calculate_distances(
+        distances = self._site_distances(
             antenna.latitude, antenna.longitude,
             grid_lats_gpu, grid_lons_gpu
         )
@@ -384,7 +773,8 @@ class CoverageCalculator:
         # Agregar parámetros adicionales del modelo (Okumura-Hata)
         path_loss_args.update(model_params)
 
-        result = model.calculate_path_loss(**path_loss_args)
+        with self.engine.jit_scope():
+            result = model.calculate_path_loss(**path_loss_args)
         # Algunos modelos retornan dict, otros ndarray directamente
         path_loss = result['path_loss'] if isinstance(result, dict) else result
 
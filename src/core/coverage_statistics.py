@@ -0,0 +1,295 @@
+"""
+Estadísticas de cobertura en una sola pasada (histogramas de bins fijos)
+
+El análisis se limitaba a min/max/media del agregado y el rango del colormap
+salía de dos np.percentile por capa (cada uno ordena una copia de los valores
+válidos). Aquí cada capa se recorre una vez, por bloques de píxeles (sirve
+para memmaps y arrays de GPU), acumulando:
+
+    histograma de RSRP con bins fijos (por píxel y por área real)
+    área con RSRP >= cada umbral
+    área servida por cada best server (bincount ponderado por área)
+    mínimo, máximo y media exactos
+
+Los percentiles se interpolan dentro del bin de la CDF acumulada (error <=
+ancho de bin). Con bins fijos los histogramas de distintas capas o bloques se
+suman directamente (merge).
+
+El área de cada píxel sale del grid geográfico: en un grid lat/lon regular el
+píxel mide |det(paso)| grados², es decir
+
+    A = |Δlat·Δlon| · (π R / 180)² · cos(lat)   [m²]
+
+de modo que los píxeles cerca del borde norte/sur no pesan lo mismo que los
+del centro cuando el grid cubre mucha latitud.
+"""
+
+import logging
+import math
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+EARTH_RADIUS_M = 6371000.0
+
+
+def pixel_area_deg2(grid_lats, grid_lons) -> Optional[float]:
+    """
+    Área de un píxel en grados² (|det| de la matriz de paso del grid).
+
+    Returns:
+        Área en grados² o None si el grid no es 2D de al menos 2x2
+    """
+    if np.ndim(grid_lats) != 2 or min(np.shape(grid_lats)) < 2:
+        return None
+    lat0, lon0 = float(grid_lats[0, 0]), float(grid_lons[0, 0])
+    step = np.array([
+        [float(grid_lats[1, 0]) - lat0, float(grid_lats[0, 1]) - lat0],
+        [float(grid_lons[1, 0]) - lon0, float(grid_lons[0, 1]) - lon0],
+    ])
+    area = abs(float(np.linalg.det(step)))
+    return area if area > 0.0 else None
+
+
+class CoverageStatistics:
+    """Acumulador de histograma, áreas por umbral y área servida por capa"""
+
+    DEFAULT_RANGE_DBM = (-160.0, -20.0)
+    DEFAULT_BIN_DB = 0.5
+    DEFAULT_THRESHOLDS_DBM = (-120.0, -110.0, -100.0, -90.0, -80.0)
+    DEFAULT_PERCENTILES = (5.0, 10.0, 50.0, 90.0, 95.0)
+
+    def __init__(self, value_range=DEFAULT_RANGE_DBM, bin_width_db: float = DEFAULT_BIN_DB,
+                 thresholds_dbm: Iterable[float] = DEFAULT_THRESHOLDS_DBM,
+                 n_servers: int = 0, tile_pixels: int = 262144, xp=None):
+        """
+        Args:
+            value_range: (min, max) de los bins [dBm]; los valores fuera caen
+                         en el primer/último bin (min/max se guardan exactos)
+            bin_width_db: Ancho de bin [dB]
+            thresholds_dbm: Umbrales de área cubierta [dBm]
+            n_servers: Número de servidores para el área servida (0: no se acumula)
+            tile_pixels: Píxeles por bloque
+            xp: Módulo numérico (np o cp). Default: np
+        """
+        self.low = float(value_range[0])
+        self.bin_width_db = float(bin_width_db)
+        self.n_bins = max(int(math.ceil((float(value_range[1]) - self.low) / self.bin_width_db)), 1)
+        self.thresholds_dbm = [float(t) for t in thresholds_dbm]
+        self.n_servers = int(n_servers)
+        self.tile_pixels = max(int(tile_pixels), 1)
+        self.xp = xp if xp is not None else np
+        self.logger = logging.getLogger("CoverageStatistics")
+
+        # Umbrales sobre un borde de bin interior: el área sale del histograma
+        self._threshold_bins = []
+        for threshold in self.thresholds_dbm:
+            edge = (threshold - self.low) / self.bin_width_db
+            aligned = abs(edge - round(edge)) < 1e-9 and 1 <= round(edge) < self.n_bins
+            self._threshold_bins.append(int(round(edge)) if aligned else None)
+
+        self.histogram = np.zeros(self.n_bins, dtype=np.int64)
+        self.histogram_area = np.zeros(self.n_bins)
+        self.area_above = np.zeros(len(self.thresholds_dbm))
+        self.served_area = np.zeros(self.n_servers)
+        self.total_pixels = 0
+        self.total_area = 0.0
+        self.valid_pixels = 0
+        self.valid_area = 0.0
+        self.value_sum = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    # ------------------------------------------------------------------
+    # Acumulación
+    # ------------------------------------------------------------------
+
+    def update(self, values, pixel_area=None, best_server=None):
+        """
+        Acumula un bloque de píxeles.
+
+        Args:
+            values: RSRP [dBm] del bloque (NaN/-inf: sin señal)
+            pixel_area: Área por píxel [m²], escalar o con la forma de values
+                        (None: 1 por píxel)
+            best_server: Índices de best server del bloque (uint16, NO_SERVER
+                         o cualquier valor >= n_servers se ignora)
+        """
+        xp = self.xp
+        values = xp.asarray(values, dtype=float).reshape(-1)
+        n = int(values.size)
+        if pixel_area is None:
+            area = xp.ones(n)
+        else:
+            area = xp.asarray(pixel_area, dtype=float)
+            area = area.reshape(-1) if area.ndim else xp.full(n, float(area))
+
+        finite = xp.isfinite(values)
+        valid = values[finite]
+        valid_area = area[finite]
+        bins = xp.clip(xp.floor((valid - self.low) / self.bin_width_db).astype(xp.int64), 0, self.n_bins - 1)
+
+        self.histogram += self._to_numpy(xp.bincount(bins, minlength=self.n_bins))
+        self.histogram_area += self._to_numpy(xp.bincount(bins, weights=valid_area, minlength=self.n_bins))
+        for t, threshold in enumerate(self.thresholds_dbm):
+            if self._threshold_bins[t] is None:
+                self.area_above[t] += float(valid_area[valid >= threshold].sum())
+
+        if best_server is not None and self.n_servers:
+            servers = xp.asarray(best_server).reshape(-1).astype(xp.int64)
+            served = servers < self.n_servers
+            self.served_area += self._to_numpy(
+                xp.bincount(servers[served], weights=area[served], minlength=self.n_servers)
+            )[:self.n_servers]
+
+        self.total_pixels += n
+        self.total_area += float(area.sum())
+        if valid.size:
+            self.valid_pixels += int(valid.size)
+            self.valid_area += float(valid_area.sum())
+            self.value_sum += float(valid.sum())
+            self.minimum = min(self.minimum, float(valid.min()))
+            self.maximum = max(self.maximum, float(valid.max()))
+
+    def accumulate(self, values, grid_lats=None, grid_lons=None, best_server=None) -> 'CoverageStatistics':
+        """
+        Recorre una capa completa por bloques (sin copiar memmaps).
+
+        Args:
+            values: Capa RSRP [dBm] (array, memmap o array de GPU)
+            grid_lats, grid_lons: Grid geográfico de la capa (área real por
+                                  píxel); sin grid cada píxel pesa 1
+            best_server: Raster de best server con la forma de values (opcional)
+
+        Returns:
+            self
+        """
+        flat = values.reshape(-1)
+        server_flat = best_server.reshape(-1) if best_server is not None else None
+        cell_deg2 = pixel_area_deg2(grid_lats, grid_lons) if grid_lats is not None else None
+        lats_flat = grid_lats.reshape(-1) if cell_deg2 is not None else None
+        scale = cell_deg2 * (math.pi * EARTH_RADIUS_M / 180.0) ** 2 if cell_deg2 is not None else None
+
+        for start in range(0, int(flat.size), self.tile_pixels):
+            stop = min(start + self.tile_pixels, int(flat.size))
+            area = None
+            if scale is not None:
+                area = scale * self.xp.cos(self.xp.radians(self.xp.asarray(lats_flat[start:stop], dtype=float)))
+            self.update(
+                flat[start:stop], pixel_area=area,
+                best_server=server_flat[start:stop] if server_flat is not None else None
+            )
+        return self
+
+    def merge(self, other: 'CoverageStatistics') -> 'CoverageStatistics':
+        """Suma otro acumulador con los mismos bins y umbrales"""
+        if (other.low, other.bin_width_db, other.n_bins) != (self.low, self.bin_width_db, self.n_bins) \
+                or other.thresholds_dbm != self.thresholds_dbm:
+            raise ValueError("Los acumuladores deben tener los mismos bins y umbrales")
+        self.histogram += other.histogram
+        self.histogram_area += other.histogram_area
+        self.area_above += other.area_above
+        if other.n_servers == self.n_servers:
+            self.served_area += other.served_area
+        self.total_pixels += other.total_pixels
+        self.total_area += other.total_area
+        self.valid_pixels += other.valid_pixels
+        self.valid_area += other.valid_area
+        self.value_sum += other.value_sum
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+        return self
+
+    # ------------------------------------------------------------------
+    # Resultados
+    # ------------------------------------------------------------------
+
+    def areas_above(self) -> np.ndarray:
+        """Área [m²] con RSRP >= cada umbral"""
+        areas = self.area_above.copy()
+        suffix = np.cumsum(self.histogram_area[::-1])[::-1]
+        for t, first_bin in enumerate(self._threshold_bins):
+            if first_bin is not None:
+                areas[t] = suffix[first_bin]
+        return areas
+
+    def percentile(self, p: float, by_area: bool = False) -> float:
+        """
+        Percentil p (0-100) interpolado en la CDF del histograma.
+
+        Args:
+            p: Percentil
+            by_area: Si es True la CDF se pondera por área real del píxel
+
+        Returns:
+            Valor [dBm] (NaN si no hay píxeles válidos)
+        """
+        weights = self.histogram_area if by_area else self.histogram.astype(float)
+        total = float(weights.sum())
+        if total <= 0.0:
+            return math.nan
+        cdf = np.cumsum(weights)
+        target = min(max(float(p), 0.0), 100.0) / 100.0 * total
+        index = min(int(np.searchsorted(cdf, target, side='left')), self.n_bins - 1)
+        below = float(cdf[index - 1]) if index > 0 else 0.0
+        fraction = (target - below) / float(weights[index]) if weights[index] > 0 else 0.0
+        value = self.low + (index + fraction) * self.bin_width_db
+        return min(max(value, self.minimum), self.maximum)
+
+    def display_range(self, low_percentile: float = 5.0, high_percentile: float = 95.0,
+                      floor_dbm: float = -120.0, ceiling_dbm: float = -20.0,
+                      min_span_db: float = 20.0):
+        """Rango (vmin, vmax) del colormap desde los percentiles del histograma"""
+        if self.valid_pixels == 0:
+            return -120, -60
+        vmin = max(self.percentile(low_percentile), floor_dbm)
+        vmax = min(self.percentile(high_percentile), ceiling_dbm)
+        # Garantizar un rango visible mínimo
+        if vmax - vmin < min_span_db:
+            vmin = vmax - min_span_db
+        return vmin, vmax
+
+    def summary(self, percentiles: Iterable[float] = DEFAULT_PERCENTILES,
+                server_ids: Optional[List[str]] = None) -> Dict[str, object]:
+        """
+        Resumen serializable a JSON (para result_store, exportación y UI).
+
+        Returns:
+            Dict con conteos, áreas [km²], min/max/media, percentiles por área,
+            área sobre cada umbral, histograma y área servida por servidor
+        """
+        km2 = 1e-6
+        total_area = max(self.total_area, 1e-12)
+        area_above = self.areas_above()
+        percentiles = [float(p) for p in percentiles]
+        result = {
+            'total_pixels': int(self.total_pixels),
+            'valid_pixels': int(self.valid_pixels),
+            'total_area_km2': self.total_area * km2,
+            'valid_area_km2': self.valid_area * km2,
+            'min_dbm': self.minimum if self.valid_pixels else None,
+            'max_dbm': self.maximum if self.valid_pixels else None,
+            'mean_dbm': self.value_sum / self.valid_pixels if self.valid_pixels else None,
+            'percentiles': percentiles,
+            'percentile_values_dbm': [self.percentile(p, by_area=True) for p in percentiles],
+            'thresholds_dbm': list(self.thresholds_dbm),
+            'area_above_km2': [float(a) * km2 for a in area_above],
+            'fraction_above': [float(a) / total_area for a in area_above],
+            'histogram_start_dbm': self.low,
+            'histogram_bin_db': self.bin_width_db,
+            'histogram': self.histogram.tolist(),
+        }
+        if self.n_servers:
+            result['served_area_km2'] = [float(a) * km2 for a in self.served_area]
+            if server_ids is not None:
+                result['server_ids'] = list(server_ids)
+        return result
+
+    @classmethod
+    def of_layer(cls, values, grid_lats=None, grid_lons=None, best_server=None,
+                 n_servers: int = 0, **kwargs) -> 'CoverageStatistics':
+        """Acumulador de una capa completa (atajo de accumulate)"""
+        return cls(n_servers=n_servers, **kwargs).accumulate(values, grid_lats, grid_lons, best_server)
+
+    def _to_numpy(self, array):
+        return self.xp.asnumpy(array) if self.xp is not np else array
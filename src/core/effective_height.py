@@ -0,0 +1,170 @@
+"""
+Altura efectiva de la estación base por sectores de acimut (familia Hata)
+
+z_ref, la altura media del terreno entre 3 y 15 km del TX, es una
+estadística de la dirección radial: los receptores de un mismo rumbo la
+comparten. En lugar de extraer un perfil de 50 muestras por píxel y
+promediarlo con nanmean sobre arrays (N, S) enmascarados, se muestrean
+n_azimuths radiales densos (al paso del píxel del DEM) una vez por (TX, DEM)
+y se guardan sus sumas acumuladas:
+
+    z_ref[b]        media del radial b en [inner_km, outer_km]
+    z_ref[b, d]     fallback si el anillo no tiene DEM suficiente: media del
+                    radial en [0, d], O(1) con la suma acumulada
+
+Cada receptor toma el valor del sector de su rumbo y
+h_b,eff = h_tx + z_tx - z_ref. El trabajo sobre el DEM es
+n_azimuths x (outer_km / paso) muestras, independiente de la resolución del grid.
+"""
+
+import json
+import logging
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+M_PER_DEG = 6371000.0 * math.pi / 180.0  # Metros por grado de latitud (esfera media)
+
+
+class AzimuthTerrainStats:
+    """Sumas acumuladas del terreno en n_azimuths radiales desde un TX"""
+
+    def __init__(self, tx_lat: float, tx_lon: float, elevations, spacing_m: float,
+                 inner_km: float, outer_km: float, min_samples: int):
+        """
+        Args:
+            tx_lat, tx_lon: Ubicación del TX [°]
+            elevations: Array (n_azimuths, n_samples) del terreno a distancias
+                k * spacing_m (NaN fuera del DEM); el radial b apunta a 360·b/n_azimuths °
+            spacing_m: Paso radial [m]
+            inner_km, outer_km: Anillo de z_ref [km]
+            min_samples: Muestras válidas mínimas en el anillo
+        """
+        self.tx_lat = float(tx_lat)
+        self.tx_lon = float(tx_lon)
+        self.spacing_m = float(spacing_m)
+        self.n_azimuths, n_samples = elevations.shape
+
+        valid = np.isfinite(elevations)
+        zeros = np.zeros((self.n_azimuths, 1))
+        self.cum_sum = np.concatenate((zeros, np.cumsum(np.where(valid, elevations, 0.0), axis=1)), axis=1)
+        self.cum_count = np.concatenate((zeros, np.cumsum(valid, axis=1)), axis=1)
+
+        first = min(int(math.ceil(inner_km * 1000.0 / self.spacing_m)), n_samples)
+        count = self.cum_count[:, -1] - self.cum_count[:, first]
+        total = self.cum_sum[:, -1] - self.cum_sum[:, first]
+        self.annulus_mean = np.where(count >= min_samples, total / np.maximum(count, 1), np.nan)
+
+    def locate(self, rx_lats, rx_lons):
+        """
+        Sector de acimut y distancia de cada receptor (proyección local del TX).
+
+        Returns:
+            (bins, distances_m): arrays (N,)
+        """
+        dy = (np.ravel(rx_lats) - self.tx_lat) * M_PER_DEG
+        dx = (np.ravel(rx_lons) - self.tx_lon) * M_PER_DEG * math.cos(math.radians(self.tx_lat))
+        sector = 2.0 * math.pi / self.n_azimuths
+        bins = np.rint(np.arctan2(dx, dy) / sector).astype(np.int64) % self.n_azimuths
+        return bins, np.hypot(dx, dy)
+
+    def terrain_reference(self, rx_lats, rx_lons, fallback: float):
+        """
+        z_ref por receptor [m MSL].
+
+        Args:
+            rx_lats, rx_lons: Coordenadas de los receptores
+            fallback: z_ref de radiales sin ninguna muestra de DEM (ej. z_tx)
+
+        Returns:
+            Array (N,) con z_ref
+        """
+        bins, distances = self.locate(rx_lats, rx_lons)
+        z_ref = self.annulus_mean[bins]
+
+        short = np.isnan(z_ref)
+        if short.any():
+            # Anillo sin DEM suficiente: media del radial hasta el receptor
+            last = self.cum_sum.shape[1] - 1
+            stop = np.minimum(np.floor(distances[short] / self.spacing_m).astype(np.int64) + 1, last)
+            count = self.cum_count[bins[short], stop]
+            total = self.cum_sum[bins[short], stop]
+            z_ref[short] = np.where(count > 0, total / np.maximum(count, 1), fallback)
+        return z_ref
+
+
+class EffectiveHeightService:
+    """z_ref y h_b,eff por sector de acimut, memoizados por (TX, DEM)"""
+
+    def __init__(self, n_azimuths: int = 360, inner_km: float = 3.0, outer_km: float = 15.0,
+                 sample_spacing_m: float = None, min_samples: int = 10, cache_size: int = 16):
+        """
+        Args:
+            n_azimuths: Número de sectores (radiales) alrededor del TX
+            inner_km, outer_km: Anillo de z_ref [km]
+            sample_spacing_m: Paso radial [m] (default: tamaño de píxel del DEM)
+            min_samples: Muestras válidas mínimas del anillo; con menos se usa
+                la media del radial hasta el receptor
+            cache_size: Estadísticas (TX, DEM) retenidas
+        """
+        self.n_azimuths = int(n_azimuths)
+        self.inner_km = float(inner_km)
+        self.outer_km = max(float(outer_km), self.inner_km)
+        self.sample_spacing_m = sample_spacing_m
+        self.min_samples = int(min_samples)
+        self.cache_size = int(cache_size)
+        self.logger = logging.getLogger("EffectiveHeightService")
+        self._cache = OrderedDict()  # (identidad DEM, lat, lon) -> (DEM, AzimuthTerrainStats)
+
+    def statistics(self, terrain_loader, tx_lat: float, tx_lon: float) -> AzimuthTerrainStats:
+        """
+        Radiales del TX sobre el DEM de terrain_loader (memoizados).
+
+        La memo usa TerrainLoader.get_identity() (ruta, tamaño, mtime, forma):
+        el mismo archivo recargado en otro TerrainLoader reutiliza los radiales.
+        Sin identidad (DEM en memoria) se exige el mismo array.
+        """
+        data = terrain_loader.data
+        get_identity = getattr(terrain_loader, 'get_identity', None)
+        identity = get_identity() if get_identity is not None else None
+        dem_key = json.dumps(identity, sort_keys=True) if identity is not None else id(data)
+        key = (dem_key, round(float(tx_lat), 7), round(float(tx_lon), 7))
+        entry = self._cache.get(key)
+        if entry is not None and (identity is not None or entry[0] is data):
+            self._cache.move_to_end(key)
+            return entry[1]
+
+        spacing = self.sample_spacing_m or terrain_loader.pixel_size_m() or 30.0
+        n_samples = int(self.outer_km * 1000.0 // spacing) + 1
+        radii = np.arange(n_samples) * spacing
+        azimuths = np.arange(self.n_azimuths) * (2.0 * math.pi / self.n_azimuths)
+
+        lats = tx_lat + np.outer(np.cos(azimuths), radii) / M_PER_DEG
+        lons = tx_lon + np.outer(np.sin(azimuths), radii) / (M_PER_DEG * math.cos(math.radians(tx_lat)))
+        elevations = terrain_loader.get_elevations_fast(lats, lons, nodata=np.nan)
+
+        stats = AzimuthTerrainStats(tx_lat, tx_lon, elevations, spacing,
+                                    self.inner_km, self.outer_km, self.min_samples)
+        self.logger.info(
+            f"Azimuth terrain stats: {self.n_azimuths} radials x {n_samples} samples "
+            f"@ {spacing:.1f} m, {int(np.isnan(stats.annulus_mean).sum())} sectors "
+            f"without [{self.inner_km:g}-{self.outer_km:g} km] coverage"
+        )
+
+        self._cache[key] = (data, stats)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return stats
+
+    def effective_height(self, terrain_loader, tx_lat: float, tx_lon: float,
+                         tx_height: float, tx_elevation: float, rx_lats, rx_lons):
+        """
+        h_b,eff = h_tx + z_tx - z_ref del sector de cada receptor.
+
+        Returns:
+            Array con h_b,eff [m] y la forma de rx_lats
+        """
+        stats = self.statistics(terrain_loader, tx_lat, tx_lon)
+        z_ref = stats.terrain_reference(rx_lats, rx_lons, fallback=float(tx_elevation))
+        return (float(tx_height) + float(tx_elevation) - z_ref).reshape(np.shape(rx_lats))
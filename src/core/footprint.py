@@ -0,0 +1,202 @@
+"""
+Recorte por huella (link budget) de la evaluación por antena
+
+El grid global de la simulación cubre todas las antenas; una small cell en un
+extremo no puede aportar señal útil en el otro. Antes de correr el modelo se
+acota, por antena, la ventana de píxeles donde el RSRP puede superar un piso
+(ej. -130 dBm) con una cota optimista:
+
+    RSRP(d) <= P_tx + G_max + margen - PL_opt(d)
+
+    - PL_opt = FSPL (cota inferior del path loss de los modelos terrestres;
+      el margen cubre correcciones locales como TCA o clutter negativo)
+    - para modelos independientes del terreno (ver BatchCoverageEngine.supports)
+      se usa además la curva radial del propio modelo, que da un radio mucho
+      más ajustado que FSPL
+
+El radio resultante se convierte en la caja lat/lon del casquete esférico y
+en un rango de filas/columnas del grid rectilíneo. El modelo solo se evalúa
+dentro de la ventana; fuera la capa queda en NaN (sin señal).
+
+Solo se recortan modelos puntuales (el path loss de un píxel no depende de
+otros píxeles): con estadísticas del grid completo (media global de terreno
+de Okumura-Hata/COST-231) o corrección DEM 2D, la ventana cambiaría el
+resultado y se evalúa el grid completo.
+"""
+
+import logging
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+
+from core.batch_engine import BatchCoverageEngine
+
+EARTH_RADIUS_M = 6371000.0
+
+
+class FootprintCuller:
+    """Ventana de píxeles por antena a partir de un link budget optimista"""
+
+    DEFAULT_FLOOR_DBM = -130.0
+    DEFAULT_MARGIN_DB = 6.0
+    RADIAL_SAMPLES = 256  # Muestras log-espaciadas de la curva radial del modelo
+
+    # Modelos cuyo path loss por píxel no depende del resto del grid
+    POINTWISE_MODELS = ('FreeSpacePathLossModel', 'ITUR_P1546Model', 'ThreGPP38901Model')
+
+    def __init__(self, floor_dbm: float = DEFAULT_FLOOR_DBM,
+                 margin_db: float = DEFAULT_MARGIN_DB):
+        """
+        Args:
+            floor_dbm: Piso de RSRP [dBm]; fuera de la huella la señal es menor
+            margin_db: Margen sumado a la cota optimista [dB]
+        """
+        self.floor_dbm = float(floor_dbm)
+        self.margin_db = float(margin_db)
+        self.logger = logging.getLogger("FootprintCuller")
+        self._axes_memo = None  # (grid_lats, grid_lons, ejes)
+
+    @classmethod
+    def is_windowable(cls, model) -> bool:
+        """True si evaluar el modelo en una sub-ventana no altera sus valores"""
+        name = model.__class__.__name__
+        if name not in cls.POINTWISE_MODELS:
+            return False
+        return not (name == 'ThreGPP38901Model' and getattr(model, 'use_dem', False))
+
+    def radius_m(self, antenna, model, model_params: dict = None,
+                 max_distance_m: float = None) -> float:
+        """
+        Distancia [m] más allá de la cual el RSRP queda bajo floor_dbm.
+
+        Args:
+            antenna: Objeto Antenna
+            model: Modelo de propagación
+            model_params: Parámetros del modelo (para la curva radial)
+            max_distance_m: Distancia máxima de interés (extremo de la curva)
+
+        Returns:
+            Radio en metros (inf si la cota no acota dentro de max_distance_m)
+        """
+        budget_db = antenna.tx_power_dbm + antenna.gain_dbi + self.margin_db - self.floor_dbm
+
+        # FSPL(d) = 20·log10(d_km) + 20·log10(f_MHz) + 32.45
+        exponent = (budget_db - 32.45 - 20 * math.log10(antenna.frequency_mhz)) / 20
+        radius = 1000.0 * 10 ** min(exponent, 10.0)
+
+        if max_distance_m and BatchCoverageEngine.supports(model):
+            radius = min(radius, self._model_radius_m(
+                antenna, model, model_params or {}, budget_db, max_distance_m
+            ))
+        return radius
+
+    def window(self, antenna, grid_lats, grid_lons, model,
+               model_params: dict = None) -> Optional[Tuple[slice, slice]]:
+        """
+        Ventana (filas, columnas) del grid donde la antena puede superar el piso.
+
+        Returns:
+            Tupla de slices o None si no se puede recortar (modelo no puntual,
+            grid no rectilíneo o la huella cubre el grid completo)
+        """
+        if not self.is_windowable(model):
+            return None
+        axes = self._grid_axes(grid_lats, grid_lons)
+        if axes is None:
+            return None
+        lat_dim, lat_axis, lon_dim, lon_axis = axes
+
+        max_distance = self._max_distance_m(antenna, lat_axis, lon_axis)
+        radius = self.radius_m(antenna, model, model_params, max_distance)
+        if radius >= max_distance:
+            return None
+
+        # Caja lat/lon del casquete esférico de radio 'radius'
+        angular = radius / EARTH_RADIUS_M
+        lat0 = math.radians(antenna.latitude)
+        dlat = math.degrees(angular)
+        sin_ratio = math.sin(angular) / max(math.cos(lat0), 1e-12)
+        dlon = math.degrees(math.asin(sin_ratio)) if sin_ratio < 1.0 else 180.0
+
+        ranges = [None, None]
+        ranges[lat_dim] = self._axis_range(lat_axis, antenna.latitude - dlat, antenna.latitude + dlat)
+        ranges[lon_dim] = self._axis_range(lon_axis, antenna.longitude - dlon, antenna.longitude + dlon)
+
+        self.logger.debug(
+            f"Footprint {antenna.name}: radius={radius / 1000:.2f} km, "
+            f"window={ranges[0].stop - ranges[0].start}x{ranges[1].stop - ranges[1].start} "
+            f"of {grid_lats.shape}"
+        )
+        return ranges[0], ranges[1]
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _model_radius_m(self, antenna, model, model_params, budget_db, max_distance_m) -> float:
+        """Radio según la curva radial del modelo (independiente del terreno)"""
+        xp = getattr(model, 'xp', np)
+        distances = np.geomspace(1.0, max_distance_m, self.RADIAL_SAMPLES)
+
+        path_loss_args = {
+            'distances': xp.asarray(distances),
+            'frequency': antenna.frequency_mhz,
+            'tx_height': antenna.height_agl,
+            'terrain_heights': None,
+        }
+        path_loss_args.update(model_params)
+        result = model.calculate_path_loss(**path_loss_args)
+        path_loss = result['path_loss'] if isinstance(result, dict) else result
+        path_loss = xp.asnumpy(path_loss) if hasattr(xp, 'asnumpy') else np.asarray(path_loss)
+
+        # Última muestra por encima del piso; el radio es la muestra siguiente
+        reachable = np.flatnonzero(budget_db - path_loss >= 0.0)
+        if reachable.size == 0:
+            return distances[0]
+        last = int(reachable[-1])
+        return distances[last + 1] if last + 1 < distances.size else math.inf
+
+    def _grid_axes(self, grid_lats, grid_lons):
+        """
+        Ejes 1D de un grid rectilíneo (memoizado por identidad del grid).
+
+        Returns:
+            (dim_lat, eje_lat, dim_lon, eje_lon) o None si el grid no es rectilíneo
+        """
+        memo = self._axes_memo
+        if memo is not None and memo[0] is grid_lats and memo[1] is grid_lons:
+            return memo[2]
+
+        axes = None
+        lats, lons = np.asarray(grid_lats), np.asarray(grid_lons)
+        if lats.ndim == 2 and lats.shape == lons.shape and lats.size > 0:
+            if (lats == lats[:1, :]).all() and (lons == lons[:, :1]).all():
+                axes = (1, lats[0, :], 0, lons[:, 0])
+            elif (lats == lats[:, :1]).all() and (lons == lons[:1, :]).all():
+                axes = (0, lats[:, 0], 1, lons[0, :])
+
+        self._axes_memo = (grid_lats, grid_lons, axes)
+        return axes
+
+    @staticmethod
+    def _max_distance_m(antenna, lat_axis, lon_axis) -> float:
+        """Distancia Haversine de la antena a la esquina más lejana del grid"""
+        lat1 = math.radians(antenna.latitude)
+        farthest = 0.0
+        for lat in (lat_axis.min(), lat_axis.max()):
+            for lon in (lon_axis.min(), lon_axis.max()):
+                lat2 = math.radians(lat)
+                dlat = lat2 - lat1
+                dlon = math.radians(lon - antenna.longitude)
+                a = math.sin(dlat / 2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2)**2
+                farthest = max(farthest, 2 * EARTH_RADIUS_M * math.asin(min(math.sqrt(a), 1.0)))
+        return farthest
+
+    @staticmethod
+    def _axis_range(axis, low, high) -> slice:
+        """Rango contiguo de índices del eje con valores en [low, high]"""
+        inside = np.flatnonzero((axis >= low) & (axis <= high))
+        if inside.size == 0:
+            return slice(0, 0)
+        return slice(int(inside[0]), int(inside[-1]) + 1)
@@ -0,0 +1,223 @@
+"""
+Motor de interferencia co-canal (RSSI / SINR)
+
+Calcula mapas de SINR y RSSI a partir de las capas RSRP individuales de cada
+antena. Las capas se recorren en streaming, agrupadas por portadora
+(frequency_mhz, bandwidth_mhz), acumulando potencia en escala lineal con
+buffers float32 y por bloques (tiles) de píxeles. Nunca se mantienen todas las
+capas en escala lineal a la vez: la memoria adicional es O(grupos × tile).
+
+Definiciones (por elemento de recurso, RS-SINR):
+    S      = RSRP de la celda servidora (la más fuerte de la portadora)
+    I      = carga · Σ RSRP de las demás celdas co-canal
+    N_RE   = -174 dBm/Hz + 10·log10(Δf_sc) + NF
+    SINR   = S / (I + N_RE)
+    RSSI   = (S + carga · Σ RSRP de las demás) · N_subportadoras + N_BW
+
+La carga solo escala a las celdas interferentes: la servidora transmite a
+plena potencia hacia el píxel que atiende.
+
+El píxel se asigna a la portadora cuya celda servidora tiene mayor RSRP.
+"""
+
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class InterferenceEngine:
+    """Calcula SINR y RSSI sumando interferencia co-canal en potencia lineal"""
+
+    THERMAL_NOISE_DBM_HZ = -174.0
+    SUBCARRIER_SPACING_HZ = 15e3
+    BANDWIDTH_OCCUPANCY = 0.9  # fracción del canal ocupada por subportadoras
+
+    def __init__(self, noise_figure_db: float = 7.0, load_factor: float = 1.0,
+                 tile_pixels: int = 262144, xp=None):
+        """
+        Args:
+            noise_figure_db: Figura de ruido del receptor (UE) en dB
+            load_factor: Carga de las celdas interferentes (0-1)
+            tile_pixels: Píxeles por bloque de procesamiento
+            xp: Módulo numérico (np o cp). Default: np
+        """
+        self.noise_figure_db = float(noise_figure_db)
+        self.load_factor = float(load_factor)
+        self.tile_pixels = max(int(tile_pixels), 1)
+        self.xp = xp if xp is not None else np
+        self.logger = logging.getLogger("InterferenceEngine")
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def group_layers(self, layers: Dict[str, dict]) -> Dict[Tuple[float, float], List[str]]:
+        """
+        Agrupa capas por portadora (frequency_mhz, bandwidth_mhz).
+
+        Args:
+            layers: Dict antenna_id -> capa con 'rsrp' y 'antenna'
+                    (estructura de results['individual'] del worker)
+
+        Returns:
+            Dict (frequency_mhz, bandwidth_mhz) -> lista de antenna_ids
+        """
+        groups: Dict[Tuple[float, float], List[str]] = {}
+        for antenna_id, layer in layers.items():
+            info = layer.get('antenna', {}) if isinstance(layer, dict) else {}
+            key = (
+                float(info.get('frequency_mhz', 0.0)),
+                float(info.get('bandwidth_mhz', 20.0)),
+            )
+            groups.setdefault(key, []).append(antenna_id)
+        return groups
+
+    def compute(self, layers: Dict[str, dict]) -> Dict:
+        """
+        Calcula rasters de SINR y RSSI para todas las portadoras.
+
+        Args:
+            layers: Dict antenna_id -> {'rsrp': array dBm, 'antenna': {...}}.
+                    Las capas 'rsrp' pueden ser arrays en memoria o memmaps.
+
+        Returns:
+            Dict con:
+            - 'sinr': Array float32 SINR [dB] de la portadora servidora
+            - 'rssi': Array float32 RSSI [dBm] de la portadora servidora
+            - 'serving_group': Array uint16 con el índice de portadora servidora
+            - 'groups': Lista de dicts {frequency_mhz, bandwidth_mhz, antenna_ids}
+        """
+        if not layers:
+            raise ValueError("No hay capas para calcular interferencia")
+
+        grouped = self.group_layers(layers)
+        group_keys = list(grouped.keys())
+        group_arrays = [
+            [self._flat_layer(layers[ant_id]['rsrp']) for ant_id in grouped[key]]
+            for key in group_keys
+        ]
+
+        shape = np.shape(layers[grouped[group_keys[0]][0]]['rsrp'])
+        n_pixels = int(np.prod(shape))
+        for arrays in group_arrays:
+            for arr in arrays:
+                if arr.size != n_pixels:
+                    raise ValueError("Todas las capas deben tener la misma forma")
+
+        xp = self.xp
+        sinr = xp.empty(n_pixels, dtype=xp.float32)
+        rssi = xp.empty(n_pixels, dtype=xp.float32)
+        serving = xp.zeros(n_pixels, dtype=xp.uint16)
+
+        noise = [self._noise_terms(bw) for (_, bw) in group_keys]
+
+        # Buffers reutilizados por todos los bloques
+        tile = min(self.tile_pixels, n_pixels)
+        layer_buf = xp.empty(tile, dtype=xp.float32)
+        sum_buf = xp.empty(tile, dtype=xp.float32)
+        best_buf = xp.empty(tile, dtype=xp.float32)
+        serving_best = xp.empty(tile, dtype=xp.float32)
+        work_buf = xp.empty(tile, dtype=xp.float32)
+
+        for start in range(0, n_pixels, tile):
+            stop = min(start + tile, n_pixels)
+            n = stop - start
+            serving_best[:n] = -1.0
+
+            for g, arrays in enumerate(group_arrays):
+                sum_buf[:n] = 0.0
+                best_buf[:n] = 0.0
+                for arr in arrays:
+                    lin = self._to_linear(arr[start:stop], layer_buf[:n])
+                    sum_buf[:n] += lin
+                    xp.maximum(best_buf[:n], lin, out=best_buf[:n])
+
+                noise_re_mw, noise_bw_mw, n_subcarriers = noise[g]
+
+                # SINR = S / (carga·(Σ - S) + N_RE)
+                interference = work_buf[:n]
+                xp.subtract(sum_buf[:n], best_buf[:n], out=interference)
+                xp.maximum(interference, 0.0, out=interference)
+                interference *= self.load_factor
+
+                # RSSI = (S + carga·(Σ - S))·N_sc + N_BW (sobre el ancho de banda del canal)
+                group_rssi = (best_buf[:n] + interference) * n_subcarriers + noise_bw_mw
+
+                interference += noise_re_mw
+                group_sinr = best_buf[:n] / interference
+
+                take = best_buf[:n] > serving_best[:n]
+                serving_best[:n] = xp.where(take, best_buf[:n], serving_best[:n])
+                serving[start:stop] = xp.where(take, g, serving[start:stop])
+                sinr[start:stop] = xp.where(take, group_sinr, sinr[start:stop])
+                rssi[start:stop] = xp.where(take, group_rssi, rssi[start:stop])
+
+        with np.errstate(divide='ignore'):
+            sinr = 10.0 * xp.log10(sinr)
+            rssi = 10.0 * xp.log10(rssi)
+
+        self.logger.info(
+            f"Interference computed: {len(layers)} layers, {len(group_keys)} carrier groups, "
+            f"{n_pixels} pixels, tile={tile}"
+        )
+
+        return {
+            'sinr': sinr.astype(xp.float32, copy=False).reshape(shape),
+            'rssi': rssi.astype(xp.float32, copy=False).reshape(shape),
+            'serving_group': serving.reshape(shape),
+            'groups': [
+                {
+                    'frequency_mhz': freq,
+                    'bandwidth_mhz': bw,
+                    'antenna_ids': list(grouped[(freq, bw)]),
+                }
+                for (freq, bw) in group_keys
+            ],
+        }
+
+    def compute_from_results(self, results: Dict) -> Optional[Dict]:
+        """
+        Conveniencia: calcula interferencia desde results['individual'] del worker.
+
+        Returns:
+            Dict de compute() o None si no hay capas individuales
+        """
+        individual = results.get('individual', {})
+        if not individual:
+            return None
+        return self.compute(individual)
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _noise_terms(self, bandwidth_mhz: float) -> Tuple[float, float, float]:
+        """Retorna (N_RE [mW], N_BW [mW], número de subportadoras) para el canal"""
+        bandwidth_hz = max(float(bandwidth_mhz), 0.0) * 1e6
+        n_subcarriers = max(
+            round(bandwidth_hz * self.BANDWIDTH_OCCUPANCY / self.SUBCARRIER_SPACING_HZ), 1
+        )
+        noise_re_dbm = (self.THERMAL_NOISE_DBM_HZ
+                        + 10.0 * np.log10(self.SUBCARRIER_SPACING_HZ)
+                        + self.noise_figure_db)
+        noise_bw_dbm = (self.THERMAL_NOISE_DBM_HZ
+                        + 10.0 * np.log10(max(bandwidth_hz, 1.0))
+                        + self.noise_figure_db)
+        return 10.0 ** (noise_re_dbm / 10.0), 10.0 ** (noise_bw_dbm / 10.0), float(n_subcarriers)
+
+    def _flat_layer(self, layer):
+        """Vista 1D de la capa (sin copia para arrays contiguos y memmaps)"""
+        if isinstance(layer, np.ndarray) or hasattr(layer, 'reshape'):
+            return layer.reshape(-1)
+        return np.asarray(layer).reshape(-1)
+
+    def _to_linear(self, chunk_dbm, out):
+        """Convierte un bloque dBm a mW en el buffer float32 'out' (in-place)"""
+        xp = self.xp
+        out[...] = xp.asarray(chunk_dbm)
+        # Valores no finitos (NaN / -inf) se tratan como ausencia de señal
+        out[~xp.isfinite(out)] = -xp.inf
+        out *= np.float32(np.log(10.0) / 10.0)
+        xp.exp(out, out=out)
+        return out
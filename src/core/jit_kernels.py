@@ -0,0 +1,285 @@
+"""
+Kernels compilados (Numba) para los cálculos sobre perfiles de terreno
+
+Las versiones NumPy de estos cálculos se escriben como expresiones con
+broadcasting que crean varios temporales (n_receptores, n_muestras) por
+llamada. Aquí cada kernel recorre las filas de perfil en un solo bucle
+fusionado (prange sobre receptores), sin temporales:
+
+    - tca_theta_max:        máximo ángulo de despeje del terreno (ITU-R P.1546 §4.5)
+    - los_max_clearance:    máximo despeje sobre la línea TX→RX (COST-231 LOS/NLOS)
+    - max_obstacle_search:  obstáculo dominante para knife-edge (DiffractionModel)
+    - annulus_mean:         media del perfil en el anillo [inner, outer] (Hata h_eff)
+
+Numba es opcional. Como con CuPy en gpu_detector, la disponibilidad se
+detecta una sola vez. Los modelos consultan is_enabled() y usan el kernel
+solo cuando trabajan con NumPy. Cada ComputeEngine guarda su propio use_jit
+y lo aplica con scoped() alrededor de sus llamadas a los modelos (el valor
+vale solo en el hilo/contexto actual); set_enabled() fija el default de
+proceso para el código que llama a los modelos sin calculador. Si Numba no
+está instalado todo sigue por la ruta NumPy.
+
+Las funciones se compilan de forma perezosa en el primer uso (cache en
+disco), así importar este módulo no importa Numba.
+"""
+
+import contextvars
+import logging
+import math
+from contextlib import contextmanager
+
+import numpy as np
+
+# Detección de Numba (una sola vez por proceso)
+_numba_checked = False
+_numba_module = None
+_numba_available = False
+
+# Default de proceso del backend JIT y override por contexto (scoped)
+_jit_enabled = False
+_jit_override = contextvars.ContextVar('jit_override', default=None)
+
+# Kernels compilados: nombre -> dispatcher de Numba
+_compiled = {}
+
+# prange se reemplaza por numba.prange antes de compilar; en Python puro es range
+prange = range
+
+
+def _try_import_numba():
+    """Intenta importar numba de forma segura"""
+    global _numba_checked, _numba_module, _numba_available, prange
+
+    if _numba_checked:
+        return _numba_module, _numba_available
+
+    _numba_checked = True
+
+    try:
+        import numba
+        _numba_module = numba
+        _numba_available = True
+        prange = numba.prange
+        logging.info(f"Numba {numba.__version__} available - JIT kernels enabled")
+    except Exception as e:
+        logging.info(f"Numba not available - using NumPy kernels: {type(e).__name__}: {e}")
+        _numba_module = None
+        _numba_available = False
+
+    return _numba_module, _numba_available
+
+
+def numba_available() -> bool:
+    """True si Numba se puede importar"""
+    return _try_import_numba()[1]
+
+
+def set_enabled(enabled: bool) -> bool:
+    """
+    Activa o desactiva el backend JIT.
+
+    Returns:
+        True si el estado solicitado quedó aplicado (False si se pidió
+        activar y Numba no está disponible)
+    """
+    global _jit_enabled
+
+    if enabled and not numba_available():
+        logging.warning("JIT backend requested but Numba is not available")
+        _jit_enabled = False
+        return False
+
+    _jit_enabled = bool(enabled)
+    return True
+
+
+def is_enabled() -> bool:
+    """True si los modelos deben usar los kernels compilados"""
+    override = _jit_override.get()
+    return _jit_enabled if override is None else override
+
+
+@contextmanager
+def scoped(enabled: bool):
+    """
+    Activa/desactiva los kernels solo dentro del bloque y en el contexto actual,
+    sin tocar el default de proceso ni a otros hilos.
+    """
+    token = _jit_override.set(bool(enabled) and numba_available())
+    try:
+        yield
+    finally:
+        _jit_override.reset(token)
+
+
+def get_kernel(name: str):
+    """Dispatcher compilado del kernel 'name' (compila en el primer uso)"""
+    kernel = _compiled.get(name)
+    if kernel is None:
+        numba, available = _try_import_numba()
+        if not available:
+            raise RuntimeError("Numba no está disponible para compilar kernels JIT")
+        kernel = numba.njit(parallel=True, cache=True, fastmath=False)(_PY_KERNELS[name])
+        _compiled[name] = kernel
+    return kernel
+
+
+# ======================================================================
+# Kernels (Python puro compatible con Numba nopython)
+# ======================================================================
+
+def _tca_theta_max(terrain_profiles, profile_distances, distances_m, h_rx, window_m):
+    """
+    θ_tc [grados] por receptor: máximo de atan((z_j - h_rx) / d_j) sobre los
+    puntos del perfil a distancia d_j = d - x_j del receptor con 0 <= d_j <= window_m
+    (d_j se limita inferiormente a 1 m). Resultado >= 0.
+    """
+    n, s = terrain_profiles.shape
+    out = np.zeros(n)
+    for i in prange(n):
+        best = 0.0
+        for j in range(s):
+            d_from_rx = distances_m[i] - profile_distances[i, j]
+            if d_from_rx < 0.0 or d_from_rx > window_m:
+                continue
+            # atan2 es monótona en (dh / d) para d > 0: basta comparar cocientes
+            ratio = (terrain_profiles[i, j] - h_rx[i]) / max(d_from_rx, 1.0)
+            if ratio > best:
+                best = ratio
+        out[i] = math.degrees(math.atan(best))
+    return out
+
+
+def _los_max_clearance(terrain_profiles, h_tx_absolute):
+    """
+    Máximo de z_j - h_line_j por receptor, con la línea recta desde
+    h_tx_absolute hasta la última muestra del perfil (elevación del RX) y
+    muestras equiespaciadas t_j = j / (s - 1).
+    """
+    n, s = terrain_profiles.shape
+    out = np.empty(n)
+    step = 1.0 / (s - 1) if s > 1 else 0.0
+    for i in prange(n):
+        h_rx = terrain_profiles[i, s - 1]
+        drop = h_tx_absolute - h_rx
+        best = -np.inf
+        for j in range(s):
+            t = 1.0 if (j == s - 1 and s > 1) else j * step  # como np.linspace(0, 1, s)
+            clearance = terrain_profiles[i, j] - (h_tx_absolute - drop * t)
+            if clearance > best:
+                best = clearance
+        out[i] = best
+    return out
+
+
+def _max_obstacle_search(terrain_profiles, distances_m, h_tx_absolute, h_rx_absolute):
+    """
+    Obstáculo dominante por receptor sobre la línea TX→RX.
+
+    Returns:
+        (altura del obstáculo sobre la línea [m], distancia TX→obstáculo [m]);
+        ante empates gana la primera muestra (como argmax)
+    """
+    n, s = terrain_profiles.shape
+    heights = np.empty(n)
+    d1 = np.empty(n)
+    for i in prange(n):
+        d = distances_m[i]
+        step = d / (s - 1) if s > 1 else 0.0
+        rise = h_rx_absolute[i] - h_tx_absolute
+        best = -np.inf
+        best_x = 0.0
+        for j in range(s):
+            x = d if (j == s - 1 and s > 1) else j * step  # como np.linspace(0, d, s)
+            obstacle = terrain_profiles[i, j] - (h_tx_absolute + rise * (x / d))
+            if obstacle > best:
+                best = obstacle
+                best_x = x
+        heights[i] = best
+        d1[i] = best_x
+    return heights, d1
+
+
+def _annulus_mean(terrain_profiles, d_km, inner_km, outer_km, min_samples):
+    """
+    Media del perfil en el anillo [inner_km, outer_km] desde el TX (muestras
+    en t_j · d con t_j = j / (s - 1)), ignorando NaN. Si el anillo tiene menos
+    de min_samples muestras se usa la media del perfil completo.
+
+    Returns:
+        (z_ref por receptor, número de muestras en el anillo)
+    """
+    n, s = terrain_profiles.shape
+    z_ref = np.empty(n)
+    counts = np.zeros(n, dtype=np.int64)
+    step = 1.0 / (s - 1) if s > 1 else 0.0
+    for i in prange(n):
+        ring_sum = 0.0
+        ring_valid = 0
+        ring_count = 0
+        full_sum = 0.0
+        full_valid = 0
+        for j in range(s):
+            z = terrain_profiles[i, j]
+            t = 1.0 if (j == s - 1 and s > 1) else j * step
+            x = d_km[i] * t
+            valid = not math.isnan(z)
+            if valid:
+                full_sum += z
+                full_valid += 1
+            if inner_km <= x <= outer_km:
+                ring_count += 1
+                if valid:
+                    ring_sum += z
+                    ring_valid += 1
+        counts[i] = ring_count
+        if ring_count >= min_samples:
+            z_ref[i] = ring_sum / ring_valid if ring_valid > 0 else np.nan
+        else:
+            z_ref[i] = full_sum / full_valid if full_valid > 0 else np.nan
+    return z_ref, counts
+
+
+_PY_KERNELS = {
+    'tca_theta_max': _tca_theta_max,
+    'los_max_clearance': _los_max_clearance,
+    'max_obstacle_search': _max_obstacle_search,
+    'annulus_mean': _annulus_mean,
+}
+
+
+# ======================================================================
+# API pública (convierte entradas a float64 contiguo y llama al kernel)
+# ======================================================================
+
+def _f64(array):
+    return np.ascontiguousarray(array, dtype=np.float64)
+
+
+def tca_theta_max(terrain_profiles, profile_distances, distances_m, h_rx,
+                  window_m: float = 15000.0) -> np.ndarray:
+    """θ_tc [°] de ITU-R P.1546 §4.5 por receptor (ver _tca_theta_max)"""
+    return get_kernel('tca_theta_max')(
+        _f64(terrain_profiles), _f64(profile_distances),
+        _f64(distances_m), _f64(h_rx), float(window_m)
+    )
+
+
+def los_max_clearance(terrain_profiles, h_tx_absolute: float) -> np.ndarray:
+    """Máximo despeje del terreno sobre la línea TX→RX por receptor [m]"""
+    return get_kernel('los_max_clearance')(_f64(terrain_profiles), float(h_tx_absolute))
+
+
+def max_obstacle_search(terrain_profiles, distances_m, h_tx_absolute: float, h_rx_absolute):
+    """(altura, d1) del obstáculo dominante por receptor"""
+    return get_kernel('max_obstacle_search')(
+        _f64(terrain_profiles), _f64(distances_m), float(h_tx_absolute), _f64(h_rx_absolute)
+    )
+
+
+def annulus_mean(terrain_profiles, d_km, inner_km: float, outer_km: float,
+                 min_samples: int):
+    """(z_ref, muestras en el anillo) para la altura efectiva de Hata"""
+    return get_kernel('annulus_mean')(
+        _f64(terrain_profiles), _f64(d_km), float(inner_km), float(outer_km), int(min_samples)
+    )
@@ -0,0 +1,462 @@
+"""
+Calibración de modelos de propagación contra mediciones
+
+Las comparaciones con Atoll (Atoll/*.txt) y los escenarios de validación se
+revisaban a ojo. Aquí el error de un modelo en puntos medidos se ajusta como
+una corrección lineal sobre atributos geométricos y de terreno del punto:
+
+    RSRP_modelo - RSRP_medido = c0 + c1·log10(d) + c2·log10(h_eff)
+                                + c3·log10(d)·log10(h_eff) + c4·θ_tc + c5·LOS
+                                + Σ_k c_k·[clutter = k]
+
+(el lado izquierdo es la pérdida medida menos la predicha: la potencia y la
+ganancia de la antena se cancelan). Los atributos (distancia, h_eff por
+sector de acimut, ángulo de despeje θ_tc de P.1546 §4.5, LOS sobre el perfil,
+clase de clutter del DEM) dependen solo del punto, del TX y del DEM: se
+calculan una vez por grupo de mediciones y se guardan. La predicción de cada
+modelo también se memoiza, de modo que cada iteración del ajuste (rechazo de
+atípicos, otros términos) es un lstsq sobre arrays ya calculados, sin volver a
+extraer perfiles.
+"""
+
+import csv
+import dataclasses
+import logging
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from core.effective_height import EffectiveHeightService
+from core.ragged_profiles import RaggedProfiles
+from core.terrain_loader import TerrainLoader
+from core.terrain_morphology import TerrainMorphology
+
+# Términos disponibles; 'clutter' se expande a una columna por clase presente
+CALIBRATION_TERMS = ('offset', 'log_d', 'log_heff', 'log_d_log_heff', 'tca', 'los', 'clutter')
+DEFAULT_TERMS = ('offset', 'log_d', 'log_heff', 'tca')
+
+DEFAULT_RX_HEIGHT_M = 1.5
+TCA_WINDOW_M = 15000.0  # Ventana de P.1546 §4.5 antes del receptor
+
+
+def read_measurements(path) -> Dict[str, np.ndarray]:
+    """
+    Lee puntos medidos o de referencia.
+
+    Formatos:
+    - Exportación de texto de Atoll: cabecera 'clave<TAB>valor' y filas
+      'lon;lat;[tx];valor'
+    - CSV con cabecera: latitud (grid_lat/lat/latitude), longitud
+      (grid_lon/lon/longitude), valor (rsrp_dbm/rsrp/value) y opcional height_m
+
+    Returns:
+        Dict con arrays 'lats', 'lons', 'rsrp' y 'heights' (None si no hay columna)
+    """
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        lines = f.read().splitlines()
+
+    header = next((line for line in lines if line.strip()), '')
+    if ',' in header and ';' not in header:
+        rows = list(csv.DictReader(lines))
+        columns = {name.strip().lower(): name for name in (rows[0].keys() if rows else [])}
+
+        def column(*names):
+            for name in names:
+                if name in columns:
+                    return np.array([float(row[columns[name]]) for row in rows])
+            return None
+
+        lats = column('grid_lat', 'lat', 'latitude')
+        lons = column('grid_lon', 'lon', 'longitude')
+        rsrp = column('rsrp_dbm', 'rsrp', 'value')
+        if lats is None or lons is None or rsrp is None:
+            raise ValueError(f"{path}: faltan columnas de latitud, longitud o RSRP")
+        return {'lats': lats, 'lons': lons, 'rsrp': rsrp, 'heights': column('height_m')}
+
+    lons, lats, rsrp = [], [], []
+    for line in lines:
+        parts = line.strip().split(';')
+        if len(parts) < 4:
+            continue  # Cabecera 'clave<TAB>valor' o línea vacía
+        lons.append(float(parts[0]))
+        lats.append(float(parts[1]))
+        rsrp.append(float(parts[-1]))
+    return {'lats': np.array(lats), 'lons': np.array(lons), 'rsrp': np.array(rsrp), 'heights': None}
+
+
+def terrain_path_features(profiles: RaggedProfiles, path_m, h_tx_amsl: float,
+                          h_rx_amsl) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Ángulo de despeje y visibilidad directa sobre perfiles TX → receptor.
+
+    Args:
+        profiles: Perfiles CSR desde el TX hasta cada receptor
+        path_m: Array (N,) distancia TX → receptor [m]
+        h_tx_amsl: Altura absoluta de la antena [m AMSL]
+        h_rx_amsl: Array (N,) altura absoluta del receptor [m AMSL]
+
+    Returns:
+        (tca_deg, los): θ_tc [°] >= 0 (P.1546 §4.5, ventana de 15 km antes del
+        receptor) y bool True si ninguna muestra interior corta la línea TX-RX
+    """
+    rows = profiles.row_ids
+    path_m = np.asarray(path_m, dtype=float)
+    h_rx_amsl = np.asarray(h_rx_amsl, dtype=float)
+
+    d_from_rx = path_m[rows] - profiles.distances
+    near_rx = (d_from_rx >= 0.0) & (d_from_rx <= TCA_WINDOW_M)
+    theta = np.degrees(np.arctan2(profiles.elevations - h_rx_amsl[rows], np.maximum(d_from_rx, 1.0)))
+    tca_deg = np.maximum(profiles.segment_max(theta, mask=near_rx), 0.0)
+
+    fraction = profiles.distances / np.maximum(path_m[rows], 1e-9)
+    line = h_tx_amsl + (h_rx_amsl[rows] - h_tx_amsl) * fraction
+    interior = (fraction > 0.0) & (fraction < 1.0)
+    clearance = profiles.segment_max(profiles.elevations - line, mask=interior)
+    return tca_deg, clearance <= 0.0
+
+
+def design_matrix(features: Dict[str, np.ndarray], terms: Iterable[str],
+                  clutter_classes: Optional[List[int]] = None) -> Tuple[np.ndarray, List[str]]:
+    """
+    Matriz de diseño (N, P) del ajuste.
+
+    Args:
+        features: Atributos por punto (ver ModelCalibrator.features)
+        terms: Términos de CALIBRATION_TERMS
+        clutter_classes: Clases con columna propia (default: las presentes;
+            con 'offset' la primera queda como referencia)
+
+    Returns:
+        (X, nombres de columna)
+    """
+    terms = list(terms)
+    unknown = [term for term in terms if term not in CALIBRATION_TERMS]
+    if unknown:
+        raise ValueError(f"Términos de calibración desconocidos: {unknown}")
+
+    n = features['log_d'].size
+    columns, names = [], []
+    for term in terms:
+        if term == 'offset':
+            columns.append(np.ones(n))
+            names.append(term)
+        elif term == 'log_d_log_heff':
+            columns.append(features['log_d'] * features['log_heff'])
+            names.append(term)
+        elif term == 'los':
+            columns.append(features['los'].astype(float))
+            names.append(term)
+        elif term == 'tca':
+            columns.append(features['tca_deg'])
+            names.append(term)
+        elif term == 'clutter':
+            if clutter_classes is None:
+                clutter_classes = np.unique(features['clutter_class']).tolist()
+                if 'offset' in terms:
+                    clutter_classes = clutter_classes[1:]
+            for code in clutter_classes:
+                columns.append((features['clutter_class'] == code).astype(float))
+                names.append(f"clutter_{TerrainMorphology.CLUTTER_CLASSES[code]}")
+        else:
+            columns.append(features[term])
+            names.append(term)
+    return np.column_stack(columns) if columns else np.zeros((n, 0)), names
+
+
+def error_statistics(predicted, measured) -> Dict[str, float]:
+    """Bias (predicho - medido), MAE, RMSE, σ y correlación de Pearson [dB]"""
+    predicted = np.asarray(predicted, dtype=float)
+    measured = np.asarray(measured, dtype=float)
+    error = predicted - measured
+    n = int(error.size)
+    if n == 0:
+        return {'count': 0, 'bias_db': math.nan, 'mae_db': math.nan, 'rmse_db': math.nan,
+                'std_db': math.nan, 'correlation': math.nan}
+    correlation = math.nan
+    if n > 1 and predicted.std() > 0 and measured.std() > 0:
+        correlation = float(np.corrcoef(predicted, measured)[0, 1])
+    return {
+        'count': n,
+        'bias_db': float(error.mean()),
+        'mae_db': float(np.abs(error).mean()),
+        'rmse_db': float(np.sqrt(np.mean(error ** 2))),
+        'std_db': float(error.std()),
+        'correlation': correlation,
+    }
+
+
+class ModelCalibrator:
+    """Ajuste por mínimos cuadrados de correcciones de modelo sobre mediciones"""
+
+    def __init__(self, calculator, terrain_loader=None, sample_spacing_m: float = None,
+                 chunk_size: int = 8192, effective_height: EffectiveHeightService = None):
+        """
+        Args:
+            calculator: CoverageCalculator para las predicciones en los puntos
+            terrain_loader: TerrainLoader con el DEM (opcional)
+            sample_spacing_m: Paso de los perfiles de θ_tc/LOS [m] (default: píxel del DEM)
+            chunk_size: Puntos por bloque al extraer perfiles
+            effective_height: Servicio de h_eff por acimut (default: uno propio)
+        """
+        self.calculator = calculator
+        self.terrain_loader = terrain_loader
+        self.sample_spacing_m = sample_spacing_m
+        self.chunk_size = int(chunk_size)
+        self.effective_height = effective_height or EffectiveHeightService()
+        self.logger = logging.getLogger("ModelCalibrator")
+
+        self.groups = []        # (antena, lats, lons, rsrp medido, alturas)
+        self._features = {}     # grupo -> (DEM, atributos)
+        self._predictions = {}  # (grupo, modelo, config, parámetros) -> (DEM, modelo, RSRP predicho)
+
+    def add_measurements(self, antenna, lats, lons, rsrp_dbm, heights=None) -> int:
+        """
+        Registra mediciones servidas por una antena.
+
+        Args:
+            antenna: Antena que sirve los puntos
+            lats, lons: Arrays (N,) de coordenadas
+            rsrp_dbm: Array (N,) de RSRP medido [dBm] (NaN se descarta)
+            heights: Altura del receptor AGL [m], escalar o (N,) (default: 1.5 m)
+
+        Returns:
+            Índice del grupo
+        """
+        lats = np.asarray(lats, dtype=float).reshape(-1)
+        lons = np.asarray(lons, dtype=float).reshape(-1)
+        rsrp = np.asarray(rsrp_dbm, dtype=float).reshape(-1)
+        if not (lats.size == lons.size == rsrp.size):
+            raise ValueError("lats, lons y rsrp_dbm deben tener el mismo tamaño")
+        if heights is not None:
+            heights = np.broadcast_to(np.asarray(heights, dtype=float), lats.shape).copy()
+        self.groups.append((antenna, lats, lons, rsrp, heights))
+        return len(self.groups) - 1
+
+    def clear_cache(self):
+        """Descarta atributos y predicciones memoizados"""
+        self._features.clear()
+        self._predictions.clear()
+
+    def _dem(self):
+        loader = self.terrain_loader
+        return loader.data if loader is not None and loader.is_loaded() else None
+
+    def features(self, group: int) -> Dict[str, np.ndarray]:
+        """
+        Atributos por punto del grupo (memoizados por DEM cargado).
+
+        Returns:
+            Dict con arrays (N,): 'distance_m', 'log_d' (log10 km), 'h_eff' [m],
+            'log_heff', 'tca_deg', 'los' (bool), 'clutter_class' (código de
+            TerrainMorphology.CLUTTER_CLASSES) y 'rx_elevation' [m]
+        """
+        dem = self._dem()
+        cached = self._features.get(group)
+        if cached is not None and cached[0] is dem:
+            return cached[1]
+
+        antenna, lats, lons, _, heights = self.groups[group]
+        rx_heights = heights if heights is not None else np.full(lats.shape, DEFAULT_RX_HEIGHT_M)
+        distances = TerrainLoader._haversine_distance(antenna.latitude, antenna.longitude, lats, lons)
+        n = lats.size
+
+        loader = self.terrain_loader
+        if dem is None:
+            rx_elevation = np.zeros(n)
+            h_eff = np.full(n, float(antenna.height_agl))
+            tca_deg = np.zeros(n)
+            los = np.ones(n, dtype=bool)
+            clutter = np.full(n, TerrainMorphology.LAYER_DEFAULTS['clutter_class'], dtype=np.int64)
+        else:
+            tx_elevation = loader.get_elevation(antenna.latitude, antenna.longitude) or 0.0
+            rx_elevation = loader.get_elevations_fast(lats, lons)
+            h_eff = self.effective_height.effective_height(
+                loader, antenna.latitude, antenna.longitude,
+                antenna.height_agl, tx_elevation, lats, lons
+            )
+            clutter = loader.sample_morphology(lats, lons, ['clutter_class'])['clutter_class'].astype(np.int64)
+
+            tca_deg = np.empty(n)
+            los = np.empty(n, dtype=bool)
+            h_tx = float(tx_elevation) + float(antenna.height_agl)
+            for start in range(0, n, self.chunk_size):
+                stop = min(start + self.chunk_size, n)
+                profiles = loader.get_adaptive_profiles(
+                    antenna.latitude, antenna.longitude, lats[start:stop], lons[start:stop],
+                    sample_spacing_m=self.sample_spacing_m
+                )
+                tca_deg[start:stop], los[start:stop] = terrain_path_features(
+                    profiles, distances[start:stop], h_tx,
+                    rx_elevation[start:stop] + rx_heights[start:stop]
+                )
+
+        log_d = np.log10(np.maximum(distances, 10.0) / 1000.0)
+        features = {
+            'distance_m': distances,
+            'log_d': log_d,
+            'h_eff': h_eff,
+            'log_heff': np.log10(np.maximum(h_eff, 1.0)),
+            'tca_deg': tca_deg,
+            'los': los,
+            'clutter_class': clutter,
+            'rx_elevation': rx_elevation,
+        }
+        self.logger.info(
+            f"Calibration features: group {group} ({antenna.name}), {n} points, "
+            f"LOS {100.0 * los.mean() if n else 0.0:.1f}%, "
+            f"mean TCA {tca_deg.mean() if n else 0.0:.2f} deg"
+        )
+        self._features[group] = (dem, features)
+        return features
+
+    def predict(self, group: int, model, model_params: dict = None) -> np.ndarray:
+        """
+        RSRP predicho por el modelo en los puntos del grupo (memoizado).
+
+        La memo distingue la instancia del modelo y su config (escenario,
+        use_dem, h_bs, ...), no solo la clase. La predicción no usa las
+        optimizaciones por corrida de la simulación (recorte por huella,
+        perfiles adaptativos, h_eff por acimut) y evalúa la antena aunque esté
+        oculta en el mapa: las mediciones la nombran explícitamente.
+        """
+        model_params = dict(model_params or {})
+        dem = self._dem()
+        config = getattr(model, 'config', None) or {}
+        key = (group, id(model), repr(sorted(config.items(), key=lambda kv: kv[0])),
+               repr(sorted(model_params.items(), key=lambda kv: kv[0])))
+        cached = self._predictions.get(key)
+        # La entrada retiene el modelo: un id() reciclado no puede coincidir
+        if cached is not None and cached[0] is dem and cached[1] is model:
+            return cached[2]
+
+        antenna, lats, lons, _, heights = self.groups[group]
+        antenna = dataclasses.replace(antenna, enabled=True, show_coverage=True)
+        result = self.calculator.calculate_points_coverage(
+            [antenna], lats, lons, model, model_params=model_params,
+            terrain_loader=self.terrain_loader, heights=heights
+        )
+        self._predictions[key] = (dem, model, result['rsrp'])
+        return result['rsrp']
+
+    def fit(self, model, model_params: dict = None, terms: Iterable[str] = DEFAULT_TERMS,
+            outlier_sigma: float = 3.0, max_iterations: int = 5) -> Dict[str, object]:
+        """
+        Ajusta la corrección del modelo sobre todos los grupos.
+
+        Tras cada ajuste se descartan los puntos con |residuo| > outlier_sigma·σ
+        y se vuelve a ajustar (hasta max_iterations) sobre los atributos en caché.
+        Columnas sin variación (ej. θ_tc sin DEM) se fijan en 0.
+
+        Args:
+            model: Modelo de propagación
+            model_params: Parámetros del modelo
+            terms: Términos de CALIBRATION_TERMS
+            outlier_sigma: Umbral de rechazo de atípicos (None: sin rechazo)
+            max_iterations: Máximo de ajustes
+
+        Returns:
+            Dict con:
+            - 'model', 'terms': nombre del modelo y columnas ajustadas
+            - 'coefficients': {columna: coeficiente [dB por unidad]}
+            - 'points', 'inliers', 'iterations'
+            - 'discarded': puntos excluidos antes del ajuste
+              ({'no_measurement', 'no_prediction'})
+            - 'errors': {'all' | clase de clutter: {'before', 'after'}} con
+              error_statistics del RSRP predicho sin y con corrección
+        """
+        if not self.groups:
+            raise ValueError("No hay mediciones registradas")
+
+        features, predicted, measured = {}, [], []
+        for group in range(len(self.groups)):
+            group_features = self.features(group)
+            for name, values in group_features.items():
+                features.setdefault(name, []).append(values)
+            predicted.append(self.predict(group, model, model_params))
+            measured.append(self.groups[group][3])
+        features = {name: np.concatenate(values) for name, values in features.items()}
+        predicted = np.concatenate(predicted)
+        measured = np.concatenate(measured)
+
+        valid = np.isfinite(predicted) & np.isfinite(measured)
+        discarded = {
+            'no_measurement': int(np.count_nonzero(~np.isfinite(measured))),
+            'no_prediction': int(np.count_nonzero(np.isfinite(measured) & ~np.isfinite(predicted))),
+        }
+        if discarded['no_prediction']:
+            self.logger.warning(
+                f"Calibration: {discarded['no_prediction']} measured points without prediction "
+                f"(NaN from the model) excluded from the fit"
+            )
+        features = {name: values[valid] for name, values in features.items()}
+        predicted, measured = predicted[valid], measured[valid]
+        residual = predicted - measured
+
+        X, names = design_matrix(features, terms)
+        varying = np.array([name == 'offset' or np.ptp(X[:, j]) > 0 for j, name in enumerate(names)],
+                           dtype=bool)
+        if not varying.all():
+            self.logger.info(
+                "Calibration: constant columns fixed at 0: "
+                + ", ".join(name for name, keep in zip(names, varying) if not keep)
+            )
+
+        coefficients = np.zeros(len(names))
+        inliers = np.ones(residual.size, dtype=bool)
+        iterations = 0
+        for iterations in range(1, max(int(max_iterations), 1) + 1):
+            solution = np.linalg.lstsq(X[inliers][:, varying], residual[inliers], rcond=None)[0]
+            coefficients[:] = 0.0
+            coefficients[varying] = solution
+            error = residual - X @ coefficients
+            if outlier_sigma is None:
+                break
+            spread = error[inliers].std()
+            updated = np.abs(error - error[inliers].mean()) <= outlier_sigma * max(spread, 1e-9)
+            if np.array_equal(updated, inliers) or updated.sum() <= len(names):
+                break
+            inliers = updated
+
+        corrected = predicted - X @ coefficients
+        errors = {'all': {'before': error_statistics(predicted, measured),
+                          'after': error_statistics(corrected, measured)}}
+        for code, name in enumerate(TerrainMorphology.CLUTTER_CLASSES):
+            selected = features['clutter_class'] == code
+            if selected.any():
+                errors[name] = {'before': error_statistics(predicted[selected], measured[selected]),
+                                'after': error_statistics(corrected[selected], measured[selected])}
+
+        model_name = getattr(model, 'name', type(model).__name__)
+        before, after = errors['all']['before'], errors['all']['after']
+        self.logger.info(
+            f"Calibration {model_name}: {int(inliers.sum())}/{residual.size} inliers, "
+            f"{iterations} iterations, RMSE {before['rmse_db']:.2f} -> {after['rmse_db']:.2f} dB, "
+            f"bias {before['bias_db']:.2f} -> {after['bias_db']:.2f} dB"
+        )
+        return {
+            'model': model_name,
+            'terms': names,
+            'coefficients': dict(zip(names, coefficients.tolist())),
+            'points': int(residual.size),
+            'inliers': int(inliers.sum()),
+            'iterations': iterations,
+            'discarded': discarded,
+            'errors': errors,
+        }
+
+    def correction(self, result: Dict[str, object], group: int) -> np.ndarray:
+        """
+        Corrección ajustada [dB] en los puntos de un grupo: el RSRP calibrado
+        es el predicho menos este valor (la pérdida calibrada, más).
+        """
+        features = self.features(group)
+        names = result['terms']
+        coefficients = result['coefficients']
+        classes = [TerrainMorphology.CLUTTER_CLASSES.index(name[len('clutter_'):])
+                   for name in names if name.startswith('clutter_')]
+        terms = [name for name in names if not name.startswith('clutter_')]
+        if classes:
+            terms.append('clutter')
+        X, columns = design_matrix(features, terms, clutter_classes=classes)
+        return X @ np.array([coefficients[name] for name in columns])
@@ -23,6 +23,8 @@ import numpy as np
 import warnings
 from typing import Dict, Tuple, Optional
 
+from ..workspace import ModelWorkspace
+
 
 class ThreGPP38901Model:
     """
@@ -36,6 +38,16 @@ class ThreGPP38901Model:
         use_dem=True  : 3GPP + correccion knife-edge aditiva sobre perfil DEM real
     """
 
+    # calculate_path_loss acepta tx_pixel (fila, columna) del TX en el grid
+    supports_tx_pixel = True
+    # Parámetro con la altura del receptor (calculate_points_coverage)
+    RX_HEIGHT_ARG = 'h_ue'
+
+    # Memoria aproximada por muestra de perfil en la correccion DEM:
+    # posiciones float64 (8) + indices int32 (4 + 4) + terreno, linea de vision (8 + 8)
+    # + temporales de where/argmax (8)
+    DEM_BYTES_PER_SAMPLE = 40
+
     SCENARIOS = {
         'UMa': {
             'description': 'Urban Macro',
@@ -65,7 +77,7 @@ class ThreGPP38901Model:
         },
     }
 
-    def __init__(self, config: Optional[Dict] = None, numpy_module=None):
+    def __init__(self, config: Optional[Dict] = None, numpy_module=None, workspace=None):
         """
         Args:
             config: Diccionario con:
@@ -75,8 +87,12 @@ class ThreGPP38901Model:
                 use_dem (bool)              : Usar correccion DEM       [default: False]
                 max_terrain_correction_db   : Limite difraccion dB      [default: 40]
                 dem_profile_samples         : Muestras perfil DEM       [default: 16]
+                dem_max_memory_mb           : Techo de memoria por bloque
+                                              de la correccion DEM [MB] [default: 64]
                 avg_building_height_m (RMa) : Altura media edificios    [default: 5.0]
                 street_width_m (RMa)        : Ancho de calle            [default: 20.0]
+            numpy_module: numpy o cupy para CPU/GPU
+            workspace: ModelWorkspace compartido (opcional, se crea uno propio)
         """
         self.config = config or {}
         self.scenario = self.config.get('scenario', 'UMa')
@@ -94,6 +110,7 @@ class ThreGPP38901Model:
             self.config.get('max_terrain_correction_db', 40.0)
         )
         self.dem_profile_samples = int(self.config.get('dem_profile_samples', 16))
+        self.dem_max_memory_mb = float(self.config.get('dem_max_memory_mb', 64.0))
 
         # Parametros RMa (pueden sobreescribirse)
         self.h_avg = float(self.config.get(
@@ -106,6 +123,9 @@ class ThreGPP38901Model:
         self._dem_warning_emitted = False
         self.xp = numpy_module if numpy_module is not None else np
 
+        # Buffers por grid reutilizados entre antenas + log10(d3D) memoizado
+        self.workspace = workspace if workspace is not None else ModelWorkspace(self.xp)
+
     # ------------------------------------------------------------------
     # API publica
     # ------------------------------------------------------------------
@@ -128,6 +148,7 @@ class ThreGPP38901Model:
             'shadow_fading_los_db': sp['shadow_fading_los_db'],
             'shadow_fading_nlos_db': sp['shadow_fading_nlos_db'],
             'dem_profile_samples': self.dem_profile_samples,
+            'dem_max_memory_mb': self.dem_max_memory_mb,
             'max_terrain_correction_db': self.max_terrain_correction_db,
         }
 
@@ -150,7 +171,9 @@ class ThreGPP38901Model:
             rx_height      : Altura RX en metros (fallback si h_ue no configurado)
             terrain_heights: Elevaciones del terreno 2D [m] (para use_dem=True)
             **kwargs       : h_bs, h_ue (prioridad > tx_height/rx_height),
-                             tx_elevation [m MSL]
+                             tx_elevation [m MSL],
+                             tx_pixel (fila, columna) fraccionaria del TX en
+                             terrain_heights (default: pixel de distancia minima)
 
         Returns:
             dict con 'path_loss' (ndarray), 'validity_mask' (ndarray), 'valid_count' (int)
@@ -167,25 +190,43 @@ class ThreGPP38901Model:
             )
 
         xp = self.xp
-        d2D = xp.asarray(distances, dtype=float)
-        d2D = xp.maximum(d2D, 10.0)  # minimo valido del estandar = 10 m
+        ws = self.workspace
+        distances = xp.asarray(distances, dtype=float)
+        shape = distances.shape
+
+        # Intermedios en buffers del workspace (reutilizados entre antenas)
+        d2D = xp.maximum(distances, 10.0, out=ws.buffer('d2D', shape))  # minimo valido del estandar = 10 m
 
         # d3D: distancia 3D incluyendo separacion vertical TX-RX
         delta_h = float(h_bs - h_ue)
-        d3D = xp.sqrt(d2D ** 2 + delta_h ** 2)
+        d3D = xp.square(d2D, out=ws.buffer('d3D', shape))
+        d3D += delta_h ** 2
+        xp.sqrt(d3D, out=d3D)
+
+        # log10(d3D) solo depende de las distancias y de delta_h: memoizado
+        # (antenas sectoriales de un mismo sitio comparten el array de distancias)
+        log10_d3D = ws.cached(
+            f'log10_d3D@{delta_h!r}', lambda: xp.log10(xp.maximum(d3D, 1.0)), distances
+        )
 
         # Breakpoint (depende de frecuencia y alturas)
         d_bp = self._calculate_breakpoint(h_bs, h_ue, f_ghz)
 
         # PL_LOS (dual-slope) y PL_NLOS = max(PL_LOS, PL_NLOS')
-        pl_los, pl_nlos = self._calculate_los_nlos(d2D, d3D, d_bp, f_ghz, h_bs, h_ue)
+        pl_los, pl_nlos = self._calculate_los_nlos(
+            d2D, d3D, d_bp, f_ghz, h_bs, h_ue, log10_d3D=log10_d3D,
+            out=(ws.buffer('pl_los', shape), ws.buffer('pl_nlos', shape)),
+        )
 
         # Probabilidad LOS estadistica
-        p_los = self._calculate_los_probability(d2D)
+        p_los = self._calculate_los_probability(d2D, out=ws.buffer('p_los', shape))
 
         # Path loss esperado: mezcla P_LOS*PL_LOS + (1-P_LOS)*PL_NLOS
         # PL_NLOS >= PL_LOS por construccion => valor fisicamente intermedio correcto
-        path_loss = p_los * pl_los + (1.0 - p_los) * pl_nlos
+        path_loss = xp.multiply(p_los, pl_los)  # array retornado (nuevo)
+        nlos_term = xp.subtract(1.0, p_los, out=p_los)
+        nlos_term *= pl_nlos
+        path_loss += nlos_term
 
         # Correccion DEM aditiva (solo cuando h_obs > 0, sin multiplicar por 1-P_LOS)
         if self.use_dem and terrain_heights is not None:
@@ -201,14 +242,15 @@ class ThreGPP38901Model:
             diffraction = self._apply_terrain_correction(
                 d2D, f_ghz, terrain_xp, h_bs, h_ue,
                 kwargs.get('tx_elevation', None),
+                kwargs.get('tx_pixel', None),
             )
-            path_loss = path_loss + diffraction
+            path_loss += diffraction
 
         validity_mask = xp.isfinite(path_loss)
         return {
             'path_loss': path_loss,
             'validity_mask': validity_mask,
-            'valid_count': int(xp.sum(validity_mask)),
+            'valid_count': int(xp.count_nonzero(validity_mask)),
         }
 
     def get_breakpoint_distance(self, frequency_ghz: float = 2.0) -> float:
@@ -248,25 +290,39 @@ class ThreGPP38901Model:
     # LOS Probability (TR 38.901 Tabla 7.4.2-1)
     # ------------------------------------------------------------------
 
-    def _calculate_los_probability(self, d2D: np.ndarray) -> np.ndarray:
+    def _calculate_los_probability(self, d2D: np.ndarray, out=None) -> np.ndarray:
         """
         Probabilidad de LOS segun TR 38.901 Tabla 7.4.2-1.
 
         UMa: min(18/d, 1)*(1-exp(-d/63)) + exp(-d/63)
         UMi: min(18/d, 1)*(1-exp(-d/36)) + exp(-d/36)
         RMa: exp(-(d2D - 10) / 1000)
+
+        Args:
+            out: Array destino (opcional); por defecto se retorna un array nuevo
         """
         xp = self.xp
-        d = xp.maximum(d2D, 1.0)
-
-        if self.scenario == 'UMa':
-            exp_term = xp.exp(-d / 63.0)
-            return xp.clip(xp.minimum(18.0 / d, 1.0) * (1.0 - exp_term) + exp_term, 0.0, 1.0)
-        elif self.scenario == 'UMi':
-            exp_term = xp.exp(-d / 36.0)
-            return xp.clip(xp.minimum(18.0 / d, 1.0) * (1.0 - exp_term) + exp_term, 0.0, 1.0)
+        ws = self.workspace
+        d2D = xp.asarray(d2D, dtype=float)
+        if out is None:
+            out = xp.empty(d2D.shape)
+        d = xp.maximum(d2D, 1.0, out=ws.buffer('los_d', d2D.shape))
+
+        if self.scenario in ('UMa', 'UMi'):
+            c2 = 63.0 if self.scenario == 'UMa' else 36.0
+            exp_term = xp.negative(d, out=ws.buffer('los_exp', d2D.shape))
+            exp_term /= c2
+            xp.exp(exp_term, out=exp_term)
+            xp.divide(18.0, d, out=out)
+            xp.minimum(out, 1.0, out=out)
+            out *= xp.subtract(1.0, exp_term, out=d)
+            out += exp_term
         else:  # RMa
-            return xp.clip(xp.exp(-(d - 10.0) / 1000.0), 0.0, 1.0)
+            xp.subtract(d, 10.0, out=out)
+            xp.negative(out, out=out)
+            out /= 1000.0
+            xp.exp(out, out=out)
+        return xp.clip(out, 0.0, 1.0, out=out)
 
     # ------------------------------------------------------------------
     # Path Loss LOS / NLOS (TR 38.901 Tabla 7.4.1-1)
@@ -280,16 +336,67 @@ class ThreGPP38901Model:
         f_ghz: float,
         h_bs: float,
         h_ue: float,
+        log10_d3D: Optional[np.ndarray] = None,
+        out: Optional[Tuple[np.ndarray, np.ndarray]] = None,
     ):
-        """Calcula (PL_LOS, PL_NLOS) para el escenario configurado."""
+        """
+        Calcula (PL_LOS, PL_NLOS) para el escenario configurado.
+
+        Args:
+            log10_d3D: log10(max(d3D, 1)) ya calculado (opcional)
+            out: Par de arrays destino (PL_LOS, PL_NLOS); por defecto arrays nuevos
+        """
         if self.scenario == 'UMa':
-            return self._uma_los_nlos(d2D, d3D, d_bp, f_ghz, h_bs, h_ue)
+            return self._uma_los_nlos(d2D, d3D, d_bp, f_ghz, h_bs, h_ue, log10_d3D, out)
         elif self.scenario == 'UMi':
-            return self._umi_los_nlos(d2D, d3D, d_bp, f_ghz, h_bs, h_ue)
+            return self._umi_los_nlos(d2D, d3D, d_bp, f_ghz, h_bs, h_ue, log10_d3D, out)
         else:
-            return self._rma_los_nlos(d2D, d3D, d_bp, f_ghz, h_bs, h_ue)
+            return self._rma_los_nlos(d2D, d3D, d_bp, f_ghz, h_bs, h_ue, log10_d3D, out)
+
+    def _los_nlos_operands(self, d2D, d3D, log10_d3D, out):
+        """Normaliza entradas de los helpers LOS/NLOS (log10_d3D y destinos por defecto)"""
+        xp = self.xp
+        d2D = xp.asarray(d2D, dtype=float)
+        d3D = xp.asarray(d3D, dtype=float)
+        if log10_d3D is None:
+            log10_d3D = xp.log10(xp.maximum(d3D, 1.0))
+        if out is None:
+            out = (xp.empty(d3D.shape), xp.empty(d3D.shape))
+        return d2D, d3D, log10_d3D, out
+
+    def _dual_slope_los_nlos(self, d2D, d_bp, pl1_terms, pl2_terms, nlos_terms,
+                             log10_d3D, out):
+        """
+        Evaluacion en sitio comun a UMa/UMi.
+
+        Cada *_terms es (coef. log10(d3D), termino constante a la izquierda,
+        termino sumado, termino restado), en el orden de la formula original
+        para conservar el redondeo: ((c0 + a*log10(d3D)) + c1) - c2.
+        """
+        xp = self.xp
+        pl_los, pl_nlos = out
+
+        def affine(dest, terms):
+            slope, c0, c1, c2 = terms
+            xp.multiply(log10_d3D, slope, out=dest)
+            dest += c0
+            dest += c1
+            dest -= c2
+            return dest
+
+        # LOS: PL2 en pl_los y PL1 copiado donde d2D <= d_BP
+        pl1 = affine(pl_nlos, pl1_terms)
+        affine(pl_los, pl2_terms)
+        near = xp.less_equal(d2D, d_bp, out=self.workspace.buffer('bp_mask', d2D.shape, bool))
+        xp.copyto(pl_los, pl1, where=near)
+
+        # NLOS' y NLOS = max(LOS, NLOS')
+        pl_prime = affine(pl_nlos, nlos_terms)
+        xp.maximum(pl_los, pl_prime, out=pl_nlos)
+
+        return pl_los, pl_nlos
 
-    def _uma_los_nlos(self, d2D, d3D, d_bp, f_ghz, h_bs, h_ue):
+    def _uma_los_nlos(self, d2D, d3D, d_bp, f_ghz, h_bs, h_ue, log10_d3D=None, out=None):
         """
         UMa LOS/NLOS -- TR 38.901 Tabla 7.4.1-1
 
@@ -302,23 +409,19 @@ class ThreGPP38901Model:
           PL' = 13.54 + 39.08*log10(d3D) + 20*log10(fc) - 0.6*(h_UT-1.5)
           PL_NLOS = max(PL_LOS, PL')
         """
-        xp = self.xp
-        log10_d3D = xp.log10(xp.maximum(d3D, 1.0))
+        d2D, d3D, log10_d3D, out = self._los_nlos_operands(d2D, d3D, log10_d3D, out)
         log10_f = float(np.log10(max(f_ghz, 1e-9)))
+        bp_term = 9.0 * float(np.log10(max(d_bp ** 2 + (h_bs - h_ue) ** 2, 1e-9)))
+
+        return self._dual_slope_los_nlos(
+            d2D, d_bp,
+            pl1_terms=(22.0, 28.0, 20.0 * log10_f, 0.0),
+            pl2_terms=(40.0, 28.0, 20.0 * log10_f, bp_term),
+            nlos_terms=(39.08, 13.54, 20.0 * log10_f, 0.6 * (h_ue - 1.5)),
+            log10_d3D=log10_d3D, out=out,
+        )
 
-        # LOS
-        pl1 = 28.0 + 22.0 * log10_d3D + 20.0 * log10_f
-        pl2 = (28.0 + 40.0 * log10_d3D + 20.0 * log10_f
-               - 9.0 * float(np.log10(max(d_bp ** 2 + (h_bs - h_ue) ** 2, 1e-9))))
-        pl_los = xp.where(d2D <= d_bp, pl1, pl2)
-
-        # NLOS' y NLOS = max(LOS, NLOS')
-        pl_prime = (13.54 + 39.08 * log10_d3D + 20.0 * log10_f - 0.6 * (h_ue - 1.5))
-        pl_nlos = xp.maximum(pl_los, pl_prime)
-
-        return pl_los, pl_nlos
-
-    def _umi_los_nlos(self, d2D, d3D, d_bp, f_ghz, h_bs, h_ue):
+    def _umi_los_nlos(self, d2D, d3D, d_bp, f_ghz, h_bs, h_ue, log10_d3D=None, out=None):
         """
         UMi Street Canyon LOS/NLOS -- TR 38.901 Tabla 7.4.1-1
 
@@ -331,23 +434,19 @@ class ThreGPP38901Model:
           PL' = 35.3*log10(d3D) + 22.4 + 21.3*log10(fc) - 0.3*(h_UT-1.5)
           PL_NLOS = max(PL_LOS, PL')
         """
-        xp = self.xp
-        log10_d3D = xp.log10(xp.maximum(d3D, 1.0))
+        d2D, d3D, log10_d3D, out = self._los_nlos_operands(d2D, d3D, log10_d3D, out)
         log10_f = float(np.log10(max(f_ghz, 1e-9)))
+        bp_term = 9.5 * float(np.log10(max(d_bp ** 2 + (h_bs - h_ue) ** 2, 1e-9)))
+
+        return self._dual_slope_los_nlos(
+            d2D, d_bp,
+            pl1_terms=(21.0, 32.4, 20.0 * log10_f, 0.0),
+            pl2_terms=(40.0, 32.4, 20.0 * log10_f, bp_term),
+            nlos_terms=(35.3, 22.4, 21.3 * log10_f, 0.3 * (h_ue - 1.5)),
+            log10_d3D=log10_d3D, out=out,
+        )
 
-        # LOS
-        pl1 = 32.4 + 21.0 * log10_d3D + 20.0 * log10_f
-        pl2 = (32.4 + 40.0 * log10_d3D + 20.0 * log10_f
-               - 9.5 * float(np.log10(max(d_bp ** 2 + (h_bs - h_ue) ** 2, 1e-9))))
-        pl_los = xp.where(d2D <= d_bp, pl1, pl2)
-
-        # NLOS' y NLOS = max(LOS, NLOS')
-        pl_prime = (35.3 * log10_d3D + 22.4 + 21.3 * log10_f - 0.3 * (h_ue - 1.5))
-        pl_nlos = xp.maximum(pl_los, pl_prime)
-
-        return pl_los, pl_nlos
-
-    def _rma_los_nlos(self, d2D, d3D, d_bp, f_ghz, h_bs, h_ue):
+    def _rma_los_nlos(self, d2D, d3D, d_bp, f_ghz, h_bs, h_ue, log10_d3D=None, out=None):
         """
         RMa LOS/NLOS -- TR 38.901 Tabla 7.4.1-1
 
@@ -368,7 +467,10 @@ class ThreGPP38901Model:
                 + 20*log10(fc) - (3.2*(log10(11.75*h_UT))^2 - 4.97)
           PL_NLOS = max(PL_LOS, PL')
         """
+        d2D, d3D, log10_d3D, out = self._los_nlos_operands(d2D, d3D, log10_d3D, out)
         xp = self.xp
+        ws = self.workspace
+        pl_los, pl_nlos = out
         h = max(self.h_avg, 0.1)
         W = max(self.W, 1.0)
 
@@ -376,33 +478,47 @@ class ThreGPP38901Model:
         B = min(0.044 * h ** 1.72, 14.77)
         C = 0.002 * np.log10(h)
 
-        d3D_safe = xp.maximum(d3D, 1.0)
+        d3D_safe = xp.maximum(d3D, 1.0, out=ws.buffer('rma_d3D', d3D.shape))
+        term = ws.buffer('rma_term', d3D.shape)
         log10_f = float(np.log10(max(f_ghz, 1e-9)))
 
-        # PL1
-        pl1 = (20.0 * xp.log10(40.0 * np.pi * d3D_safe * f_ghz / 3.0)
-               + A * xp.log10(d3D_safe) - B + C * d3D_safe)
-
         # PL2: PL1 en d_BP + 40*log10(d3D/d3D_BP)
         d_bp_safe = max(float(d_bp), 1.0)
         d3D_bp = float(np.sqrt(d_bp_safe ** 2 + (h_bs - h_ue) ** 2))
         pl1_at_bp = (20.0 * np.log10(40.0 * np.pi * d3D_bp * f_ghz / 3.0)
                      + A * np.log10(d3D_bp) - B + C * d3D_bp)
-        pl2 = pl1_at_bp + 40.0 * xp.log10(xp.maximum(d3D_safe / d3D_bp, 1e-9))
-
-        pl_los = xp.where(d2D <= d_bp, pl1, pl2)
+        xp.divide(d3D_safe, d3D_bp, out=pl_los)
+        xp.maximum(pl_los, 1e-9, out=pl_los)
+        xp.log10(pl_los, out=pl_los)
+        pl_los *= 40.0
+        pl_los += pl1_at_bp
+
+        # PL1 = 20*log10(40*pi*d3D*fc/3) + A*log10(d3D) - B + C*d3D
+        pl1 = xp.multiply(d3D_safe, 40.0 * np.pi, out=pl_nlos)
+        pl1 *= f_ghz
+        pl1 /= 3.0
+        xp.log10(pl1, out=pl1)
+        pl1 *= 20.0
+        pl1 += xp.multiply(log10_d3D, A, out=term)
+        pl1 -= B
+        pl1 += xp.multiply(d3D_safe, C, out=term)
+
+        # LOS: PL2 en pl_los y PL1 copiado donde d2D <= d_BP
+        near = xp.less_equal(d2D, d_bp, out=ws.buffer('bp_mask', d2D.shape, bool))
+        xp.copyto(pl_los, pl1, where=near)
 
         # NLOS' y NLOS = max(LOS, NLOS')
-        pl_prime = (
+        pl_prime = xp.subtract(log10_d3D, 3.0, out=pl_nlos)
+        pl_prime *= (43.42 - 3.1 * np.log10(h_bs))
+        pl_prime += (
             161.04
             - 7.1 * np.log10(W)
             + 7.5 * np.log10(h)
             - (24.37 - 3.7 * (h / h_bs) ** 2) * np.log10(h_bs)
-            + (43.42 - 3.1 * np.log10(h_bs)) * (xp.log10(d3D_safe) - 3.0)
-            + 20.0 * log10_f
-            - (3.2 * (np.log10(11.75 * h_ue)) ** 2 - 4.97)
         )
-        pl_nlos = xp.maximum(pl_los, pl_prime)
+        pl_prime += 20.0 * log10_f
+        pl_prime -= (3.2 * (np.log10(11.75 * h_ue)) ** 2 - 4.97)
+        xp.maximum(pl_los, pl_prime, out=pl_nlos)
 
         return pl_los, pl_nlos
 
@@ -442,6 +558,7 @@ class ThreGPP38901Model:
         h_bs: float,
         h_ue: float,
         tx_elevation: Optional[float] = None,
+        tx_pixel: Optional[Tuple[float, float]] = None,
     ) -> np.ndarray:
         """
         Correccion knife-edge ITU-R P.526 sobre perfil DEM.
@@ -450,6 +567,10 @@ class ThreGPP38901Model:
           - Correccion ADITIVA: PL += L_diff
           - L_diff > 0 solo cuando h_obs > 0 (obstaculo real sobre linea de vision)
           - NO se multiplica por (1-P_LOS): terreno y estadistica urbana son ortogonales
+
+        Los perfiles TX -> receptor se evaluan por bloques de receptores con
+        indices int32: la memoria de trabajo es O(muestras x bloque), acotada
+        por dem_max_memory_mb, en lugar de O(muestras x filas x columnas).
         """
         xp = self.xp
         correction = xp.zeros_like(d2D, dtype=float)
@@ -464,40 +585,67 @@ class ThreGPP38901Model:
         rows, cols = terrain_heights.shape
         samples = max(self.dem_profile_samples, 4)
 
-        tx_flat_idx = int(xp.argmin(d2D))
-        tx_row = tx_flat_idx // cols
-        tx_col = tx_flat_idx % cols
-
-        t = xp.linspace(0.0, 1.0, samples)
-        row_idx = xp.arange(rows).reshape(rows, 1)
-        col_idx = xp.arange(cols).reshape(1, cols)
-
-        sample_rows = xp.clip(
-            xp.rint(tx_row + t[:, None, None] * (row_idx[None] - tx_row)).astype(np.int64),
-            0, rows - 1,
-        )
-        sample_cols = xp.clip(
-            xp.rint(tx_col + t[:, None, None] * (col_idx[None] - tx_col)).astype(np.int64),
-            0, cols - 1,
-        )
-
-        terrain_profile = terrain_heights[sample_rows, sample_cols]
+        if tx_pixel is None:
+            # Sin coordenadas del TX: pixel de distancia minima (TX dentro del grid)
+            tx_flat_idx = int(xp.argmin(d2D))
+            tx_row, tx_col = float(tx_flat_idx // cols), float(tx_flat_idx % cols)
+        else:
+            tx_row, tx_col = float(tx_pixel[0]), float(tx_pixel[1])
+        tx_inside = (0 <= round(tx_row) < rows) and (0 <= round(tx_col) < cols)
 
-        tx_ground = (
-            float(terrain_heights[tx_row, tx_col])
-            if tx_elevation is None
-            else float(tx_elevation)
-        )
+        if tx_elevation is None:
+            tx_ground = float(terrain_heights[min(max(round(tx_row), 0), rows - 1),
+                                              min(max(round(tx_col), 0), cols - 1)])
+        else:
+            tx_ground = float(tx_elevation)
         tx_abs = tx_ground + h_bs
-        rx_abs = terrain_heights + h_ue
-        los_line = tx_abs + t[:, None, None] * (rx_abs[None] - tx_abs)
-
-        clearance = terrain_profile - los_line
-        clearance[0, :, :] = -1e9
-        clearance[-1, :, :] = -1e9
 
-        h_obs = xp.max(clearance, axis=0)
-        t_obs = xp.take(t, xp.argmax(clearance, axis=0))
+        # Solo muestras interiores: los extremos (TX y RX) no obstruyen
+        t = xp.linspace(0.0, 1.0, samples)[1:-1].reshape(-1, 1)
+        terrain_flat = terrain_heights.reshape(-1)
+        n_pixels = terrain_flat.size
+        index_dtype = xp.int32 if n_pixels < 2 ** 31 else xp.int64
+
+        chunk = int(self.dem_max_memory_mb * 1024 * 1024
+                    // (self.DEM_BYTES_PER_SAMPLE * t.shape[0]))
+        chunk = min(max(chunk, 1), n_pixels)
+
+        h_obs = xp.empty(n_pixels, dtype=float)
+        t_obs = xp.empty(n_pixels, dtype=float)
+
+        for start in range(0, n_pixels, chunk):
+            stop = min(start + chunk, n_pixels)
+            flat = xp.arange(start, stop, dtype=index_dtype)
+            rx_row = flat // cols
+            rx_col = flat - rx_row * cols
+
+            sample_rows = xp.rint(tx_row + t * (rx_row - tx_row)).astype(index_dtype)
+            sample_cols = xp.rint(tx_col + t * (rx_col - tx_col)).astype(index_dtype)
+            if not tx_inside:
+                # TX fuera del grid: las muestras sin DEM no obstruyen
+                outside = ((sample_rows < 0) | (sample_rows >= rows)
+                           | (sample_cols < 0) | (sample_cols >= cols))
+                xp.clip(sample_rows, 0, rows - 1, out=sample_rows)
+                xp.clip(sample_cols, 0, cols - 1, out=sample_cols)
+
+            sample_rows *= cols
+            sample_rows += sample_cols
+            del sample_cols
+            clearance = terrain_flat[sample_rows]
+            del sample_rows
+
+            # clearance = terreno - linea de vision TX -> RX
+            rx_abs = terrain_flat[start:stop] + h_ue
+            clearance -= tx_abs + t * (rx_abs - tx_abs)
+            if not tx_inside:
+                clearance[outside] = -1e9
+
+            worst = xp.argmax(clearance, axis=0)
+            h_obs[start:stop] = xp.take_along_axis(clearance, worst[None], axis=0)[0]
+            t_obs[start:stop] = t[worst, 0]
+
+        h_obs = h_obs.reshape(rows, cols)
+        t_obs = t_obs.reshape(rows, cols)
 
         wavelength_m = 3e8 / (f_ghz * 1e9)
         d = xp.maximum(d2D, 1.0)
@@ -20,6 +20,8 @@ import numpy as np
 import logging
 from typing import Tuple, Optional
 
+from core.ragged_profiles import RaggedProfiles
+
 
 class ClutterModel:
     """Modelo de clutter para ITU-R P.1546"""
@@ -234,7 +236,8 @@ class ClutterModel:
                                                distances_m: np.ndarray,
                                                h_rx_agl: float,
                                                environment: Optional[str] = None,
-                                               frequency_mhz: float = 900.0) -> np.ndarray:
+                                               frequency_mhz: float = 900.0,
+                                               clutter_class: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Corrección de clutter vectorizada — ITU-R P.2108-1 §3 (Terrestrial Clutter Loss).
 
@@ -250,12 +253,16 @@ class ClutterModel:
             h_g   : altura representativa de clutter según entorno [m]
 
         Args:
-            terrain_profiles: (n_receptors, n_samples) — elevación AMSL [m]
+            terrain_profiles: (n_receptors, n_samples) — elevación AMSL [m],
+                o RaggedProfiles (con sus propias distancias)
             profile_distances: (n_receptors, n_samples) — distancia desde TX [m]
             distances_m: (n_receptors,) — distancia TX→RX [m]
             h_rx_agl: Altura receptor AGL [m]
             environment: 'urban' | 'suburban' | 'rural' | None (auto-detect desde DEM)
             frequency_mhz: Frecuencia en MHz (requerida para F_fc)
+            clutter_class: (n_receptors,) — códigos de TerrainMorphology
+                (0 rural, 1 suburban, 2 urban); con environment None/'auto'
+                fija el entorno por receptor
         Returns:
             Array (n_receptors,) de pérdida por clutter [dB]
         """
@@ -266,15 +273,22 @@ class ClutterModel:
         H_G = {'urban': 25.0, 'suburban': 10.0, 'rural': 4.0}
         D_T_DEFAULT = {'urban': 0.0, 'suburban': 0.5, 'rural': 2.0}  # km sin DEM
 
-        # Determinar entorno (single value: se aplica igual a todos los receptores)
-        if environment is None or environment.strip().lower() == 'auto':
-            env = 'suburban'  # default conservador
+        # Determinar entorno: por receptor desde la morfología del DEM (auto con
+        # clutter_class) o un único valor para todos los receptores
+        auto = environment is None or environment.strip().lower() == 'auto'
+        if auto and clutter_class is not None:
+            env = 'auto'
+            codes = xp.asarray(clutter_class).reshape(-1).astype(xp.int64)
+            classes = ('rural', 'suburban', 'urban')  # TerrainMorphology.CLUTTER_CLASSES
+            h_g = xp.asarray([H_G[c] for c in classes])[codes]
+            d_t_default = xp.asarray([D_T_DEFAULT[c] for c in classes])[codes]
         else:
-            env = environment.strip().lower()
-        if env not in H_G:
-            env = 'suburban'
+            env = 'suburban' if auto else environment.strip().lower()  # default conservador
+            if env not in H_G:
+                env = 'suburban'
+            h_g = xp.full(n_receptors, H_G[env])
+            d_t_default = xp.full(n_receptors, D_T_DEFAULT[env])
 
-        h_g = H_G[env]
         h_b = float(h_rx_agl)
 
         # --- Factor de frecuencia P.2108-1 §3 ---
@@ -282,7 +296,17 @@ class ClutterModel:
         F_fc = float(np.exp(-0.0689 / f_GHz - 0.0298))
 
         # --- d_t: distancia receptor → primera obstrucción de clutter [km] ---
-        if terrain_profiles is not None and profile_distances is not None:
+        if isinstance(terrain_profiles, RaggedProfiles):
+            # Perfiles CSR: la última muestra de cada perfil es el receptor
+            rows = terrain_profiles.row_ids
+            d_from_rx = distances_m[rows] - terrain_profiles.distances
+            near_rx = (d_from_rx >= 0.0) & (d_from_rx <= 5000.0)
+            H_rx_amsl = terrain_profiles.last(terrain_profiles.elevations) + h_b
+            obstructed = terrain_profiles.elevations + h_g[rows] > H_rx_amsl[rows]
+            d_t_min_m = terrain_profiles.segment_min(d_from_rx, mask=obstructed & near_rx)
+
+            d_t_km = xp.where(xp.isinf(d_t_min_m), d_t_default, d_t_min_m / 1000.0)
+        elif terrain_profiles is not None and profile_distances is not None:
             # d_from_rx[i, j] = distancia desde RX al punto j del perfil [m]
             d_from_rx = distances_m[:, None] - profile_distances  # (n, nr)
 
@@ -290,7 +314,7 @@ class ClutterModel:
             near_rx = (d_from_rx >= 0.0) & (d_from_rx <= 5000.0)
 
             # Elevación absoluta de la cima de clutter en cada punto
-            clutter_top = terrain_profiles + h_g  # (n, nr) — techo del clutter [m AMSL]
+            clutter_top = terrain_profiles + h_g[:, None]  # (n, nr) — techo del clutter [m AMSL]
 
             # Elevación absoluta del receptor
             # terrain_heights no disponible aquí; se estima desde terrain_profiles[:, -1]
@@ -305,17 +329,13 @@ class ClutterModel:
             d_t_min_m = d_t_m.min(axis=1)  # (n,) primera obstrucción [m]
 
             # Si no hay obstrucción dentro de 5 km → d_t grande → pérdida ≈ 0
-            d_t_km = xp.where(
-                xp.isinf(d_t_min_m),
-                xp.full(n_receptors, D_T_DEFAULT[env]),
-                d_t_min_m / 1000.0
-            )
+            d_t_km = xp.where(xp.isinf(d_t_min_m), d_t_default, d_t_min_m / 1000.0)
         else:
             # Sin DEM: usar valores por defecto por entorno
-            d_t_km = xp.full(n_receptors, D_T_DEFAULT[env])
+            d_t_km = d_t_default
 
         # --- Fórmula P.2108-1 §3 (vectorizada) ---
-        h_ratio = h_b / max(h_g, 0.1)  # h_b / h_g
+        h_ratio = h_b / xp.maximum(h_g, 0.1)  # h_b / h_g
         tanh_term = xp.tanh(6.0 * (h_ratio - 0.625))
         exp_dt = xp.exp(-d_t_km)
 
@@ -324,7 +344,7 @@ class ClutterModel:
 
         self.logger.debug(
             f"Clutter P.2108-1: env={env}, f={frequency_mhz:.0f} MHz, "
-            f"F_fc={F_fc:.4f}, h_g={h_g}m, h_b={h_b}m, "
+            f"F_fc={F_fc:.4f}, h_g={float(xp.mean(h_g)):.1f}m (mean), h_b={h_b}m, "
             f"mean_L={float(xp.mean(clutter_array)):.2f} dB, "
             f"max_L={float(xp.max(clutter_array)):.2f} dB"
         )
@@ -20,6 +20,9 @@ import numpy as np
 import logging
 from typing import Dict, Any, Tuple, Optional
 
+from core import jit_kernels
+from utils import diagnostics
+
 
 class COST231WalfischIkegamiModel:
     """
@@ -32,6 +35,10 @@ class COST231WalfischIkegamiModel:
     - Cuando Okumura-Hata no es suficientemente preciso
     """
 
+    # Capas de TerrainMorphology que consume el modelo: capa -> argumento de
+    # calculate_path_loss (las muestrea el calculador en el grid)
+    MORPHOLOGY_LAYERS = {'building_height': 'building_height_map'}
+
     def __init__(self, config: Optional[Dict[str, Any]] = None,
                  compute_module=None):
         """
@@ -81,6 +88,7 @@ class COST231WalfischIkegamiModel:
                            street_orientation: float = 0.0,
                            terrain_profiles: Optional[np.ndarray] = None,
                            los_method: str = 'auto',
+                           building_height_map: Optional[np.ndarray] = None,
                            **kwargs) -> Dict[str, np.ndarray]:
         """
         Calcula Path Loss usando COST-231 Walfisch-Ikegami
@@ -109,6 +117,9 @@ class COST231WalfischIkegamiModel:
             street_orientation: Orientacion calle vs TX (grados)
             terrain_profiles: Array (n_receptors, n_samples) con perfiles radiales. Si None, usa heuristica (FASE 1)
             los_method: 'auto' (geom si terrain_profiles else heuristic), 'geometric', 'heuristic'
+            building_height_map: Altura de edificios por receptor [m] muestreada de
+                TerrainMorphology (misma forma que distances); tiene prioridad
+                sobre la estimación por perfil
 
         Returns:
             Diccionario con 'path_loss' (dB), 'validity_mask' (bool), 'valid_count' (int)
@@ -163,8 +174,11 @@ class COST231WalfischIkegamiModel:
         # building_height: altura tipica edificios (AGL)
         # mobile_height: altura movil (AGL)
 
-        # FASE 3: Estimar altura de edificios localmente si terrain_profiles disponible
-        if terrain_profiles is not None:
+        # Altura de edificios: raster de morfología del DEM (calculado una vez por
+        # DEM), estimación por perfil (FASE 3) o constante
+        if building_height_map is not None:
+            building_height_array = self.xp.asarray(building_height_map, dtype=float).reshape(-1)
+        elif terrain_profiles is not None:
             # Usar estimación local por receptor (mejor que altura global constante)
             building_height_array = self._estimate_building_height_local(terrain_profiles)
             # Convertir de (n_receptors,) a shape de distances_flat para cálculo vectorizado
@@ -315,6 +329,16 @@ class COST231WalfischIkegamiModel:
         # Altura absoluta del TX
         h_tx_absolute = tx_height + tx_elevation
         
+        # Backend JIT: clearance máximo por fila sin temporales (n_receptors, n_samples)
+        if jit_kernels.is_enabled() and self.xp is np:
+            max_clearance = jit_kernels.los_max_clearance(terrain_profiles, h_tx_absolute)
+            los_mask = max_clearance <= 1.0
+            los_mask[distances_flat < 1e-6] = True
+            diagnostics.log(self.logger, lambda: (
+                f"LOS/NLOS geométrico JIT: {int(los_mask.sum())}/{n_receptors} LOS"
+            ), logging.INFO)
+            return los_mask
+        
         # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
         # VECTORIZAR: Expandir distances_flat a matriz (n_receptors, 1)
         # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -355,13 +379,13 @@ class COST231WalfischIkegamiModel:
         trivial_mask = distances_flat < 1e-6
         los_mask[trivial_mask] = True
         
-        # Log estadísticas
-        n_los = self.xp.sum(los_mask)
-        n_nlos = n_receptors - n_los
-        self.logger.info(
-            f"LOS/NLOS geométrico VECTORIZADO: {n_los}/{n_receptors} LOS, "
-            f"{n_nlos}/{n_receptors} NLOS"
-        )
+        # Log estadísticas (conteo = reducción completa: solo en modo diagnóstico)
+        def los_stats():
+            n_los = int(self.xp.sum(los_mask))
+            return (f"LOS/NLOS geométrico VECTORIZADO: {n_los}/{n_receptors} LOS, "
+                    f"{n_receptors - n_los}/{n_receptors} NLOS")
+
+        diagnostics.log(self.logger, los_stats, logging.INFO)
         
         return los_mask
 
@@ -458,16 +482,13 @@ class COST231WalfischIkegamiModel:
         h_building_estimated = self.xp.clip(h_building_estimated, h_min, h_max)
         
         # Log estadísticas
-        h_mean = self.xp.mean(h_building_estimated)
-        h_std = self.xp.std(h_building_estimated)
-        h_min_actual = self.xp.min(h_building_estimated)
-        h_max_actual = self.xp.max(h_building_estimated)
-        
-        self.logger.info(
+        diagnostics.log(self.logger, lambda: (
             f"Building height local (FASE 3): "
-            f"media={h_mean:.1f}m, std={h_std:.1f}m, "
-            f"rango=[{h_min_actual:.1f}, {h_max_actual:.1f}]m"
-        )
+            f"media={float(self.xp.mean(h_building_estimated)):.1f}m, "
+            f"std={float(self.xp.std(h_building_estimated)):.1f}m, "
+            f"rango=[{float(self.xp.min(h_building_estimated)):.1f}, "
+            f"{float(self.xp.max(h_building_estimated)):.1f}]m"
+        ), logging.INFO)
         
         return h_building_estimated
 
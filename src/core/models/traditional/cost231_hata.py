@@ -25,6 +25,9 @@ import numpy as np
 import logging
 from typing import Dict, Any, Optional
 
+from utils import diagnostics
+from ..workspace import ModelWorkspace
+
 
 class COST231HataModel:
     """
@@ -41,13 +44,18 @@ class COST231HataModel:
     - Otros componentes: idénticos a Okumura-Hata
     """
 
-    def __init__(self, config: Optional[Dict[str, Any]] = None, compute_module=None):
+    # calculate_path_loss acepta h_b,eff precalculada (EffectiveHeightService)
+    supports_hb_effective = True
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None, compute_module=None,
+                 workspace: Optional[ModelWorkspace] = None):
         """
         Inicializa modelo COST-231 Hata
 
         Args:
             config: Diccionario de configuración (opcional)
             compute_module: numpy o cupy para CPU/GPU
+            workspace: ModelWorkspace compartido (opcional, se crea uno propio)
         """
         self.config = config or {}
         self.logger = logging.getLogger("COST231HataModel")
@@ -56,6 +64,9 @@ class COST231HataModel:
         # Módulo de cómputo (numpy o cupy)
         self.xp = compute_module if compute_module is not None else np
 
+        # Buffers por grid reutilizados entre antenas + log-distancia memoizada
+        self.workspace = workspace if workspace is not None else ModelWorkspace(self.xp)
+
         # Parámetros configurables (idénticos a Okumura-Hata)
         self.mobile_height = self.config.get('mobile_height', 1.5)  # metros
         self.environment = self.config.get('environment', 'Urban')  # Solo Urban válido
@@ -76,6 +87,7 @@ class COST231HataModel:
                            terrain_profiles: Optional[np.ndarray] = None,
                            environment: str = 'Urban',
                            city_type: str = 'medium', mobile_height: Optional[float] = None,
+                           hb_effective: Optional[np.ndarray] = None,
                            **kwargs) -> Dict[str, np.ndarray]:
         """
         Calcula pérdida de propagación usando COST-231 Hata
@@ -94,6 +106,8 @@ class COST231HataModel:
             environment: 'Urban' (solo Urban válido en COST-231 Hata)
             city_type: 'large' (C_m=3 dB) o 'medium' (C_m=0 dB)
             mobile_height: Altura móvil en metros (default: 1.5m)
+            hb_effective: h_b,eff por receptor ya calculada (ej. por sector de acimut,
+                ver EffectiveHeightService); tiene prioridad sobre terrain_profiles
             **kwargs: Parámetros adicionales
 
         Returns:
@@ -112,17 +126,25 @@ class COST231HataModel:
         # Validar rangos del modelo
         self._validate_parameters(frequency, tx_height, mobile_height)
 
-        # Convertir distancias a km
-        d_km_real = distances / 1000.0
+        xp = self.xp
+        ws = self.workspace
+        distances = xp.asarray(distances)
+        shape = distances.shape
+
+        # Convertir distancias a km (buffers del workspace, reutilizados entre antenas)
+        d_km_real = xp.divide(distances, 1000.0, out=ws.buffer('d_km_real', shape))
 
         # Distancia para modelo (clamp a 0.001 km para evitar log(0))
-        d_km_model = self.xp.maximum(d_km_real, 0.001)
+        d_km_model = xp.maximum(d_km_real, 0.001, out=ws.buffer('d_km_model', shape))
 
         # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
         # ALTURA EFECTIVA DE LA ANTENA BASE
         # h_b,eff = h_tx + z_tx - z_ref
         # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-        if terrain_profiles is not None:
+        if hb_effective is not None:
+            hb_effective = xp.asarray(hb_effective, dtype=float).reshape(shape)
+            self.logger.debug("Using precomputed effective height (azimuth sectors)")
+        elif terrain_profiles is not None:
             # Si terrain_profiles disponible, usar análisis estadístico
             original_shape = d_km_model.shape
             d_km_flat = d_km_model.ravel()
@@ -145,12 +167,17 @@ class COST231HataModel:
         # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
         # Rango COST-231 Hata: f ∈ [1500-2000], d ∈ [0.02-5]
         validity_frequency = (frequency >= 1500) and (frequency <= 2000)
-        validity_distance = (d_km_real >= 0.02) & (d_km_real <= 5.0)
-        validity_height = (hb_effective >= 30.0) & (hb_effective <= 200.0)
+        validity_mask = xp.greater_equal(d_km_real, 0.02)  # array retornado (nuevo)
+        validity_mask &= xp.less_equal(d_km_real, 5.0, out=ws.buffer('mask', shape, bool))
+        n_out_distance = validity_mask.size - int(xp.count_nonzero(validity_mask))
+
+        validity_height = xp.greater_equal(hb_effective, 30.0, out=ws.buffer('mask_hb', shape, bool))
+        validity_height &= xp.less_equal(hb_effective, 200.0, out=ws.buffer('mask', shape, bool))
+        n_out_height = validity_height.size - int(xp.count_nonzero(validity_height))
 
         # Máscara de validez combinada
-        validity_mask = validity_distance & validity_height
-        valid_count = int(self.xp.sum(validity_mask))
+        validity_mask &= validity_height
+        valid_count = int(xp.count_nonzero(validity_mask))
 
         # Log de receptores fuera de rango
         if not validity_frequency:
@@ -158,8 +185,6 @@ class COST231HataModel:
                 f"Frequency {frequency}MHz fuera de rango COST-231 Hata (1500-2000 MHz)"
             )
 
-        n_out_distance = int(self.xp.sum(~validity_distance))
-        n_out_height = int(self.xp.sum(~validity_height))
         if n_out_distance > 0:
             self.logger.warning(f"Receptores fuera de rango distancia (0.02-5km): {n_out_distance}")
         if n_out_height > 0:
@@ -170,8 +195,9 @@ class COST231HataModel:
         # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
         # FACTOR DE CORRECCIÓN POR ALTURA MÓVIL a(h_m)
         # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+        # a(h_m) no depende del píxel: se evalúa como escalar (0-d) en lugar de un grid constante
         a_hm = self._calculate_mobile_height_correction_vectorized(
-            frequency, hm, city_type, hb_effective
+            frequency, hm, city_type, xp.zeros(())
         )
 
         # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -180,15 +206,20 @@ class COST231HataModel:
         #     + [44.9 − 6.55·log₁₀(h_b)]·log₁₀(d) + C_m
         # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
         # Usar h_b_safe con clamp a 30m para estabilidad numérica (no 1m)
-        hb_safe = self.xp.maximum(hb_effective, 30.0)
-
-        path_loss_base = (
-            46.3  # COST-231 constante base (diferencia clave vs Okumura-Hata)
-            + 33.9 * self.xp.log10(frequency)  # Coeficiente frecuencia (vs 26.16 en OH)
-            - 13.82 * self.xp.log10(hb_safe)
-            - a_hm
-            + (44.9 - 6.55 * self.xp.log10(hb_safe)) * self.xp.log10(d_km_model)
-        )
+        # Evaluación en sitio: log10(hb_safe) una sola vez en un buffer, log10(d)
+        # memoizado por array de distancias, y un único array nuevo (el resultado)
+        log_hb = xp.maximum(hb_effective, 30.0, out=ws.buffer('log_hb', shape))
+        xp.log10(log_hb, out=log_hb)
+        log_d = ws.log10_distance_km(distances, 0.001)
+
+        # 46.3: constante base COST-231; 33.9: coeficiente de frecuencia (vs 69.55 / 26.16 en OH)
+        path_loss_base = xp.multiply(log_hb, 13.82)
+        xp.subtract(46.3 + 33.9 * xp.log10(frequency), path_loss_base, out=path_loss_base)
+        path_loss_base -= a_hm
+        slope = xp.multiply(log_hb, 6.55, out=ws.buffer('slope', shape))
+        xp.subtract(44.9, slope, out=slope)
+        slope *= log_d
+        path_loss_base += slope
 
         # ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
         # CORRECCIÓN POR TIPO DE CIUDAD C_m
@@ -200,12 +231,12 @@ class COST231HataModel:
             Cm = 0.0  # Ciudad mediana (default)
             self.logger.debug("Applied C_m = 0 dB for medium/small city")
 
-        path_loss = path_loss_base + Cm
-
-        self.logger.info(
-            f"COST-231 Hata: base={path_loss_base.mean():.1f} dB, "
+        diagnostics.log(self.logger, lambda: (
+            f"COST-231 Hata: base={float(path_loss_base.mean()):.1f} dB, "
             f"C_m={Cm} dB, valid={valid_count}/{distances.size}"
-        )
+        ), logging.INFO)
+        path_loss_base += Cm
+        path_loss = path_loss_base
 
         # Retornar diccionario con path_loss y metadatos de validez
         return {
@@ -21,6 +21,9 @@ import numpy as np
 import logging
 from typing import Tuple, Optional
 
+from core import jit_kernels
+from utils import diagnostics
+
 
 class DiffractionModel:
     """Modelo de difracción para ITU-R P.1546"""
@@ -313,6 +316,13 @@ class DiffractionModel:
         # En su lugar: SIEMPRE calcular perfil real para detectar obstáculos
         # (El check de radio horizonte solo es válido en terrain plano)
         
+        # Backend JIT: búsqueda del obstáculo dominante fusionada sobre todas las filas
+        if jit_kernels.is_enabled() and self.xp is np:
+            return self._diffraction_correction_jit(
+                terrain_profiles, distances_m, frequency_hz,
+                tx_elevation + h_eff_tx, terrain_heights
+            )
+        
         # PASO 3-5: Calcular correcciones por receptor
         diffraction_correction = self.xp.zeros(n_receptors)
         
@@ -356,6 +366,42 @@ class DiffractionModel:
                 # Sin obstáculo: LOS (no hay difracción)
                 diffraction_correction[i] = 0.0
         
-        self.logger.debug(f"Diffraction: mean_loss={float(self.xp.mean(diffraction_correction)):.2f} dB")
+        diagnostics.log(self.logger, lambda: (
+            f"Diffraction: mean_loss={float(self.xp.mean(diffraction_correction)):.2f} dB"
+        ))
+        
+        return diffraction_correction
+    
+    
+    def _diffraction_correction_jit(self,
+                                    terrain_profiles: np.ndarray,
+                                    distances_m: np.ndarray,
+                                    frequency_hz: float,
+                                    h_tx_absolute: float,
+                                    h_rx_absolute: np.ndarray) -> np.ndarray:
+        """
+        Variante de calculate_diffraction_correction con el kernel JIT
+        
+        La búsqueda del obstáculo máximo (el bucle por receptor) se hace en un
+        solo kernel compilado; la pérdida knife-edge se evalúa vectorizada solo
+        sobre los receptores con obstáculo.
+        """
+        max_obstacle, d1 = jit_kernels.max_obstacle_search(
+            terrain_profiles, distances_m, h_tx_absolute, h_rx_absolute
+        )
+        diffraction_correction = np.zeros(len(max_obstacle))
+        
+        obstructed = max_obstacle > 0
+        if np.any(obstructed):
+            diffraction_correction[obstructed] = self.calculate_knife_edge_loss(
+                h_obstacle=max_obstacle[obstructed],
+                d1_m=d1[obstructed],
+                d2_m=np.asarray(distances_m, dtype=float)[obstructed] - d1[obstructed],
+                frequency_hz=frequency_hz
+            )
+        
+        diagnostics.log(self.logger, lambda: (
+            f"Diffraction (JIT): mean_loss={float(np.mean(diffraction_correction)):.2f} dB"
+        ))
         
         return diffraction_correction
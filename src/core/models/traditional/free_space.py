@@ -1,6 +1,8 @@
 import logging
 import numpy as np
 
+from ..workspace import ModelWorkspace
+
 class FreeSpacePathLossModel:
     """
     Modelo de pérdidas de espacio libre (FSPL)
@@ -11,12 +13,14 @@ class FreeSpacePathLossModel:
     - f = frecuencia en MHz
     """
     
-    def __init__(self, config=None, compute_module=None):
+    def __init__(self, config=None, compute_module=None, workspace=None):
         self.config = config or {}
         self.logger = logging.getLogger("FreeSpaceModel")
         self.name = "Free Space Path Loss"
         # Permitir usar numpy o cupy
         self.xp = compute_module if compute_module is not None else np
+        # Intermedios memoizados (log-distancia) reutilizados entre antenas
+        self.workspace = workspace if workspace is not None else ModelWorkspace(self.xp)
     
     def calculate_path_loss(self, distances, frequency, tx_height=None, 
                            terrain_heights=None, **kwargs):
@@ -32,14 +36,14 @@ class FreeSpacePathLossModel:
         Returns:
             Array con path loss en dB
         """
-        # Convertir distancias de metros a kilómetros
-        d_km = distances / 1000.0
-        
-        # Evitar log de 0 (mínimo 1 metro = 0.001 km)
-        d_km = self.xp.maximum(d_km, 0.001)
+        # log10(d_km) con mínimo 1 metro (0.001 km), memoizado por array de distancias
+        log_d = self.workspace.log10_distance_km(distances, 0.001)
         
         # FSPL = 20*log10(d_km) + 20*log10(f_MHz) + 32.45
-        fspl = 20 * self.xp.log10(d_km) + 20 * self.xp.log10(frequency) + 32.45
+        # (un único array nuevo: el resultado; el resto en sitio)
+        fspl = self.xp.multiply(log_d, 20)
+        fspl += 20 * self.xp.log10(frequency)
+        fspl += 32.45
         
         self.logger.debug(f"Calculated FSPL for f={frequency}MHz")
         
@@ -43,8 +43,14 @@ import numpy as np
 import logging
 from typing import Dict, Any, Optional
 
-from .itu_r_p1546_tables import get_reference_field_intensity, get_model_tables_info, get_percentile_correction
+from .itu_r_p1546_tables import (
+    get_reference_field_intensity, get_field_strength_surface,
+    get_model_tables_info, get_percentile_correction
+)
 from .clutter_model import ClutterModel
+from core import jit_kernels
+from core.ragged_profiles import RaggedProfiles
+from utils import diagnostics
 
 
 class ITUR_P1546Model:
@@ -66,6 +72,10 @@ class ITUR_P1546Model:
     - Perfil de difracción simplificado a 2D (trayecto radial único por receptor)
     - Validación con datos de campo: pendiente
     """
+
+    # Capas de TerrainMorphology que consume el modelo: capa -> argumento de
+    # calculate_path_loss (las muestrea el calculador en el grid)
+    MORPHOLOGY_LAYERS = {'clutter_class': 'clutter_class'}
     
     def __init__(self, config: Optional[Dict[str, Any]] = None,
                  compute_module=None):
@@ -100,6 +110,12 @@ class ITUR_P1546Model:
         
         # Parámetros ITU
         self.tables_info = get_model_tables_info()
+        # Modelo de clutter P.2108 (sin estado por llamada: una instancia por modelo)
+        self.clutter_model = ClutterModel(xp=self.xp)
+        # Acepta RaggedProfiles (perfiles CSR con distancias propias) en terrain_profiles
+        self.supports_ragged_profiles = True
+        # Lookup de tablas: 'dense' (superficie cacheada por frecuencia) o 'exact'
+        self.field_table = str(self.config.get('field_table', 'dense')).lower()
         
         # Rangos de terreno para h_eff
         self.inner_radius_km = 3.0
@@ -131,6 +147,7 @@ class ITUR_P1546Model:
                            location_percentage: int = 50,
                            smoothed_terrain_profiles: Optional[np.ndarray] = None,
                            profile_distances: Optional[np.ndarray] = None,
+                           clutter_class: Optional[np.ndarray] = None,
                            **kwargs) -> np.ndarray:
         """
         Calcula Path Loss usando ITU-R P.1546-6.
@@ -154,6 +171,7 @@ class ITUR_P1546Model:
             terrain_heights: Elevaciones del terreno en cada receptor [m AMSL]
             tx_elevation: Elevación del sitio TX [m AMSL], default 0
             terrain_profiles: Perfiles radiales DEM (n_receptors, n_radios) [m AMSL]
+                o RaggedProfiles (longitud variable, con sus distancias)
             environment: 'Urban' | 'Suburban' | 'Rural'
             mobile_height: Altura receptor AGL [m], default 1.5
             time_percentage: Percentil de tiempo [1–99], default 50
@@ -161,6 +179,8 @@ class ITUR_P1546Model:
             smoothed_terrain_profiles: Perfiles suavizados (n_receptors, n_radios)
                 Si se proporciona, se usa en lugar de terrain_profiles para h_eff.
             profile_distances: Distancias TX→punto en cada perfil (n_receptors, n_radios) [m]
+            clutter_class: Clase de clutter por receptor (TerrainMorphology); con
+                environment='Auto' fija el entorno de clutter de cada receptor
             **kwargs: Parámetros adicionales ignorados
 
         Returns:
@@ -214,7 +234,7 @@ class ITUR_P1546Model:
         )
         
         # === PASO 3: TCA correction — P.1546-6 §4.5 (solo si hay perfiles DEM) ===
-        if terrain_profiles is not None and terrain_profiles.shape[0] == n_receptors:
+        if terrain_profiles is not None and len(terrain_profiles) == n_receptors:
             tca_correction = self._calculate_tca_correction_vectorized(
                 terrain_profiles=terrain_profiles,
                 distances_km=distances_km,
@@ -239,7 +259,8 @@ class ITUR_P1546Model:
             distances_km=distances_km,
             rx_height=mobile_height,
             environment=environment,
-            frequency=frequency
+            frequency=frequency,
+            clutter_class=clutter_class
         )
         
         # 4b. Terminal clearance: no aplicado (cubierto por TCA §4.5)
@@ -271,9 +292,11 @@ class ITUR_P1546Model:
         validity_mask = self.xp.isfinite(path_loss_shaped) & (path_loss_shaped > 0)
         valid_count = int(self.xp.sum(validity_mask))
 
-        self.logger.debug(f"Path loss: min={self.xp.min(path_loss_shaped):.1f} dB, "
-                         f"max={self.xp.max(path_loss_shaped):.1f} dB, "
-                         f"valid={valid_count}/{n_receptors}")
+        diagnostics.log(self.logger, lambda: (
+            f"Path loss: min={float(self.xp.min(path_loss_shaped)):.1f} dB, "
+            f"max={float(self.xp.max(path_loss_shaped)):.1f} dB, "
+            f"valid={valid_count}/{n_receptors}"
+        ))
 
         return path_loss_shaped
     
@@ -308,10 +331,14 @@ class ITUR_P1546Model:
         n_receptors = len(distances)
 
         # --- Caso sin DEM: P.1546-6 §4.3 permite h1 = h_tx_AGL ---
-        if terrain_profiles is None or terrain_profiles.shape[0] != n_receptors:
+        if terrain_profiles is None or len(terrain_profiles) != n_receptors:
             self.logger.debug("h_eff: sin perfiles DEM — usando h_tx_AGL para todos los receptores")
             return xp.full(n_receptors, float(tx_height))
 
+        if isinstance(terrain_profiles, RaggedProfiles):
+            z_mean_range = self._annulus_mean_ragged(terrain_profiles)
+            return self._effective_height_from_z_mean(distances, tx_height, tx_elevation, z_mean_range)
+
         n_radios = terrain_profiles.shape[1]
 
         # Distancias radiales: usar profile_distances si están disponibles, sino linspace
@@ -344,6 +371,24 @@ class ITUR_P1546Model:
             terrain_profiles.mean(axis=1)  # fallback: media global
         )  # (n_receptors,)
 
+        return self._effective_height_from_z_mean(distances, tx_height, tx_elevation, z_mean_range)
+
+    def _annulus_mean_ragged(self, profiles: RaggedProfiles) -> np.ndarray:
+        """z_mean(3–15 km) por perfil CSR; media global del perfil si el anillo está vacío"""
+        xp = self.xp
+        inner_m = self.inner_radius_km * 1000.0
+        outer_m = self.outer_radius_km * 1000.0
+        in_range = (profiles.distances >= inner_m) & (profiles.distances <= outer_m)
+        return xp.where(
+            profiles.segment_count(in_range) > 0,
+            profiles.segment_mean(profiles.elevations, mask=in_range),
+            profiles.segment_mean(profiles.elevations)
+        )
+
+    def _effective_height_from_z_mean(self, distances, tx_height, tx_elevation, z_mean_range):
+        """h_eff = h_tx + z_tx - z_mean con la regla d < 15 km y el clip de P.1546"""
+        xp = self.xp
+
         # h_eff_dem = h_tx + z_tx - z_mean
         z_tx = float(tx_elevation)
         h_eff_dem = tx_height + z_tx - z_mean_range  # (n_receptors,)
@@ -355,11 +400,11 @@ class ITUR_P1546Model:
         # Clipear a rango físicamente válido P.1546
         h_eff_array = xp.clip(h_eff_array, -3000.0, 1200.0)
 
-        self.logger.debug(
+        diagnostics.log(self.logger, lambda: (
             f"h_eff: min={float(xp.min(h_eff_array)):.1f} m, "
             f"max={float(xp.max(h_eff_array)):.1f} m, "
             f"mean={float(xp.mean(h_eff_array)):.1f} m"
-        )
+        ))
         return h_eff_array
     
     
@@ -370,10 +415,14 @@ class ITUR_P1546Model:
         """
         Interpola intensidad de campo E[dBμV/m] desde tablas ITU
         
-        Usa get_reference_field_intensity() que hace interpolación 3D:
+        Interpolación 3D de las tablas:
         - Frecuencia: log-linear entre 100/600/2000 MHz
         - Distancia: log-linear
         - Altura: lineal
+
+        Con field_table='dense' (default) usa la superficie remuestreada y
+        cacheada por frecuencia (lookup O(1) en self.xp, error < 0.01 dB);
+        con 'exact' llama a get_reference_field_intensity() en NumPy.
         
         Args:
             frequency: Frecuencia en MHz
@@ -383,22 +432,26 @@ class ITUR_P1546Model:
         Returns:
             Array E[dBμV/m] (n_receptors,)
         """
-        # Llamar a función de interpolación ITU
-        E_field = get_reference_field_intensity(
-            frequency=frequency,
-            distance_km=distances_km,
-            h_eff_m=h_eff,
-            xp=np  # Tablas ITU siempre en NumPy
-        )
+        if self.field_table == 'dense':
+            E_field = get_field_strength_surface(float(frequency)).lookup(
+                distances_km, h_eff, xp=self.xp
+            )
+        else:
+            E_field = get_reference_field_intensity(
+                frequency=frequency,
+                distance_km=distances_km,
+                h_eff_m=h_eff,
+                xp=np  # Tablas ITU siempre en NumPy
+            )
         
-        self.logger.debug(
+        diagnostics.log(self.logger, lambda: (
             f"E_field: f={frequency} MHz, "
-            f"h_eff=[{float(h_eff.min()):.1f},{float(h_eff.max()):.1f}] m, "
-            f"d=[{float(distances_km.min()):.2f},{float(distances_km.max()):.2f}] km, "
-            f"E=[{float(E_field.min()):.2f},{float(E_field.max()):.2f}] dBμV/m"
-        )
+            f"h_eff={diagnostics.value_range(h_eff)} m, "
+            f"d={diagnostics.value_range(distances_km, '.2f')} km, "
+            f"E={diagnostics.value_range(E_field, '.2f')} dBμV/m"
+        ))
         
-        # Convertir a xp si es necesario (GPU)
+        # Convertir a xp si es necesario (GPU, solo ruta 'exact')
         if self.xp.__name__ == 'cupy':
             E_field = self.xp.asarray(E_field)
         
@@ -452,9 +505,21 @@ class ITUR_P1546Model:
         n_receptors = len(distances_km)
 
         # Sin perfiles de terreno: sin corrección TCA
-        if terrain_profiles is None or terrain_profiles.shape[0] != n_receptors:
+        if terrain_profiles is None or len(terrain_profiles) != n_receptors:
             return xp.zeros(n_receptors, dtype=float)
 
+        # Perfiles CSR: máximo ángulo por tramo (distancias incluidas en el perfil)
+        if isinstance(terrain_profiles, RaggedProfiles):
+            rows = terrain_profiles.row_ids
+            d_from_rx = (distances_km * 1000.0)[rows] - terrain_profiles.distances
+            near_rx = (d_from_rx >= 0.0) & (d_from_rx <= 15000.0)
+            H_rx = terrain_heights + mobile_height
+            theta_i = xp.degrees(xp.arctan2(
+                terrain_profiles.elevations - H_rx[rows], xp.maximum(d_from_rx, 1.0)
+            ))
+            theta_tc = xp.maximum(terrain_profiles.segment_max(theta_i, mask=near_rx), 0.0)
+            return self._tca_from_theta(theta_tc)
+
         # Sin distancias de perfil: no podemos calcular d_desde_rx
         if profile_distances is None:
             self.logger.debug("TCA §4.5: profile_distances no disponible, sin corrección")
@@ -462,6 +527,14 @@ class ITUR_P1546Model:
 
         distances_m = distances_km * 1000.0  # (n_receptors,)
 
+        # Backend JIT: máximo ángulo en un solo recorrido, sin temporales (n, nr)
+        if jit_kernels.is_enabled() and xp is np:
+            theta_tc = jit_kernels.tca_theta_max(
+                terrain_profiles, profile_distances, distances_m,
+                terrain_heights + mobile_height, window_m=15000.0
+            )
+            return self._tca_from_theta(theta_tc)
+
         # Distancia de cada punto del perfil al receptor [m]
         # d_from_rx[i, j] = distancia TX→RX[i] - distancia TX→punto[i,j]
         d_from_rx = distances_m[:, None] - profile_distances  # (n_receptors, n_radios)
@@ -488,6 +561,12 @@ class ITUR_P1546Model:
         theta_tc = xp.max(theta_masked, axis=1)  # (n_receptors,)
         theta_tc = xp.maximum(theta_tc, 0.0)  # solo corrección cuando hay obstáculo
 
+        return self._tca_from_theta(theta_tc)
+
+    def _tca_from_theta(self, theta_tc: np.ndarray) -> np.ndarray:
+        """J(θ_tc) [dB] a partir del ángulo de despeje θ_tc [°] (>= 0)"""
+        xp = self.xp
+
         # J(θ_tc) — función de corrección definida en P.1546-6 §4.5; θ_tc en grados
         t = theta_tc - 0.1
         J_theta = 6.9 + 20.0 * xp.log10(
@@ -495,11 +574,11 @@ class ITUR_P1546Model:
         )
         tca_db = xp.where(theta_tc > 0.0, J_theta, 0.0)
 
-        self.logger.debug(
+        diagnostics.log(self.logger, lambda: (
             f"TCA §4.5: θ_tc min={float(xp.min(theta_tc)):.2f}° "
             f"max={float(xp.max(theta_tc)):.2f}°, "
             f"J(θ) mean={float(xp.mean(tca_db)):.2f} dB"
-        )
+        ))
         return tca_db
     
     
@@ -509,7 +588,8 @@ class ITUR_P1546Model:
                                                 environment: str = 'Urban',
                                                 distances_km: np.ndarray = None,
                                                 rx_height: float = 1.5,
-                                                frequency: float = 900.0) -> np.ndarray:
+                                                frequency: float = 900.0,
+                                                clutter_class: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Corrección por clutter — ITU-R P.2108-1 §3 (vectorizado, via ClutterModel).
 
@@ -520,6 +600,7 @@ class ITUR_P1546Model:
             distances_km: Distancias en km (n_receptors,)
             rx_height: Altura receptor AGL [m]
             frequency: Frecuencia en MHz (requerida por P.2108-1)
+            clutter_class: Clase de clutter por receptor (opcional, ver ClutterModel)
         Returns:
             Array de correcciones en dB (n_receptors,)
         """
@@ -527,16 +608,16 @@ class ITUR_P1546Model:
         if n_receptors == 0:
             return self.xp.zeros(0, dtype=float)
 
-        clutter = ClutterModel(xp=self.xp)
         distances_m = distances_km * 1000.0
 
-        clutter_correction = clutter.calculate_clutter_correction_vectorized(
+        clutter_correction = self.clutter_model.calculate_clutter_correction_vectorized(
             terrain_profiles=terrain_profiles,
             profile_distances=profile_distances,
             distances_m=distances_m,
             h_rx_agl=rx_height,
             environment=environment.lower() if environment else None,
-            frequency_mhz=frequency
+            frequency_mhz=frequency,
+            clutter_class=clutter_class
         )
 
         return clutter_correction
@@ -656,13 +737,13 @@ class ITUR_P1546Model:
         if percentile_correction is not None:
             path_loss = path_loss + percentile_correction
         
-        self.logger.debug(
-            f"PL [{frequency} MHz]: base={139.3 + freq_term:.2f} dB, "
-            f"E=[{float(E_field.min()):.1f},{float(E_field.max()):.1f}] dBμV/m, "
-            f"TCA=[{float(tca_correction.min()):.2f},{float(tca_correction.max()):.2f}] dB, "
-            f"clutter=[{float(clutter_correction.min()):.2f},{float(clutter_correction.max()):.2f}] dB, "
-            f"PL=[{float(path_loss.min()):.1f},{float(path_loss.max()):.1f}] dB"
-        )
+        diagnostics.log(self.logger, lambda: (
+            f"PL [{frequency} MHz]: base={float(139.3 + freq_term):.2f} dB, "
+            f"E={diagnostics.value_range(E_field)} dBμV/m, "
+            f"TCA={diagnostics.value_range(tca_correction, '.2f')} dB, "
+            f"clutter={diagnostics.value_range(clutter_correction, '.2f')} dB, "
+            f"PL={diagnostics.value_range(path_loss)} dB"
+        ))
         
         return path_loss
     
@@ -677,7 +758,7 @@ class ITUR_P1546Model:
             'distance_range': '1-1000 km',
             'tx_height_range': '10-1200 m AGL (tablas); extrapolación fuera de rango',
             'rx_height_range': '1-20 m AGL',
-            'environments': ['Urban', 'Suburban', 'Rural'],
+            'environments': ['Urban', 'Suburban', 'Rural', 'Auto'],
             'has_terrain_awareness': True,
             'has_tca_correction': True,      # P.1546-6 §4.5
             'has_clutter_correction': True,  # ITU-R P.2108-1 §3
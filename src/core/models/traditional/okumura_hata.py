@@ -2,6 +2,10 @@ import numpy as np
 import logging
 import warnings
 
+from core import jit_kernels
+from utils import diagnostics
+from ..workspace import ModelWorkspace
+
 class OkumuraHataModel:
     """
     Implementación completa del modelo de propagación Okumura-Hata
@@ -23,13 +27,17 @@ class OkumuraHataModel:
     - Cálculo vectorizado CPU/GPU (NumPy/CuPy)
     """
 
-    def __init__(self, config=None, compute_module=None):
+    # calculate_path_loss acepta h_b,eff precalculada (EffectiveHeightService)
+    supports_hb_effective = True
+
+    def __init__(self, config=None, compute_module=None, workspace=None):
         """
         Inicializa el modelo Okumura-Hata
 
         Args:
             config: Diccionario de configuración (opcional)
             compute_module: numpy o cupy para CPU/GPU
+            workspace: ModelWorkspace compartido (opcional, se crea uno propio)
         """
         self.config = config or {}
         self.logger = logging.getLogger("OkumuraHataModel")
@@ -38,6 +46,9 @@ class OkumuraHataModel:
         # Módulo de cómputo (numpy o cupy)
         self.xp = compute_module if compute_module is not None else np
 
+        # Buffers por grid reutilizados entre antenas + log-distancia memoizada
+        self.workspace = workspace if workspace is not None else ModelWorkspace(self.xp)
+
         # Parámetros configurables con valores por defecto
         self.mobile_height = self.config.get('mobile_height', 1.5)  # metros
         self.environment = self.config.get('environment', 'Urban')  # Urban/Suburban/Rural
@@ -51,7 +62,7 @@ class OkumuraHataModel:
 
     def calculate_path_loss(self, distances, frequency, tx_height, terrain_heights,
                            tx_elevation=0.0, terrain_profiles=None, environment='Urban',
-                           city_type='medium', mobile_height=None, **kwargs):
+                           city_type='medium', mobile_height=None, hb_effective=None, **kwargs):
         """
         Calcula pérdida de propagación usando Okumura-Hata completo
 
@@ -65,6 +76,8 @@ class OkumuraHataModel:
             environment: Tipo de ambiente - 'Urban', 'Suburban', 'Rural'
             city_type: Tipo de ciudad - 'large' o 'medium' (solo para Urban)
             mobile_height: Altura del móvil en metros (default: 1.5m)
+            hb_effective: h_b,eff por receptor ya calculada (ej. por sector de acimut,
+                ver EffectiveHeightService); tiene prioridad sobre terrain_profiles
             **kwargs: Parámetros adicionales
 
         Returns:
@@ -80,17 +93,25 @@ class OkumuraHataModel:
         # Validar rangos del modelo
         self._validate_parameters(frequency, tx_height, mobile_height)
 
-        # Convertir distancias a km
-        d_km_real = distances / 1000.0
+        xp = self.xp
+        ws = self.workspace
+        distances = xp.asarray(distances)
+        shape = distances.shape
+
+        # Convertir distancias a km (buffers del workspace, reutilizados entre antenas)
+        d_km_real = xp.divide(distances, 1000.0, out=ws.buffer('d_km_real', shape))
         
         # Distancia para modelo Hata (clamp a 1 km para estabilidad numérica)
         # Usar d_km_real para validez, d_km_model para cálculos (evita log(0))
-        d_km_model = self.xp.maximum(d_km_real, 1.0)
+        d_km_model = xp.maximum(d_km_real, 1.0, out=ws.buffer('d_km_model', shape))
 
         # ALTURA EFECTIVA DE LA ANTENA BASE
         # h_b,eff = h_tx + z_tx - z_ref
         # z_ref depende del método configurado (legacy global_mean o referencia local).
-        if terrain_profiles is not None:
+        if hb_effective is not None:
+            hb_effective = xp.asarray(hb_effective, dtype=float).reshape(shape)
+            self.logger.debug("Using precomputed effective height (azimuth sectors)")
+        elif terrain_profiles is not None:
             # Si terrain_profiles es pasado, aplanar d_km también para coherencia
             original_shape = d_km_model.shape
             d_km_flat = d_km_model.ravel()
@@ -111,16 +132,19 @@ class OkumuraHataModel:
         # VALIDEZ DEL MODELO
         # Separar validez matemática (rango Hata) de estabilidad numérica
         # Distancia: Hata válido solo en [1-20km] (no <1km)
-        validity_distance = (d_km_real >= 1.0) & (d_km_real <= 20.0)
-        validity_height = (hb_effective >= 30.0) & (hb_effective <= 200.0)
+        validity_mask = xp.greater_equal(d_km_real, 1.0)  # array retornado (nuevo)
+        validity_mask &= xp.less_equal(d_km_real, 20.0, out=ws.buffer('mask', shape, bool))
+        n_out_distance = validity_mask.size - int(xp.count_nonzero(validity_mask))
+        
+        validity_height = xp.greater_equal(hb_effective, 30.0, out=ws.buffer('mask_hb', shape, bool))
+        validity_height &= xp.less_equal(hb_effective, 200.0, out=ws.buffer('mask', shape, bool))
+        n_out_height = validity_height.size - int(xp.count_nonzero(validity_height))
         
         # Máscara de validez combinada
-        validity_mask = validity_distance & validity_height
-        valid_count = int(self.xp.sum(validity_mask))
+        validity_mask &= validity_height
+        valid_count = int(xp.count_nonzero(validity_mask))
         
         # Log de receptores fuera de rango
-        n_out_distance = int(self.xp.sum(~validity_distance))
-        n_out_height = int(self.xp.sum(~validity_height))
         if n_out_distance > 0:
             self.logger.warning(f"Receptores fuera de rango distancia (1-20km): {n_out_distance}")
         if n_out_height > 0:
@@ -129,8 +153,9 @@ class OkumuraHataModel:
         hm = mobile_height
 
         # FACTOR DE CORRECCIÓN POR ALTURA MÓVIL a(hm) - Vectorizado explícito
+        # a(hm) no depende del píxel: se evalúa como escalar (0-d) en lugar de un grid constante
         a_hm = self._calculate_mobile_height_correction_vectorized(
-            frequency, hm, city_type, hb_effective
+            frequency, hm, city_type, xp.zeros(())
         )
 
         # PATH LOSS URBANO (fórmula base de Okumura-Hata)
@@ -140,15 +165,20 @@ class OkumuraHataModel:
         # hb_effective = altura física real (puede ser negativa, para validación)
         # hb_safe = clamped a 30.0 para mantener coherencia estadística Hata
         #          (no 1.0: evita singularidades y mantiene dominio válido del modelo)
-        hb_safe = self.xp.maximum(hb_effective, 30.0)
-
-        path_loss_urban = (
-            69.55
-            + 26.16 * self.xp.log10(frequency)
-            - 13.82 * self.xp.log10(hb_safe)
-            - a_hm
-            + (44.9 - 6.55 * self.xp.log10(hb_safe)) * self.xp.log10(d_km_model)
-        )
+        #
+        # Evaluación en sitio: log10(hb_safe) una sola vez en un buffer, log10(d)
+        # memoizado por array de distancias, y un único array nuevo (el resultado)
+        log_hb = xp.maximum(hb_effective, 30.0, out=ws.buffer('log_hb', shape))
+        xp.log10(log_hb, out=log_hb)
+        log_d = ws.log10_distance_km(distances, 1.0)
+
+        path_loss_urban = xp.multiply(log_hb, 13.82)
+        xp.subtract(69.55 + 26.16 * xp.log10(frequency), path_loss_urban, out=path_loss_urban)
+        path_loss_urban -= a_hm
+        slope = xp.multiply(log_hb, 6.55, out=ws.buffer('slope', shape))
+        xp.subtract(44.9, slope, out=slope)
+        slope *= log_d
+        path_loss_urban += slope
 
         # CORRECCIONES POR TIPO DE AMBIENTE Y COST-231
         # Orden correcto: Cm primero (base), luego correcciones de ambiente
@@ -162,7 +192,8 @@ class OkumuraHataModel:
                 Cm = 3.0
             else:
                 Cm = 0.0
-            path_loss_base = path_loss_urban + Cm
+            path_loss_urban += Cm
+            path_loss_base = path_loss_urban
             self.logger.debug(f"Applied COST-231 extension (Cm={Cm}dB) for f>{1500}MHz in Urban environment")
         else:
             path_loss_base = path_loss_urban
@@ -172,7 +203,8 @@ class OkumuraHataModel:
             # Corrección para ambiente suburbano
             # L_suburban = L_base - 2*[log10(f/28)]^2 - 5.4
             correction = 2 * (self.xp.log10(frequency / 28.0))**2 + 5.4
-            path_loss = path_loss_base - correction
+            path_loss_base -= correction
+            path_loss = path_loss_base
             self.logger.debug("Applied Suburban correction")
 
         elif environment.lower() == 'rural':
@@ -180,7 +212,8 @@ class OkumuraHataModel:
             # L_rural = L_base - 4.78*[log10(f)]^2 + 18.33*log10(f) - 40.94
             f_term = self.xp.log10(frequency)
             correction = 4.78 * (f_term**2) - 18.33 * f_term + 40.94
-            path_loss = path_loss_base - correction
+            path_loss_base -= correction
+            path_loss = path_loss_base
             self.logger.debug("Applied Rural correction")
 
         else:  # Urban (default)
@@ -342,8 +375,6 @@ class OkumuraHataModel:
         # === ESTADÍSTICA DEL TERRENO (Hata) ===
         # Crear distancias para TODO el perfil de cada receptor
         d_km_reshaped = d_km.reshape(-1, 1)  # (n_receptors, 1)
-        t = self.xp.linspace(0.0, 1.0, n_samples)  # (n_samples,) desde TX(0) a RX(1)
-        profile_distances = d_km_reshaped * t  # (n_receptors, n_samples) - broadcast
         
         # Máscara para rango [inner_km, outer_km] - adaptado dinámicamente para mapas pequeños
         # Para mapas pequeños donde receptores están a <15km, usar distancia máxima como límite
@@ -351,6 +382,20 @@ class OkumuraHataModel:
         inner_km = self.terrain_reference_inner_km
         outer_km = self.xp.minimum(self.terrain_reference_outer_km, self.xp.max(d_km_reshaped))
         
+        # Backend JIT: media del anillo y fallback al perfil completo en un recorrido
+        if jit_kernels.is_enabled() and self.xp is np:
+            z_ref, sample_counts = jit_kernels.annulus_mean(
+                terrain_profiles, d_km, inner_km, float(outer_km), self.terrain_min_samples
+            )
+            hb_effective = tx_height + tx_elevation - z_ref
+            diagnostics.log(self.logger, lambda: (
+                f"  h_b,eff (JIT): {int((sample_counts < self.terrain_min_samples).sum())} "
+                f"radials using full profile mean, mean={np.nanmean(hb_effective):.1f}m"
+            ), logging.INFO)
+            return hb_effective
+        
+        t = self.xp.linspace(0.0, 1.0, n_samples)  # (n_samples,) desde TX(0) a RX(1)
+        profile_distances = d_km_reshaped * t  # (n_receptors, n_samples) - broadcast
         mask_annulus = (profile_distances >= inner_km) & (profile_distances <= outer_km)
         sample_counts = self.xp.sum(mask_annulus, axis=1)  # (n_receptors,)
         
@@ -391,8 +436,8 @@ class OkumuraHataModel:
         # h_b,eff = h_tx (AGL) + z_tx (MSL) - z_ref (estadístico MSL)
         hb_effective = tx_height + tx_elevation - z_ref
         
-        self.logger.info(f"  z_ref: min={self.xp.nanmin(z_ref):.1f}, max={self.xp.nanmax(z_ref):.1f}, mean={self.xp.nanmean(z_ref):.1f}m")
-        self.logger.info(f"  h_b,eff: min={self.xp.nanmin(hb_effective):.1f}, max={self.xp.nanmax(hb_effective):.1f}, mean={self.xp.nanmean(hb_effective):.1f}m")
+        diagnostics.log(self.logger, lambda: f"  z_ref: {diagnostics.summary(z_ref, unit='m')}", logging.INFO)
+        diagnostics.log(self.logger, lambda: f"  h_b,eff: {diagnostics.summary(hb_effective, unit='m')}", logging.INFO)
         
         return hb_effective
 
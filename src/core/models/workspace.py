@@ -0,0 +1,123 @@
+"""
+Workspace de modelos: buffers reutilizables e intermedios memoizados
+
+Los modelos de forma cerrada (Free Space, Okumura-Hata, COST-231 Hata,
+3GPP 38.901) evalúan sus fórmulas sobre el grid completo. Escritas como
+expresiones encadenadas, cada +, * y log10 reserva un array nuevo del tamaño
+del grid, y en el bucle multi-antena el asignador se llena de arrays de
+vida cortísima.
+
+ModelWorkspace ofrece dos piezas:
+
+    - buffer(name, shape): arrays de trabajo con nombre que se reservan una
+      vez por forma de grid y se reutilizan entre antenas. Los modelos
+      evalúan sobre ellos con ufuncs en sitio (out=...). Su contenido no
+      sobrevive a la siguiente llamada: nunca se devuelven al llamador.
+
+    - cached(name, compute, *sources): intermedios compartidos (ej.
+      log10(d_km)) memoizados por identidad de los arrays de origen. Sirve
+      cuando varias llamadas reciben el mismo array de distancias, como las
+      antenas sectoriales de un mismo sitio. Los valores se marcan de solo
+      lectura y la memo es LRU acotada.
+
+Los resultados que el modelo retorna (path_loss, máscaras) siempre son
+arrays nuevos: el llamador los conserva por antena.
+"""
+
+import logging
+from collections import OrderedDict
+from typing import Callable, Tuple
+
+import numpy as np
+
+
+class ModelWorkspace:
+    """Arena de buffers por grid y memo de intermedios para un modelo"""
+
+    def __init__(self, xp=None, memo_size: int = 4):
+        """
+        Args:
+            xp: Módulo numérico (np o cp). Default: np
+            memo_size: Número máximo de intermedios memoizados
+        """
+        self.xp = xp if xp is not None else np
+        self.memo_size = max(int(memo_size), 0)
+        self.logger = logging.getLogger("ModelWorkspace")
+
+        self._buffers = {}
+        self._memo = OrderedDict()
+        self.stats = {'allocations': 0, 'buffer_reuses': 0, 'memo_hits': 0, 'memo_misses': 0}
+
+    def buffer(self, name: str, shape: Tuple[int, ...], dtype=np.float64):
+        """
+        Array de trabajo 'name' con la forma pedida (contenido indefinido).
+
+        Se reserva solo si no existe uno con la misma forma y dtype.
+        """
+        shape = tuple(shape)
+        dtype = np.dtype(dtype)
+        buf = self._buffers.get(name)
+        if buf is not None and buf.shape == shape and buf.dtype == dtype:
+            self.stats['buffer_reuses'] += 1
+            return buf
+
+        buf = self.xp.empty(shape, dtype=dtype)
+        self._buffers[name] = buf
+        self.stats['allocations'] += 1
+        return buf
+
+    def cached(self, name: str, compute: Callable[[], object], *sources):
+        """
+        Intermedio memoizado 'name' derivado de los arrays 'sources'.
+
+        La entrada es válida mientras los orígenes sean los mismos objetos
+        (se comparan por identidad y la memo los mantiene vivos). Los
+        orígenes no deben modificarse en sitio después de memoizar.
+
+        Args:
+            name: Nombre del intermedio, incluyendo parámetros escalares
+                  (ej. 'log10_km@1.0')
+            compute: Función sin argumentos que calcula el valor
+            sources: Arrays de los que depende el valor
+        """
+        key = (name,) + tuple(id(s) for s in sources)
+        entry = self._memo.get(key)
+        if entry is not None and all(a is b for a, b in zip(entry[0], sources)):
+            self._memo.move_to_end(key)
+            self.stats['memo_hits'] += 1
+            return entry[1]
+
+        value = compute()
+        self.stats['memo_misses'] += 1
+        if self.memo_size == 0:
+            return value
+
+        if isinstance(value, np.ndarray):
+            value.setflags(write=False)
+        self._memo[key] = (sources, value)
+        while len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+        return value
+
+    def log10_distance_km(self, distances_m, floor_km: float):
+        """log10(max(d / 1000, floor_km)) memoizado por array de distancias [m]"""
+        xp = self.xp
+
+        def compute():
+            d_km = xp.divide(distances_m, 1000.0)
+            xp.maximum(d_km, floor_km, out=d_km)
+            return xp.log10(d_km, out=d_km)
+
+        return self.cached(f'log10_km@{floor_km!r}', compute, distances_m)
+
+    def release(self):
+        """Libera buffers e intermedios (ej. al cambiar de grid)"""
+        self._buffers.clear()
+        self._memo.clear()
+
+    @property
+    def nbytes(self) -> int:
+        """Memoria retenida por buffers e intermedios [bytes]"""
+        total = sum(int(b.nbytes) for b in self._buffers.values())
+        total += sum(int(getattr(v, 'nbytes', 0)) for _, v in self._memo.values())
+        return total
@@ -0,0 +1,135 @@
+"""
+Perfiles radiales de longitud variable en formato CSR (offsets + valores)
+
+Los perfiles densos (N, n_samples) usan el mismo número de muestras para un
+receptor a 100 m que para uno a 15 km: los trayectos cortos quedan
+sobremuestreados muy por debajo de la resolución del DEM y los largos
+submuestrean las crestas. Con muestras proporcionales a la longitud del
+trayecto cada perfil tiene su propio largo; se guardan concatenados:
+
+    offsets[N + 1]      inicio de cada perfil (offsets[i]:offsets[i + 1])
+    elevations[total]   elevación AMSL de cada muestra [m]
+    distances[total]    distancia TX → muestra [m]
+
+Las reducciones por perfil (media en un anillo, máximo de ángulo, mínimo de
+distancia) se hacen con ufunc.reduceat sobre los tramos, sin rellenar a una
+matriz rectangular. Cada perfil tiene al menos 2 muestras (reduceat no
+admite tramos vacíos).
+"""
+
+import numpy as np
+
+
+class RaggedProfiles:
+    """Perfiles de elevación concatenados con offsets por receptor"""
+
+    def __init__(self, offsets, elevations, distances, xp=None):
+        """
+        Args:
+            offsets: Array (N + 1,) de inicios de perfil (offsets[0] = 0)
+            elevations: Array (total,) de elevaciones [m AMSL]
+            distances: Array (total,) de distancias desde el TX [m]
+            xp: Módulo numérico (np o cp). Default: np
+        """
+        self.xp = xp if xp is not None else np
+        xp = self.xp
+        self.offsets = xp.asarray(offsets, dtype=xp.int64)
+        self.elevations = xp.asarray(elevations, dtype=float)
+        self.distances = xp.asarray(distances, dtype=float)
+
+        lengths = self.offsets[1:] - self.offsets[:-1]
+        if self.elevations.shape != self.distances.shape:
+            raise ValueError("elevations y distances deben tener la misma forma")
+        if int(self.offsets[-1]) != self.elevations.size:
+            raise ValueError(
+                f"offsets cubre {int(self.offsets[-1])} muestras, hay {self.elevations.size}"
+            )
+        if lengths.size and int(lengths.min()) < 2:
+            raise ValueError("Cada perfil necesita al menos 2 muestras")
+        self.lengths = lengths
+        self._row_ids = None
+
+    @classmethod
+    def from_dense(cls, terrain_profiles, profile_distances, xp=None) -> "RaggedProfiles":
+        """Perfiles CSR con las mismas muestras que un par de arrays (N, n_samples)"""
+        xp = xp if xp is not None else np
+        terrain_profiles = xp.asarray(terrain_profiles)
+        n, n_samples = terrain_profiles.shape
+        return cls(
+            xp.arange(n + 1) * n_samples,
+            terrain_profiles.reshape(-1),
+            xp.asarray(profile_distances).reshape(-1),
+            xp=xp
+        )
+
+    def __len__(self) -> int:
+        return int(self.offsets.size - 1)
+
+    @property
+    def total_samples(self) -> int:
+        return int(self.elevations.size)
+
+    @property
+    def starts(self):
+        """Índice de la primera muestra de cada perfil (N,)"""
+        return self.offsets[:-1]
+
+    @property
+    def row_ids(self):
+        """Perfil al que pertenece cada muestra (total,), para expandir datos por receptor"""
+        if self._row_ids is None:
+            xp = self.xp
+            self._row_ids = xp.repeat(xp.arange(len(self)), self.lengths)
+        return self._row_ids
+
+    def with_elevations(self, elevations) -> "RaggedProfiles":
+        """Mismos perfiles (offsets, distancias) con otras elevaciones"""
+        return RaggedProfiles(self.offsets, elevations, self.distances, xp=self.xp)
+
+    def to(self, xp) -> "RaggedProfiles":
+        """Copia en el backend xp (sin copia si ya está en él)"""
+        if xp is self.xp:
+            return self
+        return RaggedProfiles(
+            xp.asarray(self.offsets), xp.asarray(self.elevations), xp.asarray(self.distances), xp=xp
+        )
+
+    # ------------------------------------------------------------------
+    # Reducciones por perfil
+    # ------------------------------------------------------------------
+
+    def last(self, values):
+        """Valor de la última muestra de cada perfil (N,)"""
+        return values[self.offsets[1:] - 1]
+
+    def segment_sum(self, values, mask=None):
+        """Suma por perfil (N,); con mask solo las muestras seleccionadas"""
+        xp = self.xp
+        if mask is not None:
+            values = xp.where(mask, values, 0.0)
+        return xp.add.reduceat(values, self.starts)
+
+    def segment_count(self, mask):
+        """Número de muestras seleccionadas por perfil (N,)"""
+        return self.xp.add.reduceat(mask.astype(self.xp.int64), self.starts)
+
+    def segment_mean(self, values, mask=None):
+        """Media por perfil (N,); NaN en perfiles sin muestras seleccionadas"""
+        xp = self.xp
+        total = self.segment_sum(values, mask)
+        count = self.lengths if mask is None else self.segment_count(mask)
+        return xp.where(count > 0, total / xp.maximum(count, 1), xp.nan)
+
+    def segment_max(self, values, mask=None):
+        """Máximo por perfil (N,); -inf en perfiles sin muestras seleccionadas"""
+        xp = self.xp
+        if mask is not None:
+            values = xp.where(mask, values, -xp.inf)
+        return xp.maximum.reduceat(values, self.starts)
+
+    def segment_min(self, values, mask=None):
+        """Mínimo por perfil (N,); inf en perfiles sin muestras seleccionadas"""
+        xp = self.xp
+        if mask is not None:
+            values = xp.where(mask, values, xp.inf)
+        return xp.minimum.reduceat(values, self.starts)
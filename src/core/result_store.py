@@ -0,0 +1,426 @@
+"""
+Almacén persistente de resultados de simulación por proyecto
+
+Los resultados se guardan junto al archivo del proyecto, en el directorio
+'<proyecto>.results/':
+
+    <proyecto>.results/
+        index.json               Última corrida (referencias, metadata)
+        grids/<hash>/lats.npy    Grid de simulación (compartido entre capas)
+        grids/<hash>/lons.npy
+        layers/<key>/*.npy       Capas por antena (rsrp, path_loss, ...)
+        layers/<key>/overlay.png Imagen de overlay ya renderizada
+        layers/<key>/meta.json   Campos no-array (vmin/vmax, bounds, antena)
+        runs/<run_id>/...        Capa agregada de la corrida (misma estructura)
+
+Las capas por antena se direccionan por contenido: la clave es un SHA-256 de
+los parámetros de la antena que afectan la propagación, la configuración del
+modelo, la identidad del DEM y el grid. Una nueva corrida reutiliza toda capa
+cuya clave ya exista. Los arrays se cargan con mmap_mode='r', de modo que
+restaurar una corrida no lee los rasters completos a memoria.
+
+Cada save_run poda el almacén: las capas 'run_*' (sin clave de contenido),
+grids y agregados que la última corrida no referencia se borran; las capas
+direccionadas por contenido no referenciadas se conservan como caché hasta
+max_cache_bytes, descartando primero las de uso más antiguo.
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+
+class ResultStore:
+    """Almacén direccionado por contenido para capas de cobertura"""
+
+    INDEX_VERSION = 1
+    OVERLAY_FILE = 'overlay.png'
+    META_FILE = 'meta.json'
+
+    # Campos de Antenna que no afectan la propagación (no entran en la clave)
+    COSMETIC_ANTENNA_FIELDS = (
+        'id', 'name', 'site_id', 'color', 'visible', 'show_coverage', 'enabled', 'notes'
+    )
+
+    # Tope de las capas no referenciadas por la última corrida [bytes]
+    DEFAULT_MAX_CACHE_BYTES = 2 * 1024 ** 3
+
+    def __init__(self, root_dir, max_cache_bytes: Optional[int] = None):
+        """
+        Args:
+            root_dir: Directorio raíz del almacén (se crea al escribir)
+            max_cache_bytes: Tope de las capas reutilizables que la última
+                corrida no usa (default DEFAULT_MAX_CACHE_BYTES)
+        """
+        self.root = Path(root_dir)
+        self.max_cache_bytes = (self.DEFAULT_MAX_CACHE_BYTES if max_cache_bytes is None
+                                else int(max_cache_bytes))
+        self.logger = logging.getLogger("ResultStore")
+
+    @classmethod
+    def for_project(cls, project_filepath) -> 'ResultStore':
+        """Almacén asociado a un archivo .rfproj ('<nombre>.results/' al lado)"""
+        project_path = Path(project_filepath)
+        return cls(project_path.with_name(f"{project_path.stem}.results"))
+
+    # ------------------------------------------------------------------
+    # Claves
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def grid_hash(grid_lats, grid_lons) -> str:
+        """Hash del contenido del grid de simulación"""
+        digest = hashlib.sha256()
+        for arr in (grid_lats, grid_lons):
+            arr = np.ascontiguousarray(arr, dtype=np.float64)
+            digest.update(str(arr.shape).encode())
+            digest.update(arr.tobytes())
+        return digest.hexdigest()
+
+    def layer_key(self, antenna, model_name: str, model_params: Dict,
+                  dem_identity: Optional[Dict], grid_hash: str) -> str:
+        """
+        Clave de contenido de la capa de una antena.
+
+        Args:
+            antenna: Antenna (se usan solo los campos que afectan la propagación)
+            model_name: Nombre del modelo de propagación
+            model_params: Parámetros del modelo usados para esta antena
+            dem_identity: TerrainLoader.get_identity() o None (terreno plano)
+            grid_hash: ResultStore.grid_hash() del grid de simulación
+
+        Returns:
+            Hex SHA-256
+        """
+        antenna_params = {
+            k: v for k, v in antenna.to_dict().items()
+            if k not in self.COSMETIC_ANTENNA_FIELDS
+        }
+        payload = {
+            'antenna': antenna_params,
+            'model': model_name,
+            'model_params': model_params,
+            'dem': dem_identity,
+            'grid': grid_hash,
+        }
+        canonical = json.dumps(payload, sort_keys=True, default=self._json_default)
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    # ------------------------------------------------------------------
+    # Capas por antena
+    # ------------------------------------------------------------------
+
+    def has_layer(self, key: str) -> bool:
+        """True si la capa existe completa (meta.json se escribe al final)"""
+        return (self._layer_dir(key) / self.META_FILE).exists()
+
+    def save_layer(self, key: str, coverage: Dict):
+        """
+        Guarda la capa de una antena (estructura de results['individual'][id]).
+
+        'lats' y 'lons' no se duplican por capa: se guardan una vez por grid.
+        """
+        if self.has_layer(key):
+            return
+        self._save_entry(self._layer_dir(key), coverage)
+        self.logger.debug(f"Layer stored: {key[:12]}")
+
+    def load_layer(self, key: str, grid_lats=None, grid_lons=None) -> Optional[Dict]:
+        """
+        Carga una capa como memmaps de solo lectura.
+
+        Args:
+            key: Clave de la capa
+            grid_lats, grid_lons: Grid a adjuntar como 'lats'/'lons' (opcional)
+
+        Returns:
+            Dict de cobertura o None si la capa no existe
+        """
+        if not self.has_layer(key):
+            return None
+        layer_dir = self._layer_dir(key)
+        try:
+            os.utime(layer_dir / self.META_FILE)  # Uso reciente: última en podarse
+        except OSError:
+            pass
+        entry = self._load_entry(layer_dir)
+        if grid_lats is not None:
+            entry['lats'] = grid_lats
+            entry['lons'] = grid_lons
+        return entry
+
+    # ------------------------------------------------------------------
+    # Corridas completas
+    # ------------------------------------------------------------------
+
+    def save_run(self, results: Dict, layer_keys: Optional[Dict[str, str]] = None):
+        """
+        Persiste una corrida completa como la última del proyecto.
+
+        Args:
+            results: Resultados del SimulationWorker
+            layer_keys: Dict antenna_id -> clave de capa. Las antenas sin clave
+                        se guardan bajo una clave derivada de la corrida.
+
+        Si los resultados ya son la última corrida de este almacén no se
+        reescribe nada.
+        """
+        individual = results.get('individual', {})
+        if not individual or self.is_last_run(results):
+            return
+
+        first = next(iter(individual.values()))
+        grid_lats, grid_lons = first['lats'], first['lons']
+        grid_id = self.grid_hash(grid_lats, grid_lons)
+        self._save_grid(grid_id, grid_lats, grid_lons)
+
+        run_id = f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+        metadata = results.setdefault('metadata', {})
+        layer_keys = dict(layer_keys or metadata.get('layer_keys') or {})
+
+        individual_index = {}
+        for antenna_id, coverage in individual.items():
+            key = layer_keys.get(antenna_id) or f"run_{run_id}_{antenna_id}"
+            self.save_layer(key, coverage)
+            individual_index[antenna_id] = key
+
+        aggregated = results.get('aggregated')
+        aggregated_ref = None
+        if aggregated is not None:
+            alias = next(
+                (ant_id for ant_id, cov in individual.items() if cov is aggregated), None
+            )
+            if alias is not None:
+                aggregated_ref = {'alias': alias}
+            else:
+                self._save_entry(self.root / 'runs' / run_id, aggregated)
+                aggregated_ref = {'run': run_id}
+
+        index = {
+            'version': self.INDEX_VERSION,
+            'last_run': {
+                'run_id': run_id,
+                'saved': datetime.now().isoformat(),
+                'grid': grid_id,
+                'individual': individual_index,
+                'aggregated': aggregated_ref,
+                'metadata': {k: v for k, v in metadata.items() if k != 'stored_run'},
+            }
+        }
+        self._write_json(self.root / 'index.json', index)
+        metadata['layer_keys'] = individual_index
+        metadata['stored_run'] = {'root': str(self.root.resolve()), 'run_id': run_id}
+
+        self.prune(individual_index.values(), grid_id=grid_id,
+                   run_id=(aggregated_ref or {}).get('run'))
+
+        self.logger.info(
+            f"Run {run_id} stored: {len(individual_index)} layers in {self.root}"
+        )
+
+    def prune(self, keep_layers: Iterable[str], grid_id: Optional[str] = None,
+              run_id: Optional[str] = None):
+        """
+        Borra lo que la última corrida no referencia.
+
+        Las capas 'run_*', grids y agregados de otras corridas se eliminan;
+        las capas por contenido se conservan, de la más a la menos usada,
+        mientras quepan en max_cache_bytes. Los archivos pueden seguir
+        memory-mapped por resultados en pantalla: el borrado es best-effort.
+
+        Args:
+            keep_layers: Claves de capa de la última corrida
+            grid_id: Grid de la última corrida
+            run_id: Corrida cuyo agregado está en runs/ (None si no hay)
+        """
+        keep_layers = set(keep_layers)
+        removed, cached = 0, []
+        layers_dir = self.root / 'layers'
+        for layer_dir in (layers_dir.iterdir() if layers_dir.exists() else ()):
+            if layer_dir.name in keep_layers:
+                continue
+            meta_path = layer_dir / self.META_FILE
+            if layer_dir.name.startswith('run_') or not meta_path.exists():
+                shutil.rmtree(layer_dir, ignore_errors=True)
+                removed += 1
+                continue
+            size = sum(f.stat().st_size for f in layer_dir.iterdir() if f.is_file())
+            cached.append((meta_path.stat().st_mtime_ns, size, layer_dir))
+
+        budget = self.max_cache_bytes
+        for _, size, layer_dir in sorted(cached, key=lambda item: item[0], reverse=True):
+            if size <= budget:
+                budget -= size
+                continue
+            budget = 0  # Solo se conservan las más recientes
+            shutil.rmtree(layer_dir, ignore_errors=True)
+            removed += 1
+
+        for folder, keep in (('grids', grid_id), ('runs', run_id)):
+            folder_dir = self.root / folder
+            for entry_dir in (folder_dir.iterdir() if folder_dir.exists() else ()):
+                if entry_dir.name != keep:
+                    shutil.rmtree(entry_dir, ignore_errors=True)
+                    removed += 1
+
+        if removed:
+            self.logger.info(f"Result store pruned: {removed} entries removed from {self.root}")
+
+    def load_last_run(self) -> Optional[Dict]:
+        """
+        Restaura la última corrida con arrays memory-mapped.
+
+        Returns:
+            Dict con la estructura de resultados del worker o None
+        """
+        last = self._read_index().get('last_run')
+        if not last:
+            return None
+
+        try:
+            grid_lats, grid_lons = self._load_grid(last['grid'])
+            metadata = dict(last.get('metadata', {}))
+            metadata['layer_keys'] = dict(last.get('individual', {}))
+            metadata['stored_run'] = {'root': str(self.root.resolve()), 'run_id': last.get('run_id')}
+            results = {'individual': {}, 'metadata': metadata}
+            for antenna_id, key in last.get('individual', {}).items():
+                layer = self.load_layer(key, grid_lats, grid_lons)
+                if layer is None:
+                    self.logger.warning(f"Missing stored layer for antenna {antenna_id}")
+                    return None
+                results['individual'][antenna_id] = layer
+
+            aggregated_ref = last.get('aggregated') or {}
+            if 'alias' in aggregated_ref:
+                results['aggregated'] = results['individual'][aggregated_ref['alias']]
+            elif 'run' in aggregated_ref:
+                aggregated = self._load_entry(self.root / 'runs' / aggregated_ref['run'])
+                aggregated['lats'] = grid_lats
+                aggregated['lons'] = grid_lons
+                results['aggregated'] = aggregated
+        except (OSError, KeyError, ValueError) as e:
+            self.logger.warning(f"Stored results could not be restored: {e}")
+            return None
+
+        self.logger.info(f"Restored run {last.get('run_id')} from {self.root}")
+        return results
+
+    def is_last_run(self, results: Dict) -> bool:
+        """True si 'results' es la última corrida guardada en este almacén"""
+        stored = results.get('metadata', {}).get('stored_run') or {}
+        if stored.get('root') != str(self.root.resolve()):
+            return False
+        last = self._read_index().get('last_run') or {}
+        return stored.get('run_id') == last.get('run_id')
+
+    def clear(self):
+        """Elimina todo el almacén"""
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _layer_dir(self, key: str) -> Path:
+        return self.root / 'layers' / key
+
+    def _save_grid(self, grid_id: str, grid_lats, grid_lons):
+        grid_dir = self.root / 'grids' / grid_id
+        if (grid_dir / 'lons.npy').exists():
+            return
+        grid_dir.mkdir(parents=True, exist_ok=True)
+        self._save_array(grid_dir / 'lats.npy', grid_lats)
+        self._save_array(grid_dir / 'lons.npy', grid_lons)
+
+    def _load_grid(self, grid_id: str):
+        grid_dir = self.root / 'grids' / grid_id
+        return (np.load(grid_dir / 'lats.npy', mmap_mode='r'),
+                np.load(grid_dir / 'lons.npy', mmap_mode='r'))
+
+    def _save_entry(self, entry_dir: Path, entry: Dict):
+        """
+        Guarda un dict de cobertura: arrays numéricos -> .npy, data URL de
+        imagen -> PNG, resto -> meta.json (escrito al final como marca de
+        entrada completa).
+        """
+        entry_dir.mkdir(parents=True, exist_ok=True)
+        meta = {'arrays': [], 'images': {}, 'fields': {}}
+
+        for name, value in entry.items():
+            if name in ('lats', 'lons'):
+                continue
+            if isinstance(value, np.ndarray):
+                if value.dtype == object:
+                    continue
+                self._save_array(entry_dir / f"{name}.npy", value)
+                meta['arrays'].append(name)
+            elif isinstance(value, str) and value.startswith('data:image') and ';base64,' in value:
+                image_file = self.OVERLAY_FILE if name == 'image_url' else f"{name}.png"
+                with open(entry_dir / image_file, 'wb') as f:
+                    f.write(base64.b64decode(value.split(';base64,', 1)[1]))
+                meta['images'][name] = image_file
+            else:
+                meta['fields'][name] = value
+
+        self._write_json(entry_dir / self.META_FILE, meta)
+
+    def _load_entry(self, entry_dir: Path) -> Dict:
+        with open(entry_dir / self.META_FILE, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+
+        entry = dict(meta.get('fields', {}))
+        for name in meta.get('arrays', []):
+            entry[name] = np.load(entry_dir / f"{name}.npy", mmap_mode='r')
+        for name, image_file in meta.get('images', {}).items():
+            with open(entry_dir / image_file, 'rb') as f:
+                entry[name] = "data:image/png;base64," + base64.b64encode(f.read()).decode()
+        return entry
+
+    @staticmethod
+    def _save_array(path: Path, array):
+        """np.save atómico (archivo temporal + replace)"""
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.save(f, np.asarray(array))
+        os.replace(tmp_path, path)
+
+    def _write_json(self, path: Path, data: Dict):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, default=self._json_default)
+        os.replace(tmp_path, path)
+
+    def _read_index(self) -> Dict:
+        index_path = self.root / 'index.json'
+        if not index_path.exists():
+            return {}
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Corrupt result index {index_path}: {e}")
+            return {}
+        if index.get('version') != self.INDEX_VERSION:
+            return {}
+        return index
+
+    @staticmethod
+    def _json_default(value):
+        """Serializa escalares/arrays NumPy y enums en JSON"""
+        if isinstance(value, np.generic):
+            return value.item()
+        if isinstance(value, np.ndarray):
+            return value.tolist()
+        if hasattr(value, 'value'):
+            return value.value
+        return str(value)
@@ -0,0 +1,226 @@
+"""
+Ranking de servidores en streaming (Top-K)
+
+Reduce las capas RSRP individuales de cada antena a los K mejores servidores
+por píxel sin apilar todas las capas. Las capas se entregan una a una con
+update() y el reductor mantiene solo:
+
+    values[K, N]   RSRP de los K mejores servidores (orden descendente)
+    indices[K, N]  Índice de antena de cada uno
+    tracked[*, N]  Métricas auxiliares del mejor servidor (path loss, ganancia)
+
+La memoria es O(K · píxeles) en lugar de O(antenas · píxeles). De los K
+mejores se derivan en una sola pasada:
+
+    - best server / RSRP
+    - segundo mejor servidor / RSRP
+    - margen de handover (best - second)
+    - número de servidores dentro de X dB del mejor (pilot pollution,
+      saturado en K)
+
+El best server se entrega como raster uint16 de índices (NO_SERVER donde no
+hay señal) junto a la lista de antenna_ids que actúa como tabla de lookup.
+"""
+
+import logging
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+# Valor reservado del raster uint16 de best server para píxeles sin servidor
+NO_SERVER = 0xFFFF
+
+
+class TopKServerReducer:
+    """Mantiene los K mejores servidores por píxel recorriendo las capas una vez"""
+
+    def __init__(self, shape, k: int = 4, pollution_window_db: float = 6.0,
+                 track: Iterable[str] = (), dtype=np.float64, xp=None):
+        """
+        Args:
+            shape: Forma del grid (ej. (rows, cols))
+            k: Número de servidores retenidos por píxel (>= 2)
+            pollution_window_db: Ventana en dB respecto al mejor servidor para
+                                 contar servidores (pilot pollution)
+            track: Nombres de métricas auxiliares a conservar del mejor servidor
+            dtype: Tipo de dato de los valores RSRP retenidos
+            xp: Módulo numérico (np o cp). Default: np
+        """
+        if k < 2:
+            raise ValueError("k debe ser >= 2 para obtener el segundo servidor")
+
+        self.xp = xp if xp is not None else np
+        self.shape = tuple(shape)
+        self.k = int(k)
+        self.pollution_window_db = float(pollution_window_db)
+        self.logger = logging.getLogger("TopKServerReducer")
+
+        n_pixels = int(np.prod(self.shape))
+        xp = self.xp
+        self.values = xp.full((self.k, n_pixels), -xp.inf, dtype=dtype)
+        self.indices = xp.full((self.k, n_pixels), -1, dtype=xp.int32)
+        self.tracked = {
+            name: xp.full(n_pixels, xp.nan, dtype=dtype) for name in track
+        }
+        self.n_layers = 0
+
+    def update(self, index: int, rsrp, tracked: Optional[Dict[str, object]] = None):
+        """
+        Incorpora la capa de una antena.
+
+        Args:
+            index: Índice de la antena (posición en la lista de ids)
+            rsrp: Array RSRP [dBm] con la forma del grid. NaN = sin señal
+            tracked: Dict nombre -> array con las métricas auxiliares de la
+                     antena (solo se conservan las del mejor servidor)
+        """
+        if not 0 <= int(index) < NO_SERVER:
+            raise ValueError(f"Índice de antena fuera de rango uint16: {index}")
+
+        xp = self.xp
+        value = xp.asarray(rsrp, dtype=self.values.dtype).reshape(-1)
+        if value.size != self.values.shape[1]:
+            raise ValueError(
+                f"Capa con {value.size} píxeles, se esperaban {self.values.shape[1]}"
+            )
+        value = xp.where(xp.isnan(value), -xp.inf, value)
+        index_row = xp.full(value.shape, int(index), dtype=xp.int32)
+
+        # Inserción ordenada: la capa "burbujea" por las K posiciones.
+        # Comparación estricta: ante empate gana la antena anterior (como argmax).
+        for j in range(self.k):
+            take = value > self.values[j]
+            if j == 0 and self.tracked:
+                extras = tracked or {}
+                for name, buf in self.tracked.items():
+                    if name in extras:
+                        metric = xp.broadcast_to(
+                            xp.asarray(extras[name], dtype=buf.dtype).reshape(-1), buf.shape
+                        )
+                        buf[take] = metric[take]
+            displaced_value = xp.where(take, self.values[j], value)
+            displaced_index = xp.where(take, self.indices[j], index_row)
+            self.values[j] = xp.where(take, value, self.values[j])
+            self.indices[j] = xp.where(take, index_row, self.indices[j])
+            value, index_row = displaced_value, displaced_index
+
+        self.n_layers += 1
+
+    def update_block(self, indices, rsrp, start: int = 0,
+                     tracked: Optional[Dict[str, object]] = None):
+        """
+        Incorpora un bloque de capas sobre un tramo contiguo de píxeles.
+
+        Equivale a llamar update() con cada capa del bloque en orden de índice
+        (para motores que evalúan antenas × chunk de píxeles de una vez), sin
+        que importe el orden en que llegan los bloques. Entre valores iguales
+        siempre queda delante el índice menor (update() lo garantiza para el
+        mejor servidor, no para las posiciones desplazadas).
+
+        Args:
+            indices: Índices de antena de las filas del bloque (A,)
+            rsrp: Array RSRP [dBm] de forma (A, n). NaN = sin señal
+            start: Primer píxel (plano) del tramo [start, start + n)
+            tracked: Dict nombre -> array (A, n) con métricas auxiliares
+        """
+        xp = self.xp
+        indices = xp.asarray(indices, dtype=xp.int32).reshape(-1)
+        if indices.size and not (0 <= int(indices.min()) and int(indices.max()) < NO_SERVER):
+            raise ValueError("Índice de antena fuera de rango uint16")
+
+        block = xp.asarray(rsrp, dtype=self.values.dtype).reshape(indices.size, -1)
+        stop = start + block.shape[1]
+        if start < 0 or stop > self.values.shape[1]:
+            raise ValueError(
+                f"Tramo [{start}, {stop}) fuera del grid de {self.values.shape[1]} píxeles"
+            )
+        block = xp.where(xp.isnan(block), -xp.inf, block)
+
+        values = self.values[:, start:stop]
+        owners = self.indices[:, start:stop]
+        best = {name: buf[start:stop] for name, buf in self.tracked.items()}
+        extras = tracked or {}
+
+        # Inserción ordenada fila a fila sobre el tramo. Empates: gana el índice
+        # menor, como update() recorriendo las capas en orden de índice.
+        for row in range(indices.size):
+            value = block[row]
+            index_row = xp.full(value.shape, int(indices[row]), dtype=xp.int32)
+            for j in range(self.k):
+                take = (value > values[j]) | ((value == values[j]) & (index_row < owners[j])
+                                              & (values[j] > -xp.inf))
+                if j == 0:
+                    for name, buf in best.items():
+                        if name in extras:
+                            metric = xp.broadcast_to(
+                                xp.asarray(extras[name], dtype=buf.dtype), block.shape
+                            )[row]
+                            buf[take] = metric[take]
+                displaced_value = xp.where(take, values[j], value)
+                displaced_index = xp.where(take, owners[j], index_row)
+                values[j] = xp.where(take, value, values[j])
+                owners[j] = xp.where(take, index_row, owners[j])
+                value, index_row = displaced_value, displaced_index
+
+        # Cada capa se cuenta una vez (en el bloque que abre el grid)
+        if start == 0:
+            self.n_layers += int(indices.size)
+
+    def current_best(self):
+        """
+        RSRP del mejor servidor entre las capas incorporadas hasta ahora.
+
+        Vista barata del estado parcial (sin derivar el resto de rasters);
+        NaN donde ninguna capa aporta señal.
+        """
+        xp = self.xp
+        return xp.where(
+            self.indices[0] >= 0, self.values[0], xp.nan
+        ).reshape(self.shape)
+
+    def finalize(self) -> Dict[str, object]:
+        """
+        Deriva los rasters finales.
+
+        Returns:
+            Dict con arrays de forma self.shape:
+            - 'best_index': int32, índice del mejor servidor (-1 sin señal)
+            - 'best_server': uint16, índice del mejor servidor (NO_SERVER sin señal)
+            - 'best_rsrp': RSRP del mejor servidor [dBm] (NaN sin señal)
+            - 'second_index': int32, índice del segundo servidor (-1 si no hay)
+            - 'second_rsrp': RSRP del segundo servidor [dBm] (-inf si no hay)
+            - 'handover_margin': best - second [dB] (inf si no hay segundo)
+            - 'server_count': uint8, servidores dentro de la ventana de
+              pilot pollution (incluye al mejor, saturado en K)
+            - una entrada por cada métrica en 'track'
+        """
+        xp = self.xp
+        best = self.values[0]
+        second = self.values[1]
+
+        with np.errstate(invalid='ignore'):
+            margin = best - second
+            margin = xp.where(xp.isfinite(second), margin, xp.inf)
+            threshold = best - self.pollution_window_db
+            within = (self.values >= threshold) & xp.isfinite(self.values)
+        server_count = within.sum(axis=0).astype(xp.uint8)
+
+        result = {
+            'best_index': self.indices[0].reshape(self.shape),
+            'best_server': xp.where(
+                self.indices[0] >= 0, self.indices[0], NO_SERVER
+            ).astype(xp.uint16).reshape(self.shape),
+            'best_rsrp': xp.where(self.indices[0] >= 0, best, xp.nan).reshape(self.shape),
+            'second_index': self.indices[1].reshape(self.shape),
+            'second_rsrp': second.reshape(self.shape),
+            'handover_margin': margin.reshape(self.shape),
+            'server_count': server_count.reshape(self.shape),
+        }
+        for name, buf in self.tracked.items():
+            result[name] = buf.reshape(self.shape)
+
+        self.logger.debug(
+            f"Top-{self.k} reduction finalized over {self.n_layers} layers, "
+            f"{self.values.shape[1]} pixels"
+        )
+        return result
@@ -0,0 +1,551 @@
+"""
+Optimización de ubicación de sitios/sectores sobre capas candidatas precalculadas
+
+Planificar sitios nuevos era agregar antenas a mano y volver a simular. Aquí
+cada candidato (ubicación + configuración) se simula una sola vez y su capa
+se guarda recortada a su huella (RSRP >= floor_dbm) en formato CSR sobre
+archivos .npy que se abren con mmap:
+
+    <store>/offsets.npy   (C + 1,) inicio de cada candidato
+    <store>/pixels.npy    (total,) índice plano de píxel (ordenado por candidato)
+    <store>/rsrp.npy      (total,) RSRP [dBm] float32
+    <store>/meta.json     candidatos, portadoras, grid y clave (se escribe al final)
+
+La búsqueda (greedy o recocido simulado) mantiene un estado denso por píxel:
+los K mejores servidores seleccionados (valor + índice) y la potencia total
+por portadora en mW. Evaluar agregar, quitar o intercambiar candidatos es una
+pasada vectorizada sobre la unión de sus huellas:
+
+    - mejor servidor sin el candidato quitado: primer valor del Top-K de otro
+      candidato (exacto mientras se quiten menos de K)
+    - mejor servidor con el agregado: max(anterior, RSRP del candidato)
+    - SINR = S / (carga · (P_portadora - S) + N_RE), como InterferenceEngine
+
+El objetivo es la fracción (opcionalmente ponderada por tráfico) de píxeles
+con RSRP >= umbral y/o SINR >= umbral. Solo al confirmar la baja de un
+candidato que ocupaba el Top-K de píxeles con >= K servidores se recorren las
+huellas seleccionadas para rellenar esos píxeles.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from core.interference_engine import InterferenceEngine
+from core.result_store import ResultStore
+
+
+class CandidateLayerStore:
+    """Capas RSRP de candidatos recortadas a su huella, en CSR sobre memmaps"""
+
+    META_FILE = 'meta.json'
+
+    def __init__(self, root_dir):
+        """
+        Args:
+            root_dir: Directorio del almacén (se crea al construir)
+        """
+        self.root = Path(root_dir)
+        self.logger = logging.getLogger("CandidateLayerStore")
+        self.meta = None
+        self.offsets = self.pixels = self.rsrp = None
+
+    def is_built(self) -> bool:
+        return (self.root / self.META_FILE).exists()
+
+    def build(self, candidates, grid_lats, grid_lons, terrain_heights, calculator, model,
+              model_params: dict = None, terrain_loader=None, fixed: Sequence = (),
+              floor_dbm: float = -130.0) -> 'CandidateLayerStore':
+        """
+        Simula cada candidato una vez y guarda su huella.
+
+        Si el almacén ya contiene las mismas capas (misma clave de antenas,
+        modelo y su config, ajustes por corrida del calculador, DEM, grid y
+        piso) solo se abre.
+
+        Args:
+            candidates: Antenas candidatas (ubicación + configuración)
+            grid_lats, grid_lons, terrain_heights: Grid de simulación
+            calculator: CoverageCalculator (usa su footprint_culler si está activo)
+            model: Modelo de propagación
+            model_params: Parámetros del modelo
+            terrain_loader: TerrainLoader (opcional)
+            fixed: Antenas existentes, siempre seleccionadas
+            floor_dbm: RSRP mínimo guardado [dBm]
+
+        Returns:
+            self (abierto)
+        """
+        model_params = dict(model_params or {})
+        entries = [(antenna, True) for antenna in fixed] + [(antenna, False) for antenna in candidates]
+        if not entries:
+            raise ValueError("No hay candidatos para precalcular")
+
+        model_name = getattr(model, 'name', type(model).__name__)
+        dem_identity = terrain_loader.get_identity() if terrain_loader is not None else None
+        grid_hash = ResultStore.grid_hash(grid_lats, grid_lons)
+        keys = ResultStore(self.root)
+        # Como las claves del worker: config del modelo (escenario, use_dem, ...)
+        # y ajustes por corrida del calculador además de los parámetros
+        layer_params = {
+            'config': getattr(model, 'config', None) or {},
+            'params': model_params,
+            'calculator': self._calculator_settings(calculator),
+        }
+        digest = hashlib.sha256()
+        for antenna, is_fixed in entries:
+            digest.update(keys.layer_key(antenna, model_name, layer_params, dem_identity, grid_hash).encode())
+            digest.update(b'F' if is_fixed else b'C')
+        digest.update(repr(float(floor_dbm)).encode())
+        key = digest.hexdigest()
+
+        if self.is_built():
+            with open(self.root / self.META_FILE, 'r', encoding='utf-8') as f:
+                if json.load(f).get('key') == key:
+                    self.logger.info(f"Candidate layers reused: {self.root}")
+                    return self.open()
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        meta_path = self.root / self.META_FILE
+        if meta_path.exists():
+            meta_path.unlink()
+
+        shape = tuple(np.shape(grid_lats))
+        index_dtype = np.int32 if int(np.prod(shape)) < 2 ** 31 else np.int64
+        offsets = [0]
+        tmp_pixels = self.root / 'pixels.bin.tmp'
+        tmp_rsrp = self.root / 'rsrp.bin.tmp'
+        with open(tmp_pixels, 'wb') as pixel_file, open(tmp_rsrp, 'wb') as rsrp_file:
+            for n, (antenna, _) in enumerate(entries, start=1):
+                rsrp = calculator.calculate_single_antenna_coverage(
+                    antenna, grid_lats, grid_lons, terrain_heights, model, model_params,
+                    terrain_loader=terrain_loader
+                )
+                rsrp = calculator.xp.asnumpy(rsrp) if calculator.engine.use_gpu else rsrp
+                rsrp = np.asarray(rsrp, dtype=float).reshape(-1)
+                with np.errstate(invalid='ignore'):
+                    footprint = np.flatnonzero(rsrp >= floor_dbm)
+                pixel_file.write(footprint.astype(index_dtype).tobytes())
+                rsrp_file.write(rsrp[footprint].astype(np.float32).tobytes())
+                offsets.append(offsets[-1] + footprint.size)
+                self.logger.debug(f"Candidate {n}/{len(entries)} {antenna.name}: {footprint.size} pixels")
+
+        total = offsets[-1]
+        for name, tmp_path, dtype in (('pixels', tmp_pixels, index_dtype), ('rsrp', tmp_rsrp, np.float32)):
+            target = np.lib.format.open_memmap(self.root / f"{name}.npy", mode='w+', dtype=dtype, shape=(total,))
+            if total:
+                target[:] = np.memmap(tmp_path, dtype=dtype, mode='r', shape=(total,))
+            target.flush()
+            del target
+            os.remove(tmp_path)
+        np.save(self.root / 'offsets.npy', np.asarray(offsets, dtype=np.int64))
+
+        meta = {
+            'key': key,
+            'shape': list(shape),
+            'model': model_name,
+            'floor_dbm': float(floor_dbm),
+            'candidates': [{
+                'id': antenna.id,
+                'name': antenna.name,
+                'fixed': is_fixed,
+                'location': antenna.site_id or f"{antenna.latitude:.6f},{antenna.longitude:.6f}",
+                'frequency_mhz': float(antenna.frequency_mhz),
+                'bandwidth_mhz': float(antenna.bandwidth_mhz),
+            } for antenna, is_fixed in entries],
+        }
+        tmp_meta = meta_path.with_name(meta_path.name + '.tmp')
+        with open(tmp_meta, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_meta, meta_path)
+
+        self.logger.info(
+            f"Candidate layers stored: {len(entries)} candidates, {total} footprint pixels "
+            f"({100.0 * total / max(len(entries) * int(np.prod(shape)), 1):.1f}% of dense)"
+        )
+        return self.open()
+
+    @staticmethod
+    def _calculator_settings(calculator) -> Dict:
+        """Recorte por huella, perfiles adaptativos y h_eff por acimut activos en el calculador"""
+        culler = getattr(calculator, 'footprint_culler', None)
+        effective_height = getattr(calculator, 'effective_height', None)
+        return {
+            'footprint_culler': None if culler is None else {
+                'floor_dbm': culler.floor_dbm,
+                'margin_db': culler.margin_db,
+            },
+            'adaptive_profiles': getattr(calculator, 'adaptive_profiles', None),
+            'effective_height': None if effective_height is None else {
+                'n_azimuths': effective_height.n_azimuths,
+                'inner_km': effective_height.inner_km,
+                'outer_km': effective_height.outer_km,
+                'sample_spacing_m': effective_height.sample_spacing_m,
+                'min_samples': effective_height.min_samples,
+            },
+        }
+
+    def open(self) -> 'CandidateLayerStore':
+        """Abre el almacén (arrays como memmaps de solo lectura)"""
+        with open(self.root / self.META_FILE, 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.offsets = np.load(self.root / 'offsets.npy')
+        self.pixels = np.load(self.root / 'pixels.npy', mmap_mode='r')
+        self.rsrp = np.load(self.root / 'rsrp.npy', mmap_mode='r')
+        return self
+
+    def __len__(self) -> int:
+        return len(self.meta['candidates'])
+
+    @property
+    def shape(self):
+        return tuple(self.meta['shape'])
+
+    def footprint(self, index: int):
+        """(píxeles, RSRP [dBm]) de un candidato, leídos del memmap"""
+        start, stop = int(self.offsets[index]), int(self.offsets[index + 1])
+        return np.asarray(self.pixels[start:stop], dtype=np.int64), np.asarray(self.rsrp[start:stop])
+
+
+class SiteOptimizer:
+    """Búsqueda greedy / recocido simulado sobre un CandidateLayerStore"""
+
+    def __init__(self, store: CandidateLayerStore, rsrp_threshold_dbm: float = -100.0,
+                 sinr_threshold_db: float = 0.0, coverage_weight: float = 1.0,
+                 sinr_weight: float = 0.0, pixel_weights=None, noise_figure_db: float = 7.0,
+                 load_factor: float = 1.0, k: int = 4, seed: Optional[int] = None):
+        """
+        Args:
+            store: Almacén abierto con las capas de candidatos y antenas fijas
+            rsrp_threshold_dbm: Umbral de cobertura [dBm]
+            sinr_threshold_db: Umbral de SINR [dB]
+            coverage_weight, sinr_weight: Peso de cada objetivo en el puntaje
+            pixel_weights: Peso por píxel (tráfico, población), forma del grid
+            noise_figure_db: Figura de ruido del UE [dB]
+            load_factor: Carga de las celdas interferentes (0-1)
+            k: Servidores retenidos por píxel (>= 2)
+            seed: Semilla del recocido
+        """
+        if k < 2:
+            raise ValueError("k debe ser >= 2")
+        self.store = store
+        self.rsrp_threshold_dbm = float(rsrp_threshold_dbm)
+        self.sinr_threshold_db = float(sinr_threshold_db)
+        self.coverage_weight = float(coverage_weight)
+        self.sinr_weight = float(sinr_weight)
+        self.load_factor = float(load_factor)
+        self.k = int(k)
+        self.rng = np.random.default_rng(seed)
+        self.logger = logging.getLogger("SiteOptimizer")
+
+        candidates = store.meta['candidates']
+        self.n_pixels = int(np.prod(store.shape))
+        self.fixed = [i for i, c in enumerate(candidates) if c['fixed']]
+        self.locations = [c['location'] for c in candidates]
+
+        carriers = {}
+        self.carrier = np.array([
+            carriers.setdefault((c['frequency_mhz'], c['bandwidth_mhz']), len(carriers))
+            for c in candidates
+        ], dtype=np.int64)
+        engine = InterferenceEngine(noise_figure_db=noise_figure_db)
+        self.noise_re = np.array([engine._noise_terms(bw)[0] for (_, bw) in carriers])
+
+        if pixel_weights is None:
+            self.weights = None
+            self.total_weight = float(self.n_pixels)
+        else:
+            self.weights = np.asarray(pixel_weights, dtype=float).reshape(-1)
+            if self.weights.size != self.n_pixels:
+                raise ValueError("pixel_weights debe tener la forma del grid")
+            self.total_weight = float(self.weights.sum())
+
+        self._position = np.full(self.n_pixels, -1, dtype=np.int64)  # Scratch de delta()
+        self.evaluations = 0
+        self.reset(self.fixed)
+
+    # ------------------------------------------------------------------
+    # Estado
+    # ------------------------------------------------------------------
+
+    def reset(self, selection: Iterable[int]):
+        """Reconstruye el estado para una selección (incluye siempre las fijas)"""
+        self.top_values = np.full((self.k, self.n_pixels), -np.inf, dtype=np.float32)
+        self.top_indices = np.full((self.k, self.n_pixels), -1, dtype=np.int32)
+        self.power = np.zeros((len(self.noise_re), self.n_pixels))
+        self.server_count = np.zeros(self.n_pixels, dtype=np.int32)
+        self.selected = []
+        for index in sorted(set(self.fixed) | set(selection)):
+            self.add(index)
+
+    def add(self, index: int):
+        """Confirma el alta de un candidato"""
+        pixels, rsrp = self.store.footprint(index)
+        self.power[self.carrier[index], pixels] += self._to_mw(rsrp)
+        self.server_count[pixels] += 1
+        values = np.vstack((self.top_values[:, pixels], rsrp[None, :]))
+        indices = np.vstack((self.top_indices[:, pixels], np.full((1, pixels.size), index, dtype=np.int32)))
+        order = np.argsort(-values, axis=0, kind='stable')[:self.k]
+        self.top_values[:, pixels] = np.take_along_axis(values, order, axis=0)
+        self.top_indices[:, pixels] = np.take_along_axis(indices, order, axis=0)
+        self.selected.append(index)
+
+    def remove(self, index: int):
+        """Confirma la baja de un candidato"""
+        if index in self.fixed:
+            raise ValueError("Las antenas fijas no se pueden quitar")
+        pixels, rsrp = self.store.footprint(index)
+        self.power[self.carrier[index], pixels] -= self._to_mw(rsrp)
+        self.server_count[pixels] -= 1
+        self.selected.remove(index)
+
+        owned = (self.top_indices[:, pixels] == index).any(axis=0)
+        pixels = pixels[owned]
+        values = np.where(self.top_indices[:, pixels] == index, -np.inf, self.top_values[:, pixels])
+        order = np.argsort(-values, axis=0, kind='stable')
+        self.top_values[:, pixels] = np.take_along_axis(values, order, axis=0)
+        self.top_indices[:, pixels] = np.where(
+            np.isfinite(self.top_values[:, pixels]),
+            np.take_along_axis(self.top_indices[:, pixels], order, axis=0), -1
+        )
+
+        # Píxeles con servidores fuera del Top-K: el K-ésimo puesto quedó vacío
+        stale = pixels[self.server_count[pixels] >= self.k]
+        if stale.size:
+            self._refill(stale)
+
+    def _refill(self, pixels):
+        """Recalcula el Top-K de unos píxeles recorriendo las huellas seleccionadas"""
+        self.top_values[:, pixels] = -np.inf
+        self.top_indices[:, pixels] = -1
+        position = self._position
+        position[pixels] = np.arange(pixels.size)
+        for index in self.selected:
+            footprint, rsrp = self.store.footprint(index)
+            hit = position[footprint] >= 0
+            if not hit.any():
+                continue
+            target = footprint[hit]
+            values = np.vstack((self.top_values[:, target], rsrp[hit][None, :]))
+            indices = np.vstack((self.top_indices[:, target], np.full((1, target.size), index, dtype=np.int32)))
+            order = np.argsort(-values, axis=0, kind='stable')[:self.k]
+            self.top_values[:, target] = np.take_along_axis(values, order, axis=0)
+            self.top_indices[:, target] = np.take_along_axis(indices, order, axis=0)
+        position[pixels] = -1
+        self.logger.debug(f"Top-K refilled on {pixels.size} pixels")
+
+    # ------------------------------------------------------------------
+    # Evaluación
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _to_mw(rsrp_dbm):
+        return np.power(10.0, np.asarray(rsrp_dbm, dtype=float) / 10.0)
+
+    def _pixel_terms(self, pixels, best_value, best_index, power, with_sinr: bool):
+        """(cobertura, SINR >= umbral) por píxel, ponderados por pixel_weights"""
+        served = best_index >= 0
+        coverage = (served & (best_value >= self.rsrp_threshold_dbm)).astype(float)
+        sinr_ok = np.zeros(pixels.size)
+        if with_sinr and served.any():
+            rows = np.flatnonzero(served)
+            carrier = self.carrier[best_index[rows]]
+            signal = self._to_mw(best_value[rows])
+            interference = self.load_factor * np.maximum(power[carrier, rows] - signal, 0.0)
+            sinr_db = 10.0 * np.log10(signal / (interference + self.noise_re[carrier]))
+            sinr_ok[rows] = sinr_db >= self.sinr_threshold_db
+        if self.weights is not None:
+            coverage *= self.weights[pixels]
+            sinr_ok *= self.weights[pixels]
+        return coverage, sinr_ok
+
+    def _pixel_score(self, pixels, best_value, best_index, power):
+        """Puntaje ponderado de unos píxeles dado su mejor servidor y potencias"""
+        coverage, sinr_ok = self._pixel_terms(pixels, best_value, best_index, power,
+                                              with_sinr=bool(self.sinr_weight))
+        return self.coverage_weight * coverage + self.sinr_weight * sinr_ok
+
+    def score(self) -> Dict[str, float]:
+        """Objetivo y fracciones de cobertura/SINR de la selección actual"""
+        coverage, sinr_ok = self._pixel_terms(
+            np.arange(self.n_pixels), self.top_values[0].astype(float),
+            self.top_indices[0].astype(np.int64), self.power, with_sinr=True
+        )
+        total = max(self.total_weight, 1e-12)
+        coverage_fraction = float(coverage.sum() / total)
+        sinr_fraction = float(sinr_ok.sum() / total)
+        return {
+            'score': self.coverage_weight * coverage_fraction + self.sinr_weight * sinr_fraction,
+            'coverage_fraction': coverage_fraction,
+            'sinr_fraction': sinr_fraction,
+        }
+
+    def delta(self, remove: Sequence[int] = (), add: Sequence[int] = ()) -> float:
+        """
+        Cambio del puntaje al quitar/agregar candidatos, sin confirmarlo.
+
+        Una pasada vectorizada sobre la unión de las huellas involucradas.
+        Se pueden quitar hasta K - 1 candidatos a la vez.
+        """
+        remove, add = list(remove), list(add)
+        if len(remove) >= self.k:
+            raise ValueError(f"Se pueden evaluar hasta {self.k - 1} bajas a la vez")
+        self.evaluations += 1
+        footprints = {index: self.store.footprint(index) for index in remove + add}
+        if not footprints:
+            return 0.0
+
+        # Unión de huellas sin ordenar: mapa denso píxel -> posición (O(huella))
+        position = self._position
+        merged = np.concatenate([footprint for footprint, _ in footprints.values()])
+        order = np.arange(merged.size)
+        position[merged] = order
+        pixels = merged[position[merged] == order]
+        position[pixels] = np.arange(pixels.size)
+
+        top_values = self.top_values[:, pixels].astype(float)
+        top_indices = self.top_indices[:, pixels].astype(np.int64)
+        power = self.power[:, pixels]
+        before = self._pixel_score(pixels, top_values[0], top_indices[0], power)
+
+        power = power.copy()
+        gone = np.isin(top_indices, remove)
+        top_values[gone] = -np.inf
+        top_indices[gone] = -1
+        first = np.argmax(top_values, axis=0)
+        columns = np.arange(pixels.size)
+        best_value = top_values[first, columns]
+        best_index = top_indices[first, columns]
+
+        for index in remove:
+            footprint, rsrp = footprints[index]
+            power[self.carrier[index], position[footprint]] -= self._to_mw(rsrp)
+        for index in add:
+            footprint, rsrp = footprints[index]
+            rows = position[footprint]
+            power[self.carrier[index], rows] += self._to_mw(rsrp)
+            better = rsrp > best_value[rows]
+            best_value[rows[better]] = rsrp[better]
+            best_index[rows[better]] = index
+        position[pixels] = -1
+
+        after = self._pixel_score(pixels, best_value, best_index, power)
+        return float((after - before).sum() / max(self.total_weight, 1e-12))
+
+    # ------------------------------------------------------------------
+    # Búsqueda
+    # ------------------------------------------------------------------
+
+    def _eligible(self, free_location: Optional[str] = None) -> List[int]:
+        """Candidatos no seleccionados en ubicaciones libres (una config por ubicación)"""
+        used = {self.locations[i] for i in self.selected}
+        used.discard(free_location)
+        return [i for i in range(len(self.locations))
+                if i not in self.selected and self.locations[i] not in used]
+
+    def _result(self, history) -> Dict[str, object]:
+        candidates = self.store.meta['candidates']
+        chosen = [i for i in self.selected if i not in self.fixed]
+        return {
+            'selected': [candidates[i]['id'] for i in chosen],
+            'selected_names': [candidates[i]['name'] for i in chosen],
+            **self.score(),
+            'evaluations': self.evaluations,
+            'history': history,
+        }
+
+    def greedy(self, n_sites: int) -> Dict[str, object]:
+        """
+        Agrega de a uno el candidato de mayor ganancia hasta n_sites nuevos
+        (o hasta que ninguno mejore el puntaje).
+
+        Returns:
+            Dict con 'selected' (ids), 'selected_names', 'score',
+            'coverage_fraction', 'sinr_fraction', 'evaluations' y 'history'
+        """
+        history = [self.score()['score']]
+        while len(self.selected) - len(self.fixed) < int(n_sites):
+            eligible = self._eligible()
+            if not eligible:
+                break
+            gains = [self.delta(add=[index]) for index in eligible]
+            best = int(np.argmax(gains))
+            if gains[best] <= 0.0:
+                break
+            self.add(eligible[best])
+            history.append(history[-1] + gains[best])
+            self.logger.info(
+                f"Greedy: + {self.store.meta['candidates'][eligible[best]]['name']} "
+                f"(+{100.0 * gains[best]:.2f}%, score {history[-1]:.4f})"
+            )
+        return self._result(history)
+
+    def anneal(self, n_sites: int, iterations: int = 2000, initial_temperature: float = None,
+               cooling: float = 0.995) -> Dict[str, object]:
+        """
+        Recocido simulado con intercambios (quitar uno, agregar otro).
+
+        Parte de la selección actual completada con greedy hasta n_sites y
+        termina en la mejor selección visitada.
+
+        Args:
+            n_sites: Número de sitios nuevos
+            iterations: Intercambios propuestos
+            initial_temperature: Temperatura inicial en unidades de puntaje
+                (default: media de |Δ| de propuestas aleatorias)
+            cooling: Factor geométrico de enfriamiento por iteración
+
+        Returns:
+            Dict como greedy()
+        """
+        if len(self.selected) - len(self.fixed) < int(n_sites):
+            self.greedy(n_sites)
+        current = self.score()['score']
+        best_score, best_selection = current, list(self.selected)
+        history = [current]
+
+        def propose():
+            movable = [i for i in self.selected if i not in self.fixed]
+            if not movable:
+                return None
+            out = movable[int(self.rng.integers(len(movable)))]
+            eligible = self._eligible(free_location=self.locations[out])
+            if not eligible:
+                return None
+            return out, eligible[int(self.rng.integers(len(eligible)))]
+
+        temperature = initial_temperature
+        if temperature is None:
+            samples = [abs(self.delta([out], [inn])) for out, inn in filter(None, (propose() for _ in range(20)))]
+            temperature = max(float(np.mean(samples)) if samples else 0.0, 1e-6)
+
+        accepted = 0
+        for _ in range(int(iterations)):
+            move = propose()
+            if move is None:
+                break
+            out, inn = move
+            change = self.delta([out], [inn])
+            if change >= 0.0 or self.rng.random() < math.exp(change / temperature):
+                self.remove(out)
+                self.add(inn)
+                current += change
+                accepted += 1
+                if current > best_score + 1e-12:
+                    best_score, best_selection = current, list(self.selected)
+            history.append(current)
+            temperature *= cooling
+
+        if sorted(best_selection) != sorted(self.selected):
+            self.reset(best_selection)
+        self.logger.info(
+            f"Annealing: {accepted}/{len(history) - 1} swaps accepted, "
+            f"best score {best_score:.4f}, {self.evaluations} evaluations"
+        )
+        return self._result(history)
@@ -2,6 +2,9 @@ import logging
 import numpy as np
 from pathlib import Path
 
+from utils import diagnostics
+from core.ragged_profiles import RaggedProfiles
+
 class TerrainLoader:
     """
     Cargador de datos de elevación del terreno desde GeoTIFF
@@ -28,6 +31,8 @@ class TerrainLoader:
         self.transformer = None
         self.bounds = None
         self.stats = {}
+        self.filename = None
+        self._morphology = None  # TerrainMorphology del DEM cargado (lazy)
 
         if terrain_file:
             self.load(terrain_file)
@@ -56,6 +61,7 @@ class TerrainLoader:
 
             # Abrir dataset
             self.dataset = rasterio.open(str(filepath))
+            self.filename = str(filepath.resolve())
             self.data = self.dataset.read(1)  # Banda 1
 
             # Información del dataset
@@ -74,6 +80,7 @@ class TerrainLoader:
 
             # Guardar bounds
             self.bounds = self.dataset.bounds
+            self._morphology = None
 
             # Calcular estadísticas
             self._calculate_stats()
@@ -180,42 +187,37 @@ class TerrainLoader:
 
         return elevations.reshape(original_shape)
 
-    def get_elevations_fast(self, lats, lons):
+    def get_elevations_fast(self, lats, lons, nodata=0.0):
         """
         Versión optimizada de get_elevations (usa vectorización de rasterio)
 
         Args:
             lats: Array numpy con latitudes
             lons: Array numpy con longitudes
+            nodata: Valor fuera del raster o en píxeles NoData (default: 0.0)
 
         Returns:
             Array numpy con elevaciones
         """
         if self.dataset is None:
-            return np.zeros_like(lats)
+            return np.full(np.shape(lats), nodata, dtype=float)
 
         try:
             original_shape = lats.shape
             lats_flat = lats.flatten()
             lons_flat = lons.flatten()
 
-            # Transformar todas las coordenadas de una vez
-            xs, ys = self.transformer.transform(lons_flat, lats_flat)
-
-            # Obtener índices de píxeles
-            from rasterio.transform import rowcol
-            rows, cols = rowcol(self.dataset.transform, xs, ys)
+            # Índices de píxel de todas las coordenadas de una vez
+            rows, cols, inside = self._pixel_indices(lats_flat, lons_flat)
 
             # Inicializar array de salida
-            elevations = np.zeros(len(lats_flat))
+            elevations = np.full(len(lats_flat), nodata, dtype=float)
 
-            # Extraer elevaciones
-            for i, (row, col) in enumerate(zip(rows, cols)):
-                if 0 <= row < self.data.shape[0] and 0 <= col < self.data.shape[1]:
-                    elev = self.data[row, col]
-                    # Filtrar NoData y valores sospechosos (0 a 10000m válido)
-                    if 0 <= elev < 10000:
-                        elevations[i] = elev
+            # Extraer elevaciones (indexado vectorizado de los píxeles dentro del raster)
+            values = self.data[rows[inside], cols[inside]]
+            # Filtrar NoData y valores sospechosos (0 a 10000m válido)
+            valid = (values >= 0) & (values < 10000)
+            elevations[np.flatnonzero(inside)[valid]] = values[valid]
 
             return elevations.reshape(original_shape)
 
@@ -289,13 +291,163 @@ class TerrainLoader:
         
         result = elevations_flat.reshape(n_receptors, n_samples)
         self.logger.info(f"After reshape: result.shape={result.shape}")
-        
+
         return result
 
+    def _pixel_indices(self, lats, lons):
+        """
+        Índices de píxel del DEM para coordenadas WGS84 (vectorizado)
+
+        Returns:
+            (rows, cols, inside): índices (N,) y máscara de los que caen en el raster
+        """
+        from rasterio.transform import rowcol
+
+        xs, ys = self.transformer.transform(np.ravel(lons), np.ravel(lats))
+        rows, cols = rowcol(self.dataset.transform, xs, ys)
+        rows = np.asarray(rows, dtype=np.int64).reshape(-1)
+        cols = np.asarray(cols, dtype=np.int64).reshape(-1)
+        inside = (
+            (rows >= 0) & (rows < self.data.shape[0])
+            & (cols >= 0) & (cols < self.data.shape[1])
+        )
+        return rows, cols, inside
+
+    def _pixel_size_xy_m(self):
+        """Tamaño de píxel (x, y) en metros; CRS geográficos se convierten en el centro del raster"""
+        res_x, res_y = (abs(float(r)) for r in self.dataset.res)
+        if self.dataset.crs is not None and self.dataset.crs.is_geographic:
+            lat_center = np.radians((self.bounds.bottom + self.bounds.top) / 2.0)
+            res_x *= 111320.0 * np.cos(lat_center)
+            res_y *= 110540.0
+        return res_x, res_y
+
+    def pixel_size_m(self):
+        """
+        Tamaño de píxel del DEM en metros (el menor de ambos ejes)
+
+        Returns:
+            float: Tamaño de píxel en metros (None si no hay DEM)
+        """
+        if self.dataset is None:
+            return None
+        return float(min(self._pixel_size_xy_m()))
+
+    def get_morphology(self):
+        """
+        Rasters de morfología del DEM (rugosidad, clase de clutter, altura de
+        edificios). Se calculan una vez por DEM cargado.
+
+        Returns:
+            TerrainMorphology o None si no hay DEM
+        """
+        if self.dataset is None:
+            return None
+        if self._morphology is None:
+            from core.terrain_morphology import TerrainMorphology
+            self._morphology = TerrainMorphology(self.data, self._pixel_size_xy_m())
+        return self._morphology
+
+    def sample_morphology(self, lats, lons, layers):
+        """
+        Muestrea capas de morfología en coordenadas WGS84.
+
+        Args:
+            lats, lons: Arrays de coordenadas (misma forma)
+            layers: Nombres de capas de TerrainMorphology
+
+        Returns:
+            Dict capa -> array con la forma de lats (None si no hay DEM)
+        """
+        morphology = self.get_morphology()
+        if morphology is None:
+            return None
+        lats = np.asarray(lats)
+        rows, cols, inside = self._pixel_indices(lats, np.asarray(lons))
+        sampled = morphology.sample(rows, cols, inside, layers)
+        return {name: values.reshape(lats.shape) for name, values in sampled.items()}
+
+    def get_adaptive_profiles(self, tx_lat, tx_lon, rx_lats, rx_lons,
+                              sample_spacing_m=None, min_samples=8, max_samples=128):
+        """
+        Extrae perfiles radiales TX → receptor con muestras según la longitud.
+
+        Cada perfil tiene ceil(d / sample_spacing_m) + 1 muestras (acotadas a
+        [min_samples, max_samples]) equiespaciadas hasta el receptor: un
+        trayecto de 100 m no se muestrea por debajo de la resolución del DEM
+        y uno de 15 km no se queda en 50 muestras.
+
+        Args:
+            tx_lat: Latitud del transmisor (escalar)
+            tx_lon: Longitud del transmisor (escalar)
+            rx_lats: Array (N,) de latitudes de receptores
+            rx_lons: Array (N,) de longitudes de receptores
+            sample_spacing_m: Separación objetivo entre muestras [m]
+                              (default: tamaño de píxel del DEM)
+            min_samples: Mínimo de muestras por perfil (>= 2)
+            max_samples: Máximo de muestras por perfil
+
+        Returns:
+            RaggedProfiles con elevaciones y distancias desde TX por muestra
+            (elevaciones en cero si el terreno no está cargado)
+        """
+        rx_lats = np.asarray(rx_lats, dtype=float).ravel()
+        rx_lons = np.asarray(rx_lons, dtype=float).ravel()
+        min_samples = max(int(min_samples), 2)
+        max_samples = max(int(max_samples), min_samples)
+
+        if sample_spacing_m is None:
+            sample_spacing_m = self.pixel_size_m() or 30.0
+
+        distances = self._haversine_distance(tx_lat, tx_lon, rx_lats, rx_lons)  # (N,)
+        counts = np.clip(
+            np.ceil(distances / float(sample_spacing_m)).astype(np.int64) + 1,
+            min_samples, max_samples
+        )
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+
+        # Fracción t ∈ [0, 1] de cada muestra a lo largo de su trayecto
+        rows = np.repeat(np.arange(len(counts)), counts)
+        t = (np.arange(offsets[-1]) - offsets[rows]) / (counts[rows] - 1)
+
+        sample_lats = tx_lat + (rx_lats[rows] - tx_lat) * t
+        sample_lons = tx_lon + (rx_lons[rows] - tx_lon) * t
+        elevations = self.get_elevations_fast(sample_lats, sample_lons)
+
+        diagnostics.log(self.logger, lambda: (
+            f"get_adaptive_profiles: n_receptors={len(counts)}, spacing={sample_spacing_m:.1f} m, "
+            f"samples={int(offsets[-1])} (min={int(counts.min()) if counts.size else 0}, "
+            f"max={int(counts.max()) if counts.size else 0}), "
+            f"capped={int(np.sum(counts == max_samples))}"
+        ), logging.INFO)
+
+        return RaggedProfiles(offsets, elevations, distances[rows] * t)
+
     def is_loaded(self):
         """Verifica si hay datos de terreno cargados"""
         return self.dataset is not None
 
+    def get_identity(self):
+        """
+        Identidad del DEM cargado (para invalidar resultados cacheados)
+
+        Returns:
+            Dict con ruta absoluta, tamaño, mtime y forma, o None si no hay DEM
+        """
+        if not self.is_loaded() or not self.filename:
+            return None
+        try:
+            stat = Path(self.filename).stat()
+            size, mtime_ns = stat.st_size, stat.st_mtime_ns
+        except OSError:
+            size, mtime_ns = None, None
+        return {
+            'path': self.filename,
+            'size': size,
+            'mtime_ns': mtime_ns,
+            'shape': list(self.data.shape),
+        }
+
     def get_stats(self):
         """Retorna estadísticas del terreno"""
         return self.stats.copy() if self.stats else {}
@@ -306,6 +458,7 @@ class TerrainLoader:
             self.dataset.close()
             self.dataset = None
             self.data = None
+            self._morphology = None
             self.logger.info("Terrain data unloaded")
     
     
@@ -398,10 +551,12 @@ class TerrainLoader:
                 all_lons  # (N, n_samples)
             )
             
-            self.logger.info(f"get_profile_distances: n_receptors={n_receptors}, n_samples={n_samples}, "
-                            f"distances shape={distances.shape}, "
-                            f"range=[{np.min(distances):.1f}, {np.max(distances):.1f}] m "
-                            f"(original behavior: linear interpolation)")
+            diagnostics.log(self.logger, lambda: (
+                f"get_profile_distances: n_receptors={n_receptors}, n_samples={n_samples}, "
+                f"distances shape={distances.shape}, "
+                f"range=[{np.min(distances):.1f}, {np.max(distances):.1f}] m "
+                f"(original behavior: linear interpolation)"
+            ), logging.INFO)
             
             return distances
         
@@ -483,15 +638,20 @@ class TerrainLoader:
         la determinación de obstáculos para cálculos de difracción.
         
         Args:
-            terrain_profiles: Array (N, n_samples) con elevaciones en msnm
+            terrain_profiles: Array (N, n_samples) con elevaciones en msnm, o
+                              RaggedProfiles (usa sus propias distancias)
             window_size_m: Tamaño de ventana Gaussian en metros (default: 1km)
             profile_distances: Array (N, n_samples) con distancias desde TX (opcional)
                              Si no se proporciona, usa índices como proxy
         
         Returns:
             Array (N, n_samples) con perfiles suavizados en msnm
+            (RaggedProfiles si la entrada es RaggedProfiles)
         """
         from scipy.ndimage import gaussian_filter1d
+
+        if isinstance(terrain_profiles, RaggedProfiles):
+            return self._smooth_ragged_profiles(terrain_profiles, window_size_m)
         
         terrain_profiles = np.asarray(terrain_profiles)
         n_receptors, n_samples = terrain_profiles.shape
@@ -519,12 +679,40 @@ class TerrainLoader:
         for i in range(n_receptors):
             smoothed[i, :] = gaussian_filter1d(terrain_profiles[i, :], sigma=sigma, mode='nearest')
         
-        # Calcular estadísticas de suavizado
-        diff_dB_equivalent = 10 * np.log10(np.maximum(np.abs(smoothed - terrain_profiles), 1e-3))
-        mean_smoothing_db = np.mean(diff_dB_equivalent)
-        max_smoothing_db = np.max(diff_dB_equivalent)
-        
-        self.logger.info(f"get_smoothed_profiles: window_size={window_size_m:.0f}m, sigma={sigma:.2f} indices, "
-                        f"mean_smoothing={mean_smoothing_db:.2f} dB, max_smoothing={max_smoothing_db:.2f} dB")
+        # Estadísticas de suavizado (solo en modo diagnóstico: log10 sobre toda la matriz)
+        def smoothing_stats():
+            diff_dB_equivalent = 10 * np.log10(np.maximum(np.abs(smoothed - terrain_profiles), 1e-3))
+            return (f"get_smoothed_profiles: window_size={window_size_m:.0f}m, sigma={sigma:.2f} indices, "
+                    f"mean_smoothing={np.mean(diff_dB_equivalent):.2f} dB, "
+                    f"max_smoothing={np.max(diff_dB_equivalent):.2f} dB")
+
+        diagnostics.log(self.logger, smoothing_stats, logging.INFO)
         
         return smoothed
+
+    def _smooth_ragged_profiles(self, profiles, window_size_m):
+        """
+        Suavizado Gaussian de RaggedProfiles.
+
+        Los perfiles con el mismo número de muestras se filtran juntos como un
+        bloque 2D (gaussian_filter1d sobre axis=1), con sigma según el
+        espaciado medio del bloque como en la versión densa.
+        """
+        from scipy.ndimage import gaussian_filter1d
+
+        offsets = np.asarray(profiles.offsets)
+        lengths = np.asarray(profiles.lengths)
+        elevations = np.asarray(profiles.elevations)
+        distances = np.asarray(profiles.distances)
+        smoothed = np.empty_like(elevations)
+
+        for n_samples in np.unique(lengths):
+            rows = np.flatnonzero(lengths == n_samples)
+            index = offsets[rows][:, None] + np.arange(n_samples)  # (rows, n_samples)
+            spacing_m = np.mean(distances[index[:, -1]] - distances[index[:, 0]]) / (n_samples - 1)
+            window_indices = max(1, int(window_size_m / spacing_m)) if spacing_m > 0 else 1
+            smoothed[index] = gaussian_filter1d(
+                elevations[index], sigma=window_indices / 3.0, axis=1, mode='nearest'
+            )
+
+        return profiles.with_elevations(smoothed)
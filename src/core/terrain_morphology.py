@@ -0,0 +1,131 @@
+"""
+Rasters de morfología derivados del DEM (rugosidad, clase de clutter, altura de edificios)
+
+La clase de clutter, la rugosidad y la altura de edificios estimada son
+propiedades del terreno, no de la antena: se calculan una vez por DEM con
+filtros de ventana deslizante (scipy.ndimage) y todos los modelos las
+muestrean en los píxeles del grid, en lugar de recalcularlas por antena y
+por perfil de receptor.
+
+    local_range      max - min en ventana de CLUTTER_WINDOW_M [m]
+    local_std        desviación estándar en ventana de ROUGHNESS_WINDOW_M [m]
+    slope_deg        pendiente local [°]
+    clutter_class    0 = rural, 1 = suburban, 2 = urban (umbrales de
+                     ClutterModel.classify_clutter_from_dem sobre local_range)
+    building_height  proxy de altura de edificios [m] a partir de local_std
+                     (misma relación que COST-231 Walfisch-Ikegami)
+"""
+
+import logging
+import math
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+
+class TerrainMorphology:
+    """Rasters de morfología de un DEM, alineados píxel a píxel con él"""
+
+    CLUTTER_CLASSES = ('rural', 'suburban', 'urban')  # Código = índice
+
+    CLUTTER_WINDOW_M = 2000.0    # Ventana de variabilidad para la clase de clutter
+    ROUGHNESS_WINDOW_M = 1000.0  # Ventana de la desviación estándar local
+    SUBURBAN_RANGE_M = 20.0      # Variabilidad > 20 m → suburban
+    URBAN_RANGE_M = 50.0         # Variabilidad > 50 m → urban
+
+    # h_b ≈ α·σ + β acotado a [8, 40] m
+    BUILDING_ALPHA = 0.3
+    BUILDING_BETA_M = 12.0
+    BUILDING_RANGE_M = (8.0, 40.0)
+
+    # Valor de cada capa fuera del DEM
+    LAYER_DEFAULTS = {
+        'local_range': np.nan,
+        'local_std': np.nan,
+        'slope_deg': np.nan,
+        'clutter_class': 1,        # suburban (default conservador de ClutterModel)
+        'building_height': 15.0,   # altura típica de COST-231 WI
+    }
+
+    def __init__(self, elevations, pixel_size_m: Tuple[float, float],
+                 clutter_window_m: float = CLUTTER_WINDOW_M,
+                 roughness_window_m: float = ROUGHNESS_WINDOW_M):
+        """
+        Args:
+            elevations: Array 2D del DEM [m] (NoData: < 0 o >= 10000)
+            pixel_size_m: Tamaño de píxel (x, y) en metros
+            clutter_window_m: Lado de la ventana para local_range [m]
+            roughness_window_m: Lado de la ventana para local_std [m]
+        """
+        from scipy import ndimage
+
+        self.logger = logging.getLogger("TerrainMorphology")
+        z = np.asarray(elevations, dtype=float)
+        valid = (z >= 0) & (z < 10000)
+        fill = float(z[valid].mean()) if valid.any() else 0.0
+        z = np.where(valid, z, fill)  # NoData → media (no crea relieve artificial)
+
+        dx, dy = (float(v) for v in pixel_size_m)
+        range_size = self._window_pixels(clutter_window_m, dx, dy)
+        std_size = self._window_pixels(roughness_window_m, dx, dy)
+
+        local_range = (ndimage.maximum_filter(z, size=range_size, mode='nearest')
+                       - ndimage.minimum_filter(z, size=range_size, mode='nearest'))
+
+        mean = ndimage.uniform_filter(z, size=std_size, mode='nearest')
+        mean_sq = ndimage.uniform_filter(z * z, size=std_size, mode='nearest')
+        local_std = np.sqrt(np.maximum(mean_sq - mean * mean, 0.0))
+
+        grad_y, grad_x = np.gradient(z, dy, dx)
+        slope_deg = np.degrees(np.arctan(np.hypot(grad_x, grad_y)))
+
+        clutter_class = ((local_range > self.SUBURBAN_RANGE_M).astype(np.uint8)
+                         + (local_range > self.URBAN_RANGE_M).astype(np.uint8))
+        building_height = np.clip(
+            self.BUILDING_ALPHA * local_std + self.BUILDING_BETA_M, *self.BUILDING_RANGE_M
+        )
+
+        self.layers: Dict[str, np.ndarray] = {
+            'local_range': local_range.astype(np.float32),
+            'local_std': local_std.astype(np.float32),
+            'slope_deg': slope_deg.astype(np.float32),
+            'clutter_class': clutter_class,
+            'building_height': building_height.astype(np.float32),
+        }
+        self.shape = z.shape
+
+        counts = np.bincount(clutter_class.ravel(), minlength=3)
+        self.logger.info(
+            f"Morphology {self.shape}: windows {range_size}/{std_size} px, "
+            f"clutter rural/suburban/urban = {counts[0]}/{counts[1]}/{counts[2]}"
+        )
+
+    @staticmethod
+    def _window_pixels(window_m: float, dx: float, dy: float) -> Tuple[int, int]:
+        """Lado impar (filas, columnas) en píxeles de una ventana de window_m metros"""
+        def odd(n):
+            n = max(int(math.ceil(n)), 1)
+            return n if n % 2 else n + 1
+        return odd(window_m / dy), odd(window_m / dx)
+
+    def sample(self, rows, cols, inside, layers: Iterable[str]) -> Dict[str, np.ndarray]:
+        """
+        Valores de las capas en índices de píxel del DEM.
+
+        Args:
+            rows, cols: Índices de píxel (N,)
+            inside: Máscara (N,) de índices dentro del raster
+            layers: Nombres de capas a muestrear
+
+        Returns:
+            Dict capa -> array (N,) (LAYER_DEFAULTS fuera del raster)
+        """
+        rows = np.asarray(rows)[inside]
+        cols = np.asarray(cols)[inside]
+        sampled = {}
+        for name in layers:
+            raster = self.layers[name]
+            values = np.full(inside.shape, self.LAYER_DEFAULTS[name], dtype=raster.dtype)
+            values[inside] = raster[rows, cols]
+            sampled[name] = values
+        return sampled
@@ -1,6 +1,6 @@
 import sys
 from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import QTimer, Qt
+from PyQt6.QtCore import Qt
 import logging
 
 def main():
@@ -26,11 +26,15 @@ def main():
     splash.update_status("Cargando configuración...")
     from utils.config_manager import ConfigManager
     config = ConfigManager()
+
+    # Estadísticas de diagnóstico en rutas calientes (desactivadas por defecto)
+    from utils import diagnostics
+    diagnostics.set_enabled(config.settings.get('logging', {}).get('diagnostics', False))
     
-    # Detectar GPU
+    # Detectar GPU en segundo plano (import de cupy + CUDA) mientras se carga la UI
     splash.update_status("Detectando hardware...")
     from utils.gpu_detector import GPUDetector
-    gpu = GPUDetector()
+    gpu = GPUDetector(background=True)
     
     # Cargar modelos
     splash.update_status("Cargando modelos de propagación...")
@@ -41,9 +45,9 @@ def main():
     from ui.main_window import MainWindow
     window = MainWindow(config, gpu)
     
-    # Cerrar splash después de 2 segundos
-    QTimer.singleShot(2000, splash.close)
-    QTimer.singleShot(2000, window.show)
+    # Mostrar la ventana en cuanto está construida y cerrar el splash
+    window.show()
+    splash.finish(window)
     
     logging.info("Application ready")
     
@@ -0,0 +1,507 @@
+"""
+AntennaTable: almacenamiento columnar (structure-of-arrays) de antenas
+
+Antenna es un dataclass pensado para edición individual desde la UI. Para
+proyectos de red (miles de celdas) las operaciones masivas - importar una base
+de sitios, serializar el proyecto, agrupar antenas por parámetros o descartar
+las que no alcanzan un área - necesitan columnas NumPy, no bucles sobre
+objetos.
+
+AntennaTable guarda una columna por campo de Antenna:
+
+    - numéricas (float64): latitude, longitude, height_agl, tx_power_dbm, ...
+    - códigos (int8): technology y antenna_type como índice en su Enum
+    - booleanas: enabled, visible, show_coverage
+    - texto (object): id, name, site_id, pattern_file, color, notes
+
+y convierte en bloque desde/hacia objetos Antenna, dicts de proyecto (el mismo
+formato que Antenna.to_dict) y CSV.
+
+AntennaCollection es el almacén de AntennaManager y Project: un dict
+antenna_id -> Antenna respaldado por un AntennaTable. Sus valores son
+AntennaView, objetos Antenna ligados a una fila que leen y escriben las
+columnas, así la UI sigue editando antenas individuales mientras las
+operaciones masivas trabajan sobre la tabla sin convertir objetos.
+"""
+
+import csv
+import dataclasses
+import logging
+import uuid
+from collections.abc import MutableMapping
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+
+from models.antenna import Antenna, AntennaType, Technology
+
+
+# Valores por defecto tomados del dataclass (fuente única de verdad)
+_DEFAULTS = {
+    f.name: f.default for f in dataclasses.fields(Antenna)
+    if f.default is not dataclasses.MISSING
+}
+
+
+class AntennaTable:
+    """Tabla columnar de antenas con conversión en bloque"""
+
+    FLOAT_COLUMNS = (
+        'latitude', 'longitude', 'height_agl',
+        'frequency_mhz', 'bandwidth_mhz', 'tx_power_dbm',
+        'azimuth', 'mechanical_tilt', 'electrical_tilt',
+        'horizontal_beamwidth', 'vertical_beamwidth', 'gain_dbi',
+    )
+    BOOL_COLUMNS = ('visible', 'show_coverage', 'enabled')
+    CODE_COLUMNS = {'technology': Technology, 'antenna_type': AntennaType}
+    TEXT_COLUMNS = ('id', 'name', 'site_id', 'pattern_file', 'color', 'notes')
+
+    # Orden de columnas en CSV (igual al de Antenna.to_dict)
+    COLUMNS = tuple(Antenna().to_dict().keys())
+
+    def __init__(self, capacity: int = 0):
+        """
+        Args:
+            capacity: Filas a reservar de antemano (crece por duplicación)
+        """
+        self.logger = logging.getLogger("AntennaTable")
+        self._size = 0
+        self._data = {}
+        self._index = {}
+        self._reserve(max(int(capacity), 0))
+
+    # ------------------------------------------------------------------
+    # Construcción
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_antennas(cls, antennas: Iterable[Antenna]) -> 'AntennaTable':
+        """Tabla a partir de objetos Antenna"""
+        antennas = list(antennas)
+        table = cls(len(antennas))
+        table._append_columns({
+            name: [getattr(ant, name) for ant in antennas] for name in cls.COLUMNS
+        }, len(antennas))
+        return table
+
+    @classmethod
+    def from_dicts(cls, records: Sequence[Dict]) -> 'AntennaTable':
+        """
+        Tabla a partir de dicts con el formato de Antenna.to_dict (ej. un
+        archivo de proyecto). Campos ausentes toman el valor por defecto.
+        """
+        records = list(records)
+        table = cls(len(records))
+        columns = {}
+        for name in cls.COLUMNS:
+            default = _DEFAULTS.get(name)
+            columns[name] = [rec.get(name, default) for rec in records]
+        table._append_columns(columns, len(records))
+        return table
+
+    @classmethod
+    def from_csv(cls, path) -> 'AntennaTable':
+        """
+        Importa una base de sitios/celdas en CSV (cabecera con nombres de
+        campo de Antenna; columnas desconocidas se ignoran, ausentes o vacías
+        toman el valor por defecto).
+        """
+        with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+            reader = csv.reader(f)
+            header = [h.strip() for h in next(reader, [])]
+            rows = list(reader)
+
+        position = {name: i for i, name in enumerate(header)}
+        columns = {}
+        for name in cls.COLUMNS:
+            if name not in position:
+                continue
+            col = position[name]
+            columns[name] = [row[col].strip() if col < len(row) else '' for row in rows]
+
+        table = cls(len(rows))
+        table._append_columns(columns, len(rows), from_text=True)
+        table.logger.info(f"Imported {len(table)} antennas from {path}")
+        return table
+
+    # ------------------------------------------------------------------
+    # Acceso
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        """Columna 'name' (vista de longitud len(self))"""
+        return self._data[name][:self._size]
+
+    def __contains__(self, antenna_id: str) -> bool:
+        return antenna_id in self._index
+
+    @property
+    def ids(self) -> np.ndarray:
+        return self['id']
+
+    def index_of(self, antenna_id: str) -> int:
+        """Fila de la antena con id 'antenna_id' (KeyError si no existe)"""
+        return self._index[antenna_id]
+
+    def decoded(self, name: str) -> np.ndarray:
+        """Columna de códigos ('technology', 'antenna_type') como array de Enums"""
+        members = np.array(list(self.CODE_COLUMNS[name]), dtype=object)
+        return members[self[name]]
+
+    def value(self, antenna_id: str, name: str):
+        """Campo 'name' de una antena como valor Python (Enum en las columnas de código)"""
+        value = self._data[name][self._index[antenna_id]]
+        if name in self.CODE_COLUMNS:
+            return list(self.CODE_COLUMNS[name])[value]
+        return value.item() if isinstance(value, np.generic) else value
+
+    def antenna(self, row: int) -> Antenna:
+        """Objeto Antenna de la fila 'row'"""
+        return self._build_antennas(np.array([row]))[0]
+
+    def to_antennas(self) -> List[Antenna]:
+        """Lista de objetos Antenna (en orden de filas)"""
+        return self._build_antennas(np.arange(self._size))
+
+    def to_dicts(self) -> List[Dict]:
+        """Lista de dicts con el formato de Antenna.to_dict"""
+        columns = self._python_columns(np.arange(self._size))
+        for name, enum in self.CODE_COLUMNS.items():
+            values = [member.value for member in enum]
+            columns[name] = [values[code] for code in columns[name]]
+        return [dict(zip(self.COLUMNS, row)) for row in zip(*(columns[n] for n in self.COLUMNS))]
+
+    def to_csv(self, path):
+        """Exporta la tabla a CSV (mismas columnas que lee from_csv)"""
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(self.COLUMNS)
+            for record in self.to_dicts():
+                writer.writerow(['' if record[n] is None else record[n] for n in self.COLUMNS])
+        self.logger.info(f"Exported {len(self)} antennas to {path}")
+
+    def select(self, rows) -> 'AntennaTable':
+        """Sub-tabla con las filas indicadas (máscara booleana o índices)"""
+        rows = np.arange(self._size)[rows] if np.asarray(rows).dtype == bool else np.asarray(rows)
+        table = AntennaTable(len(rows))
+        for name in self.COLUMNS:
+            table._data[name][:len(rows)] = self[name][rows]
+        table._size = len(rows)
+        table._rebuild_index()
+        return table
+
+    # ------------------------------------------------------------------
+    # Modificación
+    # ------------------------------------------------------------------
+
+    def append(self, antenna: Antenna) -> int:
+        """Agrega una antena; retorna su fila"""
+        self.extend([antenna])
+        return self._size - 1
+
+    def extend(self, antennas: Iterable[Antenna]):
+        """Agrega antenas en bloque"""
+        antennas = list(antennas)
+        self._append_columns({
+            name: [getattr(ant, name) for ant in antennas] for name in self.COLUMNS
+        }, len(antennas))
+
+    def extend_table(self, other: 'AntennaTable'):
+        """Agrega las filas de otra tabla copiando columnas (sin objetos intermedios)"""
+        n = len(other)
+        duplicated = [aid for aid in other['id'].tolist() if aid in self._index]
+        if duplicated:
+            raise ValueError(f"ID de antena duplicado: {duplicated[0]}")
+        self._reserve(self._size + n)
+        start, stop = self._size, self._size + n
+        for name in self.COLUMNS:
+            self._data[name][start:stop] = other[name]
+        self._size = stop
+        self._index.update((aid, row) for row, aid in enumerate(other['id'].tolist(), start=start))
+
+    def update(self, antenna_id: str, **values):
+        """
+        Actualiza campos de una antena (nombres de campo de Antenna).
+
+        Cambiar 'id' a uno que ya existe en la tabla es un ValueError.
+        """
+        row = self._index[antenna_id]
+        new_id = values.get('id', antenna_id)
+        if new_id != antenna_id and new_id in self._index:
+            raise ValueError(f"ID de antena duplicado: {new_id}")
+        for name, value in values.items():
+            if name not in self._data:
+                continue
+            if name in self.CODE_COLUMNS:
+                value = self._encode(name, [value])[0]
+            self._data[name][row] = value
+        if new_id != antenna_id:
+            del self._index[antenna_id]
+            self._index[new_id] = row
+
+    def clear(self):
+        """Elimina todas las filas (conserva la reserva)"""
+        for column in self._data.values():
+            if column.dtype == object:
+                column[:self._size] = None
+        self._size = 0
+        self._index = {}
+
+    def remove(self, antenna_ids: Iterable[str]) -> int:
+        """Elimina antenas por id; retorna cuántas se eliminaron"""
+        rows = [self._index[a] for a in antenna_ids if a in self._index]
+        if not rows:
+            return 0
+        keep = np.ones(self._size, dtype=bool)
+        keep[rows] = False
+        n_keep = int(keep.sum())
+        for name, column in self._data.items():
+            column[:n_keep] = column[:self._size][keep]
+            if column.dtype == object:
+                column[n_keep:self._size] = None
+        self._size = n_keep
+        self._rebuild_index()
+        return len(rows)
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _dtype(self, name: str):
+        if name in self.FLOAT_COLUMNS:
+            return np.float64
+        if name in self.BOOL_COLUMNS:
+            return np.bool_
+        if name in self.CODE_COLUMNS:
+            return np.int8
+        return object
+
+    def _reserve(self, capacity: int):
+        """Garantiza espacio para 'capacity' filas (duplicando la reserva)"""
+        current = len(self._data['id']) if self._data else -1
+        if capacity <= current:
+            return
+        new_capacity = max(capacity, 2 * max(current, 0), 16)
+        for name in self.COLUMNS:
+            column = np.empty(new_capacity, dtype=self._dtype(name))
+            if column.dtype == object:
+                column[:] = None
+            if name in self._data:
+                column[:self._size] = self._data[name][:self._size]
+            self._data[name] = column
+
+    def _append_columns(self, columns: Dict[str, list], n: int, from_text: bool = False):
+        """Agrega n filas a partir de listas por columna (ausentes = default)"""
+        if n == 0:
+            return
+        self._reserve(self._size + n)
+        start, stop = self._size, self._size + n
+
+        for name in self.COLUMNS:
+            values = columns.get(name)
+            if name == 'id':
+                values = [v if v else str(uuid.uuid4()) for v in (values or [None] * n)]
+            elif values is None:
+                self._data[name][start:stop] = self._encode(name, [_DEFAULTS.get(name)])[0]
+                continue
+            elif from_text:
+                values = self._parse_text(name, values)
+            self._data[name][start:stop] = self._encode(name, values)
+
+        self._size = stop
+        for row in range(start, stop):
+            antenna_id = self._data['id'][row]
+            if antenna_id in self._index:
+                raise ValueError(f"ID de antena duplicado: {antenna_id}")
+            self._index[antenna_id] = row
+
+    def _encode(self, name: str, values: list) -> np.ndarray:
+        """Lista de valores Python -> array del dtype de la columna"""
+        if name in self.CODE_COLUMNS:
+            enum = self.CODE_COLUMNS[name]
+            members = list(enum)
+            lookup = {m: i for i, m in enumerate(members)}
+            lookup.update({m.value: i for i, m in enumerate(members)})
+            # Miembros del mismo Enum importado por otra ruta (src.models...) por su valor
+            codes = (lookup[v] if v in lookup else lookup[getattr(v, 'value', v)] for v in values)
+            return np.fromiter(codes, dtype=np.int8, count=len(values))
+        if name in self.TEXT_COLUMNS:
+            array = np.empty(len(values), dtype=object)
+            array[:] = values
+            return array
+        return np.asarray(values, dtype=self._dtype(name))
+
+    @staticmethod
+    def _parse_text(name: str, values: List[str]) -> list:
+        """Valores de texto (CSV) -> tipos Python; vacíos toman el default"""
+        default = _DEFAULTS.get(name)
+        if name in AntennaTable.FLOAT_COLUMNS:
+            return [float(v) if v else default for v in values]
+        if name in AntennaTable.BOOL_COLUMNS:
+            return [v.lower() in ('1', 'true', 'yes', 'si', 'sí') if v else default for v in values]
+        if name in AntennaTable.CODE_COLUMNS:
+            return [v if v else default for v in values]
+        if name == 'site_id':
+            return [v or None for v in values]
+        return [v if v else (default if default is not None else '') for v in values]
+
+    def _python_columns(self, rows: np.ndarray) -> Dict[str, list]:
+        """Columnas de las filas 'rows' como listas de tipos Python nativos"""
+        return {name: self._data[name][rows].tolist() for name in self.COLUMNS}
+
+    def _build_antennas(self, rows: np.ndarray) -> List[Antenna]:
+        columns = self._python_columns(rows)
+        for name, enum in self.CODE_COLUMNS.items():
+            members = list(enum)
+            columns[name] = [members[code] for code in columns[name]]
+        return [Antenna(**dict(zip(self.COLUMNS, row)))
+                for row in zip(*(columns[n] for n in self.COLUMNS))]
+
+    def _rebuild_index(self):
+        self._index = {antenna_id: row for row, antenna_id in enumerate(self['id'].tolist())}
+
+
+_FIELD_NAMES = frozenset(AntennaTable.COLUMNS)
+
+
+class AntennaView(Antenna):
+    """
+    Antenna ligada a una fila de la tabla de un AntennaCollection.
+
+    Los campos se leen y escriben en las columnas de la tabla. Al quitar la
+    antena de su AntennaCollection la vista se desliga y conserva sus últimos
+    valores como un Antenna común. copy/deepcopy/pickle producen Antenna sueltos.
+    """
+
+    @classmethod
+    def _bind(cls, owner: 'AntennaCollection', antenna_id: str) -> 'AntennaView':
+        view = object.__new__(cls)
+        object.__setattr__(view, '_owner', owner)
+        object.__setattr__(view, '_row_id', antenna_id)
+        return view
+
+    def __getattribute__(self, name):
+        if name in _FIELD_NAMES:
+            state = object.__getattribute__(self, '__dict__')
+            owner = state.get('_owner')
+            if owner is not None:
+                return owner.table.value(state['_row_id'], name)
+        return object.__getattribute__(self, name)
+
+    def __setattr__(self, name, value):
+        state = self.__dict__
+        owner = state.get('_owner')
+        if owner is None or name not in _FIELD_NAMES:
+            object.__setattr__(self, name, value)
+        elif name == 'id':
+            owner._rename(state['_row_id'], value)
+        else:
+            owner.table.update(state['_row_id'], **{name: value})
+
+    def __eq__(self, other):
+        if not isinstance(other, Antenna):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    __hash__ = None
+
+    def detached(self) -> Antenna:
+        """Copia suelta (Antenna común) con los valores actuales"""
+        return Antenna(**{name: getattr(self, name) for name in AntennaTable.COLUMNS})
+
+    def _detach(self):
+        """Desliga la vista de la tabla guardando sus valores actuales"""
+        values = {name: getattr(self, name) for name in AntennaTable.COLUMNS}
+        object.__setattr__(self, '_owner', None)
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __copy__(self):
+        return self.detached()
+
+    def __deepcopy__(self, memo):
+        return self.detached()
+
+    def __reduce__(self):
+        return Antenna.from_dict, (self.to_dict(),)
+
+
+class AntennaCollection(MutableMapping):
+    """
+    Dict antenna_id -> Antenna respaldado por un AntennaTable.
+
+    Asignar una antena copia sus valores a la tabla; leer retorna su
+    AntennaView (la misma instancia mientras la antena siga en la colección).
+    """
+
+    def __init__(self, antennas=None, table: AntennaTable = None):
+        """
+        Args:
+            antennas: Dict/mapping antenna_id -> Antenna inicial (opcional)
+            table: Tabla a usar como almacén (opcional, se crea una vacía)
+        """
+        self.table = table if table is not None else AntennaTable()
+        self._views = {}
+        if antennas:
+            self.update(antennas)
+
+    def __getitem__(self, antenna_id: str) -> Antenna:
+        if antenna_id not in self.table:
+            raise KeyError(antenna_id)
+        view = self._views.get(antenna_id)
+        if view is None:
+            view = self._views[antenna_id] = AntennaView._bind(self, antenna_id)
+        return view
+
+    def __setitem__(self, antenna_id: str, antenna: Antenna):
+        if antenna.id != antenna_id:
+            raise ValueError(f"La clave {antenna_id} no coincide con el id de la antena ({antenna.id})")
+        if antenna is self._views.get(antenna_id):
+            return
+        if antenna_id in self.table:
+            values = {name: getattr(antenna, name) for name in AntennaTable.COLUMNS if name != 'id'}
+            self.table.update(antenna_id, **values)
+        else:
+            self.table.append(antenna)
+
+    def __delitem__(self, antenna_id: str):
+        if antenna_id not in self.table:
+            raise KeyError(antenna_id)
+        view = self._views.pop(antenna_id, None)
+        if view is not None:
+            view._detach()
+        self.table.remove([antenna_id])
+
+    def __iter__(self):
+        return iter(self.table.ids.tolist())
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def __contains__(self, antenna_id) -> bool:
+        return antenna_id in self.table
+
+    def __repr__(self) -> str:
+        return f"AntennaCollection({len(self)} antennas)"
+
+    def clear(self):
+        for view in self._views.values():
+            view._detach()
+        self._views.clear()
+        self.table.clear()
+
+    def _rename(self, antenna_id: str, new_id: str):
+        """Cambia el id de una antena (tabla, índice y vista)"""
+        self.table.update(antenna_id, id=new_id)
+        view = self._views.pop(antenna_id, None)
+        if view is not None:
+            object.__setattr__(view, '_row_id', new_id)
+            self._views[new_id] = view
+
+    def extend_table(self, table: AntennaTable) -> List[str]:
+        """Agrega en bloque las filas de 'table'; retorna sus ids"""
+        self.table.extend_table(table)
+        return table.ids.tolist()
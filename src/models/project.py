@@ -4,6 +4,7 @@ import uuid
 import json
 from datetime import datetime
 from models.antenna import Antenna
+from models.antenna_table import AntennaCollection, AntennaTable
 from models.site import Site
 
 @dataclass
@@ -26,13 +27,19 @@ class Project:
     zoom_level: int = 13
     terrain_file: Optional[str] = None
     
-    # Referencias a entidades
+    # Referencias a entidades (antenas en un AntennaTable columnar)
     sites: Dict[str, Site] = field(default_factory=dict)
-    antennas: Dict[str, Antenna] = field(default_factory=dict)
+    antennas: Dict[str, Antenna] = field(default_factory=AntennaCollection)
     
     # Configuración de simulación
     simulation_config: Dict = field(default_factory=dict)
     
+    def __setattr__(self, name, value):
+        # Un dict de antenas asignado al proyecto pasa a un AntennaCollection
+        if name == 'antennas' and not isinstance(value, AntennaCollection):
+            value = AntennaCollection(value)
+        super().__setattr__(name, value)
+    
     def save_to_file(self, filepath: str):
         """Guarda proyecto en archivo .rfproj (JSON)"""
         import json
@@ -58,7 +65,7 @@ class Project:
             'zoom_level': self.zoom_level,
             'terrain_file': self.terrain_file,
             'sites': {sid: site.to_dict() for sid, site in self.sites.items()},
-            'antennas': {aid: ant.to_dict() for aid, ant in self.antennas.items()},
+            'antennas': {rec['id']: rec for rec in self.antennas.table.to_dicts()},
             'simulation_config': self.simulation_config
         }
         
@@ -89,8 +96,10 @@ class Project:
         # Cargar sitios y antenas
         project.sites = {sid: Site.from_dict(sdata) 
                         for sid, sdata in data.get('sites', {}).items()}
-        project.antennas = {aid: Antenna.from_dict(adata) 
-                           for aid, adata in data.get('antennas', {}).items()}
+        # Antenas en bloque: dicts -> columnas, sin from_dict/setattr por antena
+        antenna_records = [dict(adata, id=adata.get('id', aid))
+                           for aid, adata in data.get('antennas', {}).items()]
+        project.antennas = AntennaCollection(table=AntennaTable.from_dicts(antenna_records))
         
         # Guardar filepath y marcar como guardado
         project._filepath = filepath
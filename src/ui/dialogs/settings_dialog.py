@@ -67,6 +67,15 @@ class SettingsDialog(QDialog):
         self.use_gpu_check.setEnabled(self.compute_engine.gpu_detector.cupy_available)
         gpu_layout.addRow("Usar GPU:", self.use_gpu_check)
 
+        # Kernels JIT (Numba) para el modo CPU
+        self.use_jit_check = QCheckBox()
+        self.use_jit_check.setEnabled(self.compute_engine.jit_available)
+        self.use_jit_check.setToolTip(
+            "Kernels compilados para perfiles de terreno (TCA, LOS, difracción, h_eff). "
+            "Solo se aplican en modo CPU."
+        )
+        gpu_layout.addRow("Kernels JIT (Numba):", self.use_jit_check)
+
         # GPU Info
         gpu_info = self.compute_engine.gpu_detector.get_device_info_string()
         gpu_info_label = QLabel(gpu_info)
@@ -148,6 +157,7 @@ class SettingsDialog(QDialog):
         
         # Compute
         self.use_gpu_check.setChecked(compute_settings.get('use_gpu', True))
+        self.use_jit_check.setChecked(compute_settings.get('use_jit', False))
 
         # UI
         theme = ui_settings.get('theme', 'dark')
@@ -166,6 +176,7 @@ class SettingsDialog(QDialog):
         """Retorna la configuración actualizada"""
         # Actualizar settings
         self.config.settings['compute']['use_gpu'] = self.use_gpu_check.isChecked()
+        self.config.settings['compute']['use_jit'] = self.use_jit_check.isChecked()
 
         self.config.settings['ui']['theme'] = self.theme_combo.currentText()
         self.config.settings['application']['language'] = self.language_combo.currentText()
@@ -188,4 +199,10 @@ class SettingsDialog(QDialog):
                 mode = "GPU" if new_use_gpu else "CPU"
                 self.logger.info(f"Compute mode changed to {mode}")
 
+        new_use_jit = self.use_jit_check.isChecked()
+        if self.compute_engine.use_jit != new_use_jit:
+            if not self.compute_engine.switch_jit_mode(new_use_jit):
+                QMessageBox.warning(self, "Advertencia",
+                                   "Numba no está disponible. Continuando con kernels NumPy.")
+
         super().accept()
\ No newline at end of file
@@ -196,6 +196,7 @@ class SimulationDialog(QDialog):
         self.itu_p1546_environment_combo.addItem("Urbano (Urban)", "Urban")
         self.itu_p1546_environment_combo.addItem("Suburbano (Suburban)", "Suburban")
         self.itu_p1546_environment_combo.addItem("Rural (Open Area)", "Rural")
+        self.itu_p1546_environment_combo.addItem("Automático (morfología del DEM)", "Auto")
         self.itu_p1546_environment_combo.setCurrentIndex(0)
         itu_p1546_layout.addRow("Ambiente:", self.itu_p1546_environment_combo)
 
@@ -294,6 +295,92 @@ class SimulationDialog(QDialog):
         self.frequency_spin.setToolTip("Override de frecuencia para la simulación. 0 = usar frecuencia de la antena configurada")
         params_layout.addRow("Frecuencia Override:", self.frequency_spin)
 
+        # Modo progresivo: vistas previas gruesas antes del grid completo
+        self.progressive_checkbox = QCheckBox("Vista previa progresiva (1/8 → 1/4 → 1/2)")
+        self.progressive_checkbox.setChecked(False)
+        self.progressive_checkbox.setToolTip(
+            "Muestra en el mapa versiones de baja resolución mientras se calcula el grid completo"
+        )
+        params_layout.addRow("", self.progressive_checkbox)
+
+        # Grid adaptativo: refinamiento quadtree (solo modelos puntuales)
+        self.adaptive_checkbox = QCheckBox("Grid adaptativo (refinar bordes y umbrales)")
+        self.adaptive_checkbox.setChecked(False)
+        self.adaptive_checkbox.setToolTip(
+            "Evalúa el modelo solo donde el RSRP varía más de la tolerancia, cambia el "
+            "best server o cruza umbrales de cobertura; el resto se interpola"
+        )
+        params_layout.addRow("", self.adaptive_checkbox)
+
+        self.adaptive_tolerance_spin = QDoubleSpinBox()
+        self.adaptive_tolerance_spin.setRange(0.5, 20.0)
+        self.adaptive_tolerance_spin.setValue(3.0)
+        self.adaptive_tolerance_spin.setSingleStep(0.5)
+        self.adaptive_tolerance_spin.setSuffix(" dB")
+        params_layout.addRow("Tolerancia adaptativa:", self.adaptive_tolerance_spin)
+
+        # Solo agregado: motor por lotes sin capas por antena (modelos sin DEM)
+        self.aggregate_only_checkbox = QCheckBox("Solo cobertura agregada (cálculo por lotes)")
+        self.aggregate_only_checkbox.setChecked(False)
+        self.aggregate_only_checkbox.setToolTip(
+            "Para Free Space, Okumura-Hata sin DEM y 3GPP sin DEM: evalúa todas las antenas "
+            "por bloques y calcula solo best server / RSRP máximo (sin capas individuales ni SINR)"
+        )
+        params_layout.addRow("", self.aggregate_only_checkbox)
+
+        # Recorte por huella: evaluar cada antena solo donde puede superar el piso
+        self.footprint_checkbox = QCheckBox("Recortar por huella (link budget)")
+        self.footprint_checkbox.setChecked(False)
+        self.footprint_checkbox.setToolTip(
+            "Evalúa cada antena solo en la ventana donde su RSRP optimista (FSPL con "
+            "ganancia máxima) puede superar el piso; fuera queda sin señal. "
+            "Solo modelos puntuales (Free Space, ITU-R P.1546, 3GPP sin DEM)"
+        )
+        params_layout.addRow("", self.footprint_checkbox)
+
+        self.footprint_floor_spin = QDoubleSpinBox()
+        self.footprint_floor_spin.setRange(-160.0, -80.0)
+        self.footprint_floor_spin.setValue(-130.0)
+        self.footprint_floor_spin.setSingleStep(5.0)
+        self.footprint_floor_spin.setSuffix(" dBm")
+        params_layout.addRow("Piso de huella:", self.footprint_floor_spin)
+
+        # Perfiles DEM adaptativos: muestras según la longitud de cada trayecto
+        self.adaptive_profiles_checkbox = QCheckBox("Perfiles DEM adaptativos (ITU-R P.1546)")
+        self.adaptive_profiles_checkbox.setChecked(False)
+        self.adaptive_profiles_checkbox.setToolTip(
+            "Muestrea cada perfil TX → receptor al paso del píxel del DEM (máx. 128 "
+            "muestras) en lugar de 50 muestras fijas estiradas a 15 km"
+        )
+        params_layout.addRow("", self.adaptive_profiles_checkbox)
+
+        # Altura efectiva por acimut: z_ref por sector en lugar de por receptor
+        self.azimuth_heff_checkbox = QCheckBox("Altura efectiva por acimut (Okumura/COST-231 Hata)")
+        self.azimuth_heff_checkbox.setChecked(False)
+        self.azimuth_heff_checkbox.setToolTip(
+            "Calcula z_ref (terreno medio a 3-15 km) en 360 radiales por antena y lo "
+            "asigna a cada receptor según su rumbo, sin perfiles por píxel"
+        )
+        params_layout.addRow("", self.azimuth_heff_checkbox)
+
+        # Probabilidad de cobertura: sombra lognormal sobre la corrida mediana
+        self.coverage_probability_checkbox = QCheckBox("Probabilidad de cobertura (sombra lognormal)")
+        self.coverage_probability_checkbox.setChecked(False)
+        self.coverage_probability_checkbox.setToolTip(
+            "Calcula P(RSRP > -110/-100/-90 dBm) del mejor servidor con la σ de "
+            "sombra del modelo y ambiente, y las áreas con confiabilidad 90/95 %"
+        )
+        params_layout.addRow("", self.coverage_probability_checkbox)
+
+        # Interferencia co-canal: pasada extra sobre todas las capas individuales
+        self.interference_checkbox = QCheckBox("Interferencia co-canal (SINR / RSSI)")
+        self.interference_checkbox.setChecked(False)
+        self.interference_checkbox.setToolTip(
+            "Suma la potencia de las celdas de la misma portadora y calcula SINR y "
+            "RSSI de la celda servidora (despliegues con varias antenas)"
+        )
+        params_layout.addRow("", self.interference_checkbox)
+
         params_group.setLayout(params_layout)
         layout.addWidget(params_group)
 
@@ -402,7 +489,17 @@ class SimulationDialog(QDialog):
             'model': self.model_combo.currentData(),
             'radius_km': self.radius_spin.value(),
             'resolution': self.resolution_spin.value(),
-            'frequency_override_mhz': self.frequency_spin.value() if self.frequency_spin.value() > 0 else None
+            'frequency_override_mhz': self.frequency_spin.value() if self.frequency_spin.value() > 0 else None,
+            'progressive': self.progressive_checkbox.isChecked(),
+            'adaptive_grid': self.adaptive_checkbox.isChecked(),
+            'adaptive_tolerance_db': self.adaptive_tolerance_spin.value(),
+            'aggregate_only': self.aggregate_only_checkbox.isChecked(),
+            'footprint_culling': self.footprint_checkbox.isChecked(),
+            'footprint_floor_dbm': self.footprint_floor_spin.value(),
+            'adaptive_profiles': self.adaptive_profiles_checkbox.isChecked(),
+            'azimuth_effective_height': self.azimuth_heff_checkbox.isChecked(),
+            'coverage_probability': self.coverage_probability_checkbox.isChecked(),
+            'compute_interference': self.interference_checkbox.isChecked()
         }
 
         # Agregar parámetros de Okumura-Hata si está seleccionado
@@ -4,6 +4,7 @@ from PyQt6.QtWidgets import (QMainWindow, QWidget, QHBoxLayout, QVBoxLayout,
 from PyQt6.QtCore import Qt, QTimer, pyqtSlot
 from PyQt6.QtGui import QAction, QIcon, QActionGroup
 from datetime import datetime
+import copy
 import json
 from src.ui.widgets.map_widget import MapMode, MapWidget
 from src.core.compute_engine import ComputeEngine
@@ -11,6 +12,7 @@ from src.core.antenna_manager import AntennaManager
 from src.core.site_manager import SiteManager
 from src.core.project_manager import ProjectManager
 from src.core.coverage_calculator import CoverageCalculator
+from src.core.coverage_statistics import CoverageStatistics
 import logging
 
 class MainWindow(QMainWindow):
@@ -46,10 +48,14 @@ class MainWindow(QMainWindow):
         """Inicializa los managers del sistema"""
         # Compute engine
         use_gpu = self.config.settings['compute'].get('use_gpu', True)
-        self.compute_engine = ComputeEngine(use_gpu=use_gpu)
+        use_jit = self.config.settings['compute'].get('use_jit', False)
+        self.compute_engine = ComputeEngine(use_gpu=use_gpu, use_jit=use_jit, gpu_detector=self.gpu)
 
         # Connect GPU/CPU mode change signal
         self.compute_engine.gpu_mode_changed.connect(self._on_compute_mode_changed)
+        self.compute_engine.jit_mode_changed.connect(
+            lambda _: self._on_compute_mode_changed(self.compute_engine.use_gpu)
+        )
 
         # Managers
         self.antenna_manager = AntennaManager()
@@ -131,6 +137,14 @@ class MainWindow(QMainWindow):
         export_csv_action.triggered.connect(lambda: self.export_results('csv'))
         export_menu.addAction(export_csv_action)
 
+        export_geojson_action = QAction("GeoJSON (contornos)", self)
+        export_geojson_action.triggered.connect(lambda: self.export_results('geojson'))
+        export_menu.addAction(export_geojson_action)
+
+        export_kml_contours_action = QAction("KML (contornos)", self)
+        export_kml_contours_action.triggered.connect(lambda: self.export_results('kml_contours'))
+        export_menu.addAction(export_kml_contours_action)
+
         file_menu.addSeparator()
         
         exit_action = QAction("&Salir", self)
@@ -165,6 +179,16 @@ class MainWindow(QMainWindow):
         properties_action.triggered.connect(self.show_antenna_properties)
         antenna_menu.addAction(properties_action)
         
+        antenna_menu.addSeparator()
+        
+        import_antennas_action = QAction("&Importar Antenas (CSV)...", self)
+        import_antennas_action.triggered.connect(self.import_antennas_csv)
+        antenna_menu.addAction(import_antennas_action)
+        
+        export_antennas_action = QAction("E&xportar Antenas (CSV)...", self)
+        export_antennas_action.triggered.connect(self.export_antennas_csv)
+        antenna_menu.addAction(export_antennas_action)
+        
         # Menú Simulation
         simulation_menu = menubar.addMenu("&Simulación")
         
@@ -188,6 +212,14 @@ class MainWindow(QMainWindow):
         view_menu = menubar.addMenu("&Vista")
         view_menu.addAction(self.project_dock.toggleViewAction())
         
+        view_menu.addSeparator()
+        
+        self.best_server_action = QAction("Áreas de &Best Server", self)
+        self.best_server_action.setCheckable(True)
+        self.best_server_action.setEnabled(False)
+        self.best_server_action.toggled.connect(self.toggle_best_server_layer)
+        view_menu.addAction(self.best_server_action)
+        
         # Menú Help
         help_menu = menubar.addMenu("A&yuda")
         
@@ -288,8 +320,7 @@ class MainWindow(QMainWindow):
         status_bar.addWidget(self.status_label)
 
         # Info del sistema (GPU/CPU mode - actualizable)
-        compute_mode = "GPU" if self.compute_engine.use_gpu else "CPU"
-        self.compute_mode_label = QLabel(f"Aceleración: {compute_mode}")
+        self.compute_mode_label = QLabel(f"Aceleración: {self._compute_mode_text()}")
         status_bar.addPermanentWidget(self.compute_mode_label)
 
         # Coordenadas del cursor
@@ -313,6 +344,7 @@ class MainWindow(QMainWindow):
         self.antenna_manager.antenna_added.connect(self.on_antenna_added)
         self.antenna_manager.antenna_removed.connect(self.on_antenna_removed)
         self.antenna_manager.antenna_modified.connect(self.on_antenna_modified)
+        self.antenna_manager.antennas_imported.connect(self.on_antennas_imported)
         
         # Señales del project panel
         self.project_panel.antenna_selected.connect(self.select_antenna)
@@ -322,6 +354,7 @@ class MainWindow(QMainWindow):
         self.antenna_manager.antenna_added.connect(self._mark_project_modified)
         self.antenna_manager.antenna_removed.connect(self._mark_project_modified)
         self.antenna_manager.antenna_modified.connect(self._mark_project_modified)
+        self.antenna_manager.antennas_imported.connect(self._mark_project_modified)
     
     def _load_settings(self):
         """Carga configuración inicial"""
@@ -370,11 +403,15 @@ class MainWindow(QMainWindow):
     @pyqtSlot(bool)
     def _on_compute_mode_changed(self, use_gpu: bool):
         """Updates UI when GPU/CPU mode changes"""
-        mode = "GPU" if use_gpu else "CPU"
+        mode = self._compute_mode_text()
         self.compute_mode_label.setText(f"Aceleración: {mode}")
         self.status_label.setText(f"Modo de cómputo cambiado a {mode}")
         self.logger.info(f"Compute mode updated: {mode}")
 
+    def _compute_mode_text(self) -> str:
+        """Texto del backend de cómputo para la barra de estado"""
+        return {'cupy': "GPU", 'numba': "CPU (JIT)"}.get(self.compute_engine.backend, "CPU")
+
     # ===== Slots para manejo de antenas =====
     
     def start_add_antenna_mode(self):
@@ -441,6 +478,17 @@ class MainWindow(QMainWindow):
         """Actualiza UI cuando se agrega una antena"""
         self.project_panel.refresh()
     
+    def on_antennas_imported(self, antenna_ids: list):
+        """Actualiza UI tras una importación en bloque (un solo refresh del panel)"""
+        for antenna_id in antenna_ids:
+            antenna = self.antenna_manager.get_antenna(antenna_id)
+            self.map_widget.add_antenna(
+                antenna.id, antenna.latitude, antenna.longitude,
+                antenna.name, antenna.color
+            )
+        self.project_panel.refresh()
+        self.status_label.setText(f"{len(antenna_ids)} antenas importadas")
+    
     def on_antenna_removed(self, antenna_id: str):
         """Actualiza UI cuando se elimina una antena"""
         self.map_widget.remove_antenna(antenna_id)
@@ -569,6 +617,13 @@ class MainWindow(QMainWindow):
                     self.current_project.zoom_level
                 )
                 
+                # Restaurar resultados persistidos (sin recalcular)
+                if hasattr(self, 'last_simulation_results'):
+                    del self.last_simulation_results
+                self.best_server_action.setEnabled(False)
+                if self._restore_results():
+                    self.logger.info("Stored simulation results restored")
+                
                 # Actualizar UI
                 self.project_panel.refresh()
                 self._update_window_title()
@@ -598,6 +653,7 @@ class MainWindow(QMainWindow):
             
             # Guardar
             self.project_manager.save_project(self.current_project, filepath)
+            self._persist_results()
             
             self._update_window_title()
             self.logger.info(f"Project saved: {filepath}")
@@ -644,6 +700,7 @@ class MainWindow(QMainWindow):
                 
                 # Guardar
                 self.project_manager.save_project(self.current_project, filename)
+                self._persist_results()
                 
                 self._update_window_title()
                 self.logger.info(f"Project saved as: {filename}")
@@ -686,10 +743,12 @@ class MainWindow(QMainWindow):
             
             self.simulation_thread = QThread()
             self.simulation_worker = SimulationWorker(
-                antennas=antennas,
+                # Copias sueltas: el worker no lee la tabla de antenas mientras la UI la edita
+                antennas=[copy.copy(antenna) for antenna in antennas],
                 coverage_calculator=self.coverage_calculator,
                 terrain_data=self.terrain_loader,  # PHASE 4: Pasar terrain_loader en lugar de None
-                config=dialog.get_config()
+                config=dialog.get_config(),
+                result_store=self._get_result_store()
             )
             
             self.simulation_worker.moveToThread(self.simulation_thread)
@@ -698,6 +757,9 @@ class MainWindow(QMainWindow):
             self.simulation_thread.started.connect(self.simulation_worker.run)
             self.simulation_worker.progress.connect(self.update_simulation_progress)
             self.simulation_worker.status_message.connect(self.status_label.setText)
+            self.simulation_worker.preview_ready.connect(self.on_simulation_preview)
+            self.simulation_worker.antenna_finished.connect(self.on_antenna_finished)
+            self.simulation_worker.partial_aggregate.connect(self.on_partial_aggregate)
             self.simulation_worker.finished.connect(self.on_simulation_finished)
             self.simulation_worker.error.connect(self.on_simulation_error)
             
@@ -709,10 +771,41 @@ class MainWindow(QMainWindow):
         """Actualiza barra de progreso de simulación"""
         self.progress_bar.setValue(value)
     
+    @pyqtSlot(dict)
+    def on_simulation_preview(self, preview: dict):
+        """Muestra el overlay de una etapa progresiva (se reemplaza por el final)"""
+        if not self.simulation_running:
+            return
+        self.map_widget.show_coverage('aggregated_coverage', preview)
+        self.status_label.setText(
+            f"Vista previa {preview.get('stage')}/{preview.get('n_stages')} "
+            f"(1/{preview.get('step')} de resolución)..."
+        )
+    
+    @pyqtSlot(dict)
+    def on_antenna_finished(self, handle: dict):
+        """Notificación liviana por antena terminada (sin arrays)"""
+        if not self.simulation_running:
+            return
+        origin = " (reutilizada)" if handle.get('reused') else ""
+        self.status_label.setText(
+            f"Antena {handle.get('index', 0) + 1}/{handle.get('n_antennas')} lista{origin}"
+        )
+    
+    @pyqtSlot(dict)
+    def on_partial_aggregate(self, partial: dict):
+        """Refresca (con throttling) el overlay agregado parcial"""
+        if not self.simulation_running:
+            return
+        self.map_widget.queue_coverage('aggregated_coverage', partial)
+    
     @pyqtSlot(dict)
     def on_simulation_finished(self, results: dict):
         """Callback cuando termina la simulación"""
         self.logger.info("Simulation completed")
+        
+        # Un parcial encolado no debe pisar el overlay final
+        self.map_widget.cancel_pending_coverage()
 
         # NUEVO: Guardar resultados para exportación
         self.last_simulation_results = results
@@ -722,19 +815,68 @@ class MainWindow(QMainWindow):
         self.progress_bar.setVisible(False)
         self.status_label.setText("Simulación completada")
 
+        self._display_results(results)
+
+        self._cleanup_simulation_thread()
+
+        QMessageBox.information(self, "Simulación", "Simulación completada exitosamente")
+    
+    def _display_results(self, results: dict):
+        """Muestra en el mapa los overlays de un conjunto de resultados"""
         # PHASE 7: Mostrar heatmap AGREGADO por defecto (en lugar de individual superpuesto)
         if 'aggregated' in results:
             self.logger.info("Displaying aggregated heatmap")
             self.map_widget.show_coverage('aggregated_coverage', results['aggregated'])
+            has_best_server = bool(results['aggregated'].get('best_server_image_url'))
+            self.best_server_action.setEnabled(has_best_server)
+            if has_best_server and self.best_server_action.isChecked():
+                self.map_widget.show_best_server(results['aggregated'])
         else:
             # Fallback: si no hay agregada (debería siempre existir), mostrar individual
             self.logger.warning("Aggregated coverage not found, displaying individual coverages")
             for antenna_id, coverage in results['individual'].items():
                 self.map_widget.show_coverage(antenna_id, coverage)
-
-        self._cleanup_simulation_thread()
-
-        QMessageBox.information(self, "Simulación", "Simulación completada exitosamente")
+    
+    def _get_result_store(self):
+        """ResultStore del proyecto actual (None si el proyecto no tiene archivo)"""
+        if not self.current_project or not self.current_project.get_filepath():
+            return None
+        from src.core.result_store import ResultStore
+        return ResultStore.for_project(self.current_project.get_filepath())
+    
+    def _persist_results(self):
+        """Guarda los últimos resultados en el almacén del proyecto"""
+        results = getattr(self, 'last_simulation_results', None)
+        store = self._get_result_store()
+        if not results or store is None:
+            return
+        try:
+            store.save_run(results)
+        except OSError as e:
+            self.logger.warning(f"Could not persist simulation results: {e}")
+    
+    def _restore_results(self):
+        """Restaura la última corrida persistida del proyecto (memory-mapped)"""
+        store = self._get_result_store()
+        results = store.load_last_run() if store is not None else None
+        if not results:
+            return False
+        
+        self.last_simulation_results = results
+        self.last_simulation_timestamp = datetime.now()
+        self._display_results(results)
+        return True
+    
+    def toggle_best_server_layer(self, visible: bool):
+        """Muestra u oculta la capa de áreas de best server"""
+        results = getattr(self, 'last_simulation_results', None)
+        if not results or 'aggregated' not in results:
+            return
+        
+        if visible:
+            self.map_widget.show_best_server(results['aggregated'])
+        else:
+            self.map_widget.hide_coverage('best_server')
     
     @pyqtSlot(str)
     def on_simulation_error(self, error_msg: str):
@@ -743,6 +885,7 @@ class MainWindow(QMainWindow):
         self.simulation_running = False
         self.progress_bar.setVisible(False)
         self.status_label.setText("Error en simulación")
+        self.map_widget.cancel_pending_coverage()
 
         self._cleanup_simulation_thread()
         
@@ -763,6 +906,31 @@ class MainWindow(QMainWindow):
     
     # ===== Otras funciones =====
     
+    def import_antennas_csv(self):
+        """Importa una base de antenas/celdas desde CSV"""
+        filename, _ = QFileDialog.getOpenFileName(
+            self, "Importar Antenas", "data", "CSV Files (*.csv)"
+        )
+        if filename:
+            try:
+                self.antenna_manager.import_csv(filename)
+            except Exception as e:
+                self.logger.error(f"Error importing antennas: {e}")
+                QMessageBox.critical(self, "Error", f"No se pudieron importar las antenas:\n{e}")
+    
+    def export_antennas_csv(self):
+        """Exporta las antenas del proyecto a CSV"""
+        filename, _ = QFileDialog.getSaveFileName(
+            self, "Exportar Antenas", "data/exports/antennas.csv", "CSV Files (*.csv)"
+        )
+        if filename:
+            try:
+                count = self.antenna_manager.export_csv(filename)
+                self.status_label.setText(f"{count} antenas exportadas")
+            except Exception as e:
+                self.logger.error(f"Error exporting antennas: {e}")
+                QMessageBox.critical(self, "Error", f"No se pudieron exportar las antenas:\n{e}")
+    
     def import_terrain(self):
         """Importa archivo de terreno"""
         filename, _ = QFileDialog.getOpenFileName(
@@ -873,6 +1041,23 @@ class MainWindow(QMainWindow):
                     self.logger.info(f"Export complete: {filename}")
                     QMessageBox.information(self, "Exportación completada", f"Archivo: {filename}")
 
+            elif format_type in ('geojson', 'kml_contours'):
+                # Contornos vectoriales: bandas de RSRP y regiones de best server
+                if format_type == 'geojson':
+                    title, extension, file_filter = "Exportar contornos como GeoJSON", 'geojson', "GeoJSON Files (*.geojson)"
+                    export = exporter.export_geojson
+                else:
+                    title, extension, file_filter = "Exportar contornos como KML", 'kml', "KML Files (*.kml)"
+                    export = exporter.export_kml_contours
+                filename, _ = QFileDialog.getSaveFileName(
+                    self, title, f"data/exports/{base_name}_contornos.{extension}", file_filter
+                )
+                if filename:
+                    export(results, filename)
+                    self.status_label.setText(f"Contornos exportados a {extension.upper()}")
+                    self.logger.info(f"Export complete: {filename}")
+                    QMessageBox.information(self, "Exportación completada", f"Archivo: {filename}")
+
         except Exception as e:
             self.logger.error(f"Export error: {e}", exc_info=True)
             QMessageBox.critical(self, "Error", f"Error al exportar:\n{e}")
@@ -917,25 +1102,62 @@ class MainWindow(QMainWindow):
         metadata = results.get('metadata', {})
         aggregated = results.get('aggregated', {})
 
-        rsrp = aggregated.get('rsrp')
-        if rsrp is not None:
-            rsrp_min = float(rsrp.min())
-            rsrp_max = float(rsrp.max())
-            rsrp_mean = float(rsrp.mean())
-        else:
-            rsrp_min = rsrp_max = rsrp_mean = float('nan')
+        # Estadísticas de la corrida (o calculadas ahora para corridas restauradas sin ellas)
+        stats = aggregated.get('statistics')
+        if stats is None and aggregated.get('rsrp') is not None:
+            server_ids = aggregated.get('best_server_ids')
+            stats = CoverageStatistics.of_layer(
+                aggregated['rsrp'], aggregated.get('lats'), aggregated.get('lons'),
+                best_server=aggregated.get('best_server') if server_ids else None,
+                n_servers=len(server_ids or [])
+            ).summary(server_ids=server_ids)
 
         analysis_text = (
             f"Antenas simuladas: {metadata.get('num_antennas', len(results.get('individual', {})))}\n"
             f"Modelo: {metadata.get('model_used', 'unknown')}\n"
             f"GPU usada: {'Sí' if metadata.get('gpu_used', False) else 'No'}\n"
-            f"Tiempo total: {metadata.get('total_execution_time_seconds', 'N/A')} s\n"
-            f"\n"
-            f"RSRP agregado mínimo: {rsrp_min:.2f} dBm\n"
-            f"RSRP agregado máximo: {rsrp_max:.2f} dBm\n"
-            f"RSRP agregado promedio: {rsrp_mean:.2f} dBm"
+            f"Tiempo total: {metadata.get('total_execution_time_seconds', 'N/A')} s"
         )
 
+        if stats is not None and stats.get('valid_pixels'):
+            analysis_text += (
+                f"\n\n"
+                f"Área simulada: {stats['total_area_km2']:.2f} km²\n"
+                f"RSRP agregado mínimo: {stats['min_dbm']:.2f} dBm\n"
+                f"RSRP agregado máximo: {stats['max_dbm']:.2f} dBm\n"
+                f"RSRP agregado promedio: {stats['mean_dbm']:.2f} dBm\n"
+                f"Percentiles (por área): " + ", ".join(
+                    f"P{p:g} {v:.1f}" for p, v in zip(stats['percentiles'], stats['percentile_values_dbm'])
+                ) + " dBm\n"
+                f"\nÁrea con RSRP >= umbral:\n" + "\n".join(
+                    f"  {t:g} dBm: {a:.2f} km² ({100.0 * f:.1f} %)"
+                    for t, a, f in zip(stats['thresholds_dbm'], stats['area_above_km2'], stats['fraction_above'])
+                )
+            )
+            served = stats.get('served_area_km2')
+            if served:
+                names = {}
+                for antenna_id in stats.get('server_ids', []):
+                    antenna = self.antenna_manager.get_antenna(antenna_id)
+                    names[antenna_id] = antenna.name if antenna is not None else antenna_id[:8]
+                ranked = sorted(zip(stats.get('server_ids', []), served), key=lambda item: -item[1])
+                analysis_text += "\n\nÁrea servida (best server):\n" + "\n".join(
+                    f"  {names.get(antenna_id, antenna_id)}: {area:.2f} km²"
+                    for antenna_id, area in ranked[:10]
+                )
+
+        sinr = aggregated.get('sinr')
+        if sinr is not None:
+            import numpy as np
+            finite_sinr = sinr[np.isfinite(sinr)]
+            if finite_sinr.size > 0:
+                analysis_text += (
+                    f"\n\n"
+                    f"Portadoras: {len(aggregated.get('carrier_groups', []))}\n"
+                    f"SINR promedio: {float(finite_sinr.mean()):.2f} dB\n"
+                    f"Área con SINR < 0 dB: {100.0 * float((finite_sinr < 0).mean()):.1f} %"
+                )
+
         QMessageBox.information(self, "Análisis de Cobertura", analysis_text)
     
     def show_about(self):
@@ -1,7 +1,7 @@
 from PyQt6.QtWidgets import QWidget, QVBoxLayout
 from PyQt6.QtWebEngineWidgets import QWebEngineView
 from PyQt6.QtWebChannel import QWebChannel
-from PyQt6.QtCore import pyqtSlot, pyqtSignal, QObject, QUrl
+from PyQt6.QtCore import pyqtSlot, pyqtSignal, QObject, QUrl, QTimer
 from enum import Enum
 import json
 import logging
@@ -67,12 +67,22 @@ class MapWidget(QWidget):
     antenna_moved = pyqtSignal(str, float, float)
     antenna_selected = pyqtSignal(str)
     
+    # Intervalo mínimo (ms) entre refrescos de capas encoladas (resultados parciales)
+    LAYER_REFRESH_INTERVAL_MS = 500
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.logger = logging.getLogger("MapWidget")
         self.current_mode = MapMode.PAN
         self._map_center_cache = {'lat': 0, 'lng': 0, 'zoom': 13}
         
+        # Capas pendientes de refresco: layer_id -> coverage_data (solo la última)
+        self._pending_layers = {}
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(self.LAYER_REFRESH_INTERVAL_MS)
+        self._refresh_timer.timeout.connect(self._flush_pending_layers)
+        
         self._setup_ui()
         self._setup_bridge()
     
@@ -514,6 +524,53 @@ class MapWidget(QWidget):
                     float(coverage_data['rsrp_vmax'])
                 )
 
+    def queue_coverage(self, layer_id: str, coverage_data: dict):
+        """
+        Encola una actualización de capa con refresco limitado en frecuencia
+        
+        Pensado para resultados parciales que llegan más rápido de lo que el
+        mapa puede redibujar: solo se conserva la última versión de cada capa
+        y se envía a Leaflet como máximo una vez por LAYER_REFRESH_INTERVAL_MS.
+        """
+        self._pending_layers[layer_id] = coverage_data
+        if not self._refresh_timer.isActive():
+            self._refresh_timer.start()
+    
+    def cancel_pending_coverage(self):
+        """Descarta actualizaciones encoladas (ej. al llegar el resultado final)"""
+        self._refresh_timer.stop()
+        self._pending_layers.clear()
+    
+    def _flush_pending_layers(self):
+        """Envía al mapa las capas encoladas"""
+        pending, self._pending_layers = self._pending_layers, {}
+        for layer_id, coverage_data in pending.items():
+            self.show_coverage(layer_id, coverage_data)
+    
+    def show_best_server(self, coverage_data: dict, layer_id: str = 'best_server'):
+        """
+        Muestra áreas de best server como overlay categórico
+        
+        Args:
+            coverage_data: dict agregado con 'best_server_image_url' y 'bounds'
+            layer_id: ID de la capa en el mapa
+        """
+        if not self.bridge:
+            return
+        
+        image_url = coverage_data.get('best_server_image_url')
+        if not image_url:
+            self.logger.warning("No best server image available")
+            return
+        
+        bounds = coverage_data['bounds']  # [[lat_min, lon_min], [lat_max, lon_max]]
+        self.bridge.add_coverage_layer.emit(
+            layer_id,
+            image_url,
+            bounds[0][0], bounds[0][1],  # lat_min, lon_min
+            bounds[1][0], bounds[1][1]   # lat_max, lon_max
+        )
+
     def show_coverage1(self, antenna_id: str, coverage_data: np.ndarray):
         """Muestra capa de cobertura para una antena"""
         # Convertir array numpy a formato compatible con Leaflet
@@ -13,6 +13,7 @@ class ConfigManager:
         },
         "compute": {
             "use_gpu": False,
+            "use_jit": False,
         },
         "ui": {
             "theme": "dark",
@@ -28,6 +29,7 @@ class ConfigManager:
             "level": "INFO",
             "max_file_size_mb": 10,
             "backup_count": 5,
+            "diagnostics": False,
         },
     }
 
@@ -0,0 +1,70 @@
+"""
+Diagnósticos de rutas calientes (estadísticas evaluadas de forma perezosa)
+
+Muchos mensajes de log de los modelos y del TerrainLoader incluyen
+estadísticas (min/max/mean, conteos LOS, rangos de campo) que cuestan una
+reducción sobre el array completo y, con CuPy, una sincronización con el
+dispositivo. Escritas como f-strings se evalúan siempre, aunque el nivel
+del logger descarte el mensaje.
+
+Con este módulo el mensaje se pasa como función sin argumentos y solo se
+construye cuando los diagnósticos están activos y el logger acepta el nivel:
+
+    diagnostics.log(self.logger, lambda: f"PL: {diagnostics.summary(pl)}")
+
+Como jit_kernels, el modo es un interruptor global (set_enabled); por
+defecto está desactivado y las llamadas no cuestan más que crear la lambda.
+"""
+
+import logging
+
+# Interruptor global de diagnósticos
+_enabled = False
+
+
+def set_enabled(enabled: bool):
+    """Activa o desactiva la evaluación de estadísticas de diagnóstico"""
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def is_enabled() -> bool:
+    """True si se deben calcular y registrar las estadísticas de diagnóstico"""
+    return _enabled
+
+
+def log(logger: logging.Logger, build_message, level: int = logging.DEBUG):
+    """
+    Registra build_message() solo si los diagnósticos están activos.
+
+    Args:
+        logger: Logger destino
+        build_message: Función sin argumentos que retorna el mensaje
+        level: Nivel de logging (default: DEBUG)
+    """
+    if _enabled and logger.isEnabledFor(level):
+        logger.log(level, build_message())
+
+
+def summary(values, fmt: str = '.1f', unit: str = '') -> str:
+    """'min=…, max=…, mean=…' ignorando NaN (para usar dentro de build_message)"""
+    xp = _array_module(values)
+    return (f"min={float(xp.nanmin(values)):{fmt}}{unit}, "
+            f"max={float(xp.nanmax(values)):{fmt}}{unit}, "
+            f"mean={float(xp.nanmean(values)):{fmt}}{unit}")
+
+
+def value_range(values, fmt: str = '.1f') -> str:
+    """'[min,max]' ignorando NaN"""
+    xp = _array_module(values)
+    return f"[{float(xp.nanmin(values)):{fmt}},{float(xp.nanmax(values)):{fmt}}]"
+
+
+def _array_module(values):
+    """numpy o cupy según el tipo del array"""
+    module = type(values).__module__.split('.')[0]
+    if module == 'cupy':
+        import cupy
+        return cupy
+    import numpy
+    return numpy
@@ -5,13 +5,15 @@ import numpy as np
 from pathlib import Path
 from datetime import datetime
 import logging
-
-from pyproj import CRS as PyprojCRS
+from xml.sax.saxutils import escape
 
 
 class ExportManager:
     """Manager para exportar resultados de simulación en múltiples formatos"""
 
+    # Paleta de bandas de RSRP (de la más débil a la más fuerte)
+    CONTOUR_BAND_COLORS = ('#d7191c', '#fdae61', '#ffffbf', '#a6d96a', '#1a9641')
+
     def __init__(self):
         self.logger = logging.getLogger("ExportManager")
 
@@ -119,6 +121,14 @@ class ExportManager:
                     'model_name': metadata.get('model_used'),
                     'parameters': metadata.get('model_parameters', {})
                 },
+                'coverage_statistics': {
+                    'aggregated': results.get('aggregated', {}).get('statistics'),
+                    'per_antenna': {
+                        antenna_id: coverage.get('statistics')
+                        for antenna_id, coverage in results.get('individual', {}).items()
+                        if coverage.get('statistics') is not None
+                    }
+                },
                 'data_description': {
                     'num_antennas': metadata.get('num_antennas'),
                     'num_grid_points_per_antenna': metadata.get('grid_parameters', {}).get('total_grid_points'),
@@ -162,6 +172,7 @@ class ExportManager:
 
         try:
             # Validar CRS destino para evitar archivos corruptos
+            from pyproj import CRS as PyprojCRS
             PyprojCRS.from_string(target_crs)
 
             # PHASE 7: Usar agregada si existe, si no usar primera antena individual
@@ -276,12 +287,125 @@ class ExportManager:
                 dst.update_tags(export_crs=output_crs, source_crs=source_crs)
 
             self.logger.info(f"GeoTIFF multibanda exportado: {filename}")
+
+            # Best server: GeoTIFF categórico aparte (uint16 + paleta)
+            if coverage.get('best_server') is not None and 'best_server_ids' in coverage:
+                self.export_best_server_geotiff(coverage, filename, target_crs=target_crs)
+
             return filename
 
         except Exception as e:
             self.logger.error(f"Error exporting GeoTIFF: {e}")
             raise
 
+    def export_best_server_geotiff(self, coverage, filename, target_crs='EPSG:4326'):
+        """
+        Exporta el raster de best server como GeoTIFF categórico
+
+        Se escribe junto al GeoTIFF principal como '<nombre>_best_server.tif':
+        una banda uint16 con el índice de la antena servidora, paleta de
+        colores por antena y la tabla índice -> antenna_id en los tags.
+        Los píxeles sin servidor usan NO_SERVER como nodata.
+
+        Args:
+            coverage: Dict de cobertura agregada con 'best_server',
+                      'best_server_ids', 'lats' y 'lons'
+            filename: Ruta del GeoTIFF principal (se deriva el nombre)
+            target_crs: CRS de salida
+
+        Returns:
+            Ruta del archivo creado
+        """
+        import rasterio
+        from rasterio.transform import Affine
+        from rasterio.warp import calculate_default_transform, reproject, Resampling
+        from core.server_ranking import NO_SERVER
+
+        output_path = Path(filename)
+        best_server_file = str(output_path.with_name(f"{output_path.stem}_best_server.tif"))
+
+        try:
+            best_server = np.asarray(coverage['best_server'], dtype=np.uint16)
+            antenna_ids = list(coverage['best_server_ids'])
+            colors = coverage.get('best_server_colors') or []
+
+            lats_2d = coverage['lats']
+            lons_2d = coverage['lons']
+            west, east = float(lons_2d.min()), float(lons_2d.max())
+            south, north = float(lats_2d.min()), float(lats_2d.max())
+            height, width = best_server.shape
+            transform = Affine(
+                (east - west) / width, 0, west,
+                0, -(north - south) / height, north
+            )
+            source_crs = 'EPSG:4326'
+
+            if target_crs != source_crs:
+                dst_transform, dst_width, dst_height = calculate_default_transform(
+                    source_crs, target_crs, width, height, west, south, east, north
+                )
+                band = np.full((dst_height, dst_width), NO_SERVER, dtype=np.uint16)
+                # Categórico: vecino más cercano (nunca interpolar índices)
+                reproject(
+                    source=best_server,
+                    destination=band,
+                    src_transform=transform,
+                    src_crs=source_crs,
+                    src_nodata=NO_SERVER,
+                    dst_transform=dst_transform,
+                    dst_crs=target_crs,
+                    dst_nodata=NO_SERVER,
+                    resampling=Resampling.nearest,
+                )
+                output_transform, output_crs = dst_transform, target_crs
+            else:
+                band = best_server
+                output_transform, output_crs = transform, source_crs
+
+            colormap = {}
+            for i in range(len(antenna_ids)):
+                color = colors[i] if i < len(colors) else '#808080'
+                colormap[i] = self._hex_to_rgba(color)
+            colormap[NO_SERVER] = (0, 0, 0, 0)
+
+            with rasterio.open(
+                best_server_file, 'w',
+                driver='GTiff',
+                height=band.shape[0],
+                width=band.shape[1],
+                count=1,
+                dtype=np.uint16,
+                crs=output_crs,
+                transform=output_transform,
+                nodata=NO_SERVER
+            ) as dst:
+                dst.write(band, 1)
+                dst.write_colormap(1, colormap)
+                dst.update_tags(1, DESCRIPTION='Best server (antenna index)')
+                dst.update_tags(
+                    best_server_ids=json.dumps(antenna_ids),
+                    export_crs=output_crs,
+                    source_crs=source_crs
+                )
+
+            self.logger.info(f"Best server GeoTIFF exportado: {best_server_file}")
+            return best_server_file
+
+        except Exception as e:
+            self.logger.error(f"Error exporting best server GeoTIFF: {e}")
+            raise
+
+    @staticmethod
+    def _hex_to_rgba(color):
+        """Convierte '#RRGGBB' a tupla (r, g, b, 255); gris si no es válido"""
+        value = str(color).lstrip('#')
+        if len(value) != 6:
+            value = '808080'
+        try:
+            return (int(value[0:2], 16), int(value[2:4], 16), int(value[4:6], 16), 255)
+        except ValueError:
+            return (128, 128, 128, 255)
+
     def export_kml(self, results, filename):
         """
         Exporta como KML con heatmap georeferenciado como overlay
@@ -370,3 +494,159 @@ class ExportManager:
         except Exception as e:
             self.logger.error(f"Error exporting KML: {e}")
             raise
+
+    def _contour_regions(self, results, thresholds=None, tolerance_px=1.0):
+        """
+        Polígonos de bandas de RSRP y de best server de la cobertura principal
+
+        Returns:
+            (nombre de la cobertura, ContourExtractor, regiones) con 'layer',
+            'name' y 'fill' en cada región
+        """
+        from core.contour_extractor import ContourExtractor
+        from core.coverage_statistics import CoverageStatistics
+
+        if 'aggregated' in results:
+            coverage = results['aggregated']
+            coverage_name = 'Aggregated Coverage'
+        else:
+            coverage_name = list(results['individual'].keys())[0]
+            coverage = results['individual'][coverage_name]
+
+        edges = sorted(float(t) for t in (thresholds or CoverageStatistics.DEFAULT_THRESHOLDS_DBM))
+        extractor = ContourExtractor(tolerance_px=tolerance_px)
+        palette = self.CONTOUR_BAND_COLORS
+        regions = []
+        for region in extractor.threshold_bands(coverage['rsrp'], coverage['lats'], coverage['lons'], edges):
+            upper = region['max_dbm']
+            position = region['band'] * (len(palette) - 1) // max(len(edges) - 1, 1)
+            region.update({
+                'layer': 'rsrp_band',
+                'name': (f"RSRP >= {region['min_dbm']:g} dBm" if upper is None
+                         else f"RSRP {region['min_dbm']:g} a {upper:g} dBm"),
+                'fill': palette[position],
+            })
+            regions.append(region)
+
+        if coverage.get('best_server') is not None and 'best_server_ids' in coverage:
+            colors = coverage.get('best_server_colors') or []
+            for region in extractor.best_server_regions(coverage['best_server'], coverage['lats'],
+                                                         coverage['lons'], list(coverage['best_server_ids'])):
+                index = region['server_index']
+                region.update({
+                    'layer': 'best_server',
+                    'name': region['server_id'],
+                    'fill': colors[index] if index < len(colors) else '#808080',
+                })
+                regions.append(region)
+
+        return coverage_name, extractor, regions
+
+    def export_geojson(self, results, filename, thresholds=None, tolerance_px=1.0):
+        """
+        Exporta contornos de cobertura como GeoJSON (polígonos con huecos)
+
+        Un MultiPolygon por banda de RSRP y por región de best server, con
+        bordes compartidos idénticos entre regiones vecinas. Ocupa una
+        fracción del CSV por píxel y se carga directo en cualquier SIG.
+
+        Args:
+            results: Dict con results de simulación
+            filename: Ruta completa del archivo GeoJSON
+            thresholds: Umbrales de las bandas (dBm); por defecto los de
+                        CoverageStatistics
+            tolerance_px: Tolerancia de simplificación en píxeles
+        """
+        try:
+            coverage_name, extractor, regions = self._contour_regions(results, thresholds, tolerance_px)
+            collection = extractor.to_geojson(regions)
+            collection['name'] = coverage_name
+
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(collection, f, separators=(',', ':'))
+
+            self.logger.info(f"GeoJSON exportado: {filename} ({len(regions)} regiones)")
+            return filename
+
+        except Exception as e:
+            self.logger.error(f"Error exporting GeoJSON: {e}")
+            raise
+
+    def export_kml_contours(self, results, filename, thresholds=None, tolerance_px=1.0):
+        """
+        Exporta contornos de cobertura como polígonos KML
+
+        A diferencia de export_kml (PNG drapeado) cada banda de RSRP y cada
+        región de best server es un Placemark con MultiGeometry vectorial,
+        en carpetas separadas.
+
+        Args:
+            results: Dict con results de simulación
+            filename: Ruta completa del archivo KML
+            thresholds: Umbrales de las bandas (dBm)
+            tolerance_px: Tolerancia de simplificación en píxeles
+        """
+        try:
+            coverage_name, extractor, regions = self._contour_regions(results, thresholds, tolerance_px)
+
+            def kml_color(color, alpha):
+                r, g, b, _ = self._hex_to_rgba(color)
+                return f"{alpha:02x}{b:02x}{g:02x}{r:02x}"
+
+            def ring_coordinates(ring):
+                return ' '.join(f"{lon},{lat}" for lon, lat in np.round(ring, extractor.precision).tolist())
+
+            styles, folders = [], {'rsrp_band': [], 'best_server': []}
+            for i, region in enumerate(regions):
+                style_id = f"contour_{i}"
+                styles.append(
+                    f'    <Style id="{style_id}">'
+                    f'<LineStyle><color>{kml_color(region["fill"], 0xff)}</color><width>1</width></LineStyle>'
+                    f'<PolyStyle><color>{kml_color(region["fill"], 0x99)}</color></PolyStyle></Style>'
+                )
+                polygons = []
+                for polygon in region['polygons']:
+                    inner = ''.join(
+                        f'<innerBoundaryIs><LinearRing><coordinates>{ring_coordinates(hole)}'
+                        f'</coordinates></LinearRing></innerBoundaryIs>'
+                        for hole in polygon[1:]
+                    )
+                    polygons.append(
+                        f'<Polygon><outerBoundaryIs><LinearRing><coordinates>{ring_coordinates(polygon[0])}'
+                        f'</coordinates></LinearRing></outerBoundaryIs>{inner}</Polygon>'
+                    )
+                area = region.get('area_km2')
+                folders[region['layer']].append(
+                    f'      <Placemark><name>{escape(str(region["name"]))}</name>'
+                    f'<styleUrl>#{style_id}</styleUrl>'
+                    + (f'<ExtendedData><Data name="area_km2"><value>{area:.4f}</value></Data></ExtendedData>'
+                       if area is not None else '')
+                    + f'<MultiGeometry>{"".join(polygons)}</MultiGeometry></Placemark>'
+                )
+
+            folder_names = {'rsrp_band': 'RSRP Bands', 'best_server': 'Best Server'}
+            body = ''.join(
+                f'    <Folder>\n      <name>{folder_names[layer]}</name>\n' + '\n'.join(placemarks) + '\n    </Folder>\n'
+                for layer, placemarks in folders.items() if placemarks
+            )
+            kml_content = (
+                '<?xml version="1.0" encoding="UTF-8"?>\n'
+                '<kml xmlns="http://www.opengis.net/kml/2.2">\n'
+                '  <Document>\n'
+                f'    <name>RF Coverage Contours - {escape(str(coverage_name))}</name>\n'
+                '    <description>Exported from RF Coverage Tool</description>\n'
+                + '\n'.join(styles) + '\n'
+                + body
+                + '  </Document>\n'
+                '</kml>\n'
+            )
+
+            with open(filename, 'w', encoding='utf-8') as f:
+                f.write(kml_content)
+
+            self.logger.info(f"KML de contornos exportado: {filename} ({len(regions)} regiones)")
+            return filename
+
+        except Exception as e:
+            self.logger.error(f"Error exporting KML contours: {e}")
+            raise
@@ -1,13 +1,21 @@
 import logging
+import threading
 
 # Detección automática de CuPy - sin forzar CPU
 _cupy_checked = False
 _cupy_module = None
 _cupy_available = False
+# La detección puede correr en un hilo de fondo: serializar el primer intento
+_cupy_lock = threading.Lock()
 
 
 def _try_import_cupy():
     """Intenta importar cupy de forma segura"""
+    with _cupy_lock:
+        return _try_import_cupy_locked()
+
+
+def _try_import_cupy_locked():
     global _cupy_checked, _cupy_module, _cupy_available
     
     if _cupy_checked:
@@ -31,12 +39,57 @@ def _try_import_cupy():
 
 
 class GPUDetector:
-    def __init__(self):
-        self.has_cuda = False
-        self.cupy_available = False
-        self.device_name = "CPU"
-        self.device_info = {}
-        self._detect()
+    def __init__(self, background: bool = False):
+        """
+        Args:
+            background: Si es True, la detección (import de cupy + acceso al
+                        dispositivo CUDA, lento en arranque en frío) corre en un
+                        hilo de fondo. Los atributos esperan a que termine.
+        """
+        self._has_cuda = False
+        self._cupy_available = False
+        self._device_name = "CPU"
+        self._device_info = {}
+        self._ready = threading.Event()
+
+        if background:
+            threading.Thread(target=self._run_detection, name="GPUDetector", daemon=True).start()
+        else:
+            self._run_detection()
+
+    def _run_detection(self):
+        try:
+            self._detect()
+        finally:
+            self._ready.set()
+
+    def is_ready(self) -> bool:
+        """True si la detección ya terminó (no bloquea)"""
+        return self._ready.is_set()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Espera a que termine la detección; retorna False si vence el timeout"""
+        return self._ready.wait(timeout)
+
+    @property
+    def has_cuda(self) -> bool:
+        self.wait()
+        return self._has_cuda
+
+    @property
+    def cupy_available(self) -> bool:
+        self.wait()
+        return self._cupy_available
+
+    @property
+    def device_name(self) -> str:
+        self.wait()
+        return self._device_name
+
+    @property
+    def device_info(self) -> dict:
+        self.wait()
+        return self._device_info
     
     def _detect(self):
         try:
@@ -44,14 +97,14 @@ class GPUDetector:
             
             if not available:
                 raise ImportError("CuPy not available")
-            self.cupy_available = True
-            self.has_cuda = True
+            self._cupy_available = True
+            self._has_cuda = True
             
             # Obtener información del dispositivo de forma segura
             try:
                 device = cp.cuda.Device()
                 # Método correcto para obtener atributos del dispositivo
-                self.device_info = {
+                self._device_info = {
                     'id': device.id,
                     'compute_capability': device.compute_capability,
                     'pci_bus_id': device.pci_bus_id
@@ -61,19 +114,19 @@ class GPUDetector:
                 try:
                     # En CuPy más reciente
                     props = cp.cuda.runtime.getDeviceProperties(device.id)
-                    self.device_name = props['name'].decode('utf-8')
+                    self._device_name = props['name'].decode('utf-8')
                 except:
                     # Fallback
-                    self.device_name = f"CUDA Device {device.id}"
+                    self._device_name = f"CUDA Device {device.id}"
                     
             except Exception as e:
                 logging.warning(f"Could not get device details: {e}")
-                self.device_name = "CUDA Device (Unknown)"
+                self._device_name = "CUDA Device (Unknown)"
             
-            logging.info(f"GPU detected: {self.device_name}")
-            if self.device_info:
-                logging.info(f"  Device ID: {self.device_info.get('id', 'N/A')}")
-                logging.info(f"  Compute Capability: {self.device_info.get('compute_capability', 'N/A')}")
+            logging.info(f"GPU detected: {self._device_name}")
+            if self._device_info:
+                logging.info(f"  Device ID: {self._device_info.get('id', 'N/A')}")
+                logging.info(f"  Compute Capability: {self._device_info.get('compute_capability', 'N/A')}")
             
         except ImportError:
             logging.warning("CuPy not available. Using NumPy/CPU.")
@@ -3,12 +3,21 @@ import base64
 from io import BytesIO
 import logging
 
-# Configurar matplotlib para usar backend no-interactivo (thread-safe)
-import matplotlib
-matplotlib.use('Agg')  # Debe estar antes de importar pyplot
+# matplotlib (~0.5 s de importación) se carga en el primer render, no al arrancar
+_matplotlib = None
+
+
+def _get_matplotlib():
+    """Importa matplotlib con backend no-interactivo (thread-safe) en el primer uso"""
+    global _matplotlib
+    if _matplotlib is None:
+        import matplotlib
+        matplotlib.use('Agg')  # Debe estar antes de importar pyplot
+        import matplotlib.colors
+        import matplotlib.pyplot
+        _matplotlib = matplotlib
+    return _matplotlib
 
-from matplotlib import pyplot as plt
-from matplotlib.colors import Normalize
 
 class HeatmapGenerator:
     """Genera imágenes de heatmap para cobertura RF"""
@@ -17,7 +26,7 @@ class HeatmapGenerator:
         self.logger = logging.getLogger("HeatmapGenerator")
     
     def generate_heatmap_image(self, rsrp_data, colormap='jet', 
-                              vmin=-120, vmax=-60, alpha=0.6):
+                              vmin=-120, vmax=-60, alpha=0.6, size_inches=10):
         """
         Genera imagen PNG de heatmap
         
@@ -26,13 +35,15 @@ class HeatmapGenerator:
             colormap: Nombre del colormap (jet, viridis, plasma, etc)
             vmin, vmax: Rango de valores para el colormap
             alpha: Transparencia (0-1)
+            size_inches: Tamaño de la figura a 100 dpi (menor = render más rápido)
         
         Returns:
             Imagen PNG como data URL (base64)
         """
         try:
             # Normalizar valores
-            norm = Normalize(vmin=vmin, vmax=vmax)
+            matplotlib = _get_matplotlib()
+            norm = matplotlib.colors.Normalize(vmin=vmin, vmax=vmax)
             cmap = matplotlib.colormaps.get_cmap(colormap)
             
             # Aplicar colormap
@@ -45,28 +56,68 @@ class HeatmapGenerator:
             mask = rsrp_data < -120
             colored[mask, 3] = 0
             
-            # Convertir a imagen
-            fig, ax = plt.subplots(figsize=(10, 10), dpi=100)
-            ax.imshow(colored, origin='lower', interpolation='bilinear')
-            ax.axis('off')
-            plt.subplots_adjust(left=0, right=1, top=1, bottom=0)
+            return self._rgba_to_data_url(colored, interpolation='bilinear',
+                                          size_inches=size_inches)
             
-            # Guardar en memoria
-            buffer = BytesIO()
-            plt.savefig(buffer, format='png', transparent=True, 
-                       bbox_inches='tight', pad_inches=0)
-            plt.close(fig)
+        except Exception as e:
+            self.logger.error(f"Error generating heatmap: {e}")
+            return None
+    
+    def generate_best_server_image(self, best_server, colors, no_server=0xFFFF,
+                                   alpha=0.5):
+        """
+        Genera imagen PNG categórica de áreas de best server
+        
+        Args:
+            best_server: Array 2D uint16 con índice de la mejor antena
+            colors: Lista de colores hex ('#RRGGBB') indexada igual que best_server
+            no_server: Valor de índice sin servidor (transparente)
+            alpha: Transparencia (0-1)
+        
+        Returns:
+            Imagen PNG como data URL (base64)
+        """
+        try:
+            # Paleta: una fila RGBA por antena + fila transparente para no_server
+            to_rgba = _get_matplotlib().colors.to_rgba
+            palette = np.zeros((len(colors) + 1, 4), dtype=np.float32)
+            for i, color in enumerate(colors):
+                try:
+                    palette[i] = to_rgba(color, alpha)
+                except ValueError:
+                    palette[i] = to_rgba('#808080', alpha)
             
-            # Convertir a base64
-            buffer.seek(0)
-            img_base64 = base64.b64encode(buffer.read()).decode()
+            lookup = np.where(best_server == no_server, len(colors),
+                              np.minimum(best_server, len(colors)))
+            colored = palette[lookup]
             
-            return f"data:image/png;base64,{img_base64}"
+            # Categórico: sin interpolación para no mezclar colores entre celdas
+            return self._rgba_to_data_url(colored, interpolation='nearest')
             
         except Exception as e:
-            self.logger.error(f"Error generating heatmap: {e}")
+            self.logger.error(f"Error generating best server image: {e}")
             return None
     
+    def _rgba_to_data_url(self, colored, interpolation='bilinear', size_inches=10):
+        """Renderiza un array RGBA (H, W, 4) a PNG y lo retorna como data URL"""
+        plt = _get_matplotlib().pyplot
+        fig, ax = plt.subplots(figsize=(size_inches, size_inches), dpi=100)
+        ax.imshow(colored, origin='lower', interpolation=interpolation)
+        ax.axis('off')
+        plt.subplots_adjust(left=0, right=1, top=1, bottom=0)
+        
+        # Guardar en memoria
+        buffer = BytesIO()
+        plt.savefig(buffer, format='png', transparent=True, 
+                   bbox_inches='tight', pad_inches=0)
+        plt.close(fig)
+        
+        # Convertir a base64
+        buffer.seek(0)
+        img_base64 = base64.b64encode(buffer.read()).decode()
+        
+        return f"data:image/png;base64,{img_base64}"
+    
     def generate_geojson_heatmap(self, lats, lons, rsrp_data, threshold=-100):
         """
         Genera GeoJSON con polígonos de cobertura
@@ -77,7 +128,10 @@ class HeatmapGenerator:
             threshold: Umbral en dBm para considerar cobertura
         
         Returns:
-            Dict GeoJSON
+            Dict GeoJSON (FeatureCollection con un MultiPolygon, huecos incluidos)
         """
-        # TODO: Implementar contornos de cobertura
-        pass
\ No newline at end of file
+        from core.contour_extractor import ContourExtractor
+
+        extractor = ContourExtractor()
+        regions = extractor.threshold_bands(rsrp_data, lats, lons, [threshold])
+        return extractor.to_geojson(regions)
\ No newline at end of file
@@ -1,35 +1,79 @@
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 from datetime import datetime
 
+# Listener activo: escribe en archivo/consola desde su propio hilo
+_listener = None
+
+
 def setup_logger(log_dir: str = "logs", level=logging.INFO):
+    """
+    Configura el logger raíz.
+
+    Los hilos de cálculo solo encolan los registros (QueueHandler); el
+    formateo y la escritura a disco/consola los hace un QueueListener en
+    segundo plano, de modo que el I/O del log no bloquea las rutas calientes.
+    """
+    global _listener
+
     log_path = Path(log_dir)
     log_path.mkdir(exist_ok=True)
-    
+
     # Archivo con fecha
     log_file = log_path / f"app_{datetime.now().strftime('%Y%m%d')}.log"
-    
+
     # Formato detallado
     formatter = logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
     )
-    
+
     # Handler rotativo (10MB, 5 backups)
     file_handler = RotatingFileHandler(
         log_file, maxBytes=10*1024*1024, backupCount=5, encoding='utf-8'
     )
     file_handler.setFormatter(formatter)
-    
+
     # Handler consola
     console_handler = logging.StreamHandler()
     console_handler.setFormatter(formatter)
-    
+
+    # Reconfiguración: detener el listener anterior (vacía su cola)
+    shutdown_logger()
+
+    log_queue = queue.SimpleQueue()
+    _listener = QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    _listener.start()
+
     # Logger raíz
     root_logger = logging.getLogger()
     root_logger.setLevel(level)
-    root_logger.addHandler(file_handler)
-    root_logger.addHandler(console_handler)
-    
-    return root_logger
\ No newline at end of file
+    root_logger.addHandler(QueueHandler(log_queue))
+
+    return root_logger
+
+
+def shutdown_logger():
+    """Detiene el listener (procesa los registros pendientes) y retira su QueueHandler"""
+    global _listener
+
+    if _listener is None:
+        return
+
+    root_logger = logging.getLogger()
+    for handler in list(root_logger.handlers):
+        if isinstance(handler, QueueHandler) and handler.queue is _listener.queue:
+            root_logger.removeHandler(handler)
+
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+
+atexit.register(shutdown_logger)
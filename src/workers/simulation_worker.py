@@ -1,11 +1,19 @@
 from PyQt6.QtCore import QObject, pyqtSignal
 import numpy as np
 import logging
+import threading
 from typing import List, Dict
 from pathlib import Path
 from models.antenna import Antenna
 from core.models.traditional.free_space import FreeSpacePathLossModel
 from core.terrain_loader import TerrainLoader
+from core.interference_engine import InterferenceEngine
+from core.server_ranking import TopKServerReducer, NO_SERVER
+from core.batch_engine import BatchCoverageEngine
+from core.footprint import FootprintCuller
+from core.coverage_probability import CoverageProbabilityEngine, shadow_fading_sigma
+from core.coverage_statistics import CoverageStatistics
+from core.adaptive_grid import AdaptiveGridEvaluator
 from utils.heatmap_generator import HeatmapGenerator
 
 class SimulationWorker(QObject):
@@ -16,16 +24,46 @@ class SimulationWorker(QObject):
     status_message = pyqtSignal(str)
     finished = pyqtSignal(dict)
     error = pyqtSignal(str)
+    preview_ready = pyqtSignal(dict)  # Overlay agregado de una etapa progresiva
+    antenna_finished = pyqtSignal(dict)  # Handle liviano de la capa recién terminada
+    partial_aggregate = pyqtSignal(dict)  # Overlay del agregado parcial (throttled)
+
+    # Claves de config que no afectan las capas por antena (no invalidan caché):
+    # post-proceso del agregado (interferencia, ranking, probabilidad de
+    # cobertura) y entrega de resultados (progresivo, parciales)
+    LAYER_INDEPENDENT_CONFIG_KEYS = (
+        'compute_interference', 'noise_figure_db', 'interference_load_factor',
+        'server_ranking_k', 'pollution_window_db',
+        'coverage_probability', 'coverage_thresholds_dbm', 'reliability_targets',
+        'shadow_sigma_db', 'shadowing_correlation',
+        'progressive', 'progressive_steps', 'partial_update_interval_s',
+    )
+
+    # Modo progresivo: pasos de submuestreo por defecto (1/8, 1/4, 1/2 del grid)
+    DEFAULT_PROGRESSIVE_STEPS = (8, 4, 2)
+    MIN_PREVIEW_SIDE = 16  # Lado mínimo (px) de una etapa de vista previa
+    PREVIEW_SIZE_INCHES = 4  # Render reducido de los overlays de vista previa
+
+    # Intervalo mínimo (s) entre emisiones del agregado parcial
+    DEFAULT_PARTIAL_UPDATE_INTERVAL_S = 1.0
 
     def __init__(self, antennas: List[Antenna], coverage_calculator,
-                 terrain_data, config: Dict):
+                 terrain_data, config: Dict, result_store=None):
         super().__init__()
         self.antennas = antennas
         self.calculator = coverage_calculator
         self.config = config
+        self.result_store = result_store
         self.should_stop = False
         self.logger = logging.getLogger("SimulationWorker")
 
+        # Capas terminadas de la corrida en curso (los arrays no viajan por señales).
+        # Se escriben en el hilo del worker y se leen desde la UI: siempre con el lock
+        self._layers = {}
+        self._layers_lock = threading.Lock()
+        self._partial_reducer = None
+        self._last_partial_emit = None
+
         # PHASE 4: Cargar TerrainLoader
         self.terrain_loader = None
         if terrain_data is not None and terrain_data.is_loaded():
@@ -70,6 +108,44 @@ class SimulationWorker(QObject):
             # Modelo de propagación - usar el seleccionado en config
             model = self._get_propagation_model()
 
+            # Recorte por huella: cada antena se evalúa solo donde puede superar el piso
+            self.calculator.footprint_culler = None
+            if self.config.get('footprint_culling', False):
+                self.calculator.footprint_culler = FootprintCuller(
+                    floor_dbm=self.config.get('footprint_floor_dbm', FootprintCuller.DEFAULT_FLOOR_DBM),
+                    margin_db=self.config.get('footprint_margin_db', FootprintCuller.DEFAULT_MARGIN_DB)
+                )
+                if not FootprintCuller.is_windowable(model):
+                    self.logger.warning(
+                        f"Footprint culling requires a pointwise model; "
+                        f"'{self.config.get('model')}' will use the full grid"
+                    )
+
+            # Perfiles DEM de longitud variable (muestras según longitud del trayecto)
+            self.calculator.adaptive_profiles = None
+            if self.config.get('adaptive_profiles', False):
+                self.calculator.adaptive_profiles = {
+                    'sample_spacing_m': self.config.get('profile_spacing_m'),
+                    'max_samples': self.config.get('profile_max_samples', 128),
+                }
+                if not getattr(model, 'supports_ragged_profiles', False):
+                    self.logger.warning(
+                        f"Adaptive profiles are only used by ITU-R P.1546; "
+                        f"'{self.config.get('model')}' keeps fixed 50-sample profiles"
+                    )
+
+            # Altura efectiva Hata por sector de acimut (radiales compartidos por rumbo)
+            self.calculator.effective_height = None
+            if self.config.get('azimuth_effective_height', False):
+                self.calculator.effective_height = self.calculator.effective_height_service(
+                    n_azimuths=self.config.get('effective_height_azimuths', 360)
+                )
+                if not getattr(model, 'supports_hb_effective', False):
+                    self.logger.warning(
+                        f"Azimuth effective height is only used by Hata-family models; "
+                        f"'{self.config.get('model')}' keeps per-receptor profiles"
+                    )
+
             # PHASE 7: Crear grid GLOBAL una sola vez
             self.logger.info("Creating global simulation grid...")
             grid_lats, grid_lons, terrain_heights = self._create_simulation_grid()
@@ -80,6 +156,17 @@ class SimulationWorker(QObject):
             self.progress.emit(30)
 
             results = {'individual': {}}
+            with self._layers_lock:
+                self._layers = {}
+            layer_keys = {}  # antenna_id -> clave de capa en el ResultStore
+            reused_layers = 0
+            if self.result_store is not None:
+                grid_id = self.result_store.grid_hash(grid_lats, grid_lons)
+                dem_identity = self.terrain_loader.get_identity() if self.terrain_loader else None
+                layer_config = {
+                    k: v for k, v in self.config.items()
+                    if k not in self.LAYER_INDEPENDENT_CONFIG_KEYS
+                }
             antenna_times = {}  # NUEVO: Rastrear tiempos por antena
             antenna_coverage_times = {}  # NUEVA: Timing de cálculo (sin render)
             antenna_render_times = {}  # NUEVA: Timing de render
@@ -135,8 +222,64 @@ class SimulationWorker(QObject):
             if frequency_override_mhz and frequency_override_mhz > 0:
                 base_model_params['frequency_override_mhz'] = frequency_override_mhz
 
+            # Modo solo-agregado: motor por lotes (antenas × chunk de píxeles)
+            # directo al ranking Top-K, sin capas individuales
+            batched_ranking = None
+            if self._use_batch_engine(model):
+                self.status_message.emit("Calculando cobertura agregada (por lotes)...")
+                batched_ranking = self.calculator.batch_engine().compute(
+                    self.antennas, grid_lats, grid_lons, terrain_heights, model,
+                    base_model_params,
+                    terrain_loader=self.terrain_loader,
+                    k=self.config.get('server_ranking_k', 4),
+                    pollution_window_db=self.config.get('pollution_window_db', 6.0),
+                    track=('path_loss', 'antenna_gain')
+                )
+                if self.calculator.engine.use_gpu:
+                    batched_ranking = {
+                        key: value if key == 'best_server_ids' else self.calculator.xp.asnumpy(value)
+                        for key, value in batched_ranking.items()
+                    }
+                self.progress.emit(80)
+
+            # Modo adaptativo: quadtree sobre el grid, solo para modelos puntuales
+            adaptive_layers, adaptive_stats = {}, None
+            if self.config.get('adaptive_grid', False) and batched_ranking is None:
+                if self._model_is_pointwise():
+                    self.status_message.emit("Calculando cobertura (grid adaptativo)...")
+                    adaptive_layers, adaptive_stats = self._run_adaptive_grid(
+                        model, base_model_params, grid_lats, grid_lons, terrain_heights
+                    )
+                else:
+                    self.logger.warning(
+                        f"Adaptive grid requires a pointwise model; "
+                        f"'{self.config.get('model')}' will use the full grid"
+                    )
+
+            # Modo progresivo: pasadas gruesas con vista previa antes del grid completo
+            coarse_layers = {}
+            if (self.config.get('progressive', False) and not adaptive_layers
+                    and batched_ranking is None):
+                coarse_layers = self._run_progressive_preview(
+                    model, base_model_params, grid_lats, grid_lons, terrain_heights
+                )
+                if self.should_stop:
+                    return
+
+            # Reducción Top-K en streaming: cada capa se incorpora al terminar,
+            # lo que alimenta el agregado parcial y evita recorrerlas otra vez
+            self._partial_reducer = None
+            self._last_partial_emit = time.perf_counter()
+            if len(self.antennas) > 1 and batched_ranking is None:
+                self._partial_reducer = TopKServerReducer(
+                    grid_lats.shape,
+                    k=self.config.get('server_ranking_k', 4),
+                    pollution_window_db=self.config.get('pollution_window_db', 6.0),
+                    track=('path_loss', 'antenna_gain')
+                )
+
             # Calcular para cada antena
-            for i, antenna in enumerate(self.antennas):
+            for i, antenna in enumerate(self.antennas if batched_ranking is None else ()):
                 if self.should_stop:
                     return
 
@@ -146,30 +289,38 @@ class SimulationWorker(QObject):
                 self.status_message.emit(f"Calculando antena {i+1}/{len(self.antennas)}...")
 
                 # Copiar parámetros base y agregar parámetros específicos de esta antena
-                model_params = base_model_params.copy()
-
-                # Obtener tx_elevation del terreno para esta antena
-                if self.terrain_loader and self.terrain_loader.is_loaded():
-                    tx_elevation = self.terrain_loader.get_elevation(
-                        antenna.latitude, antenna.longitude
+                model_params = self._antenna_model_params(antenna, base_model_params)
+
+                # Reutilizar capa persistida si la antena, el modelo, el DEM y el grid no cambiaron
+                if self.result_store is not None:
+                    layer_key = self.result_store.layer_key(
+                        antenna,
+                        self.config.get('model', 'free_space'),
+                        {'config': layer_config, 'params': model_params},
+                        dem_identity,
+                        grid_id
                     )
-                    model_params['tx_elevation'] = tx_elevation
-                    self.logger.debug(f"TX elevation for {antenna.name}: {tx_elevation:.1f}m")
-                else:
-                    model_params['tx_elevation'] = 0.0
+                    layer_keys[antenna.id] = layer_key
+                    cached = self.result_store.load_layer(layer_key, grid_lats, grid_lons)
+                    if cached is not None:
+                        cached['antenna'] = self._antenna_info(antenna)
+                        results['individual'][antenna.id] = cached
+                        reused_layers += 1
+                        self._publish_layer(i, antenna.id, cached, reused=True)
+                        antenna_times[antenna.id] = round(time.perf_counter() - antenna_start, 3)
+                        self.logger.debug(f"Antenna {antenna.name} reused from result store")
+                        self.progress.emit(30 + int((i + 1) / len(self.antennas) * 50))
+                        continue
 
                 # PHASE 7: Usar grid GLOBAL en lugar de crear uno centrado en antena
                 coverage_start = time.perf_counter()  # NUEVA: Checkpoint inicio coverage calc
-                coverage_result = self.calculator.calculate_single_antenna_coverage(
-                    antenna=antenna,
-                    grid_lats=grid_lats,
-                    grid_lons=grid_lons,
-                    terrain_heights=terrain_heights,
-                    model=model,
-                    model_params=model_params,
-                    return_details=True,
-                    terrain_loader=self.terrain_loader,
-                )
+                if antenna.id in adaptive_layers:
+                    coverage_result = adaptive_layers[antenna.id]
+                else:
+                    coverage_result = self._compute_layer(
+                        antenna, grid_lats, grid_lons, terrain_heights, model, model_params,
+                        previous=coarse_layers.get(antenna.id)
+                    )
                 coverage_calc_time = time.perf_counter() - coverage_start  # NUEVA: Timing coverage calc
                 antenna_coverage_times[antenna.id] = round(coverage_calc_time, 3)
 
@@ -189,16 +340,9 @@ class SimulationWorker(QObject):
                 render_start = time.perf_counter()  # NUEVA: Checkpoint inicio render
                 heatmap_gen = HeatmapGenerator()
 
-                # Rango dinámico: basado en los datos reales con márgenes fijos de referencia
-                valid_rsrp = rsrp_numpy[np.isfinite(rsrp_numpy)]
-                if len(valid_rsrp) > 0:
-                    _vmin = max(float(np.percentile(valid_rsrp, 5)), -120)
-                    _vmax = min(float(np.percentile(valid_rsrp, 95)), -20)
-                    # Garantizar al menos 20 dB de rango visible
-                    if _vmax - _vmin < 20:
-                        _vmin = _vmax - 20
-                else:
-                    _vmin, _vmax = -120, -60
+                # Estadísticas en una pasada; el rango del colormap sale de su histograma
+                layer_stats = CoverageStatistics.of_layer(rsrp_numpy, grid_lats, grid_lons)
+                _vmin, _vmax = layer_stats.display_range()
 
                 image_url = heatmap_gen.generate_heatmap_image(
                     rsrp_numpy,
@@ -217,16 +361,11 @@ class SimulationWorker(QObject):
                     'rsrp': rsrp_numpy,
                     'path_loss': path_loss_numpy,
                     'antenna_gain': antenna_gain_numpy,
-                    'antenna': {
-                        'id': antenna.id,
-                        'name': antenna.name,
-                        'frequency_mhz': antenna.frequency_mhz,
-                        'tx_power_dbm': antenna.tx_power_dbm,
-                        'tx_height_m': antenna.height_agl,
-                    },
+                    'antenna': self._antenna_info(antenna),
                     'image_url': image_url,
                     'rsrp_vmin': _vmin,
                     'rsrp_vmax': _vmax,
+                    'statistics': layer_stats.summary(),
                     'bounds': [
                         [grid_lats.min(), grid_lons.min()],
                         [grid_lats.max(), grid_lons.max()]
@@ -235,6 +374,14 @@ class SimulationWorker(QObject):
 
                 results['individual'][antenna.id] = coverage
 
+                if self.result_store is not None:
+                    try:
+                        self.result_store.save_layer(layer_keys[antenna.id], coverage)
+                    except OSError as e:
+                        self.logger.warning(f"Could not persist layer for {antenna.name}: {e}")
+
+                self._publish_layer(i, antenna.id, coverage, reused=False)
+
                 # NUEVO: Capturar tiempo de antena
                 antenna_time = time.perf_counter() - antenna_start
                 antenna_times[antenna.id] = round(antenna_time, 3)
@@ -245,31 +392,36 @@ class SimulationWorker(QObject):
 
             # PHASE 7: Calcular heatmap agregado para múltiples antenas
             aggregation_start = time.perf_counter()  # NUEVA: Checkpoint inicio aggregation
+            ranking = None
             if len(self.antennas) > 1:
                 self.status_message.emit("Calculando cobertura agregada...")
                 self.logger.info("Computing aggregated coverage for multi-antenna deployment")
 
-                # Llamar método de agregación que ya existe
-                aggregated_results = self.calculator.calculate_multi_antenna_coverage(
-                    antennas=self.antennas,
-                    grid_lats=grid_lats,
-                    grid_lons=grid_lons,
-                    terrain_heights=terrain_heights,
-                    model=model,
-                    model_params=model_params
-                )
+                if batched_ranking is not None:
+                    ranking = batched_ranking
+                    antenna_ids = ranking['best_server_ids']
+                    best_server_colors = [
+                        self._antenna_info(antenna).get('color', '#808080')
+                        for antenna in self.antennas
+                    ]
+                else:
+                    # El reductor Top-K ya incorporó cada capa al terminar la antena
+                    antenna_ids = list(results['individual'].keys())
+                    ranking = self._partial_reducer.finalize()
+
+                    best_server_colors = [
+                        results['individual'][ant_id]['antenna'].get('color', '#808080')
+                        for ant_id in antenna_ids
+                    ]
 
                 # Generar heatmap agregado con rango dinámico
                 heatmap_gen = HeatmapGenerator()
-                agg_rsrp = aggregated_results['rsrp']
-                agg_valid = agg_rsrp[np.isfinite(agg_rsrp)]
-                if len(agg_valid) > 0:
-                    _agg_vmin = max(float(np.percentile(agg_valid, 5)), -120)
-                    _agg_vmax = min(float(np.percentile(agg_valid, 95)), -20)
-                    if _agg_vmax - _agg_vmin < 20:
-                        _agg_vmin = _agg_vmax - 20
-                else:
-                    _agg_vmin, _agg_vmax = -120, -60
+                agg_rsrp = ranking['best_rsrp']
+                agg_stats = CoverageStatistics.of_layer(
+                    agg_rsrp, grid_lats, grid_lons,
+                    best_server=ranking['best_server'], n_servers=len(antenna_ids)
+                )
+                _agg_vmin, _agg_vmax = agg_stats.display_range()
                 aggregated_image = heatmap_gen.generate_heatmap_image(
                     agg_rsrp,
                     colormap='jet',
@@ -277,6 +429,11 @@ class SimulationWorker(QObject):
                     vmax=_agg_vmax,
                     alpha=0.6
                 )
+                best_server_image = heatmap_gen.generate_best_server_image(
+                    ranking['best_server'],
+                    best_server_colors,
+                    no_server=NO_SERVER
+                )
 
                 results['aggregated'] = {
                     'lats': grid_lats,
@@ -284,48 +441,55 @@ class SimulationWorker(QObject):
                     'image_url': aggregated_image,
                     'rsrp_vmin': _agg_vmin,
                     'rsrp_vmax': _agg_vmax,
+                    'statistics': agg_stats.summary(server_ids=antenna_ids),
                     'bounds': [
                         [grid_lats.min(), grid_lons.min()],
                         [grid_lats.max(), grid_lons.max()]
                     ],
                     'rsrp': agg_rsrp,
-                    'best_server': aggregated_results['best_server']
+                    'best_server': ranking['best_server'],
+                    'best_server_ids': antenna_ids,
+                    'best_server_colors': best_server_colors,
+                    'best_server_image_url': best_server_image,
+                    'path_loss': ranking['path_loss'],
+                    'antenna_gain': ranking['antenna_gain'],
+                    'second_rsrp': ranking['second_rsrp'],
+                    'handover_margin': ranking['handover_margin'],
+                    'server_count': ranking['server_count']
                 }
 
-                # Derivar métricas agregadas a partir de la antena dominante por píxel.
-                antenna_ids = list(results['individual'].keys())
-                if antenna_ids:
-                    rsrp_stack = np.stack([
-                        results['individual'][ant_id]['rsrp'] for ant_id in antenna_ids
-                    ], axis=0)
-                    best_indices = np.argmax(rsrp_stack, axis=0)
-                    expanded_indices = np.expand_dims(best_indices, axis=0)
-
-                    path_loss_stack = np.stack([
-                        results['individual'][ant_id]['path_loss'] for ant_id in antenna_ids
-                    ], axis=0)
-                    antenna_gain_stack = np.stack([
-                        results['individual'][ant_id]['antenna_gain'] for ant_id in antenna_ids
-                    ], axis=0)
-
-                    results['aggregated']['path_loss'] = np.take_along_axis(
-                        path_loss_stack,
-                        expanded_indices,
-                        axis=0
-                    )[0]
-                    results['aggregated']['antenna_gain'] = np.take_along_axis(
-                        antenna_gain_stack,
-                        expanded_indices,
-                        axis=0
-                    )[0]
+                # Interferencia co-canal: SINR/RSSI acumulados en streaming por portadora
+                # (opcional: una pasada extra sobre todas las capas; requiere las capas
+                # individuales, no disponible en modo solo-agregado)
+                if self.config.get('compute_interference', False) and results['individual']:
+                    self.status_message.emit("Calculando interferencia (SINR)...")
+                    interference_engine = InterferenceEngine(
+                        noise_figure_db=self.config.get('noise_figure_db', 7.0),
+                        load_factor=self.config.get('interference_load_factor', 1.0)
+                    )
+                    interference = interference_engine.compute(results['individual'])
+                    results['aggregated']['sinr'] = interference['sinr']
+                    results['aggregated']['rssi'] = interference['rssi']
+                    results['aggregated']['serving_group'] = interference['serving_group']
+                    results['aggregated']['carrier_groups'] = interference['groups']
 
                 self.logger.info("Aggregated coverage generated successfully")
             else:
-                # Para una sola antena, copiar la individual como agregada
+                # Para una sola antena, copiar la individual como agregada (copia
+                # superficial: las capas que se agregan abajo no tocan la individual)
                 antenna_id = self.antennas[0].id
-                results['aggregated'] = results['individual'][antenna_id]
+                results['aggregated'] = dict(results['individual'][antenna_id])
                 self.logger.info("Single antenna deployment: using individual coverage as aggregated")
 
+            # Probabilidad de cobertura con sombra lognormal sobre la corrida mediana
+            if self.config.get('coverage_probability', False):
+                self.status_message.emit("Calculando probabilidad de cobertura...")
+                probability = self._coverage_probability(results['aggregated'], ranking)
+                results['aggregated']['coverage_probability'] = probability['probability']
+                results['aggregated']['coverage_thresholds_dbm'] = probability['thresholds_dbm']
+                results['aggregated']['coverage_area_reliability'] = probability['area_reliability']
+                results['aggregated']['coverage_reliable_fraction'] = probability['reliable_area_fraction']
+
             aggregation_time = time.perf_counter() - aggregation_start  # NUEVA: Timing aggregation
             self.progress.emit(90)
 
@@ -343,6 +507,9 @@ class SimulationWorker(QObject):
                 'antenna_render_times_seconds': antenna_render_times,
                 'multi_antenna_aggregation_time_seconds': round(aggregation_time, 3),
                 'num_antennas': len(self.antennas),
+                'reused_layers': reused_layers,
+                'batched_aggregate': batched_ranking is not None,
+                'adaptive_grid': adaptive_stats,
                 'grid_parameters': {
                     'radius_km': self.config.get('radius_km', 5.0),
                     'resolution': self.config.get('resolution', 100),
@@ -356,6 +523,14 @@ class SimulationWorker(QObject):
                 }
             }
 
+            # Persistir la corrida para restaurarla al reabrir el proyecto
+            if self.result_store is not None:
+                self.status_message.emit("Guardando resultados...")
+                try:
+                    self.result_store.save_run(results, layer_keys)
+                except OSError as e:
+                    self.logger.warning(f"Could not persist simulation results: {e}")
+
             self.progress.emit(100)
             self.logger.info(f"Simulation completed in {total_time:.2f}s")
             self.finished.emit(results)
@@ -369,6 +544,377 @@ class SimulationWorker(QObject):
         self.should_stop = True
         self.logger.info("Simulation stop requested")
     
+    def _antenna_model_params(self, antenna: Antenna, base_model_params: Dict) -> Dict:
+        """Parámetros del modelo para una antena (base + tx_elevation)"""
+        model_params = base_model_params.copy()
+
+        # Obtener tx_elevation del terreno para esta antena
+        if self.terrain_loader and self.terrain_loader.is_loaded():
+            tx_elevation = self.terrain_loader.get_elevation(
+                antenna.latitude, antenna.longitude
+            )
+            model_params['tx_elevation'] = tx_elevation
+            self.logger.debug(f"TX elevation for {antenna.name}: {tx_elevation:.1f}m")
+        else:
+            model_params['tx_elevation'] = 0.0
+
+        return model_params
+
+    def _coverage_probability(self, aggregated: Dict, ranking) -> Dict:
+        """
+        P(RSRP > umbral) del mejor servidor con sombra lognormal.
+
+        Usa los K servidores del reductor Top-K; en modo solo-agregado (motor
+        por lotes, sin reductor expuesto) el mejor y el segundo servidor.
+        """
+        engine = CoverageProbabilityEngine(
+            thresholds_dbm=self.config.get(
+                'coverage_thresholds_dbm', CoverageProbabilityEngine.DEFAULT_THRESHOLDS_DBM),
+            reliability_targets=self.config.get(
+                'reliability_targets', CoverageProbabilityEngine.DEFAULT_TARGETS),
+            correlation=self.config.get('shadowing_correlation', 0.5)
+        )
+
+        frequency_override = self.config.get('frequency_override_mhz')
+        if self.config.get('shadow_sigma_db') is not None:
+            sigma = np.full(len(self.antennas), float(self.config['shadow_sigma_db']))
+        else:
+            sigma = np.array([
+                shadow_fading_sigma(
+                    self.config.get('model', 'free_space'),
+                    environment=self.config.get('environment'),
+                    frequency_mhz=frequency_override or antenna.frequency_mhz,
+                    scenario=self.config.get('scenario')
+                )
+                for antenna in self.antennas
+            ])
+
+        if len(self.antennas) == 1:
+            return engine.compute_from_layer(aggregated['rsrp'], float(sigma[0]))
+
+        shape = aggregated['rsrp'].shape
+        if self._partial_reducer is not None:
+            values = self._partial_reducer.values
+            indices = self._partial_reducer.indices
+        else:
+            values = np.stack([ranking['best_rsrp'].reshape(-1), ranking['second_rsrp'].reshape(-1)])
+            indices = np.stack([ranking['best_index'].reshape(-1), ranking['second_index'].reshape(-1)])
+        return engine.compute(values, indices, sigma, shape=shape)
+
+    @staticmethod
+    def _display_range(rsrp):
+        """Rango (vmin, vmax) del colormap a partir de percentiles 5-95 del RSRP"""
+        return CoverageStatistics.of_layer(rsrp).display_range()
+
+    def _use_batch_engine(self, model) -> bool:
+        """
+        True si la corrida puede resolverse con el motor por lotes.
+
+        Requiere 'aggregate_only' en la config (no se generan capas por
+        antena, ni su caché, ni SINR), varias antenas y un modelo
+        independiente del terreno.
+        """
+        if not self.config.get('aggregate_only', False) or len(self.antennas) < 2:
+            return False
+        if not BatchCoverageEngine.supports(model, self.terrain_loader):
+            self.logger.warning(
+                f"aggregate_only requires a terrain-independent model; "
+                f"'{self.config.get('model')}' will compute per-antenna layers"
+            )
+            return False
+        return True
+
+    def _model_is_pointwise(self) -> bool:
+        """
+        True si el path loss de cada píxel depende solo de ese píxel.
+
+        Solo entonces las muestras de una etapa gruesa pueden reutilizarse en
+        la siguiente. Modelos con estadísticas del grid completo (media global
+        de terreno) o con corrección DEM 2D (3GPP use_dem) se recalculan.
+        """
+        model_name = self.config.get('model', 'free_space')
+        if model_name in ('free_space', 'itu_p1546'):
+            return True
+        if model_name == 'three_gpp_38901':
+            return not self.config.get('use_dem', False)
+        return False
+
+    def _compute_layer(self, antenna, grid_lats, grid_lons, terrain_heights, model,
+                       model_params, previous=None):
+        """
+        Calcula la capa de una antena sobre un grid (rsrp, path_loss, antenna_gain).
+
+        Si 'previous' contiene la capa de la etapa anterior (grid[::2, ::2]) y el
+        modelo es puntual, solo se evalúan los píxeles nuevos y las muestras
+        gruesas se copian. En ese caso los arrays retornados son NumPy.
+        """
+        if previous is None or not self._model_is_pointwise():
+            return self.calculator.calculate_single_antenna_coverage(
+                antenna=antenna,
+                grid_lats=grid_lats,
+                grid_lons=grid_lons,
+                terrain_heights=terrain_heights,
+                model=model,
+                model_params=model_params,
+                return_details=True,
+                terrain_loader=self.terrain_loader,
+            )
+
+        new_points = np.ones(grid_lats.shape, dtype=bool)
+        new_points[::2, ::2] = False
+
+        # Puntos nuevos como columna (N, 1): los modelos puntuales no dependen de la forma
+        partial = self.calculator.calculate_single_antenna_coverage(
+            antenna=antenna,
+            grid_lats=grid_lats[new_points].reshape(-1, 1),
+            grid_lons=grid_lons[new_points].reshape(-1, 1),
+            terrain_heights=np.asarray(terrain_heights)[new_points].reshape(-1, 1),
+            model=model,
+            model_params=model_params,
+            return_details=True,
+            terrain_loader=self.terrain_loader,
+        )
+
+        layer = {}
+        for name in ('rsrp', 'path_loss', 'antenna_gain'):
+            values = partial[name]
+            if self.calculator.engine.use_gpu:
+                values = self.calculator.xp.asnumpy(values)
+            full = np.empty(grid_lats.shape, dtype=np.float64)
+            full[::2, ::2] = previous[name]
+            full[new_points] = np.broadcast_to(values, (int(new_points.sum()), 1)).ravel()
+            layer[name] = full
+        return layer
+
+    def _run_adaptive_grid(self, model, base_model_params, grid_lats, grid_lons,
+                           terrain_heights):
+        """
+        Evalúa todas las antenas con refinamiento quadtree (AdaptiveGridEvaluator).
+
+        Returns:
+            (layers, stats): layers = antenna_id -> {'rsrp', 'path_loss',
+            'antenna_gain'} a resolución completa; stats = conteo de puntos
+        """
+        params_by_antenna = [
+            self._antenna_model_params(antenna, base_model_params)
+            for antenna in self.antennas
+        ]
+        heights = np.asarray(terrain_heights)
+
+        def evaluate(rows, cols):
+            lats = grid_lats[rows, cols].reshape(-1, 1)
+            lons = grid_lons[rows, cols].reshape(-1, 1)
+            h = heights[rows, cols].reshape(-1, 1)
+            stacked = {'rsrp': [], 'path_loss': [], 'antenna_gain': []}
+            for antenna, params in zip(self.antennas, params_by_antenna):
+                partial = self.calculator.calculate_single_antenna_coverage(
+                    antenna=antenna,
+                    grid_lats=lats,
+                    grid_lons=lons,
+                    terrain_heights=h,
+                    model=model,
+                    model_params=params,
+                    return_details=True,
+                    terrain_loader=self.terrain_loader,
+                )
+                for name in stacked:
+                    values = partial[name]
+                    if self.calculator.engine.use_gpu:
+                        values = self.calculator.xp.asnumpy(values)
+                    stacked[name].append(np.broadcast_to(values, lats.shape).ravel())
+            return {name: np.stack(values) for name, values in stacked.items()}
+
+        # Las celdas que contienen antenas se refinan siempre (pico de señal)
+        force_points = []
+        for antenna in self.antennas:
+            d2 = (grid_lats - antenna.latitude) ** 2 + (grid_lons - antenna.longitude) ** 2
+            force_points.append(np.unravel_index(int(np.argmin(d2)), grid_lats.shape))
+
+        import time
+        adaptive_start = time.perf_counter()
+        evaluator = AdaptiveGridEvaluator(
+            grid_lats.shape,
+            base_step=self.config.get('adaptive_base_step', 8),
+            tolerance_db=self.config.get('adaptive_tolerance_db', 3.0),
+            thresholds=self.config.get('adaptive_thresholds', (-110.0, -100.0, -90.0)),
+            force_points=force_points
+        )
+        result = evaluator.run(evaluate)
+
+        layers = {
+            antenna.id: {name: result['layers'][name][idx] for name in result['layers']}
+            for idx, antenna in enumerate(self.antennas)
+        }
+        total = int(grid_lats.size)
+        stats = {
+            'evaluated_points': result['n_evaluated'],
+            'total_points': total,
+            'evaluated_fraction': round(result['n_evaluated'] / max(total, 1), 4),
+            'leaves': result['n_leaves'],
+            'time_seconds': round(time.perf_counter() - adaptive_start, 3),
+        }
+        return layers, stats
+
+    def _run_progressive_preview(self, model, base_model_params, grid_lats, grid_lons,
+                                 terrain_heights) -> Dict:
+        """
+        Pasadas gruesas (grid[::s, ::s]) con emisión de overlay agregado por etapa.
+
+        Cada etapa reutiliza las muestras de la anterior cuando el modelo es
+        puntual. Retorna las capas de la última etapa (paso 2) por antena,
+        listas para reutilizarse en la pasada completa; dict vacío si el grid
+        es demasiado pequeño para etapas útiles.
+        """
+        import time
+
+        steps = sorted(
+            {int(s) for s in self.config.get('progressive_steps', self.DEFAULT_PROGRESSIVE_STEPS)
+             if int(s) > 1 and min(grid_lats.shape) // int(s) >= self.MIN_PREVIEW_SIDE},
+            reverse=True
+        )
+        if not steps:
+            return {}
+
+        params_by_antenna = {
+            antenna.id: self._antenna_model_params(antenna, base_model_params)
+            for antenna in self.antennas
+        }
+        heatmap_gen = HeatmapGenerator()
+        layers = {}
+        previous_step = None
+
+        for stage, step in enumerate(steps):
+            stage_start = time.perf_counter()
+            self.status_message.emit(f"Vista previa {stage + 1}/{len(steps)} (1/{step})...")
+
+            stage_lats = grid_lats[::step, ::step]
+            stage_lons = grid_lons[::step, ::step]
+            stage_heights = np.asarray(terrain_heights)[::step, ::step]
+            # Las muestras del paso anterior solo encajan si step_prev == 2·step
+            reuse = previous_step == 2 * step
+
+            reducer = TopKServerReducer(stage_lats.shape, k=2)
+            stage_layers = {}
+            for idx, antenna in enumerate(self.antennas):
+                if self.should_stop:
+                    return {}
+                layer = self._compute_layer(
+                    antenna, stage_lats, stage_lons, stage_heights, model,
+                    params_by_antenna[antenna.id],
+                    previous=layers.get(antenna.id) if reuse else None
+                )
+                if self.calculator.engine.use_gpu:
+                    layer = {k: self.calculator.xp.asnumpy(v) for k, v in layer.items()}
+                stage_layers[antenna.id] = layer
+                reducer.update(idx, layer['rsrp'])
+
+            layers = stage_layers
+            previous_step = step
+            preview_rsrp = reducer.finalize()['best_rsrp']
+            vmin, vmax = self._display_range(preview_rsrp)
+
+            self.preview_ready.emit({
+                'stage': stage + 1,
+                'n_stages': len(steps),
+                'step': step,
+                'shape': tuple(stage_lats.shape),
+                'image_url': heatmap_gen.generate_heatmap_image(
+                    preview_rsrp, colormap='jet', vmin=vmin, vmax=vmax, alpha=0.6,
+                    size_inches=self.PREVIEW_SIZE_INCHES
+                ),
+                'rsrp_vmin': vmin,
+                'rsrp_vmax': vmax,
+                'bounds': [
+                    [stage_lats.min(), stage_lons.min()],
+                    [stage_lats.max(), stage_lons.max()]
+                ],
+                'elapsed_seconds': round(time.perf_counter() - stage_start, 3),
+            })
+            self.logger.info(
+                f"Progressive stage {stage + 1}/{len(steps)} (1/{step}, {stage_lats.shape}) "
+                f"emitted in {time.perf_counter() - stage_start:.3f}s"
+            )
+
+        # Solo la etapa 1/2 encaja como submuestreo [::2, ::2] del grid completo
+        return layers if previous_step == 2 else {}
+
+    def get_layer(self, antenna_id: str) -> Dict:
+        """
+        Capa completa (arrays incluidos) de una antena ya terminada.
+
+        Los handles de antenna_finished no transportan arrays; quien necesite
+        los datos los pide aquí (seguro desde otro hilo). Retorna None si la
+        antena aún no terminó.
+        """
+        with self._layers_lock:
+            return self._layers.get(antenna_id)
+
+    def _publish_layer(self, index: int, antenna_id: str, coverage: Dict, reused: bool):
+        """
+        Incorpora una capa terminada al agregado y notifica a la UI.
+
+        Emite antenna_finished con un handle sin arrays y, si pasó el
+        intervalo configurado, partial_aggregate con el overlay del mejor
+        RSRP acumulado. La última antena no emite parcial: le sigue finished.
+        """
+        import time
+
+        n_antennas = len(self.antennas)
+        with self._layers_lock:
+            self._layers[antenna_id] = coverage
+        if self._partial_reducer is not None:
+            self._partial_reducer.update(index, coverage['rsrp'], tracked=coverage)
+
+        self.antenna_finished.emit({
+            'antenna_id': antenna_id,
+            'index': index,
+            'n_antennas': n_antennas,
+            'reused': reused,
+            'image_url': coverage.get('image_url'),
+            'rsrp_vmin': coverage.get('rsrp_vmin'),
+            'rsrp_vmax': coverage.get('rsrp_vmax'),
+            'bounds': coverage.get('bounds'),
+        })
+
+        if self._partial_reducer is None or index + 1 >= n_antennas:
+            return
+        interval = self.config.get(
+            'partial_update_interval_s', self.DEFAULT_PARTIAL_UPDATE_INTERVAL_S
+        )
+        now = time.perf_counter()
+        if interval is None or interval < 0 or now - self._last_partial_emit < interval:
+            return
+
+        partial_rsrp = self._partial_reducer.current_best()
+        vmin, vmax = self._display_range(partial_rsrp)
+        self.partial_aggregate.emit({
+            'n_done': index + 1,
+            'n_antennas': n_antennas,
+            'image_url': HeatmapGenerator().generate_heatmap_image(
+                partial_rsrp, colormap='jet', vmin=vmin, vmax=vmax, alpha=0.6,
+                size_inches=self.PREVIEW_SIZE_INCHES
+            ),
+            'rsrp_vmin': vmin,
+            'rsrp_vmax': vmax,
+            'bounds': coverage.get('bounds'),
+        })
+        self._last_partial_emit = time.perf_counter()
+        self.logger.debug(
+            f"Partial aggregate {index + 1}/{n_antennas} emitted in {self._last_partial_emit - now:.3f}s"
+        )
+
+    def _antenna_info(self, antenna: Antenna) -> Dict:
+        """Resumen de la antena adjunto a cada capa de resultados"""
+        return {
+            'id': antenna.id,
+            'name': antenna.name,
+            'frequency_mhz': antenna.frequency_mhz,
+            'bandwidth_mhz': antenna.bandwidth_mhz,
+            'tx_power_dbm': antenna.tx_power_dbm,
+            'tx_height_m': antenna.height_agl,
+            'color': antenna.color,
+        }
+
     def _create_simulation_grid(self):
         """Crea grid de puntos para simulación"""
         # Determinar bounds a partir de la distribución actual de antenas
@@ -545,6 +1091,9 @@ class SimulationWorker(QObject):
             else:
                 three_gpp_config['use_dem'] = False
 
+            if 'dem_max_memory_mb' in self.config:
+                three_gpp_config['dem_max_memory_mb'] = self.config['dem_max_memory_mb']
+
             self.logger.info(f"3GPP TR 38.901 config: {three_gpp_config}")
 
             return ThreGPP38901Model(config=three_gpp_config, numpy_module=self.calculator.xp)
@@ -0,0 +1,101 @@
+"""
+Tests para la corrección DEM por bloques de 3GPP TR 38.901 (use_dem=True)
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import unittest
+import warnings
+
+import numpy as np
+
+from core.models.gpp_3gpp.three_gpp_38901 import ThreGPP38901Model
+from core.coverage_calculator import CoverageCalculator
+
+
+def _dense_knife_edge(d2D, f_ghz, terrain, h_bs, h_ue, tx_elevation, samples, max_db):
+    """Referencia: perfiles (muestras, filas, columnas) completos con TX en argmin(d2D)"""
+    rows, cols = terrain.shape
+    tx_row, tx_col = divmod(int(np.argmin(d2D)), cols)
+    t = np.linspace(0.0, 1.0, samples)
+    sample_rows = np.rint(tx_row + t[:, None, None] * (np.arange(rows)[None, :, None] - tx_row))
+    sample_cols = np.rint(tx_col + t[:, None, None] * (np.arange(cols)[None, None, :] - tx_col))
+    profile = terrain[sample_rows.astype(int), sample_cols.astype(int)]
+    tx_abs = tx_elevation + h_bs
+    clearance = profile - (tx_abs + t[:, None, None] * (terrain[None] + h_ue - tx_abs))
+    clearance[0] = clearance[-1] = -1e9
+    h_obs = clearance.max(axis=0)
+    t_obs = t[clearance.argmax(axis=0)]
+
+    wavelength = 3e8 / (f_ghz * 1e9)
+    d = np.maximum(d2D, 1.0)
+    d1 = np.maximum(t_obs * d, 1.0)
+    d2 = np.maximum((1.0 - t_obs) * d, 1.0)
+    v = h_obs * np.sqrt(2.0 * (d1 + d2) / (wavelength * d1 * d2))
+    loss = np.where(v <= -0.78, 0.0, 6.9 + 20.0 * np.log10(np.sqrt((v - 0.1) ** 2 + 1.0) + v - 0.1))
+    return np.minimum(np.where(h_obs > 0.0, np.maximum(loss, 0.0), 0.0), max_db)
+
+
+class TestChunkedTerrainCorrection(unittest.TestCase):
+    """Bloques con techo de memoria reproducen el cálculo denso"""
+
+    def setUp(self):
+        warnings.simplefilter('ignore', UserWarning)
+        rows, cols = np.indices((60, 80))
+        self.terrain = 2500.0 + 60.0 * np.sin(rows / 5.0) * np.cos(cols / 7.0)
+        self.tx = (25, 33)
+        self.d2D = np.maximum(np.hypot(rows - self.tx[0], cols - self.tx[1]) * 30.0, 10.0)
+
+    def _model(self, **config):
+        return ThreGPP38901Model({'use_dem': True, 'dem_profile_samples': 32, **config})
+
+    def test_matches_dense_reference(self):
+        expected = _dense_knife_edge(self.d2D, 3.5, self.terrain, 25.0, 1.5, 2600.0, 32, 40.0)
+        for memory_mb in (64.0, 0.01):  # un bloque / muchos bloques
+            model = self._model(dem_max_memory_mb=memory_mb)
+            correction = model._apply_terrain_correction(
+                self.d2D, 3.5, self.terrain, 25.0, 1.5, tx_elevation=2600.0
+            )
+            np.testing.assert_allclose(correction, expected)
+            self.assertGreater(np.count_nonzero(correction), 0)
+
+    def test_tx_pixel_from_coordinates(self):
+        model = self._model()
+        by_argmin = model.calculate_path_loss(self.d2D, 3500.0, terrain_heights=self.terrain,
+                                              tx_elevation=2600.0)['path_loss']
+        by_pixel = model.calculate_path_loss(self.d2D, 3500.0, terrain_heights=self.terrain,
+                                             tx_elevation=2600.0, tx_pixel=self.tx)['path_loss']
+        np.testing.assert_array_equal(by_pixel, by_argmin)
+
+    def test_tx_outside_grid(self):
+        # Ventana que no contiene al TX: solo obstruye el terreno dentro del grid
+        model = self._model()
+        flat = np.full((20, 20), 2500.0)
+        correction = model._apply_terrain_correction(
+            np.full((20, 20), 1000.0), 3.5, flat, 25.0, 1.5,
+            tx_elevation=2500.0, tx_pixel=(-40.0, 10.0)
+        )
+        np.testing.assert_array_equal(correction, 0.0)
+
+
+class TestGridPixel(unittest.TestCase):
+    """CoverageCalculator._grid_pixel en grids 'ij' y 'xy'"""
+
+    def test_indexing_orders(self):
+        lats = np.linspace(-2.95, -2.85, 11)
+        lons = np.linspace(-79.05, -78.90, 16)
+        for indexing in ('ij', 'xy'):
+            grid_lats, grid_lons = np.meshgrid(lats, lons, indexing=indexing)
+            row, col = CoverageCalculator._grid_pixel(-2.90, -79.00, grid_lats, grid_lons)
+            r, c = int(round(row)), int(round(col))
+            self.assertAlmostEqual(grid_lats[r, c], -2.90)
+            self.assertAlmostEqual(grid_lons[r, c], -79.00)
+
+        grid_lats, grid_lons = np.meshgrid(lats, lons, indexing='ij')
+        row, col = CoverageCalculator._grid_pixel(-3.05, -79.00, grid_lats, grid_lons)
+        self.assertAlmostEqual(row, -10.0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
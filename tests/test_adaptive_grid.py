@@ -0,0 +1,116 @@
+"""
+Tests para AdaptiveGridEvaluator (refinamiento quadtree del grid)
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import unittest
+import numpy as np
+
+from core.adaptive_grid import AdaptiveGridEvaluator
+from core.compute_engine import ComputeEngine
+from core.coverage_calculator import CoverageCalculator
+from models.antenna import Antenna
+from workers.simulation_worker import SimulationWorker
+
+
+SITES = [(40, 30), (150, 170), (180, 20)]
+
+
+def _synthetic(rows, cols):
+    """RSRP sintético tipo log-distancia para tres sitios (puntual)"""
+    rsrp, gain = [], []
+    for r, c in SITES:
+        d = np.hypot(rows - r, cols - c) * 25.0 + 10.0
+        rsrp.append(-30.0 - 35.0 * np.log10(d))
+        gain.append(np.full(rows.shape, 2.0))
+    return {'rsrp': np.array(rsrp), 'antenna_gain': np.array(gain)}
+
+
+class TestAdaptiveGridEvaluator(unittest.TestCase):
+    """Test suite para AdaptiveGridEvaluator"""
+
+    shape = (200, 210)
+
+    def setUp(self):
+        rr, cc = np.meshgrid(np.arange(self.shape[0]), np.arange(self.shape[1]), indexing='ij')
+        self.dense = _synthetic(rr.ravel(), cc.ravel())['rsrp'].reshape((3,) + self.shape)
+
+    def _run(self, **kwargs):
+        params = dict(base_step=16, tolerance_db=3.0, force_points=SITES)
+        params.update(kwargs)
+        return AdaptiveGridEvaluator(self.shape, **params).run(_synthetic)
+
+    def test_evaluates_fraction_of_grid(self):
+        result = self._run()
+        self.assertLess(result['n_evaluated'], 0.3 * np.prod(self.shape))
+        self.assertEqual(result['layers']['rsrp'].shape, (3,) + self.shape)
+        self.assertFalse(np.isnan(result['layers']['rsrp']).any())
+
+    def test_evaluated_points_are_exact(self):
+        result = self._run()
+        mask = result['evaluated']
+        np.testing.assert_allclose(result['layers']['rsrp'][:, mask], self.dense[:, mask])
+
+    def test_fidelity(self):
+        result = self._run()
+        layers = result['layers']['rsrp']
+        best_dense = self.dense.max(axis=0)
+        best_adaptive = layers.max(axis=0)
+
+        self.assertLess(np.abs(best_dense - best_adaptive).max(), 1.0)
+        np.testing.assert_array_equal(layers.argmax(axis=0), self.dense.argmax(axis=0))
+        for threshold in (-110.0, -100.0, -90.0):
+            np.testing.assert_array_equal(best_adaptive >= threshold, best_dense >= threshold)
+
+    def test_tighter_tolerance_evaluates_more(self):
+        loose = self._run(tolerance_db=6.0)
+        tight = self._run(tolerance_db=0.5)
+        self.assertGreater(tight['n_evaluated'], loose['n_evaluated'])
+
+    def test_extra_layers_are_interpolated(self):
+        result = self._run()
+        np.testing.assert_allclose(result['layers']['antenna_gain'], 2.0)
+
+    def test_uniform_field_only_needs_coarse_lattice(self):
+        def flat(rows, cols):
+            return {'rsrp': np.full((1, rows.size), -80.0)}
+
+        result = AdaptiveGridEvaluator((65, 65), base_step=16, thresholds=()).run(flat)
+        self.assertEqual(result['n_evaluated'], 25)
+        np.testing.assert_allclose(result['layers']['rsrp'], -80.0)
+
+
+class TestWorkerAdaptiveMode(unittest.TestCase):
+    """Integración con SimulationWorker"""
+
+    def test_adaptive_run_matches_full_grid(self):
+        antennas = [
+            Antenna(name='A', latitude=-2.90, longitude=-79.00),
+            Antenna(name='B', latitude=-2.89, longitude=-78.985),
+        ]
+        calculator = CoverageCalculator(ComputeEngine(use_gpu=False))
+
+        outputs = []
+        for adaptive in (False, True):
+            config = {'model': 'free_space', 'radius_km': 2, 'resolution': 120,
+                      'adaptive_grid': adaptive}
+            worker = SimulationWorker(antennas, calculator, None, config)
+            worker.terrain_loader = None
+            out = {}
+            worker.finished.connect(out.update)
+            worker.run()
+            outputs.append(out)
+
+        full, adaptive = outputs
+        stats = adaptive['metadata']['adaptive_grid']
+        self.assertIsNone(full['metadata']['adaptive_grid'])
+        self.assertLess(stats['evaluated_fraction'], 0.5)
+        self.assertLess(
+            np.abs(full['aggregated']['rsrp'] - adaptive['aggregated']['rsrp']).max(), 1.0
+        )
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
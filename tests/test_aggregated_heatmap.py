@@ -176,15 +176,19 @@ class TestAggregatedHeatmap(unittest.TestCase):
         rsrp_1 = aggregated['individual'][self.antenna1.id]
         rsrp_2 = aggregated['individual'][self.antenna2.id]
         best_server = aggregated['best_server']
+        best_server_ids = aggregated['best_server_ids']
+
+        # best_server es un raster uint16 de índices sobre best_server_ids
+        self.assertEqual(best_server.dtype, np.uint16)
 
         # Verify best_server correctly identifies stronger signal
         # At each point, best_server should match the antenna with higher RSRP
         for i in range(best_server.shape[0]):
             for j in range(best_server.shape[1]):
                 if rsrp_1[i, j] > rsrp_2[i, j]:
-                    self.assertEqual(best_server[i, j], self.antenna1.id)
+                    self.assertEqual(best_server_ids[best_server[i, j]], self.antenna1.id)
                 elif rsrp_2[i, j] > rsrp_1[i, j]:
-                    self.assertEqual(best_server[i, j], self.antenna2.id)
+                    self.assertEqual(best_server_ids[best_server[i, j]], self.antenna2.id)
                 # If equal, could be either - don't assert
 
     def test_aggregation_preserves_shape(self):
@@ -0,0 +1,216 @@
+"""
+Tests para AntennaTable (almacenamiento columnar de antenas)
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import copy
+import tempfile
+import unittest
+
+import numpy as np
+
+from models.antenna import Antenna, AntennaType, Technology
+from models.antenna_table import AntennaCollection, AntennaTable
+from models.project import Project
+from core.antenna_manager import AntennaManager
+
+
+def _sample_antennas(n=6):
+    return [
+        Antenna(
+            name=f"Cell {i}", latitude=-2.9 + 0.01 * i, longitude=-79.0 - 0.01 * i,
+            azimuth=120.0 * (i % 3), tx_power_dbm=40.0 + i,
+            technology=Technology.NR_3500 if i % 2 else Technology.LTE_700,
+            antenna_type=AntennaType.SECTORIAL, enabled=(i != 3),
+            site_id=f"site-{i // 3}", notes="a, b" if i == 1 else "",
+        )
+        for i in range(n)
+    ]
+
+
+class TestAntennaTable(unittest.TestCase):
+    """Test suite para AntennaTable"""
+
+    def setUp(self):
+        self.antennas = _sample_antennas()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def assertSameAntennas(self, expected, actual):
+        self.assertEqual([a.to_dict() for a in expected], [a.to_dict() for a in actual])
+
+    def test_columns_and_codes(self):
+        table = AntennaTable.from_antennas(self.antennas)
+        self.assertEqual(len(table), 6)
+        self.assertEqual(table['latitude'].dtype, np.float64)
+        self.assertEqual(table['technology'].dtype, np.int8)
+        np.testing.assert_allclose(table['tx_power_dbm'], 40.0 + np.arange(6))
+        self.assertEqual(list(table['enabled']), [True, True, True, False, True, True])
+        self.assertEqual(table.decoded('technology')[1], Technology.NR_3500)
+        self.assertEqual(table.index_of(self.antennas[4].id), 4)
+
+    def test_roundtrip_dicts(self):
+        table = AntennaTable.from_antennas(self.antennas)
+        self.assertEqual(table.to_dicts(), [a.to_dict() for a in self.antennas])
+        self.assertSameAntennas(self.antennas, AntennaTable.from_dicts(table.to_dicts()).to_antennas())
+
+    def test_roundtrip_csv(self):
+        path = Path(self.tmp.name) / "antennas.csv"
+        AntennaTable.from_antennas(self.antennas).to_csv(path)
+        self.assertSameAntennas(self.antennas, AntennaTable.from_csv(path).to_antennas())
+
+    def test_csv_missing_fields_take_defaults(self):
+        path = Path(self.tmp.name) / "sites.csv"
+        path.write_text("name,latitude,longitude,technology,vendor\n"
+                        "A,-2.9,-79.0,5G NR 3500,X\n"
+                        "B,-2.8,-79.1,,Y\n", encoding='utf-8')
+        table = AntennaTable.from_csv(path)
+        default = Antenna()
+        a, b = table.to_antennas()
+        self.assertEqual(a.technology, Technology.NR_3500)
+        self.assertEqual(b.technology, default.technology)
+        self.assertEqual(a.height_agl, default.height_agl)
+        self.assertEqual(b.frequency_mhz, default.frequency_mhz)
+        self.assertNotEqual(a.id, b.id)
+
+    def test_duplicate_ids_rejected(self):
+        with self.assertRaises(ValueError):
+            AntennaTable.from_antennas(self.antennas + [self.antennas[0]])
+
+    def test_select_update_remove(self):
+        table = AntennaTable.from_antennas(self.antennas)
+        enabled = table.select(table['enabled'])
+        self.assertEqual(len(enabled), 5)
+        self.assertNotIn(self.antennas[3].id, enabled)
+
+        table.update(self.antennas[2].id, azimuth=45.0, technology=Technology.GSM_900)
+        self.assertEqual(table.antenna(2).azimuth, 45.0)
+        self.assertEqual(table.antenna(2).technology, Technology.GSM_900)
+
+        removed = table.remove([self.antennas[0].id, self.antennas[5].id, "missing"])
+        self.assertEqual(removed, 2)
+        self.assertEqual(list(table.ids), [a.id for a in self.antennas[1:5]])
+        self.assertEqual(table.index_of(self.antennas[1].id), 0)
+
+    def test_update_id_keeps_index_consistent(self):
+        table = AntennaTable.from_antennas(self.antennas)
+        with self.assertRaises(ValueError):
+            table.update(self.antennas[0].id, id=self.antennas[1].id)
+        self.assertEqual(table.index_of(self.antennas[1].id), 1)
+
+        table.update(self.antennas[0].id, id="renamed", name="R")
+        self.assertEqual(table.index_of("renamed"), 0)
+        self.assertNotIn(self.antennas[0].id, table)
+        self.assertEqual(table.antenna(0).name, "R")
+
+    def test_collection_views_write_through(self):
+        antennas = AntennaCollection({a.id: a for a in self.antennas})
+        view = antennas[self.antennas[2].id]
+        self.assertIs(antennas[self.antennas[2].id], view)
+        self.assertEqual(view, self.antennas[2])
+
+        view.tx_power_dbm = 50.0
+        view.technology = Technology.LTE_2600
+        row = antennas.table.index_of(view.id)
+        self.assertEqual(antennas.table['tx_power_dbm'][row], 50.0)
+        self.assertIs(antennas.table.decoded('technology')[row], Technology.LTE_2600)
+        self.assertIsInstance(view.tx_power_dbm, float)
+
+        view.id = "renamed"
+        self.assertIs(antennas["renamed"], view)
+        self.assertNotIn(self.antennas[2].id, antennas)
+
+        # Copias sueltas: no escriben en la tabla
+        clone = copy.deepcopy(view)
+        self.assertIs(type(clone), Antenna)
+        clone.tx_power_dbm = 10.0
+        self.assertEqual(view.tx_power_dbm, 50.0)
+
+        # Al quitarla la vista conserva sus últimos valores
+        del antennas["renamed"]
+        self.assertEqual(len(antennas), 5)
+        self.assertEqual((view.id, view.tx_power_dbm), ("renamed", 50.0))
+        view.name = "detached"
+        self.assertNotIn("detached", antennas.table['name'].tolist())
+
+    def test_growth_keeps_rows(self):
+        table = AntennaTable()
+        for antenna in _sample_antennas(40):
+            table.append(antenna)
+        self.assertEqual(len(table), 40)
+        self.assertEqual(table.antenna(39).name, "Cell 39")
+
+    def test_large_csv_import(self):
+        path = Path(self.tmp.name) / "network.csv"
+        antennas = [Antenna(name=f"Cell {i}", latitude=-2.0 - i * 1e-4) for i in range(10000)]
+        AntennaTable.from_antennas(antennas).to_csv(path)
+        table = AntennaTable.from_csv(path)
+        self.assertEqual(len(table), 10000)
+        np.testing.assert_allclose(table['latitude'], [a.latitude for a in antennas])
+
+
+class TestAntennaTableIntegration(unittest.TestCase):
+    """Proyecto y AntennaManager usando AntennaTable"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_project_save_load(self):
+        project = Project(name="SoA")
+        project.antennas = {a.id: a for a in _sample_antennas()}
+        path = str(Path(self.tmp.name) / "p.rfproj")
+        project.save_to_file(path)
+
+        loaded = Project.load_from_file(path)
+        self.assertEqual({k: a.to_dict() for k, a in loaded.antennas.items()},
+                         {k: a.to_dict() for k, a in project.antennas.items()})
+
+    def test_manager_and_project_share_table(self):
+        manager = AntennaManager()
+        for antenna in _sample_antennas():
+            manager.add_antenna(antenna)
+        project = Project(name="SoA")
+        project.antennas = manager.antennas
+        self.assertIs(project.antennas, manager.antennas)
+        self.assertIs(manager.get_table(), manager.antennas.table)
+
+        antenna_id = manager.get_all_antennas()[0].id
+        manager.update_antenna(antenna_id, azimuth=45.0, technology=Technology.NR_3500)
+        row = manager.get_table().index_of(antenna_id)
+        self.assertEqual(manager.get_table()['azimuth'][row], 45.0)
+        self.assertEqual([a.id for a in manager.get_enabled_antennas()],
+                         manager.get_table(enabled_only=True).ids.tolist())
+
+        copy_id = manager.duplicate_antenna(antenna_id)
+        self.assertEqual(manager.get_antenna(copy_id).azimuth, 45.0)
+        self.assertNotEqual(copy_id, antenna_id)
+
+        removed = manager.get_antenna(antenna_id)
+        manager.remove_antenna(antenna_id)
+        self.assertEqual(removed.azimuth, 45.0)  # La UI aún lee la antena eliminada
+        self.assertNotIn(antenna_id, project.antennas)
+
+    def test_manager_csv_import_export(self):
+        path = str(Path(self.tmp.name) / "antennas.csv")
+        AntennaTable.from_antennas(_sample_antennas()).to_csv(path)
+
+        manager = AntennaManager()
+        emitted = []
+        manager.antennas_imported.connect(emitted.append)
+        ids = manager.import_csv(path)
+
+        self.assertEqual(len(ids), 6)
+        self.assertEqual(emitted, [ids])
+        self.assertEqual(len(manager.get_table(enabled_only=True)), 5)
+        with self.assertRaises(ValueError):
+            manager.import_csv(path)
+
+        out = str(Path(self.tmp.name) / "export.csv")
+        self.assertEqual(manager.export_csv(out), 6)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
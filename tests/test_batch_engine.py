@@ -0,0 +1,169 @@
+"""
+Tests para BatchCoverageEngine (antenas × chunk de píxeles → ranking Top-K)
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import unittest
+import warnings
+
+import numpy as np
+
+from core.batch_engine import BatchCoverageEngine
+from core.compute_engine import ComputeEngine
+from core.coverage_calculator import CoverageCalculator
+from core.server_ranking import TopKServerReducer
+from core.models.traditional.free_space import FreeSpacePathLossModel
+from core.models.traditional.okumura_hata import OkumuraHataModel
+from core.models.traditional.cost231 import COST231WalfischIkegamiModel
+from core.models.gpp_3gpp.three_gpp_38901 import ThreGPP38901Model
+from models.antenna import Antenna, AntennaType
+from workers.simulation_worker import SimulationWorker
+
+
+RANKING_KEYS = ('rsrp', 'second_rsrp', 'handover_margin', 'server_count', 'best_server')
+
+
+def _network(n=7, seed=3):
+    """Antenas con frecuencias/alturas mezcladas (varios grupos) y una omni"""
+    rng = np.random.default_rng(seed)
+    return [
+        Antenna(
+            name=f"Cell {i}",
+            latitude=-2.90 + rng.uniform(-0.02, 0.02),
+            longitude=-79.00 + rng.uniform(-0.02, 0.02),
+            azimuth=float(rng.uniform(0, 360)),
+            frequency_mhz=(900.0, 1800.0)[i % 2],
+            height_agl=(30.0, 45.0)[i % 3 == 0],
+            antenna_type=AntennaType.OMNIDIRECTIONAL if i == 2 else AntennaType.SECTORIAL,
+        )
+        for i in range(n)
+    ]
+
+
+class TestBatchCoverageEngine(unittest.TestCase):
+    """El motor por lotes reproduce exactamente el cálculo por antena"""
+
+    def setUp(self):
+        warnings.simplefilter('ignore', UserWarning)
+        self.calculator = CoverageCalculator(ComputeEngine(use_gpu=False))
+        self.antennas = _network()
+        self.grid_lats, self.grid_lons = np.meshgrid(
+            np.linspace(-2.93, -2.87, 45), np.linspace(-79.03, -78.97, 38)
+        )
+        self.terrain = np.zeros_like(self.grid_lats)
+
+    def _assert_matches_per_antenna(self, model, params):
+        expected = self.calculator.calculate_multi_antenna_coverage(
+            self.antennas, self.grid_lats, self.grid_lons, self.terrain, model, params
+        )
+        batched = self.calculator.calculate_multi_antenna_coverage(
+            self.antennas, self.grid_lats, self.grid_lons, self.terrain, model, params,
+            keep_individual=False
+        )
+        self.assertEqual(batched['individual'], {})
+        self.assertEqual(batched['best_server_ids'], expected['best_server_ids'])
+        for key in RANKING_KEYS:
+            np.testing.assert_array_equal(batched[key], expected[key], err_msg=key)
+
+    def test_free_space(self):
+        self._assert_matches_per_antenna(FreeSpacePathLossModel(), {})
+
+    def test_okumura_hata_without_dem(self):
+        self._assert_matches_per_antenna(OkumuraHataModel(), {'environment': 'Suburban'})
+
+    def test_3gpp_without_dem(self):
+        self._assert_matches_per_antenna(ThreGPP38901Model(), {'scenario': 'UMa'})
+
+    def test_small_chunks_match(self):
+        model = FreeSpacePathLossModel()
+        engine = BatchCoverageEngine(self.calculator, pixel_chunk=101, antenna_chunk=2)
+        small = engine.compute(self.antennas, self.grid_lats, self.grid_lons, self.terrain,
+                               model, track=('path_loss', 'antenna_gain'))
+        full = BatchCoverageEngine(self.calculator).compute(
+            self.antennas, self.grid_lats, self.grid_lons, self.terrain, model
+        )
+        np.testing.assert_array_equal(small['best_rsrp'], full['best_rsrp'])
+        np.testing.assert_array_equal(small['best_server'], full['best_server'])
+        np.testing.assert_allclose(
+            small['best_rsrp'],
+            small['antenna_gain'] + np.array([a.tx_power_dbm for a in self.antennas])[small['best_index']]
+            - small['path_loss']
+        )
+
+    def test_supports(self):
+        self.assertTrue(BatchCoverageEngine.supports(FreeSpacePathLossModel()))
+        self.assertTrue(BatchCoverageEngine.supports(ThreGPP38901Model()))
+        self.assertFalse(BatchCoverageEngine.supports(ThreGPP38901Model(config={'use_dem': True})))
+        self.assertFalse(BatchCoverageEngine.supports(
+            OkumuraHataModel(config={'terrain_reference_method': 'tx_local_mean'})
+        ))
+        self.assertFalse(BatchCoverageEngine.supports(COST231WalfischIkegamiModel()))
+
+
+class TestUpdateBlock(unittest.TestCase):
+    """TopKServerReducer.update_block equivale a update() en orden de índice"""
+
+    def test_matches_sequential_with_ties_and_nan(self):
+        rng = np.random.default_rng(0)
+        layers = np.round(rng.uniform(-110, -60, (6, 50)))  # empates frecuentes
+        layers[2, :10] = np.nan
+        layers[4] = layers[1]
+
+        sequential = TopKServerReducer((50,), k=3, track=('path_loss',))
+        for i, layer in enumerate(layers):
+            sequential.update(i, layer, tracked={'path_loss': -layer})
+
+        # Bloques fuera de orden y en dos tramos de píxeles
+        blocked = TopKServerReducer((50,), k=3, track=('path_loss',))
+        for rows in ([3, 5], [0, 1, 4], [2]):
+            for start, stop in ((0, 20), (20, 50)):
+                block = layers[rows, start:stop]
+                blocked.update_block(rows, block, start=start, tracked={'path_loss': -block})
+
+        expected, actual = sequential.finalize(), blocked.finalize()
+        self.assertEqual(blocked.n_layers, 6)
+        for key in expected:
+            if key != 'second_index':
+                np.testing.assert_array_equal(actual[key], expected[key], err_msg=key)
+
+        # update() puede reordenar empates desplazados: comparar el segundo
+        # servidor solo donde su valor es único entre los retenidos
+        values = sequential.values
+        unique = (values[1] != values[0]) & (values[1] != values[2])
+        np.testing.assert_array_equal(
+            actual['second_index'][unique], expected['second_index'][unique]
+        )
+
+
+class TestAggregateOnlyWorker(unittest.TestCase):
+    """SimulationWorker con aggregate_only usa el motor por lotes"""
+
+    def _run(self, **config):
+        calculator = CoverageCalculator(ComputeEngine(use_gpu=False))
+        base = {'model': 'free_space', 'radius_km': 2, 'resolution': 30}
+        base.update(config)
+        worker = SimulationWorker(_network(4), calculator, None, base)
+        worker.terrain_loader = None
+        out = {}
+        worker.finished.connect(out.update)
+        worker.run()
+        return out
+
+    def test_aggregate_only_matches_layers(self):
+        full = self._run()
+        batched = self._run(aggregate_only=True)
+
+        self.assertEqual(batched['individual'], {})
+        self.assertTrue(batched['metadata']['batched_aggregate'])
+        self.assertNotIn('sinr', batched['aggregated'])
+        for key in ('rsrp', 'best_server', 'second_rsrp', 'path_loss', 'antenna_gain'):
+            np.testing.assert_array_equal(
+                batched['aggregated'][key], full['aggregated'][key], err_msg=key
+            )
+        self.assertTrue(batched['aggregated']['best_server_image_url'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,101 @@
+"""
+Tests del raster compacto de best server (uint16 + tabla de IDs)
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import json
+import tempfile
+import unittest
+import numpy as np
+
+from core.server_ranking import NO_SERVER, TopKServerReducer
+from utils.heatmap_generator import HeatmapGenerator
+from utils.export_manager import ExportManager
+
+try:
+    import rasterio
+    RASTERIO_AVAILABLE = True
+except ImportError:
+    RASTERIO_AVAILABLE = False
+
+
+def _aggregated_coverage():
+    """Cobertura agregada sintética con tres antenas y una zona sin señal"""
+    lats_1d = np.linspace(-2.95, -2.85, 12)
+    lons_1d = np.linspace(-79.05, -78.95, 10)
+    lats, lons = np.meshgrid(lats_1d, lons_1d)
+
+    rng = np.random.default_rng(1)
+    layers = [rng.uniform(-110, -70, size=lats.shape) for _ in range(3)]
+    for layer in layers:
+        layer[0, :3] = np.nan
+
+    reducer = TopKServerReducer(lats.shape, k=2)
+    for i, layer in enumerate(layers):
+        reducer.update(i, layer)
+    ranking = reducer.finalize()
+
+    return {
+        'lats': lats,
+        'lons': lons,
+        'rsrp': ranking['best_rsrp'],
+        'best_server': ranking['best_server'],
+        'best_server_ids': ['ant-a', 'ant-b', 'ant-c'],
+        'best_server_colors': ['#FF0000', '#00FF00', 'not-a-color'],
+        'bounds': [[lats.min(), lons.min()], [lats.max(), lons.max()]],
+    }, layers
+
+
+class TestBestServerRaster(unittest.TestCase):
+    """Test suite para el raster de best server"""
+
+    def test_uint16_raster_with_sentinel(self):
+        coverage, layers = _aggregated_coverage()
+        best_server = coverage['best_server']
+
+        self.assertEqual(best_server.dtype, np.uint16)
+        self.assertTrue(np.all(best_server[0, :3] == NO_SERVER))
+
+        valid = best_server != NO_SERVER
+        expected = np.nanargmax(np.stack(layers)[:, valid], axis=0)
+        np.testing.assert_array_equal(best_server[valid], expected)
+
+    def test_best_server_image(self):
+        coverage, _ = _aggregated_coverage()
+        url = HeatmapGenerator().generate_best_server_image(
+            coverage['best_server'], coverage['best_server_colors']
+        )
+        self.assertIsNotNone(url)
+        self.assertTrue(url.startswith('data:image/png;base64,'))
+
+    @unittest.skipUnless(RASTERIO_AVAILABLE, "rasterio not installed")
+    def test_geotiff_export_writes_categorical_sidecar(self):
+        coverage, _ = _aggregated_coverage()
+        results = {'aggregated': coverage, 'individual': {}}
+
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = str(Path(tmp) / 'sim.tif')
+            ExportManager().export_geotiff(results, filename)
+
+            sidecar = Path(tmp) / 'sim_best_server.tif'
+            self.assertTrue(sidecar.exists())
+
+            with rasterio.open(sidecar) as src:
+                self.assertEqual(src.count, 1)
+                self.assertEqual(src.dtypes[0], 'uint16')
+                self.assertEqual(src.nodata, NO_SERVER)
+                band = src.read(1)
+                colormap = src.colormap(1)
+                tags = src.tags()
+
+            np.testing.assert_array_equal(band, coverage['best_server'])
+            self.assertEqual(json.loads(tags['best_server_ids']), coverage['best_server_ids'])
+            self.assertEqual(colormap[0], (255, 0, 0, 255))
+            self.assertEqual(colormap[1], (0, 255, 0, 255))
+            self.assertEqual(colormap[2], (128, 128, 128, 255))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
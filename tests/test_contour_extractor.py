@@ -0,0 +1,155 @@
+"""
+Tests para ContourExtractor (polígonos de bandas de RSRP y best server)
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import json
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from core.contour_extractor import ContourExtractor, band_labels
+from core.server_ranking import NO_SERVER
+from utils.export_manager import ExportManager
+from utils.heatmap_generator import HeatmapGenerator
+
+
+def _signed_area(ring):
+    x, y = np.asarray(ring, dtype=np.float64).T
+    return 0.5 * float(np.sum(x[:-1] * y[1:] - x[1:] * y[:-1]))
+
+
+def _contains(polygon, points):
+    """Paridad de cruces contra todos los anillos del polígono"""
+    inside = np.zeros(len(points), dtype=bool)
+    px, py = points[:, 0:1], points[:, 1:2]
+    for ring in polygon:
+        x0, y0 = ring[:-1, 0][None, :].astype(float), ring[:-1, 1][None, :].astype(float)
+        x1, y1 = ring[1:, 0][None, :].astype(float), ring[1:, 1][None, :].astype(float)
+        straddle = (y0 > py) != (y1 > py)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            crossing = x0 + (py - y0) * (x1 - x0) / (y1 - y0)
+        inside ^= (np.count_nonzero(straddle & (px < crossing), axis=1) % 2) == 1
+    return inside
+
+
+def _field(shape, noise_db=0.7, seed=0):
+    """RSRP sintético: caída con la distancia más una ondulación (islas y huecos)"""
+    rows, cols = np.mgrid[0:shape[0], 0:shape[1]]
+    distance = np.hypot(rows - shape[0] * 0.45, cols - shape[1] * 0.5)
+    noise = np.random.default_rng(seed).normal(0.0, noise_db, shape)
+    return -55.0 - 30.0 * np.log10(1.0 + distance / 4.0) + 6.0 * np.sin(cols / 9.0) * np.cos(rows / 13.0) + noise
+
+
+class TestContourExtractor(unittest.TestCase):
+
+    def test_exact_areas_holes_and_islands(self):
+        labels = np.full((12, 12), -1)
+        labels[1:10, 1:10] = 0
+        labels[3:8, 3:8] = -1  # Hueco de la banda 0...
+        labels[4:6, 4:6] = 1   # ...con una isla de la banda 1 adentro
+
+        polygons = ContourExtractor(tolerance_px=0).polygons(labels)
+        shell, hole = polygons[0][0]
+        self.assertEqual(_signed_area(shell), 81.0)
+        self.assertEqual(_signed_area(hole), -25.0)
+        self.assertEqual([_signed_area(r) for r in polygons[1][0]], [4.0])
+
+        # Píxeles en diagonal (tablero): conectividad 4, un polígono por píxel
+        checkerboard = np.indices((4, 4)).sum(axis=0) % 2
+        polygons = ContourExtractor(tolerance_px=0).polygons(checkerboard)
+        self.assertEqual({k: len(v) for k, v in polygons.items()}, {0: 8, 1: 8})
+
+    def test_simplified_bands_partition_the_grid(self):
+        values = _field((160, 200))
+        labels = band_labels(values, [-200.0, -100.0, -90.0, -80.0, -70.0])  # Cubre todo el grid
+        exact = ContourExtractor(tolerance_px=0).polygons(labels)
+        simplified = ContourExtractor(tolerance_px=1.5).polygons(labels)
+
+        points = np.random.default_rng(1).uniform([3.0, 3.0], [197.0, 157.0], (3000, 2))
+        for polygons in (exact, simplified):
+            hits = np.zeros(len(points), dtype=int)
+            for band_polygons in polygons.values():
+                for polygon in band_polygons:
+                    self.assertGreater(_signed_area(polygon[0]), 0)
+                    self.assertTrue(all(_signed_area(hole) < 0 for hole in polygon[1:]))
+                    hits += _contains(polygon, points)
+            # Sin huecos ni solapes entre bandas vecinas
+            np.testing.assert_array_equal(hits, 1)
+
+        # Sin simplificar el área es exactamente la de los píxeles
+        for band, band_polygons in exact.items():
+            area = sum(_signed_area(ring) for polygon in band_polygons for ring in polygon)
+            self.assertEqual(area, np.count_nonzero(labels == band))
+
+        count = lambda polygons: sum(len(r) for v in polygons.values() for p in v for r in p)
+        self.assertLess(count(simplified), 0.7 * count(exact))
+
+    def test_lonlat_orientation_for_both_grid_layouts(self):
+        lats_1d = np.linspace(-3.0, -2.9, 80)
+        lons_1d = np.linspace(-79.1, -78.95, 120)
+        lats, lons = np.meshgrid(lats_1d, lons_1d, indexing='ij')
+        rsrp = _field(lats.shape)
+
+        generator = HeatmapGenerator()
+        reference = generator.generate_geojson_heatmap(lats, lons, rsrp, threshold=-90)
+        transposed = generator.generate_geojson_heatmap(lats.T, lons.T, rsrp.T, threshold=-90)
+        for collection in (reference, transposed):
+            self.assertEqual(collection['type'], 'FeatureCollection')
+            (feature,) = collection['features']
+            self.assertEqual(feature['properties']['min_dbm'], -90.0)
+            for polygon in feature['geometry']['coordinates']:
+                self.assertEqual(polygon[0][0], polygon[0][-1])
+                self.assertGreater(_signed_area(polygon[0]), 0)  # RFC 7946: exterior antihorario
+                self.assertTrue(all(_signed_area(hole) < 0 for hole in polygon[1:]))
+
+        area = lambda c: sum(_signed_area(r) for p in c['features'][0]['geometry']['coordinates'] for r in p)
+        pixel_deg2 = (lats_1d[1] - lats_1d[0]) * (lons_1d[1] - lons_1d[0])
+        self.assertAlmostEqual(area(reference), area(transposed), delta=1e-3 * area(reference))
+        self.assertAlmostEqual(area(reference) / pixel_deg2, np.count_nonzero(rsrp >= -90), delta=60)
+
+    def test_export_geojson_and_kml_contours(self):
+        lats, lons = np.meshgrid(np.linspace(-3.0, -2.8, 180), np.linspace(-79.1, -78.9, 200), indexing='ij')
+        rsrp = _field(lats.shape, noise_db=0.0)
+        best_server = np.where(lons < -79.0, 0, 1).astype(np.uint16)
+        best_server[np.hypot(lats + 2.9, lons + 79.0) < 0.02] = 2
+        best_server[rsrp < -100] = NO_SERVER
+        coverage = {
+            'lats': lats, 'lons': lons, 'rsrp': rsrp, 'best_server': best_server,
+            'best_server_ids': ['A1', 'A2', 'A3'],
+            'best_server_colors': ['#ff0000', '#00ff00', '#0000ff'],
+        }
+        results = {'individual': {'A1': dict(coverage)}, 'aggregated': coverage, 'metadata': {}}
+
+        exporter = ExportManager()
+        with tempfile.TemporaryDirectory() as folder:
+            geojson_file = Path(folder) / 'contours.geojson'
+            exporter.export_geojson(results, str(geojson_file))
+            collection = json.loads(geojson_file.read_text())
+            layers = [f['properties']['layer'] for f in collection['features']]
+            self.assertEqual(layers.count('best_server'), 3)
+            self.assertGreater(layers.count('rsrp_band'), 2)
+            server = next(f for f in collection['features'] if f['properties'].get('server_id') == 'A3')
+            self.assertEqual(server['properties']['fill'], '#0000ff')
+
+            # Mucho más liviano que el CSV por píxel
+            csv_file = Path(exporter.export_csv(results, str(Path(folder) / 'pixels')))
+            self.assertLess(geojson_file.stat().st_size * 20, csv_file.stat().st_size)
+
+            kml_file = Path(folder) / 'contours.kml'
+            exporter.export_kml_contours(results, str(kml_file))
+            ns = {'k': 'http://www.opengis.net/kml/2.2'}
+            root = ET.parse(kml_file).getroot()
+            folders = root.findall('k:Document/k:Folder', ns)
+            self.assertEqual([f.find('k:name', ns).text for f in folders], ['RSRP Bands', 'Best Server'])
+            self.assertEqual(len(folders[1].findall('k:Placemark', ns)), 3)
+            # El servidor A2 rodea a A3: su polígono lleva un hueco
+            self.assertTrue(root.findall('.//k:innerBoundaryIs', ns))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,75 @@
+"""
+Tests para CoverageProbabilityEngine (probabilidad de cobertura con sombra lognormal)
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import math
+import unittest
+
+import numpy as np
+from scipy.special import ndtr
+
+from core.coverage_probability import (
+    CoverageProbabilityEngine, shadow_fading_sigma, DEFAULT_SIGMA_DB
+)
+
+
+class TestCoverageProbability(unittest.TestCase):
+
+    def test_single_server_matches_normal_cdf(self):
+        rsrp = np.linspace(-125.0, -75.0, 51)
+        expected = 1.0 - ndtr((-100.0 - rsrp) / 8.0)
+        for rho in (0.0, 0.5):
+            engine = CoverageProbabilityEngine(thresholds_dbm=[-100.0], correlation=rho)
+            result = engine.compute_from_layer(rsrp, 8.0)
+            np.testing.assert_allclose(result['probability'][0], expected, atol=1e-5)
+
+    def test_independent_best_server(self):
+        values = np.array([[-102.0, -95.0], [-104.0, -np.inf]])
+        indices = np.array([[0, 1], [1, -1]])
+        sigma = np.array([6.0, 9.0])  # σ por antena
+        engine = CoverageProbabilityEngine(thresholds_dbm=[-100.0], correlation=0.0)
+        probability = engine.compute(values, indices, sigma)['probability'][0]
+
+        expected_both = 1.0 - ndtr(2.0 / 6.0) * ndtr(4.0 / 9.0)
+        expected_single = 1.0 - ndtr(-5.0 / 9.0)
+        np.testing.assert_allclose(probability, [expected_both, expected_single], atol=1e-6)
+
+    def test_correlated_shadowing_matches_monte_carlo(self):
+        mu = np.array([-103.0, -101.0, -106.0])
+        sigma, rho, threshold = 8.0, 0.5, -100.0
+        engine = CoverageProbabilityEngine(thresholds_dbm=[threshold], correlation=rho)
+        analytic = engine.compute(mu[:, None], np.arange(3)[:, None], sigma)['probability'][0, 0]
+
+        rng = np.random.default_rng(3)
+        common = rng.standard_normal((200000, 1))
+        own = rng.standard_normal((200000, 3))
+        samples = mu + sigma * (math.sqrt(rho) * common + math.sqrt(1.0 - rho) * own)
+        simulated = (samples.max(axis=1) > threshold).mean()
+        self.assertAlmostEqual(float(analytic), simulated, delta=0.005)
+
+        # La correlación reduce la ganancia de macro-diversidad
+        independent = CoverageProbabilityEngine(thresholds_dbm=[threshold], correlation=0.0)
+        self.assertLess(analytic, independent.compute(
+            mu[:, None], np.arange(3)[:, None], sigma)['probability'][0, 0])
+
+    def test_area_statistics_and_empty_pixels(self):
+        rsrp = np.array([[-60.0, np.nan], [-160.0, -60.0]])
+        engine = CoverageProbabilityEngine(thresholds_dbm=[-100.0], reliability_targets=[0.9])
+        result = engine.compute_from_layer(rsrp, 8.0)
+        np.testing.assert_allclose(result['probability'][0], [[1.0, 0.0], [0.0, 1.0]], atol=1e-6)
+        self.assertAlmostEqual(result['area_reliability'][0], 0.5, places=5)
+        self.assertEqual(result['reliable_area_fraction'][0.9], [0.5])
+
+    def test_sigma_table(self):
+        self.assertAlmostEqual(shadow_fading_sigma('itu_p1546', 'Urban', 900.0),
+                               1.2 + 1.3 * math.log10(900.0))
+        self.assertEqual(shadow_fading_sigma('three_gpp_38901', scenario='UMi'), 7.82)
+        self.assertEqual(shadow_fading_sigma('okumura_hata', 'Rural'), 6.0)
+        self.assertEqual(shadow_fading_sigma('free_space'), DEFAULT_SIGMA_DB)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
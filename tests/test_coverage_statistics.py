@@ -0,0 +1,87 @@
+"""
+Tests para CoverageStatistics (histogramas, áreas y percentiles en streaming)
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import json
+import math
+import tempfile
+import unittest
+
+import numpy as np
+
+from core.coverage_statistics import CoverageStatistics, EARTH_RADIUS_M
+from core.server_ranking import NO_SERVER
+
+
+class TestCoverageStatistics(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.lats, self.lons = np.meshgrid(np.linspace(-4.0, -2.0, 201), np.linspace(-80.0, -79.0, 101),
+                                           indexing='ij')
+        self.rsrp = rng.normal(-95.0, 12.0, self.lats.shape)
+        self.rsrp[rng.random(self.lats.shape) < 0.1] = np.nan
+        step_deg2 = 0.01 * 0.01
+        self.pixel_area = step_deg2 * (math.pi * EARTH_RADIUS_M / 180.0) ** 2 * np.cos(np.radians(self.lats))
+
+    def test_percentiles_and_display_range(self):
+        stats = CoverageStatistics.of_layer(self.rsrp)
+        valid = self.rsrp[np.isfinite(self.rsrp)]
+        for p in (5, 50, 95):
+            self.assertAlmostEqual(stats.percentile(p), np.percentile(valid, p), delta=0.5)
+
+        vmin, vmax = stats.display_range()
+        self.assertAlmostEqual(vmin, max(np.percentile(valid, 5), -120), delta=0.5)
+        self.assertAlmostEqual(vmax, min(np.percentile(valid, 95), -20), delta=0.5)
+        self.assertEqual(CoverageStatistics.of_layer(np.full(4, np.nan)).display_range(), (-120, -60))
+
+    def test_true_pixel_area(self):
+        thresholds = (-110.0, -100.0, -93.25)  # -93.25 no cae en un borde de bin
+        stats = CoverageStatistics.of_layer(self.rsrp, self.lats, self.lons, thresholds_dbm=thresholds)
+        summary = stats.summary()
+        self.assertAlmostEqual(summary['total_area_km2'], self.pixel_area.sum() * 1e-6, places=6)
+        for threshold, area in zip(thresholds, summary['area_above_km2']):
+            with np.errstate(invalid='ignore'):
+                expected = self.pixel_area[self.rsrp >= threshold].sum() * 1e-6
+            self.assertAlmostEqual(area, expected, places=6)
+
+        # El grid indexado 'xy' describe la misma área
+        transposed = CoverageStatistics.of_layer(self.rsrp.T, self.lats.T, self.lons.T)
+        self.assertAlmostEqual(transposed.total_area, stats.total_area, places=3)
+
+    def test_tiled_memmap_and_merge_match_single_pass(self):
+        whole = CoverageStatistics.of_layer(self.rsrp, self.lats, self.lons)
+        with tempfile.TemporaryDirectory() as folder:
+            path = Path(folder) / 'rsrp.npy'
+            np.save(path, self.rsrp.astype(np.float32))
+            layer = np.load(path, mmap_mode='r')
+            tiled = CoverageStatistics.of_layer(layer, self.lats, self.lons, tile_pixels=1000)
+            np.testing.assert_array_equal(tiled.histogram, whole.histogram)
+            self.assertAlmostEqual(tiled.total_area, whole.total_area, delta=whole.total_area * 1e-12)
+            del layer
+
+        top = CoverageStatistics().accumulate(self.rsrp[:100], self.lats[:100], self.lons[:100])
+        bottom = CoverageStatistics().accumulate(self.rsrp[100:], self.lats[100:], self.lons[100:])
+        merged = top.merge(bottom)
+        np.testing.assert_array_equal(merged.histogram, whole.histogram)
+        np.testing.assert_allclose(merged.areas_above(), whole.areas_above())
+        self.assertEqual(merged.minimum, whole.minimum)
+
+    def test_served_area_per_server(self):
+        best_server = np.where(self.lons < -79.5, 0, 1).astype(np.uint16)
+        best_server[~np.isfinite(self.rsrp)] = NO_SERVER
+        stats = CoverageStatistics.of_layer(self.rsrp, self.lats, self.lons,
+                                            best_server=best_server, n_servers=2)
+        summary = stats.summary(server_ids=['a', 'b'])
+        for index in (0, 1):
+            expected = self.pixel_area[best_server == index].sum() * 1e-6
+            self.assertAlmostEqual(summary['served_area_km2'][index], expected, places=6)
+        self.assertEqual(summary['server_ids'], ['a', 'b'])
+        json.dumps(summary)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
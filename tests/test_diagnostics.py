@@ -0,0 +1,95 @@
+"""
+Tests para el modo de diagnóstico perezoso y el logging con cola
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import logging
+import tempfile
+import unittest
+from logging.handlers import QueueHandler
+
+import numpy as np
+
+from utils import diagnostics
+from utils.logger import setup_logger, shutdown_logger
+from core.models.traditional.okumura_hata import OkumuraHataModel
+
+
+class TestDiagnostics(unittest.TestCase):
+    """Test suite para utils.diagnostics"""
+
+    def setUp(self):
+        self.logger = logging.getLogger("TestDiagnostics")
+        self.logger.setLevel(logging.DEBUG)
+        self.calls = []
+
+    def tearDown(self):
+        diagnostics.set_enabled(False)
+
+    def _message(self):
+        self.calls.append(1)
+        return "stats"
+
+    def test_disabled_does_not_build_message(self):
+        diagnostics.set_enabled(False)
+        diagnostics.log(self.logger, self._message, logging.INFO)
+        self.assertEqual(self.calls, [])
+
+    def test_enabled_builds_message_only_for_active_level(self):
+        diagnostics.set_enabled(True)
+        self.logger.setLevel(logging.INFO)
+
+        diagnostics.log(self.logger, self._message)  # DEBUG descartado
+        self.assertEqual(self.calls, [])
+
+        with self.assertLogs(self.logger, logging.INFO) as captured:
+            diagnostics.log(self.logger, self._message, logging.INFO)
+        self.assertEqual(self.calls, [1])
+        self.assertIn("stats", captured.output[0])
+
+    def test_summary_ignores_nan(self):
+        values = np.array([1.0, np.nan, 3.0])
+        self.assertEqual(diagnostics.summary(values, unit='m'), "min=1.0m, max=3.0m, mean=2.0m")
+        self.assertEqual(diagnostics.value_range(values, '.2f'), "[1.00,3.00]")
+
+    def test_model_statistics_skipped_when_disabled(self):
+        model = OkumuraHataModel()
+        model.logger.setLevel(logging.INFO)
+        profiles = np.linspace(2500.0, 2600.0, 20 * 30).reshape(20, 30)
+        d_km = np.linspace(1.0, 15.0, 20)
+
+        outputs = []
+        for enabled in (False, True):
+            diagnostics.set_enabled(enabled)
+            with self.assertLogs(model.logger, logging.INFO) as captured:
+                model._calculate_effective_height_vectorized(30.0, 2550.0, profiles, d_km)
+            outputs.append(captured.output)
+
+        self.assertFalse(any("z_ref:" in line for line in outputs[0]))
+        self.assertTrue(any("z_ref:" in line for line in outputs[1]))
+
+
+class TestQueueLogger(unittest.TestCase):
+    """setup_logger escribe a disco desde un QueueListener"""
+
+    def test_records_reach_file_through_queue(self):
+        root = logging.getLogger()
+        previous_level = root.level
+        with tempfile.TemporaryDirectory() as tmp:
+            try:
+                setup_logger(tmp, level=logging.INFO)
+                self.assertTrue(any(isinstance(h, QueueHandler) for h in root.handlers))
+                logging.getLogger("TestQueueLogger").info("queued message")
+            finally:
+                shutdown_logger()
+                root.setLevel(previous_level)
+
+            self.assertFalse(any(isinstance(h, QueueHandler) for h in root.handlers))
+            contents = "".join(p.read_text(encoding='utf-8') for p in Path(tmp).glob("*.log"))
+            self.assertIn("queued message", contents)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
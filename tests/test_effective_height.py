@@ -0,0 +1,116 @@
+"""
+Tests para EffectiveHeightService (z_ref y h_b,eff por sector de acimut)
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import math
+import unittest
+
+import numpy as np
+
+from core.compute_engine import ComputeEngine
+from core.coverage_calculator import CoverageCalculator
+from core.effective_height import EffectiveHeightService, M_PER_DEG
+from core.models.traditional.okumura_hata import OkumuraHataModel
+from core.models.traditional.cost231_hata import COST231HataModel
+
+TX_LAT, TX_LON = -2.90, -79.00
+
+
+class _SlopeTerrain:
+    """Terreno plano inclinado hacia el norte con la interfaz de TerrainLoader usada"""
+
+    def __init__(self, base=2500.0, slope=0.01, max_range_m=None):
+        self.data = np.zeros(1)
+        self.base = base
+        self.slope = slope
+        self.max_range_m = max_range_m
+
+    def pixel_size_m(self):
+        return 30.0
+
+    def get_elevations_fast(self, lats, lons, nodata=0.0):
+        north = (np.asarray(lats) - TX_LAT) * M_PER_DEG
+        east = (np.asarray(lons) - TX_LON) * M_PER_DEG * math.cos(math.radians(TX_LAT))
+        z = self.base + self.slope * north
+        if self.max_range_m is not None:
+            z = np.where(np.hypot(north, east) <= self.max_range_m, z, nodata)
+        return z
+
+
+def _receptors(bearing_deg, distances_m):
+    """Coordenadas de receptores a distances_m del TX sobre un rumbo"""
+    theta = math.radians(bearing_deg)
+    lats = TX_LAT + np.asarray(distances_m) * math.cos(theta) / M_PER_DEG
+    lons = TX_LON + np.asarray(distances_m) * math.sin(theta) / (
+        M_PER_DEG * math.cos(math.radians(TX_LAT)))
+    return lats, lons
+
+
+class TestEffectiveHeightService(unittest.TestCase):
+
+    def test_annulus_mean_per_bearing(self):
+        service = EffectiveHeightService(n_azimuths=72)
+        terrain = _SlopeTerrain()
+        stats = service.statistics(terrain, TX_LAT, TX_LON)
+
+        # Media del radial en [3, 15] km: base + pendiente * cos(θ) * 9 km
+        theta = np.arange(72) * (2.0 * math.pi / 72)
+        np.testing.assert_allclose(stats.annulus_mean, 2500.0 + 0.01 * np.cos(theta) * 9000.0,
+                                   atol=0.01)
+
+        # Receptores del mismo rumbo comparten z_ref sin importar su distancia
+        lats, lons = _receptors(90.0, [500.0, 4000.0, 12000.0])
+        z_ref = stats.terrain_reference(lats, lons, fallback=0.0)
+        np.testing.assert_allclose(z_ref, z_ref[0])
+
+    def test_fallback_without_annulus_coverage(self):
+        # DEM que termina a 2 km: media del radial entre el TX y el receptor
+        service = EffectiveHeightService(n_azimuths=36)
+        terrain = _SlopeTerrain(max_range_m=2000.0)
+        lats, lons = _receptors(0.0, [600.0, 1500.0])
+        hb_eff = service.effective_height(terrain, TX_LAT, TX_LON, 30.0, 2500.0, lats, lons)
+        np.testing.assert_allclose(hb_eff, [30.0 - 0.01 * 300.0, 30.0 - 0.01 * 750.0], atol=0.2)
+
+    def test_statistics_cached_per_dem(self):
+        service = EffectiveHeightService(n_azimuths=36)
+        terrain = _SlopeTerrain()
+        first = service.statistics(terrain, TX_LAT, TX_LON)
+        self.assertIs(service.statistics(terrain, TX_LAT, TX_LON), first)
+
+        terrain.data = np.zeros(2)  # otro DEM cargado
+        self.assertIsNot(service.statistics(terrain, TX_LAT, TX_LON), first)
+
+    def test_statistics_keyed_on_dem_identity(self):
+        service = EffectiveHeightService(n_azimuths=36)
+        identity = {'path': '/dem.tif', 'size': 10, 'mtime_ns': 1, 'shape': [1]}
+        terrain = _SlopeTerrain()
+        terrain.get_identity = lambda: dict(identity)
+        first = service.statistics(terrain, TX_LAT, TX_LON)
+
+        reloaded = _SlopeTerrain()  # Mismo archivo en otro TerrainLoader
+        reloaded.get_identity = lambda: dict(identity)
+        self.assertIs(service.statistics(reloaded, TX_LAT, TX_LON), first)
+
+        identity['mtime_ns'] = 2  # Archivo modificado
+        self.assertIsNot(service.statistics(reloaded, TX_LAT, TX_LON), first)
+
+    def test_calculator_reuses_service_between_runs(self):
+        calculator = CoverageCalculator(ComputeEngine(use_gpu=False))
+        service = calculator.effective_height_service(n_azimuths=36)
+        self.assertIs(calculator.effective_height_service(n_azimuths=36), service)
+        self.assertIsNot(calculator.effective_height_service(n_azimuths=72), service)
+
+    def test_hata_models_use_precomputed_height(self):
+        distances = np.array([[2000.0, 5000.0], [8000.0, 12000.0]])
+        hb_eff = np.array([[45.0, 60.0], [75.0, 90.0]])
+        for model, frequency in ((OkumuraHataModel(), 900.0), (COST231HataModel(), 1800.0)):
+            result = model.calculate_path_loss(distances, frequency, 40.0, np.zeros((2, 2)),
+                                               hb_effective=hb_eff)
+            np.testing.assert_array_equal(result['hb_effective'], hb_eff)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
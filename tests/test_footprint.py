@@ -0,0 +1,117 @@
+"""
+Tests para FootprintCuller (recorte de la evaluación por huella de link budget)
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import math
+import unittest
+import warnings
+
+import numpy as np
+
+from core.compute_engine import ComputeEngine
+from core.coverage_calculator import CoverageCalculator
+from core.footprint import FootprintCuller
+from core.models.gpp_3gpp.three_gpp_38901 import ThreGPP38901Model
+from core.models.traditional.free_space import FreeSpacePathLossModel
+from core.models.traditional.okumura_hata import OkumuraHataModel
+from models.antenna import Antenna
+from workers.simulation_worker import SimulationWorker
+
+
+def _small_cell(lat=-2.90, lon=-79.00):
+    return Antenna(name="Small", latitude=lat, longitude=lon, tx_power_dbm=24.0,
+                   gain_dbi=5.0, frequency_mhz=3500.0, height_agl=10.0)
+
+
+class TestFootprintCuller(unittest.TestCase):
+    """Test suite para FootprintCuller"""
+
+    def setUp(self):
+        warnings.simplefilter('ignore', UserWarning)
+        self.calculator = CoverageCalculator(ComputeEngine(use_gpu=False))
+        # Grid de ~30 km de lado
+        self.grid_lats, self.grid_lons = np.meshgrid(
+            np.linspace(-3.04, -2.76, 160), np.linspace(-79.14, -78.86, 150)
+        )
+        self.terrain = np.zeros_like(self.grid_lats)
+        self.model = ThreGPP38901Model()
+        self.params = {'scenario': 'UMi', 'h_bs': 10.0}
+
+    def _coverage(self, antenna, culler):
+        self.calculator.footprint_culler = culler
+        return self.calculator.calculate_single_antenna_coverage(
+            antenna, self.grid_lats, self.grid_lons, self.terrain,
+            self.model, self.params, return_details=True
+        )
+
+    def test_fspl_radius_closes_budget(self):
+        culler = FootprintCuller(floor_dbm=-100.0, margin_db=3.0)
+        antenna = _small_cell()
+        radius = culler.radius_m(antenna, OkumuraHataModel())
+        fspl = 20 * math.log10(radius / 1000) + 20 * math.log10(antenna.frequency_mhz) + 32.45
+        self.assertAlmostEqual(antenna.tx_power_dbm + antenna.gain_dbi + 3.0 - fspl, -100.0)
+
+    def test_window_matches_full_grid(self):
+        antenna = _small_cell()
+        full = self._coverage(antenna, None)
+        culled = self._coverage(antenna, FootprintCuller())
+
+        inside = np.isfinite(culled['rsrp'])
+        self.assertLess(inside.mean(), 0.5)
+        for name in ('rsrp', 'path_loss', 'antenna_gain'):
+            np.testing.assert_array_equal(culled[name][inside], full[name][inside])
+        self.assertTrue((full['rsrp'][~inside] < -130.0).all())
+
+    def test_non_pointwise_model_uses_full_grid(self):
+        culler = FootprintCuller(floor_dbm=-60.0)
+        model = OkumuraHataModel()
+        self.assertIsNone(culler.window(_small_cell(), self.grid_lats, self.grid_lons, model))
+        self.assertIsNone(culler.window(
+            _small_cell(), self.grid_lats, self.grid_lons, ThreGPP38901Model(config={'use_dem': True})
+        ))
+
+    def test_non_rectilinear_grid_uses_full_grid(self):
+        column = (self.grid_lats.reshape(-1, 1), self.grid_lons.reshape(-1, 1))
+        culler = FootprintCuller()
+        self.assertIsNone(culler.window(_small_cell(), *column, self.model, self.params))
+
+    def test_antenna_outside_grid_is_empty(self):
+        culled = self._coverage(_small_cell(lat=-4.0, lon=-80.0), FootprintCuller())
+        self.assertTrue(np.isnan(culled['rsrp']).all())
+
+    def test_fspl_only_bound_is_conservative(self):
+        # Free Space a -130 dBm llega a cientos de km: no hay recorte
+        culler = FootprintCuller()
+        self.assertIsNone(culler.window(
+            _small_cell(), self.grid_lats, self.grid_lons, FreeSpacePathLossModel()
+        ))
+
+
+class TestFootprintWorker(unittest.TestCase):
+    """SimulationWorker con footprint_culling"""
+
+    def test_layers_outside_footprint_are_nan(self):
+        warnings.simplefilter('ignore', UserWarning)
+        calculator = CoverageCalculator(ComputeEngine(use_gpu=False))
+        antennas = [_small_cell(), _small_cell(lat=-2.95, lon=-79.05)]
+        config = {'model': 'three_gpp_38901', 'scenario': 'UMi', 'h_bs': 10.0,
+                  'radius_km': 15, 'resolution': 60, 'footprint_culling': True,
+                  'compute_interference': False}
+        worker = SimulationWorker(antennas, calculator, None, config)
+        worker.terrain_loader = None
+        out = {}
+        worker.finished.connect(out.update)
+        worker.run()
+
+        for antenna in antennas:
+            rsrp = out['individual'][antenna.id]['rsrp']
+            self.assertTrue(np.isnan(rsrp).any())
+            self.assertTrue(np.isfinite(rsrp).any())
+        self.assertIsNotNone(calculator.footprint_culler)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,123 @@
+"""
+Tests para InterferenceEngine (SINR / RSSI co-canal en streaming)
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import unittest
+import numpy as np
+from core.interference_engine import InterferenceEngine
+
+
+def _layer(rsrp, frequency_mhz=1800.0, bandwidth_mhz=20.0):
+    return {
+        'rsrp': rsrp,
+        'antenna': {'frequency_mhz': frequency_mhz, 'bandwidth_mhz': bandwidth_mhz},
+    }
+
+
+class TestInterferenceEngine(unittest.TestCase):
+    """Test suite para InterferenceEngine"""
+
+    def setUp(self):
+        self.engine = InterferenceEngine(noise_figure_db=7.0)
+        self.noise_re_mw, _, _ = self.engine._noise_terms(20.0)
+
+    def test_two_cochannel_cells_sinr(self):
+        """SINR coincide con S / (I + N) en escala lineal"""
+        layers = {
+            'a': _layer(np.full((10, 12), -80.0)),
+            'b': _layer(np.full((10, 12), -90.0)),
+        }
+        result = self.engine.compute(layers)
+
+        s_mw = 10 ** (-80.0 / 10)
+        i_mw = 10 ** (-90.0 / 10)
+        expected = 10 * np.log10(s_mw / (i_mw + self.noise_re_mw))
+
+        self.assertEqual(result['sinr'].shape, (10, 12))
+        self.assertEqual(result['sinr'].dtype, np.float32)
+        np.testing.assert_allclose(result['sinr'], expected, atol=1e-3)
+
+    def test_different_carriers_do_not_interfere(self):
+        """Celdas en portadoras distintas no suman interferencia"""
+        layers = {
+            'a': _layer(np.full((5, 5), -80.0), frequency_mhz=1800.0),
+            'b': _layer(np.full((5, 5), -82.0), frequency_mhz=2600.0),
+        }
+        result = self.engine.compute(layers)
+
+        expected = -80.0 - 10 * np.log10(self.noise_re_mw)
+        np.testing.assert_allclose(result['sinr'], expected, atol=1e-3)
+        self.assertEqual(len(result['groups']), 2)
+        # Portadora servidora = la de mayor RSRP
+        self.assertTrue(np.all(result['serving_group'] == 0))
+
+    def test_tiling_is_transparent(self):
+        """El resultado no depende del tamaño de bloque"""
+        rng = np.random.default_rng(0)
+        layers = {
+            str(i): _layer(rng.uniform(-120, -60, size=(37, 41)))
+            for i in range(6)
+        }
+        full = InterferenceEngine(tile_pixels=10**7).compute(layers)
+        tiled = InterferenceEngine(tile_pixels=97).compute(layers)
+
+        np.testing.assert_allclose(full['sinr'], tiled['sinr'], atol=1e-4)
+        np.testing.assert_allclose(full['rssi'], tiled['rssi'], atol=1e-4)
+
+    def test_rssi_includes_all_cells(self):
+        """RSSI crece al agregar celdas co-canal"""
+        one = self.engine.compute({'a': _layer(np.full((4, 4), -80.0))})
+        two = self.engine.compute({
+            'a': _layer(np.full((4, 4), -80.0)),
+            'b': _layer(np.full((4, 4), -80.0)),
+        })
+        self.assertTrue(np.all(two['rssi'] > one['rssi'] + 2.9))
+
+    def test_load_factor_scales_only_interferers(self):
+        """La carga reduce I en SINR y RSSI pero no la potencia de la servidora"""
+        layers = {
+            'a': _layer(np.full((4, 4), -70.0)),
+            'b': _layer(np.full((4, 4), -80.0)),
+        }
+        engine = InterferenceEngine(noise_figure_db=7.0, load_factor=0.5)
+        noise_re_mw, noise_bw_mw, n_subcarriers = engine._noise_terms(20.0)
+        s, i = 10 ** (-70.0 / 10), 10 ** (-80.0 / 10)
+        result = engine.compute(layers)
+
+        np.testing.assert_allclose(result['sinr'], 10 * np.log10(s / (0.5 * i + noise_re_mw)), atol=1e-3)
+        np.testing.assert_allclose(
+            result['rssi'], 10 * np.log10((s + 0.5 * i) * n_subcarriers + noise_bw_mw), atol=1e-3
+        )
+
+    def test_non_finite_values_are_no_signal(self):
+        """NaN en una capa se trata como ausencia de señal"""
+        weak = np.full((3, 3), np.nan)
+        result = self.engine.compute({
+            'a': _layer(np.full((3, 3), -80.0)),
+            'b': _layer(weak),
+        })
+        expected = -80.0 - 10 * np.log10(self.noise_re_mw)
+        np.testing.assert_allclose(result['sinr'], expected, atol=1e-3)
+
+    def test_memmap_layers(self):
+        """Funciona sobre capas memory-mapped sin cargarlas completas"""
+        import tempfile
+        import os
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'layer.npy')
+            np.save(path, np.full((20, 20), -85.0))
+            mm = np.load(path, mmap_mode='r')
+            result = self.engine.compute({
+                'a': _layer(mm),
+                'b': _layer(np.full((20, 20), -95.0)),
+            })
+            self.assertTrue(np.all(np.isfinite(result['sinr'])))
+            del mm
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,134 @@
+"""
+Tests para el backend JIT (kernels Numba) frente a las rutas NumPy
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import unittest
+import numpy as np
+
+from core import jit_kernels
+from core.compute_engine import ComputeEngine
+from core.models.traditional.itu_r_p1546 import ITUR_P1546Model
+from core.models.traditional.cost231 import COST231WalfischIkegamiModel
+from core.models.traditional.okumura_hata import OkumuraHataModel
+from core.models.traditional.diffraction_model import DiffractionModel
+
+
+def _profiles(n=300, s=60, seed=7):
+    """Perfiles sintéticos con colinas y distancias TX→RX de 0.5 a 25 km"""
+    rng = np.random.default_rng(seed)
+    d_m = rng.uniform(500.0, 25000.0, n)
+    t = np.linspace(0.0, 1.0, s)
+    hills = 80.0 * np.sin(np.outer(rng.uniform(1, 6, n), t) * np.pi) ** 2
+    profiles = 2500.0 + hills + rng.normal(0.0, 5.0, (n, s))
+    return profiles, d_m, d_m[:, None] * t
+
+
+@unittest.skipUnless(jit_kernels.numba_available(), "Numba no instalado")
+class TestJitKernels(unittest.TestCase):
+    """Los kernels compilados reproducen la ruta NumPy"""
+
+    def setUp(self):
+        self.profiles, self.d_m, self.profile_distances = _profiles()
+        self.terrain_heights = self.profiles[:, -1]
+
+    def tearDown(self):
+        jit_kernels.set_enabled(False)
+
+    def _both(self, fn):
+        jit_kernels.set_enabled(False)
+        reference = fn()
+        self.assertTrue(jit_kernels.set_enabled(True))
+        return reference, fn()
+
+    def test_itu_tca(self):
+        model = ITUR_P1546Model()
+        reference, jit = self._both(lambda: model._calculate_tca_correction_vectorized(
+            terrain_profiles=self.profiles,
+            distances_km=self.d_m / 1000.0,
+            tx_height=30.0, tx_elevation=2550.0,
+            terrain_heights=self.terrain_heights,
+            profile_distances=self.profile_distances
+        ))
+        self.assertGreater(np.count_nonzero(reference), 0)
+        np.testing.assert_allclose(jit, reference, rtol=1e-9, atol=1e-9)
+
+    def test_cost231_los(self):
+        model = COST231WalfischIkegamiModel()
+        reference, jit = self._both(lambda: model._calculate_los_nlos_geometric_vectorized(
+            self.d_m, self.profiles, 30.0, 2550.0, 1.5
+        ))
+        self.assertTrue(reference.any() and not reference.all())
+        np.testing.assert_array_equal(jit, reference)
+
+    def test_hata_annulus_mean(self):
+        model = OkumuraHataModel()
+        profiles = self.profiles.copy()
+        profiles[::17, 5:9] = np.nan
+        reference, jit = self._both(lambda: model._calculate_effective_height_vectorized(
+            30.0, 2550.0, profiles, self.d_m / 1000.0
+        ))
+        np.testing.assert_allclose(jit, reference, rtol=1e-9)
+
+    def test_diffraction_obstacle_search(self):
+        model = DiffractionModel()
+        n = 80
+        reference, jit = self._both(lambda: model.calculate_diffraction_correction(
+            terrain_profiles=self.profiles[:n],
+            distances_km=self.d_m[:n] / 1000.0,
+            frequency_hz=900e6,
+            h_eff_tx=30.0,
+            h_eff_rx=np.full(n, 1.5),
+            tx_elevation=2550.0,
+            terrain_heights=self.terrain_heights[:n]
+        ))
+        self.assertGreater(np.count_nonzero(reference), 0)
+        np.testing.assert_allclose(jit, reference, rtol=1e-9, atol=1e-9)
+
+
+class TestJitBackendSelection(unittest.TestCase):
+    """Selección del backend en ComputeEngine"""
+
+    def tearDown(self):
+        jit_kernels.set_enabled(False)
+
+    def test_default_is_numpy(self):
+        engine = ComputeEngine(use_gpu=False)
+        self.assertEqual(engine.backend, 'numpy')
+        self.assertFalse(jit_kernels.is_enabled())
+
+    def test_jit_backend_or_fallback(self):
+        engine = ComputeEngine(use_gpu=False, use_jit=True)
+        if jit_kernels.numba_available():
+            self.assertEqual(engine.backend, 'numba')
+            with engine.jit_scope():
+                self.assertTrue(jit_kernels.is_enabled())
+            self.assertTrue(engine.switch_jit_mode(False))
+            self.assertEqual(engine.backend, 'numpy')
+        else:
+            self.assertEqual(engine.backend, 'numpy')
+            self.assertFalse(engine.switch_jit_mode(True))
+        self.assertIs(engine.xp, np)
+
+    def test_flag_is_per_engine(self):
+        jit_engine = ComputeEngine(use_gpu=False, use_jit=True)
+        numpy_engine = ComputeEngine(use_gpu=False, use_jit=False)
+        # Crear motores no cambia el default de proceso
+        self.assertFalse(jit_kernels.is_enabled())
+
+        with numpy_engine.jit_scope():
+            self.assertFalse(jit_kernels.is_enabled())
+            with jit_engine.jit_scope():
+                self.assertEqual(jit_kernels.is_enabled(), jit_kernels.numba_available())
+            self.assertFalse(jit_kernels.is_enabled())
+        self.assertEqual(jit_engine.use_jit, jit_kernels.numba_available())
+
+        jit_kernels.set_enabled(True)
+        with numpy_engine.jit_scope():
+            self.assertFalse(jit_kernels.is_enabled())
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
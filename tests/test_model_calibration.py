@@ -0,0 +1,137 @@
+"""
+Tests para ModelCalibrator (calibración de modelos contra mediciones)
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import math
+import tempfile
+import unittest
+
+import numpy as np
+
+from core.compute_engine import ComputeEngine
+from core.coverage_calculator import CoverageCalculator
+from core.footprint import FootprintCuller
+from core.model_calibration import ModelCalibrator, read_measurements, terrain_path_features
+from core.ragged_profiles import RaggedProfiles
+from core.models.gpp_3gpp.three_gpp_38901 import ThreGPP38901Model
+from core.models.traditional.free_space import FreeSpacePathLossModel
+from models.antenna import Antenna
+
+
+class TestModelCalibration(unittest.TestCase):
+
+    def setUp(self):
+        self.antenna = Antenna(name="A1", latitude=-2.90, longitude=-79.00, frequency_mhz=900.0)
+        rng = np.random.default_rng(5)
+        self.lats = -2.90 + rng.uniform(-0.08, 0.08, 2000)
+        self.lons = -79.00 + rng.uniform(-0.08, 0.08, 2000)
+        self.model = FreeSpacePathLossModel()
+        self.calibrator = ModelCalibrator(CoverageCalculator(ComputeEngine(use_gpu=False)))
+
+    def _measured(self, offset, slope, noise_db=0.5, seed=0):
+        """RSRP 'medido': predicción menos una corrección lineal en log10(d) y ruido"""
+        calibrator = ModelCalibrator(self.calibrator.calculator)
+        group = calibrator.add_measurements(self.antenna, self.lats, self.lons, np.zeros(self.lats.size))
+        predicted = calibrator.predict(group, self.model)
+        log_d = calibrator.features(group)['log_d']
+        noise = np.random.default_rng(seed).normal(0.0, noise_db, self.lats.size)
+        return predicted - (offset + slope * log_d) + noise
+
+    def test_recovers_linear_correction(self):
+        measured = self._measured(offset=6.0, slope=12.0)
+        self.calibrator.add_measurements(self.antenna, self.lats, self.lons, measured)
+        result = self.calibrator.fit(self.model, terms=('offset', 'log_d'))
+
+        self.assertAlmostEqual(result['coefficients']['offset'], 6.0, delta=0.1)
+        self.assertAlmostEqual(result['coefficients']['log_d'], 12.0, delta=0.2)
+        after = result['errors']['all']['after']
+        self.assertAlmostEqual(after['bias_db'], 0.0, delta=0.05)
+        self.assertLess(after['rmse_db'], 0.6)
+        self.assertGreater(result['errors']['all']['before']['rmse_db'], 3.0)
+
+        corrected = self.calibrator.predict(0, self.model) - self.calibrator.correction(result, 0)
+        self.assertAlmostEqual(float(np.mean(corrected - measured)), 0.0, delta=0.05)
+
+    def test_outliers_rejected(self):
+        measured = self._measured(offset=-4.0, slope=0.0)
+        measured[:40] -= 35.0  # Puntos en interiores o mal georreferenciados
+        self.calibrator.add_measurements(self.antenna, self.lats, self.lons, measured)
+        result = self.calibrator.fit(self.model, terms=('offset', 'log_d'))
+
+        # Se descartan los 40 atípicos (y a lo sumo algunas colas de la gaussiana)
+        self.assertLessEqual(result['inliers'], self.lats.size - 40)
+        self.assertGreater(result['inliers'], self.lats.size - 60)
+        self.assertAlmostEqual(result['coefficients']['offset'], -4.0, delta=0.15)
+
+    def test_refits_reuse_cached_features(self):
+        self.calibrator.add_measurements(self.antenna, self.lats, self.lons, self._measured(2.0, 0.0))
+        features = self.calibrator.features(0)
+        predicted = self.calibrator.predict(0, self.model)
+        result = self.calibrator.fit(self.model, terms=('offset', 'log_d', 'tca', 'los'))
+
+        self.assertIs(self.calibrator.features(0), features)
+        self.assertIs(self.calibrator.predict(0, self.model), predicted)
+        # Sin DEM θ_tc y LOS son constantes: se fijan en 0
+        self.assertEqual(result['coefficients']['tca'], 0.0)
+        self.assertEqual(result['coefficients']['los'], 0.0)
+        self.assertIn('suburban', result['errors'])
+
+    def test_prediction_memo_distinguishes_model_config(self):
+        antenna = Antenna(name="A2", latitude=-2.90, longitude=-79.00, frequency_mhz=3500.0)
+        group = self.calibrator.add_measurements(antenna, self.lats, self.lons, np.zeros(self.lats.size))
+        uma = self.calibrator.predict(group, ThreGPP38901Model({'scenario': 'UMa'}))
+        rma_model = ThreGPP38901Model({'scenario': 'RMa'})
+        rma = self.calibrator.predict(group, rma_model)
+
+        fresh = ModelCalibrator(self.calibrator.calculator)
+        fresh.add_measurements(antenna, self.lats, self.lons, np.zeros(self.lats.size))
+        np.testing.assert_array_equal(rma, fresh.predict(0, ThreGPP38901Model({'scenario': 'RMa'})))
+        self.assertGreater(np.nanmean(np.abs(uma - rma)), 1.0)
+        self.assertIs(self.calibrator.predict(group, rma_model), rma)
+
+    def test_prediction_ignores_simulation_state(self):
+        self.antenna.show_coverage = False  # Oculta en el mapa: igual se calibra
+        self.calibrator.add_measurements(self.antenna, self.lats, self.lons, self._measured(2.0, 0.0))
+        # Recorte por huella dejado por una simulación previa en el calculador compartido
+        self.calibrator.calculator.footprint_culler = FootprintCuller(floor_dbm=-40.0, margin_db=0.0)
+        predicted = self.calibrator.predict(0, self.model)
+        self.assertTrue(np.isfinite(predicted).all())
+
+        result = self.calibrator.fit(self.model, terms=('offset',))
+        self.assertEqual(result['points'], self.lats.size)
+        self.assertEqual(result['discarded'], {'no_measurement': 0, 'no_prediction': 0})
+
+    def test_terrain_path_features(self):
+        distances = np.linspace(0.0, 2000.0, 21)
+        flat = np.full(21, 100.0)
+        ridge = flat.copy()
+        ridge[15] = 160.0  # 500 m antes del receptor
+        profiles = RaggedProfiles([0, 21, 42], np.concatenate((flat, ridge)), np.tile(distances, 2))
+
+        tca, los = terrain_path_features(profiles, [2000.0, 2000.0], 130.0, np.array([101.5, 101.5]))
+        np.testing.assert_array_equal(los, [True, False])
+        self.assertEqual(tca[0], 0.0)
+        self.assertAlmostEqual(tca[1], math.degrees(math.atan2(58.5, 500.0)), places=6)
+
+    def test_read_measurement_files(self):
+        with tempfile.TemporaryDirectory() as folder:
+            atoll = Path(folder) / 'atoll.txt'
+            atoll.write_text("type\tGSM\nresolution\t33\n\n"
+                             "-79.0489;-2.9493;[0];-82.750\n-79.0486;-2.9492;[0];-82.688\n")
+            data = read_measurements(atoll)
+            np.testing.assert_allclose(data['lons'], [-79.0489, -79.0486])
+            np.testing.assert_allclose(data['rsrp'], [-82.75, -82.688])
+            self.assertIsNone(data['heights'])
+
+            table = Path(folder) / 'drive.csv'
+            table.write_text("grid_lat,grid_lon,rsrp_dbm,height_m\n-2.9,-79.0,-90.5,1.5\n")
+            data = read_measurements(table)
+            np.testing.assert_allclose(data['lats'], [-2.9])
+            np.testing.assert_allclose(data['heights'], [1.5])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
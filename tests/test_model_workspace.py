@@ -0,0 +1,142 @@
+"""
+Tests para ModelWorkspace (buffers reutilizables e intermedios memoizados)
+y su uso en los modelos de forma cerrada
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import unittest
+import warnings
+import numpy as np
+
+from core.compute_engine import ComputeEngine
+from core.coverage_calculator import CoverageCalculator
+from core.models.workspace import ModelWorkspace
+from core.models.traditional.free_space import FreeSpacePathLossModel
+from core.models.traditional.okumura_hata import OkumuraHataModel
+from core.models.traditional.cost231_hata import COST231HataModel
+from core.models.gpp_3gpp.three_gpp_38901 import ThreGPP38901Model
+
+
+class TestModelWorkspace(unittest.TestCase):
+    """Test suite para ModelWorkspace"""
+
+    def test_buffer_is_reused_per_shape(self):
+        ws = ModelWorkspace()
+        a = ws.buffer('tmp', (10, 10))
+        b = ws.buffer('tmp', (10, 10))
+        c = ws.buffer('tmp', (5, 5))
+
+        self.assertIs(a, b)
+        self.assertEqual(c.shape, (5, 5))
+        self.assertEqual(ws.buffer('tmp', (5, 5), bool).dtype, bool)
+        self.assertEqual(ws.stats['allocations'], 3)
+        self.assertEqual(ws.stats['buffer_reuses'], 1)
+
+    def test_cached_by_source_identity(self):
+        ws = ModelWorkspace()
+        d = np.array([500.0, 2000.0, 8000.0])
+
+        first = ws.log10_distance_km(d, 1.0)
+        second = ws.log10_distance_km(d, 1.0)
+        other = ws.log10_distance_km(d.copy(), 1.0)
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertFalse(first.flags.writeable)
+        np.testing.assert_array_equal(first, np.log10(np.maximum(d / 1000.0, 1.0)))
+        self.assertEqual(ws.stats['memo_hits'], 1)
+        self.assertEqual(ws.stats['memo_misses'], 2)
+
+    def test_memo_is_bounded(self):
+        ws = ModelWorkspace(memo_size=2)
+        for _ in range(5):
+            ws.log10_distance_km(np.ones(4), 1.0)
+        self.assertEqual(len(ws._memo), 2)
+
+        ws.release()
+        self.assertEqual(ws.nbytes, 0)
+
+
+class TestModelsWithWorkspace(unittest.TestCase):
+    """Los modelos retornan arrays nuevos y reutilizan el workspace"""
+
+    def setUp(self):
+        self.distances = np.linspace(100.0, 15000.0, 400).reshape(20, 20)
+        self.terrain = np.zeros_like(self.distances)
+        warnings.simplefilter('ignore')
+
+    def _path_loss(self, model, distances, frequency=1800, tx_height=30.0):
+        result = model.calculate_path_loss(distances, frequency, tx_height,
+                                            terrain_heights=self.terrain)
+        return result['path_loss']
+
+    def _models(self):
+        return [
+            FreeSpacePathLossModel(),
+            OkumuraHataModel(),
+            COST231HataModel(),
+            ThreGPP38901Model({'scenario': 'UMa'}),
+            ThreGPP38901Model({'scenario': 'RMa'}),
+        ]
+
+    def test_results_are_fresh_arrays(self):
+        for model in self._models():
+            with self.subTest(model=model.__class__.__name__):
+                first = self._path_loss(model, self.distances)
+                snapshot = first.copy()
+                second = self._path_loss(model, self.distances * 0.5)
+
+                self.assertFalse(np.shares_memory(first, second))
+                np.testing.assert_array_equal(first, snapshot)
+
+    def test_repeated_calls_reuse_buffers_and_memo(self):
+        model = OkumuraHataModel()
+        first = self._path_loss(model, self.distances, 900, 30.0)
+        allocations = model.workspace.stats['allocations']
+        second = self._path_loss(model, self.distances, 900, 50.0)
+
+        self.assertEqual(model.workspace.stats['allocations'], allocations)
+        self.assertEqual(model.workspace.stats['memo_hits'], 1)
+        self.assertTrue(np.all(second < first))
+
+    def test_free_space_formula(self):
+        pl = self._path_loss(FreeSpacePathLossModel(), self.distances, 2600)
+        d_km = np.maximum(self.distances / 1000.0, 0.001)
+        expected = 20 * np.log10(d_km) + 20 * np.log10(2600) + 32.45
+        np.testing.assert_allclose(pl, expected)
+
+    def test_3gpp_helpers_without_out(self):
+        model = ThreGPP38901Model({'scenario': 'UMi'})
+        d2D = np.array([20.0, 200.0, 2000.0])
+        d3D = np.sqrt(d2D ** 2 + 8.5 ** 2)
+
+        pl_los, pl_nlos = model._umi_los_nlos(d2D, d3D, 500.0, 3.5, 10.0, 1.5)
+        again, _ = model._umi_los_nlos(d2D, d3D, 500.0, 3.5, 10.0, 1.5)
+
+        self.assertIsNot(pl_los, again)
+        self.assertTrue(np.all(pl_nlos >= pl_los))
+        expected_near = 32.4 + 21.0 * np.log10(d3D[:2]) + 20.0 * np.log10(3.5)
+        np.testing.assert_allclose(pl_los[:2], expected_near)
+
+
+class TestSiteDistanceMemo(unittest.TestCase):
+    """Distancias compartidas por antenas co-ubicadas"""
+
+    def test_same_site_same_grid_shares_distances(self):
+        calculator = CoverageCalculator(ComputeEngine(use_gpu=False))
+        lats, lons = np.meshgrid(np.linspace(-2.91, -2.89, 30), np.linspace(-79.01, -78.99, 30))
+
+        a = calculator._site_distances(-2.90, -79.00, lats, lons)
+        b = calculator._site_distances(-2.90, -79.00, lats, lons)
+        c = calculator._site_distances(-2.90, -79.00, lats.copy(), lons)
+
+        self.assertIs(a, b)
+        self.assertIsNot(a, c)
+        self.assertFalse(a.flags.writeable)
+        np.testing.assert_array_equal(a, calculator._calculate_distances(-2.90, -79.00, lats, lons))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,76 @@
+"""
+Tests para la superficie densa de intensidad de campo ITU-R P.1546
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import unittest
+
+import numpy as np
+
+from core.models.traditional.itu_r_p1546 import ITUR_P1546Model
+from core.models.traditional.itu_r_p1546_tables import (
+    FieldStrengthSurface, get_field_strength_surface, get_reference_field_intensity
+)
+
+
+class TestFieldStrengthSurface(unittest.TestCase):
+    """La superficie remuestreada reproduce la interpolación de referencia"""
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        # Fuera de rango en ambos ejes: d < 1 km, d > 1000 km, h negativa y > 1200 m
+        self.distances = np.exp(rng.uniform(np.log(0.05), np.log(2000.0), 20000))
+        self.heights = np.concatenate([
+            rng.uniform(-3500.0, 1500.0, 10000), rng.uniform(-15.0, 40.0, 10000)
+        ])
+
+    def test_matches_reference_interpolation(self):
+        for frequency in (80.0, 150.0, 600.0, 900.0, 1800.0, 2600.0):
+            surface = get_field_strength_surface(frequency)
+            np.testing.assert_allclose(
+                surface.lookup(self.distances, self.heights),
+                get_reference_field_intensity(frequency, self.distances, self.heights),
+                atol=0.01, err_msg=f"{frequency} MHz"
+            )
+
+    def test_surface_is_cached_per_frequency(self):
+        self.assertIs(get_field_strength_surface(900.0), get_field_strength_surface(900.0))
+        self.assertIsNot(get_field_strength_surface(900.0), get_field_strength_surface(1800.0))
+
+    def test_grid_corners_are_exact(self):
+        surface = FieldStrengthSurface(700.0, distance_samples=16, height_samples=8)
+        distances = np.array([1.0, 1.0, 1000.0, 1000.0])
+        heights = np.array([1.25, 1200.0, 1.25, 1200.0])
+        np.testing.assert_allclose(
+            surface.lookup(distances, heights),
+            get_reference_field_intensity(700.0, distances, heights),
+            atol=1e-9
+        )
+
+    def test_broadcast_and_scalar_inputs(self):
+        surface = get_field_strength_surface(900.0)
+        grid = surface.lookup(np.array([[1.0], [10.0]]), np.array([20.0, 75.0, 150.0]))
+        self.assertEqual(grid.shape, (2, 3))
+        self.assertEqual(np.ndim(surface.lookup(10.0, 75.0)), 0)
+
+
+class TestModelFieldTable(unittest.TestCase):
+    """ITUR_P1546Model con field_table 'dense' y 'exact'"""
+
+    def test_dense_close_to_exact(self):
+        distances = np.geomspace(100.0, 80000.0, 300)
+        terrain = np.zeros_like(distances)
+        results = {}
+        for mode in ('dense', 'exact'):
+            model = ITUR_P1546Model(config={'field_table': mode})
+            results[mode] = model.calculate_path_loss(
+                distances=distances, frequency=900.0, tx_height=30.0,
+                terrain_heights=terrain
+            )
+        np.testing.assert_allclose(results['dense'], results['exact'], atol=0.01)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
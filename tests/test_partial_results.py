@@ -0,0 +1,98 @@
+"""
+Tests de la entrega parcial de resultados por antena (SimulationWorker)
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import tempfile
+import unittest
+import numpy as np
+
+from core.compute_engine import ComputeEngine
+from core.coverage_calculator import CoverageCalculator
+from core.result_store import ResultStore
+from models.antenna import Antenna
+from workers.simulation_worker import SimulationWorker
+
+
+class TestPartialResults(unittest.TestCase):
+    """Test suite para antenna_finished / partial_aggregate"""
+
+    def setUp(self):
+        self.calculator = CoverageCalculator(ComputeEngine(use_gpu=False))
+        self.antennas = [
+            Antenna(name='A', latitude=-2.90, longitude=-79.00),
+            Antenna(name='B', latitude=-2.89, longitude=-78.99),
+            Antenna(name='C', latitude=-2.91, longitude=-78.98),
+        ]
+
+    def _run(self, result_store=None, **config):
+        base = {'model': 'free_space', 'radius_km': 2, 'resolution': 40}
+        base.update(config)
+        worker = SimulationWorker(self.antennas, self.calculator, None, base,
+                                  result_store=result_store)
+        worker.terrain_loader = None
+
+        out, handles, partials = {}, [], []
+        worker.finished.connect(out.update)
+        worker.antenna_finished.connect(handles.append)
+        worker.partial_aggregate.connect(partials.append)
+        worker.run()
+        return worker, out, handles, partials
+
+    def test_handles_are_lightweight(self):
+        worker, out, handles, _ = self._run()
+
+        self.assertEqual([h['antenna_id'] for h in handles], [a.id for a in self.antennas])
+        self.assertEqual([h['index'] for h in handles], [0, 1, 2])
+        for handle in handles:
+            self.assertEqual(handle['n_antennas'], 3)
+            self.assertFalse(handle['reused'])
+            self.assertTrue(handle['image_url'].startswith('data:image/png;base64,'))
+            self.assertFalse(any(isinstance(v, np.ndarray) for v in handle.values()))
+
+        # Los arrays se piden al worker bajo demanda
+        layer = worker.get_layer(handles[1]['antenna_id'])
+        self.assertIs(layer, out['individual'][handles[1]['antenna_id']])
+        self.assertIsNone(worker.get_layer('missing'))
+
+    def test_partial_aggregate_unthrottled(self):
+        _, out, _, partials = self._run(partial_update_interval_s=0)
+
+        # La última antena no emite parcial: el resultado final llega por finished
+        self.assertEqual([p['n_done'] for p in partials], [1, 2])
+        for partial in partials:
+            self.assertEqual(partial['n_antennas'], 3)
+            self.assertLess(partial['rsrp_vmin'], partial['rsrp_vmax'])
+            self.assertEqual(partial['bounds'], out['aggregated']['bounds'])
+
+    def test_partial_aggregate_throttled(self):
+        _, _, _, partials = self._run(partial_update_interval_s=3600)
+        self.assertEqual(partials, [])
+
+    def test_streaming_reduction_matches_stack(self):
+        _, out, _, _ = self._run()
+        stack = np.stack([out['individual'][a.id]['rsrp'] for a in self.antennas])
+        np.testing.assert_array_equal(out['aggregated']['rsrp'], stack.max(axis=0))
+        np.testing.assert_array_equal(out['aggregated']['best_server'], stack.argmax(axis=0))
+
+    def test_reused_layers_are_reported(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ResultStore(Path(tmp) / 'p.results')
+            self._run(result_store=store)
+            _, _, handles, _ = self._run(result_store=store)
+        self.assertTrue(all(h['reused'] for h in handles))
+
+    def test_single_antenna_aggregate_does_not_alias_individual(self):
+        self.antennas = self.antennas[:1]
+        _, out, _, _ = self._run(coverage_probability=True)
+        individual = out['individual'][self.antennas[0].id]
+
+        self.assertIn('coverage_probability', out['aggregated'])
+        self.assertNotIn('coverage_probability', individual)
+        self.assertIs(out['aggregated']['rsrp'], individual['rsrp'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,108 @@
+"""
+Tests para CoverageCalculator.calculate_points_coverage (evaluación en puntos sueltos)
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import unittest
+
+import numpy as np
+
+from core.compute_engine import ComputeEngine
+from core.coverage_calculator import CoverageCalculator
+from core.footprint import FootprintCuller
+from core.server_ranking import NO_SERVER
+from core.models.traditional.free_space import FreeSpacePathLossModel
+from core.models.traditional.okumura_hata import OkumuraHataModel
+from models.antenna import Antenna
+
+
+class TestPointsCoverage(unittest.TestCase):
+
+    def setUp(self):
+        self.calculator = CoverageCalculator(ComputeEngine(use_gpu=False))
+        self.antennas = [
+            Antenna(name=f"A{i}", latitude=-2.90 + 0.01 * i, longitude=-79.00 + 0.013 * i)
+            for i in range(4)
+        ]
+        self.lats, self.lons = np.meshgrid(np.linspace(-2.95, -2.80, 40),
+                                           np.linspace(-79.05, -78.90, 30), indexing='ij')
+
+    def test_matches_grid_evaluation(self):
+        model = FreeSpacePathLossModel()
+        grid = self.calculator.calculate_multi_antenna_coverage(
+            self.antennas, self.lats, self.lons, np.zeros(self.lats.shape), model
+        )
+        points = self.calculator.calculate_points_coverage(
+            self.antennas, self.lats.ravel(), self.lons.ravel(), model, chunk_size=97
+        )
+        np.testing.assert_allclose(points['rsrp'], grid['rsrp'].ravel())
+        np.testing.assert_array_equal(points['best_server'], grid['best_server'].ravel())
+        self.assertEqual(points['best_server_ids'], grid['best_server_ids'])
+
+        best = points['best_server'].astype(int)
+        gain = points['antenna_gain']
+        tx_power = np.array([ant.tx_power_dbm for ant in self.antennas])[best]
+        np.testing.assert_allclose(points['rsrp'], tx_power + gain - points['path_loss'])
+
+    def test_per_point_heights(self):
+        model = OkumuraHataModel()
+        heights = np.tile([1.5, 10.0, 1.5, 4.0], self.lats.size // 4)
+        mixed = self.calculator.calculate_points_coverage(
+            self.antennas, self.lats.ravel(), self.lons.ravel(), model, heights=heights,
+            chunk_size=200
+        )
+        for height in (1.5, 4.0, 10.0):
+            fixed = self.calculator.calculate_points_coverage(
+                self.antennas, self.lats.ravel(), self.lons.ravel(), model,
+                model_params={'mobile_height': height}
+            )
+            selected = heights == height
+            np.testing.assert_allclose(mixed['rsrp'][selected], fixed['rsrp'][selected])
+
+    def test_footprint_culling_skips_far_points(self):
+        model = FreeSpacePathLossModel()
+        full = self.calculator.calculate_points_coverage(
+            self.antennas, self.lats.ravel(), self.lons.ravel(), model
+        )
+        culled = self.calculator.calculate_points_coverage(
+            self.antennas, self.lats.ravel(), self.lons.ravel(), model,
+            footprint_culler=FootprintCuller(floor_dbm=-60.0, margin_db=0.0)
+        )
+        served = np.isfinite(culled['rsrp'])
+        self.assertTrue(0 < served.sum() < served.size)
+        np.testing.assert_allclose(culled['rsrp'][served], full['rsrp'][served])
+        self.assertTrue((full['rsrp'][~served] < -60.0).all())
+        self.assertTrue((culled['best_server'][~served] == NO_SERVER).all())
+
+    def test_ignores_per_run_calculator_state(self):
+        model = FreeSpacePathLossModel()
+        reference = self.calculator.calculate_points_coverage(
+            self.antennas, self.lats.ravel(), self.lons.ravel(), model
+        )
+        # Lo que deja una simulación previa en el calculador no afecta a los puntos
+        self.calculator.footprint_culler = FootprintCuller(floor_dbm=-60.0, margin_db=0.0)
+        after_run = self.calculator.calculate_points_coverage(
+            self.antennas, self.lats.ravel(), self.lons.ravel(), model
+        )
+        np.testing.assert_array_equal(after_run['rsrp'], reference['rsrp'])
+        self.assertTrue(np.isfinite(after_run['rsrp']).all())
+
+    def test_same_antenna_set_as_grid(self):
+        model = FreeSpacePathLossModel()
+        self.antennas[1].show_coverage = False
+        self.antennas[2].enabled = False
+        grid = self.calculator.calculate_multi_antenna_coverage(
+            self.antennas, self.lats, self.lons, np.zeros(self.lats.shape), model
+        )
+        points = self.calculator.calculate_points_coverage(
+            self.antennas, self.lats.ravel(), self.lons.ravel(), model
+        )
+        self.assertEqual(points['best_server_ids'], grid['best_server_ids'])
+        self.assertEqual(points['best_server_ids'], [self.antennas[0].id, self.antennas[3].id])
+        np.testing.assert_allclose(points['rsrp'], grid['rsrp'].ravel())
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,79 @@
+"""
+Tests del modo progresivo de SimulationWorker (vista previa gruesa -> fina)
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import unittest
+import numpy as np
+
+from core.compute_engine import ComputeEngine
+from core.coverage_calculator import CoverageCalculator
+from models.antenna import Antenna
+from workers.simulation_worker import SimulationWorker
+
+
+class TestProgressiveSimulation(unittest.TestCase):
+    """Test suite para el modo progresivo"""
+
+    def setUp(self):
+        self.calculator = CoverageCalculator(ComputeEngine(use_gpu=False))
+        self.antennas = [
+            Antenna(name='A', latitude=-2.90, longitude=-79.00),
+            Antenna(name='B', latitude=-2.89, longitude=-78.99),
+        ]
+
+    def _run(self, **config):
+        base = {'model': 'free_space', 'radius_km': 2, 'resolution': 130}
+        base.update(config)
+        worker = SimulationWorker(self.antennas, self.calculator, None, base)
+        worker.terrain_loader = None
+
+        out, previews = {}, []
+        worker.finished.connect(out.update)
+        worker.preview_ready.connect(previews.append)
+        worker.run()
+        return out, previews
+
+    def test_previews_are_emitted_coarse_to_fine(self):
+        _, previews = self._run(progressive=True)
+
+        self.assertEqual([p['step'] for p in previews], [8, 4, 2])
+        self.assertEqual([p['shape'] for p in previews], [(17, 17), (33, 33), (65, 65)])
+        for preview in previews:
+            self.assertTrue(preview['image_url'].startswith('data:image/png;base64,'))
+            self.assertLess(preview['rsrp_vmin'], preview['rsrp_vmax'])
+            self.assertEqual(preview['n_stages'], 3)
+
+    def test_final_result_matches_direct_run(self):
+        direct, no_previews = self._run(progressive=False)
+        progressive, _ = self._run(progressive=True)
+
+        self.assertEqual(no_previews, [])
+        np.testing.assert_array_equal(progressive['aggregated']['rsrp'],
+                                      direct['aggregated']['rsrp'])
+        for ant_id, layer in direct['individual'].items():
+            np.testing.assert_allclose(progressive['individual'][ant_id]['path_loss'],
+                                       layer['path_loss'])
+
+    def test_non_pointwise_model_is_recomputed(self):
+        direct, _ = self._run(model='okumura_hata', progressive=False)
+        progressive, previews = self._run(model='okumura_hata', progressive=True)
+
+        self.assertEqual(len(previews), 3)
+        np.testing.assert_allclose(progressive['aggregated']['rsrp'],
+                                   direct['aggregated']['rsrp'])
+
+    def test_small_grid_skips_preview(self):
+        _, previews = self._run(progressive=True, resolution=50)
+        # 50 // 8 < 16 y 50 // 4 < 16: solo queda la etapa 1/2
+        self.assertEqual([p['step'] for p in previews], [2])
+
+    def test_custom_steps(self):
+        _, previews = self._run(progressive=True, progressive_steps=[4])
+        self.assertEqual([p['step'] for p in previews], [4])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
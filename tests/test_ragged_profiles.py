@@ -0,0 +1,124 @@
+"""
+Tests para RaggedProfiles (perfiles CSR) y perfiles adaptativos de TerrainLoader
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import unittest
+import warnings
+
+import numpy as np
+
+from core.ragged_profiles import RaggedProfiles
+from core.terrain_loader import TerrainLoader
+from core.models.traditional.itu_r_p1546 import ITUR_P1546Model
+
+
+def _dense_profiles(n=400, n_samples=50, seed=0):
+    """Perfiles densos al estilo de ITU-R P.1546 (estirados a max(d, 15 km))"""
+    rng = np.random.default_rng(seed)
+    distances = rng.uniform(200.0, 40000.0, n)
+    profile_distances = np.outer(np.maximum(distances, 15000.0), np.linspace(0.0, 1.0, n_samples))
+    profiles = (2500.0 + 300.0 * np.sin(profile_distances / 900.0 + rng.uniform(0, 6, (n, 1)))
+                + rng.normal(0.0, 20.0, (n, n_samples)))
+    return distances, profiles, profile_distances
+
+
+class TestRaggedProfiles(unittest.TestCase):
+    """Reducciones por tramo equivalen a reducir cada perfil por separado"""
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        lengths = rng.integers(2, 30, 40)
+        self.offsets = np.concatenate(([0], np.cumsum(lengths)))
+        self.values = rng.normal(size=self.offsets[-1])
+        self.profiles = RaggedProfiles(self.offsets, self.values, np.abs(self.values))
+        self.rows = [self.values[a:b] for a, b in zip(self.offsets[:-1], self.offsets[1:])]
+
+    def test_segment_reductions(self):
+        p = self.profiles
+        np.testing.assert_allclose(p.segment_sum(self.values), [r.sum() for r in self.rows])
+        np.testing.assert_allclose(p.segment_mean(self.values), [r.mean() for r in self.rows])
+        np.testing.assert_array_equal(p.segment_max(self.values), [r.max() for r in self.rows])
+        np.testing.assert_array_equal(p.segment_min(self.values), [r.min() for r in self.rows])
+        np.testing.assert_array_equal(p.last(self.values), [r[-1] for r in self.rows])
+        np.testing.assert_array_equal(p.row_ids[self.offsets[:-1]], np.arange(len(p)))
+
+    def test_masked_reductions_with_empty_rows(self):
+        p = self.profiles
+        mask = self.values > 0.8
+        mask[self.offsets[0]:self.offsets[1]] = False  # primer perfil sin muestras
+
+        mean = p.segment_mean(self.values, mask=mask)
+        self.assertTrue(np.isnan(mean[0]))
+        self.assertEqual(p.segment_max(self.values, mask=mask)[0], -np.inf)
+        self.assertEqual(p.segment_min(self.values, mask=mask)[0], np.inf)
+        self.assertEqual(p.segment_count(mask)[0], 0)
+
+        for i, (a, b) in enumerate(zip(self.offsets[:-1], self.offsets[1:])):
+            selected = self.values[a:b][mask[a:b]]
+            if selected.size:
+                self.assertAlmostEqual(mean[i], selected.mean())
+
+    def test_rejects_short_profiles(self):
+        with self.assertRaises(ValueError):
+            RaggedProfiles([0, 1, 3], np.zeros(3), np.zeros(3))
+        with self.assertRaises(ValueError):
+            RaggedProfiles([0, 2, 5], np.zeros(4), np.zeros(4))
+
+
+class TestAdaptiveProfiles(unittest.TestCase):
+    """TerrainLoader.get_adaptive_profiles: muestras según la longitud del trayecto"""
+
+    def test_sample_count_follows_distance(self):
+        loader = TerrainLoader()  # sin DEM: elevaciones en cero, geometría completa
+        tx_lat, tx_lon = -2.90, -79.00
+        rx_lats = np.array([-2.9005, -2.91, -2.95, -3.10])
+        rx_lons = np.full(4, -79.00)
+
+        profiles = loader.get_adaptive_profiles(
+            tx_lat, tx_lon, rx_lats, rx_lons, sample_spacing_m=30.0, min_samples=8, max_samples=200
+        )
+        path_lengths = TerrainLoader._haversine_distance(tx_lat, tx_lon, rx_lats, rx_lons)
+        expected = np.clip(np.ceil(path_lengths / 30.0).astype(int) + 1, 8, 200)
+
+        np.testing.assert_array_equal(profiles.lengths, expected)
+        np.testing.assert_allclose(profiles.last(profiles.distances), path_lengths)
+        np.testing.assert_array_equal(profiles.distances[profiles.starts], 0.0)
+        self.assertTrue((np.diff(profiles.distances)[np.diff(profiles.row_ids) == 0] > 0).all())
+        self.assertFalse(profiles.elevations.any())
+
+    def test_smoothing_matches_dense(self):
+        loader = TerrainLoader()
+        _, profiles, profile_distances = _dense_profiles(n=60)
+        dense = loader.get_smoothed_profiles(profiles, profile_distances=profile_distances)
+        ragged = loader.get_smoothed_profiles(RaggedProfiles.from_dense(profiles, profile_distances))
+        np.testing.assert_allclose(ragged.elevations.reshape(profiles.shape), dense)
+
+
+class TestRaggedP1546(unittest.TestCase):
+    """ITU-R P.1546 con RaggedProfiles reproduce la ruta densa con las mismas muestras"""
+
+    def test_matches_dense_profiles(self):
+        warnings.simplefilter('ignore', UserWarning)
+        distances, profiles, profile_distances = _dense_profiles()
+        smoothed = profiles * 0.9 + 250.0
+        model = ITUR_P1546Model()
+        common = dict(distances=distances, frequency=900.0, tx_height=30.0,
+                      terrain_heights=profiles[:, -1], tx_elevation=2600.0)
+
+        dense = model.calculate_path_loss(
+            terrain_profiles=profiles, profile_distances=profile_distances,
+            smoothed_terrain_profiles=smoothed, **common
+        )
+        ragged = model.calculate_path_loss(
+            terrain_profiles=RaggedProfiles.from_dense(profiles, profile_distances),
+            smoothed_terrain_profiles=RaggedProfiles.from_dense(smoothed, profile_distances),
+            **common
+        )
+        np.testing.assert_allclose(ragged, dense, atol=1e-9)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,189 @@
+"""
+Tests para ResultStore (persistencia de resultados por proyecto)
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import tempfile
+import unittest
+import numpy as np
+
+from core.result_store import ResultStore
+from core.compute_engine import ComputeEngine
+from core.coverage_calculator import CoverageCalculator
+from models.antenna import Antenna
+from workers.simulation_worker import SimulationWorker
+
+
+def _coverage(lats, lons, value):
+    return {
+        'lats': lats,
+        'lons': lons,
+        'rsrp': np.full(lats.shape, value),
+        'path_loss': np.full(lats.shape, 100.0),
+        'antenna_gain': np.full(lats.shape, 2.0),
+        'antenna': {'id': 'x', 'frequency_mhz': 1800.0},
+        'image_url': 'data:image/png;base64,iVBORw0KGgo=',
+        'rsrp_vmin': np.float64(-120.0),
+        'rsrp_vmax': -60.0,
+        'bounds': [[float(lats.min()), float(lons.min())], [float(lats.max()), float(lons.max())]],
+    }
+
+
+class TestResultStore(unittest.TestCase):
+    """Test suite para ResultStore"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = ResultStore.for_project(Path(self.tmp.name) / 'demo.rfproj')
+        lats, lons = np.meshgrid(np.linspace(-2.9, -2.8, 6), np.linspace(-79.0, -78.9, 5))
+        self.lats, self.lons = lats, lons
+        self.grid_id = ResultStore.grid_hash(lats, lons)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_store_location(self):
+        self.assertEqual(self.store.root, Path(self.tmp.name) / 'demo.results')
+
+    def test_layer_key_ignores_cosmetic_fields(self):
+        antenna = Antenna(name='A', latitude=-2.85, longitude=-78.95)
+        key = self.store.layer_key(antenna, 'free_space', {'h': 1.5}, None, self.grid_id)
+
+        antenna.name = 'Renamed'
+        antenna.color = '#00FF00'
+        self.assertEqual(
+            key, self.store.layer_key(antenna, 'free_space', {'h': 1.5}, None, self.grid_id)
+        )
+
+        antenna.tx_power_dbm += 3
+        self.assertNotEqual(
+            key, self.store.layer_key(antenna, 'free_space', {'h': 1.5}, None, self.grid_id)
+        )
+        antenna.tx_power_dbm -= 3
+        self.assertNotEqual(
+            key, self.store.layer_key(antenna, 'free_space', {'h': 1.5},
+                                      {'path': 'dem.tif'}, self.grid_id)
+        )
+
+    def test_layer_roundtrip_is_memory_mapped(self):
+        coverage = _coverage(self.lats, self.lons, -80.0)
+        self.store.save_layer('k1', coverage)
+
+        self.assertTrue(self.store.has_layer('k1'))
+        loaded = self.store.load_layer('k1', self.lats, self.lons)
+        self.assertIsInstance(loaded['rsrp'], np.memmap)
+        np.testing.assert_array_equal(loaded['rsrp'], coverage['rsrp'])
+        self.assertEqual(loaded['image_url'], coverage['image_url'])
+        self.assertEqual(loaded['rsrp_vmin'], -120.0)
+        self.assertIs(loaded['lats'], self.lats)
+        self.assertIsNone(self.store.load_layer('missing'))
+
+    def test_run_roundtrip(self):
+        individual = {
+            'a': _coverage(self.lats, self.lons, -80.0),
+            'b': _coverage(self.lats, self.lons, -90.0),
+        }
+        aggregated = dict(_coverage(self.lats, self.lons, -80.0))
+        aggregated['best_server'] = np.zeros(self.lats.shape, dtype=np.uint16)
+        aggregated['best_server_ids'] = ['a', 'b']
+        results = {'individual': individual, 'aggregated': aggregated,
+                   'metadata': {'model_used': 'free_space'}}
+
+        self.store.save_run(results, {'a': 'key-a', 'b': 'key-b'})
+        restored = self.store.load_last_run()
+
+        self.assertEqual(set(restored['individual']), {'a', 'b'})
+        self.assertEqual(restored['metadata']['model_used'], 'free_space')
+        self.assertEqual(restored['aggregated']['best_server'].dtype, np.uint16)
+        self.assertEqual(restored['aggregated']['best_server_ids'], ['a', 'b'])
+        np.testing.assert_array_equal(restored['aggregated']['lats'], self.lats)
+
+        # Resultados restaurados no se vuelven a escribir
+        self.assertTrue(self.store.is_last_run(restored))
+        run_id = restored['metadata']['stored_run']['run_id']
+        self.store.save_run(restored)
+        self.assertEqual(self.store.load_last_run()['metadata']['stored_run']['run_id'], run_id)
+
+    def test_single_antenna_aggregated_alias(self):
+        coverage = _coverage(self.lats, self.lons, -80.0)
+        self.store.save_run({'individual': {'a': coverage}, 'aggregated': coverage})
+        restored = self.store.load_last_run()
+        self.assertIs(restored['aggregated'], restored['individual']['a'])
+
+    def test_no_index_returns_none(self):
+        self.assertIsNone(self.store.load_last_run())
+
+    def test_save_run_prunes_unreferenced_entries(self):
+        def save(store, keys, lats=self.lats, lons=self.lons):
+            individual = {ant_id: _coverage(lats, lons, -80.0) for ant_id in keys}
+            aggregated = dict(_coverage(lats, lons, -80.0))
+            store.save_run({'individual': individual, 'aggregated': aggregated}, keys)
+            return store._read_index()['last_run']['run_id']
+
+        root = self.store.root
+        save(self.store, {'a': 'key-a', 'b': 'key-b', 'c': None})
+        other_lats, other_lons = self.lats + 0.5, self.lons
+        run_id = save(self.store, {'a': 'key-a'}, other_lats, other_lons)
+
+        listing = lambda folder: sorted(p.name for p in (root / folder).iterdir())
+        # Las capas 'run_*' y los agregados/grids anteriores se borran...
+        self.assertEqual(listing('layers'), ['key-a', 'key-b'])
+        self.assertEqual(listing('runs'), [run_id])
+        self.assertEqual(listing('grids'), [ResultStore.grid_hash(other_lats, other_lons)])
+        # ...y las capas por contenido no referenciadas quedan como caché
+        self.assertIsNotNone(self.store.load_layer('key-b'))
+
+        capped = ResultStore(root, max_cache_bytes=0)
+        save(capped, {'a': 'key-a'})
+        self.assertEqual(listing('layers'), ['key-a'])
+        self.assertIsNotNone(capped.load_last_run())
+
+
+class TestWorkerLayerReuse(unittest.TestCase):
+    """La segunda corrida reutiliza las capas sin cambios"""
+
+    def test_rerun_reuses_unchanged_layers(self):
+        antennas = [
+            Antenna(name='A', latitude=-2.90, longitude=-79.00),
+            Antenna(name='B', latitude=-2.89, longitude=-78.99),
+        ]
+        config = {'model': 'free_space', 'radius_km': 1, 'resolution': 20}
+        calculator = CoverageCalculator(ComputeEngine(use_gpu=False))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            store = ResultStore(Path(tmp) / 'p.results')
+
+            def run():
+                out = {}
+                worker = SimulationWorker(antennas, calculator, None, dict(config),
+                                          result_store=store)
+                worker.terrain_loader = None
+                worker.finished.connect(out.update)
+                worker.run()
+                return out
+
+            first = run()
+            self.assertEqual(first['metadata']['reused_layers'], 0)
+
+            second = run()
+            self.assertEqual(second['metadata']['reused_layers'], 2)
+            np.testing.assert_array_equal(second['aggregated']['rsrp'], first['aggregated']['rsrp'])
+
+            antennas[1].tx_power_dbm += 3
+            third = run()
+            self.assertEqual(third['metadata']['reused_layers'], 1)
+
+            restored = store.load_last_run()
+            np.testing.assert_array_equal(restored['aggregated']['rsrp'], third['aggregated']['rsrp'])
+
+            # Opciones de post-proceso del agregado no invalidan las capas
+            config.update(coverage_probability=True, shadow_sigma_db=6.0)
+            fourth = run()
+            self.assertEqual(fourth['metadata']['reused_layers'], 2)
+            self.assertIn('coverage_probability', fourth['aggregated'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
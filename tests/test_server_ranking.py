@@ -0,0 +1,102 @@
+"""
+Tests para TopKServerReducer (ranking de servidores en streaming)
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import unittest
+import numpy as np
+from core.server_ranking import TopKServerReducer
+
+
+class TestTopKServerReducer(unittest.TestCase):
+    """Test suite para TopKServerReducer"""
+
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.shape = (23, 17)
+        self.layers = [rng.uniform(-120, -60, size=self.shape) for _ in range(7)]
+        self.stack = np.stack(self.layers)
+
+    def _reduce(self, k=4, window=6.0, **kwargs):
+        reducer = TopKServerReducer(self.shape, k=k, pollution_window_db=window, **kwargs)
+        for i, layer in enumerate(self.layers):
+            reducer.update(i, layer)
+        return reducer.finalize()
+
+    def test_matches_stack_argmax(self):
+        """Best server y RSRP coinciden con argmax/max sobre el stack"""
+        result = self._reduce()
+        np.testing.assert_array_equal(result['best_index'], np.argmax(self.stack, axis=0))
+        np.testing.assert_array_equal(result['best_rsrp'], np.max(self.stack, axis=0))
+
+    def test_second_server_and_margin(self):
+        """Segundo servidor y margen de handover coinciden con el ordenamiento"""
+        result = self._reduce()
+        order = np.argsort(-self.stack, axis=0)
+        second = np.take_along_axis(self.stack, order[1:2], axis=0)[0]
+
+        np.testing.assert_array_equal(result['second_index'], order[1])
+        np.testing.assert_array_equal(result['second_rsrp'], second)
+        np.testing.assert_allclose(result['handover_margin'],
+                                   np.max(self.stack, axis=0) - second)
+
+    def test_pilot_pollution_count(self):
+        """Conteo de servidores dentro de la ventana, saturado en K"""
+        result = self._reduce(k=3, window=10.0)
+        best = np.max(self.stack, axis=0)
+        expected = np.minimum((self.stack >= best - 10.0).sum(axis=0), 3)
+        np.testing.assert_array_equal(result['server_count'], expected)
+        self.assertEqual(result['server_count'].dtype, np.uint8)
+
+    def test_tracked_metrics_follow_best_server(self):
+        """Las métricas auxiliares corresponden al mejor servidor"""
+        reducer = TopKServerReducer(self.shape, k=2, track=('path_loss',))
+        for i, layer in enumerate(self.layers):
+            reducer.update(i, layer, tracked={'path_loss': -layer + i})
+        result = reducer.finalize()
+
+        best = np.argmax(self.stack, axis=0)
+        expected = np.take_along_axis(-self.stack, best[None], axis=0)[0] + best
+        np.testing.assert_allclose(result['path_loss'], expected)
+
+    def test_ties_keep_first_antenna(self):
+        """Ante empate gana la antena anterior (igual que argmax)"""
+        reducer = TopKServerReducer((2, 2), k=2)
+        reducer.update(0, np.full((2, 2), -80.0))
+        reducer.update(1, np.full((2, 2), -80.0))
+        result = reducer.finalize()
+        self.assertTrue(np.all(result['best_index'] == 0))
+        self.assertTrue(np.all(result['second_index'] == 1))
+        self.assertTrue(np.all(result['handover_margin'] == 0.0))
+
+    def test_single_layer_and_nan(self):
+        """Sin segundo servidor el margen es infinito; NaN no sirve"""
+        layer = np.full((3, 3), -90.0)
+        layer[0, 0] = np.nan
+        reducer = TopKServerReducer((3, 3), k=2)
+        reducer.update(0, layer)
+        result = reducer.finalize()
+
+        self.assertEqual(result['best_index'][0, 0], -1)
+        self.assertTrue(np.isnan(result['best_rsrp'][0, 0]))
+        self.assertEqual(result['server_count'][0, 0], 0)
+        self.assertTrue(np.all(np.isinf(result['handover_margin'])))
+        self.assertTrue(np.all(result['second_index'] == -1))
+
+    def test_current_best_tracks_partial_state(self):
+        """current_best refleja el máximo de las capas incorporadas hasta ahora"""
+        reducer = TopKServerReducer(self.shape, k=2)
+        self.assertTrue(np.isnan(reducer.current_best()).all())
+        for i, layer in enumerate(self.layers[:3]):
+            reducer.update(i, layer)
+        np.testing.assert_array_equal(reducer.current_best(), self.stack[:3].max(axis=0))
+
+    def test_invalid_k(self):
+        with self.assertRaises(ValueError):
+            TopKServerReducer((2, 2), k=1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
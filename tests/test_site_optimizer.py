@@ -0,0 +1,138 @@
+"""
+Tests para CandidateLayerStore y SiteOptimizer (planificación de sitios)
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import tempfile
+import unittest
+
+import numpy as np
+
+from core.compute_engine import ComputeEngine
+from core.coverage_calculator import CoverageCalculator
+from core.footprint import FootprintCuller
+from core.site_optimizer import CandidateLayerStore, SiteOptimizer
+from core.models.gpp_3gpp.three_gpp_38901 import ThreGPP38901Model
+from core.models.traditional.okumura_hata import OkumuraHataModel
+from models.antenna import Antenna
+
+
+class TestSiteOptimizer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.calculator = CoverageCalculator(ComputeEngine(use_gpu=False))
+        cls.model = OkumuraHataModel()
+        cls.lats, cls.lons = np.meshgrid(np.linspace(-3.0, -2.8, 60),
+                                         np.linspace(-79.1, -78.9, 60), indexing='ij')
+        rng = np.random.default_rng(0)
+        cls.candidates = []
+        for i in range(8):
+            lat, lon = rng.uniform(-3.0, -2.8), rng.uniform(-79.1, -78.9)
+            for height in (20.0, 40.0):  # Dos configuraciones por ubicación
+                cls.candidates.append(Antenna(name=f"C{i}_{height:.0f}", latitude=lat, longitude=lon,
+                                              height_agl=height, frequency_mhz=900.0,
+                                              tx_power_dbm=30.0, gain_dbi=2.0))
+        cls.fixed = [Antenna(name="F0", latitude=-2.9, longitude=-79.0, frequency_mhz=900.0,
+                             tx_power_dbm=30.0, gain_dbi=2.0)]
+        cls.folder = tempfile.TemporaryDirectory()
+        cls.store = cls._build(CandidateLayerStore(cls.folder.name))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.folder.cleanup()
+
+    @classmethod
+    def _build(cls, store):
+        return store.build(cls.candidates, cls.lats, cls.lons, np.zeros(cls.lats.shape),
+                           cls.calculator, cls.model, fixed=cls.fixed, floor_dbm=-110.0)
+
+    def _optimizer(self, selection=(), **kwargs):
+        params = dict(rsrp_threshold_dbm=-85.0, sinr_threshold_db=3.0,
+                      coverage_weight=1.0, sinr_weight=1.0, k=3, seed=1)
+        params.update(kwargs)
+        optimizer = SiteOptimizer(self.store, **params)
+        optimizer.reset(selection)
+        return optimizer
+
+    def test_store_keeps_footprint_and_is_reused(self):
+        self.assertEqual(len(self.store), 17)
+        self.assertTrue(self.store.meta['candidates'][0]['fixed'])
+
+        dense = self.calculator.calculate_single_antenna_coverage(
+            self.candidates[3], self.lats, self.lons, np.zeros(self.lats.shape), self.model
+        ).reshape(-1)
+        pixels, rsrp = self.store.footprint(4)  # Índice 0 es la antena fija
+        np.testing.assert_array_equal(pixels, np.flatnonzero(dense >= -110.0))
+        np.testing.assert_allclose(rsrp, dense[pixels], atol=1e-4)
+        self.assertIsInstance(self.store.rsrp, np.memmap)
+
+        stamp = (Path(self.folder.name) / 'rsrp.npy').stat().st_mtime_ns
+        reopened = self._build(CandidateLayerStore(self.folder.name))
+        self.assertEqual((Path(self.folder.name) / 'rsrp.npy').stat().st_mtime_ns, stamp)
+        self.assertEqual(reopened.meta['key'], self.store.meta['key'])
+
+    def test_store_key_includes_model_config_and_calculator_state(self):
+        candidates = self.candidates[:2]
+        with tempfile.TemporaryDirectory() as folder:
+            def build(model, culler=None):
+                calculator = CoverageCalculator(ComputeEngine(use_gpu=False))
+                calculator.footprint_culler = culler
+                store = CandidateLayerStore(folder).build(
+                    candidates, self.lats, self.lons, np.zeros(self.lats.shape),
+                    calculator, model, floor_dbm=-200.0
+                )
+                return store.meta['key'], np.array(store.rsrp)
+
+            uma_key, _ = build(ThreGPP38901Model({'scenario': 'UMa'}))
+            rma_key, rma = build(ThreGPP38901Model({'scenario': 'RMa'}))
+            self.assertNotEqual(rma_key, uma_key)
+
+            fresh = np.concatenate([
+                self.calculator.calculate_single_antenna_coverage(
+                    antenna, self.lats, self.lons, np.zeros(self.lats.shape),
+                    ThreGPP38901Model({'scenario': 'RMa'})
+                ).reshape(-1) for antenna in candidates
+            ])
+            np.testing.assert_allclose(rma, fresh, atol=1e-3)
+
+            culled_key, _ = build(ThreGPP38901Model({'scenario': 'RMa'}), FootprintCuller(floor_dbm=-200.0))
+            self.assertNotEqual(culled_key, rma_key)
+
+    def test_delta_matches_full_evaluation(self):
+        selection = [1, 4, 8]
+        optimizer = self._optimizer(selection)
+        base = optimizer.score()['score']
+
+        for remove, add in (([], [11]), ([4], []), ([4], [12]), ([1, 8], [14])):
+            expected = self._optimizer(
+                [i for i in selection if i not in remove] + add).score()['score'] - base
+            self.assertAlmostEqual(optimizer.delta(remove, add), expected, places=9)
+
+    def test_greedy_one_configuration_per_location(self):
+        optimizer = self._optimizer()
+        result = optimizer.greedy(4)
+        self.assertEqual(len(result['selected']), 4)
+
+        chosen = [i for i in optimizer.selected if i not in optimizer.fixed]
+        locations = [optimizer.locations[i] for i in chosen]
+        self.assertEqual(len(set(locations)), len(locations))
+        self.assertTrue(all(np.diff(result['history']) > 0))
+        self.assertGreater(result['score'], result['history'][0])
+
+    def test_annealing_state_stays_consistent(self):
+        greedy = self._optimizer().greedy(4)
+        optimizer = self._optimizer()
+        result = optimizer.anneal(4, iterations=150)
+        self.assertGreaterEqual(result['score'], greedy['score'] - 1e-12)
+
+        rebuilt = self._optimizer(optimizer.selected)
+        np.testing.assert_array_equal(rebuilt.top_values, optimizer.top_values)
+        np.testing.assert_array_equal(rebuilt.top_indices, optimizer.top_indices)
+        self.assertAlmostEqual(rebuilt.score()['score'], result['score'], places=9)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
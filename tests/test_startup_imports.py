@@ -0,0 +1,91 @@
+"""
+Tests de arranque: presupuesto de importación (-X importtime) de la ruta headless
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import os
+import subprocess
+import unittest
+
+from utils.gpu_detector import GPUDetector
+
+
+SRC_DIR = Path(__file__).parent.parent / 'src'
+
+# Ruta de simulación sin interfaz: worker, motor de cálculo, modelos, exportación
+HEADLESS_MODULES = [
+    'workers.simulation_worker',
+    'core.coverage_calculator',
+    'core.compute_engine',
+    'core.terrain_loader',
+    'core.result_store',
+    'utils.export_manager',
+    'utils.heatmap_generator',
+    'core.models.traditional.okumura_hata',
+    'core.models.traditional.cost231',
+    'core.models.traditional.itu_r_p1546',
+    'core.models.gpp_3gpp.three_gpp_38901',
+]
+
+# Dependencias pesadas que solo se cargan en el primer uso
+LAZY_PACKAGES = ('matplotlib', 'PyQt6.QtWebEngine', 'pyproj', 'scipy', 'rasterio', 'cupy', 'numba')
+
+# Tiempo acumulado máximo de importación de la ruta headless [s]. Depende de la
+# máquina, así que solo se verifica con RUN_IMPORT_BENCHMARK=1
+HEADLESS_IMPORT_BUDGET_S = 1.0
+
+
+def _import_times(modules):
+    """{módulo: tiempo acumulado [s]} medido con python -X importtime en un proceso limpio"""
+    code = 'import ' + ', '.join(modules)
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=SRC_DIR, capture_output=True, text=True, timeout=120
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr[-2000:])
+
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = (int(cumulative), not name.startswith('  '))
+    return times
+
+
+class TestStartupImports(unittest.TestCase):
+    """Test suite para el arranque en frío"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.times = _import_times(HEADLESS_MODULES)
+
+    def test_heavy_dependencies_are_lazy(self):
+        loaded = [name for name in self.times
+                  if any(name == pkg or name.startswith(pkg + '.') for pkg in LAZY_PACKAGES)]
+        self.assertEqual(loaded, [])
+
+    @unittest.skipUnless(os.environ.get('RUN_IMPORT_BENCHMARK'), "benchmark opcional (RUN_IMPORT_BENCHMARK=1)")
+    def test_headless_import_budget(self):
+        total_us = sum(us for us, top_level in self.times.values() if top_level)
+        self.assertLess(total_us / 1e6, HEADLESS_IMPORT_BUDGET_S)
+
+
+class TestBackgroundGPUProbe(unittest.TestCase):
+    """GPUDetector(background=True) no bloquea y los atributos esperan al resultado"""
+
+    def test_background_detection_matches_blocking(self):
+        background = GPUDetector(background=True)
+        self.assertTrue(background.wait(timeout=60))
+        self.assertTrue(background.is_ready())
+
+        blocking = GPUDetector()
+        self.assertEqual(background.cupy_available, blocking.cupy_available)
+        self.assertEqual(background.get_device_info_string(), blocking.get_device_info_string())
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
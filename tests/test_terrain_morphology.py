@@ -0,0 +1,116 @@
+"""
+Tests para TerrainMorphology y su uso en ClutterModel / ITU-R P.1546 / COST-231 WI
+"""
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+import unittest
+import warnings
+
+import numpy as np
+
+from core.terrain_morphology import TerrainMorphology
+from core.models.traditional.clutter_model import ClutterModel
+from core.models.traditional.itu_r_p1546 import ITUR_P1546Model
+from core.models.traditional.cost231 import COST231WalfischIkegamiModel
+
+
+def _terrain(shape=(40, 50), seed=0):
+    """DEM sintético con relieve variable y algunos píxeles NoData"""
+    rng = np.random.default_rng(seed)
+    rows, cols = np.indices(shape)
+    z = 2500.0 + 40.0 * np.sin(rows / 4.0) * np.cos(cols / 7.0) + rng.normal(0.0, 5.0, shape)
+    z[0, 0] = -9999.0
+    return z
+
+
+class TestMorphologyRasters(unittest.TestCase):
+    """Las capas equivalen a recorrer cada ventana por separado"""
+
+    def setUp(self):
+        self.z = _terrain()
+        # Píxel de 100 m: ventana de clutter 500 m → 5 px, rugosidad 300 m → 3 px
+        self.morphology = TerrainMorphology(self.z, (100.0, 100.0),
+                                            clutter_window_m=500.0, roughness_window_m=300.0)
+
+    def _window(self, z, r, c, half):
+        padded = np.pad(z, half, mode='edge')
+        return padded[r:r + 2 * half + 1, c:c + 2 * half + 1]
+
+    def test_layers_match_brute_force_windows(self):
+        valid = (self.z >= 0) & (self.z < 10000)
+        z = np.where(valid, self.z, self.z[valid].mean())
+        layers = self.morphology.layers
+        for r, c in [(0, 0), (5, 7), (20, 25), (39, 49)]:
+            window = self._window(z, r, c, 2)
+            self.assertAlmostEqual(layers['local_range'][r, c], window.max() - window.min(), places=3)
+            window = self._window(z, r, c, 1)
+            self.assertAlmostEqual(layers['local_std'][r, c], window.std(), places=2)
+
+    def test_clutter_class_thresholds(self):
+        local_range = self.morphology.layers['local_range']
+        codes = self.morphology.layers['clutter_class']
+        expected = np.where(local_range > 50.0, 2, np.where(local_range > 20.0, 1, 0))
+        np.testing.assert_array_equal(codes, expected)
+
+    def test_building_height_matches_cost231_proxy(self):
+        # Misma relación σ → h_b que la estimación por perfil de COST-231 WI
+        model = COST231WalfischIkegamiModel()
+        window = self._window(self.z, 20, 25, 1).reshape(1, -1)
+        expected = model._estimate_building_height_local(window)[0]
+        self.assertAlmostEqual(float(self.morphology.layers['building_height'][20, 25]),
+                               float(expected), places=3)
+
+    def test_sample_outside_raster_uses_defaults(self):
+        rows = np.array([3, -1, 10])
+        cols = np.array([4, 2, 99])
+        inside = np.array([True, False, False])
+        sampled = self.morphology.sample(rows, cols, inside, ('clutter_class', 'building_height'))
+        self.assertEqual(sampled['clutter_class'][0], self.morphology.layers['clutter_class'][3, 4])
+        np.testing.assert_array_equal(sampled['clutter_class'][1:], 1)
+        np.testing.assert_array_equal(sampled['building_height'][1:], 15.0)
+
+
+class TestMorphologyInModels(unittest.TestCase):
+    """Los modelos usan las capas muestreadas por receptor"""
+
+    def setUp(self):
+        warnings.simplefilter('ignore', UserWarning)
+        self.distances_m = np.linspace(300.0, 20000.0, 12)
+
+    def test_auto_clutter_uses_per_receptor_class(self):
+        clutter = ClutterModel()
+        codes = np.array([0, 1, 2] * 4)
+        auto = clutter.calculate_clutter_correction_vectorized(
+            None, None, distances_m=self.distances_m, h_rx_agl=1.5, environment='Auto',
+            frequency_mhz=900.0, clutter_class=codes
+        )
+        for code, env in enumerate(TerrainMorphology.CLUTTER_CLASSES):
+            fixed = clutter.calculate_clutter_correction_vectorized(
+                None, None, distances_m=self.distances_m, h_rx_agl=1.5, environment=env,
+                frequency_mhz=900.0
+            )
+            np.testing.assert_allclose(auto[codes == code], fixed[codes == code])
+
+    def test_p1546_reuses_clutter_model(self):
+        model = ITUR_P1546Model()
+        clutter = model.clutter_model
+        common = dict(distances=self.distances_m, frequency=900.0, tx_height=30.0,
+                      terrain_heights=np.zeros(12), environment='Auto')
+        uniform = model.calculate_path_loss(clutter_class=np.full(12, 2), **common)
+        urban = model.calculate_path_loss(**dict(common, environment='Urban'))
+        self.assertIs(model.clutter_model, clutter)
+        np.testing.assert_allclose(uniform, urban)
+
+    def test_cost231_building_height_map(self):
+        model = COST231WalfischIkegamiModel()
+        common = dict(distances=self.distances_m, frequency=900.0, tx_height=30.0,
+                      terrain_heights=np.zeros(12))
+        constant = model.calculate_path_loss(building_height=20.0, **common)
+        mapped = model.calculate_path_loss(building_height_map=np.full(12, 20.0), **common)
+        np.testing.assert_allclose(mapped['path_loss'], constant['path_loss'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)